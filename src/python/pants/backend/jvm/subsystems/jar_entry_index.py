@@ -0,0 +1,89 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import logging
+import os
+
+from pants.base.hash_utils import hash_file
+from pants.subsystem.subsystem import Subsystem
+from pants.util.dirutil import safe_concurrent_creation
+from pants.util.ziputil import read_zip_names
+
+
+logger = logging.getLogger(__name__)
+
+
+class JarEntryIndex(Subsystem):
+  """A persistent index of the names of the entries of jars, keyed by the digests of the jars.
+
+  The entries of a jar are read from its central directory the first time the jar is seen (by any
+  run), and recorded under its digest: later lookups of the same jar content, at any path, read
+  only the recorded names. Digests are computed via `hash_file`, and so are served by the file
+  digest cache for unchanged jars.
+
+  Lookups are also memoized for the lifetime of the run, by the path and stat info of the jar.
+  """
+
+  options_scope = 'jar-entry-index'
+
+  VERSION = 1
+
+  # Separates the names in a recorded index entry: it may not appear in the name of a zip entry.
+  _SEPARATOR = '\0'
+
+  @classmethod
+  def register_options(cls, register):
+    super(JarEntryIndex, cls).register_options(register)
+    register('--enabled', advanced=True, type=bool, default=True,
+             help='Record the entry names of jars by their digests, so that each distinct jar is '
+                  'only scanned once.')
+    register('--dir', advanced=True,
+             default=os.path.join(register.bootstrap.pants_bootstrapdir, 'jar_entries'),
+             help='The directory to record the entry names of jars in.')
+
+  def __init__(self, *args, **kwargs):
+    super(JarEntryIndex, self).__init__(*args, **kwargs)
+    # A map from (path, stat key) to a tuple of entry names. Assignments to a dict are atomic, so
+    # concurrent lookups of the same jar at worst read it twice.
+    self._memo = {}
+
+  def entries(self, jar_path, persist=True):
+    """Return a tuple of the names of the entries of the given jar, in the order it lists them.
+
+    :param str jar_path: The path of the jar.
+    :param bool persist: False to skip recording the entries of the jar by its digest: appropriate
+                         for jars that are frequently rewritten, such as those of compile outputs.
+    :rtype: tuple of string
+    """
+    stat = os.stat(jar_path)
+    key = (jar_path, stat.st_size, stat.st_mtime, stat.st_ino)
+    names = self._memo.get(key)
+    if names is None:
+      if persist and self.get_options().enabled:
+        names = self._read_recorded(jar_path)
+      else:
+        names = tuple(read_zip_names(jar_path))
+      self._memo[key] = names
+    return names
+
+  def _read_recorded(self, jar_path):
+    path = os.path.join(self.get_options().dir, 'v{}'.format(self.VERSION), hash_file(jar_path))
+    try:
+      with open(path, 'rb') as fp:
+        content = fp.read().decode('utf-8')
+      return tuple(content.split(self._SEPARATOR)) if content else ()
+    except IOError:
+      pass  # Not yet recorded.
+
+    names = tuple(read_zip_names(jar_path))
+    try:
+      with safe_concurrent_creation(path) as tmp_path:
+        with open(tmp_path, 'wb') as fp:
+          fp.write(self._SEPARATOR.join(names).encode('utf-8'))
+    except (IOError, OSError) as e:
+      logger.warn('Failed to record the entries of {} in {}: {}'.format(jar_path, path, e))
+    return names
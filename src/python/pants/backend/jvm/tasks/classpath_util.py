@@ -118,34 +118,41 @@ class ClasspathUtil(object):
       yield entry
 
   @classmethod
-  def classpath_contents(cls, targets, classpath_products, confs=('default',)):
+  def classpath_contents(cls, targets, classpath_products, confs=('default',),
+                         jar_entry_index=None):
     """Provide a generator over the contents (classes/resources) of a classpath.
 
     :param targets: Targets to iterate the contents classpath for.
     :param ClasspathProducts classpath_products: Product containing classpath elements.
     :param confs: The list of confs for use by this classpath.
+    :param jar_entry_index: An optional JarEntryIndex to list the contents of jars with.
     :returns: An iterator over all classpath contents, one directory, class or resource relative
               path per iteration step.
     :rtype: :class:`collections.Iterator` of string
     """
     classpath_iter = cls._classpath_iter(targets, classpath_products, confs=confs)
-    for f in cls.classpath_entries_contents(classpath_iter):
+    for f in cls.classpath_entries_contents(classpath_iter, jar_entry_index=jar_entry_index):
       yield f
 
   @classmethod
-  def classpath_entries_contents(cls, classpath_entries):
+  def classpath_entries_contents(cls, classpath_entries, jar_entry_index=None):
     """Provide a generator over the contents (classes/resources) of a classpath.
 
     Subdirectories are included and differentiated via a trailing forward slash (for symmetry
     across ZipFile.namelist and directory walks).
 
     :param classpath_entries: A sequence of classpath_entries. Non-jars/dirs are ignored.
+    :param jar_entry_index: An optional JarEntryIndex to list the contents of jars with.
     :returns: An iterator over all classpath contents, one directory, class or resource relative
               path per iteration step.
     :rtype: :class:`collections.Iterator` of string
     """
     for entry in classpath_entries:
       if cls.is_jar(entry):
+        if jar_entry_index is not None:
+          for name in jar_entry_index.entries(entry):
+            yield name
+          continue
         # Walk the jar namelist.
         with open_zip(entry, mode='r') as jar:
           for name in jar.namelist():
@@ -9,6 +9,7 @@ import os
 import re
 from collections import defaultdict
 
+from pants.backend.jvm.subsystems.jar_entry_index import JarEntryIndex
 from pants.backend.jvm.tasks.classpath_util import ClasspathUtil
 from pants.backend.jvm.tasks.jvm_binary_task import JvmBinaryTask
 from pants.base.exceptions import TaskError
@@ -29,6 +30,10 @@ class DuplicateDetector(JvmBinaryTask):
   def _isdir(name):
     return name[-1] == '/'
 
+  @classmethod
+  def subsystem_dependencies(cls):
+    return super(DuplicateDetector, cls).subsystem_dependencies() + (JarEntryIndex,)
+
   @classmethod
   def register_options(cls, register):
     super(DuplicateDetector, cls).register_options(register)
@@ -49,6 +54,10 @@ class DuplicateDetector(JvmBinaryTask):
     super(DuplicateDetector, cls).prepare(options, round_manager)
     round_manager.require_data('runtime_classpath')
 
+  @memoized_property
+  def _jar_entry_index(self):
+    return JarEntryIndex.global_instance()
+
   @memoized_property
   def max_dups(self):
     return int(self.get_options().max_dups)
@@ -110,7 +119,8 @@ class DuplicateDetector(JvmBinaryTask):
     # no external JarLibrary products.
     def record_file_ownership(target):
       entries = ClasspathUtil.internal_classpath([target], classpath_products)
-      for f in ClasspathUtil.classpath_entries_contents(entries):
+      for f in ClasspathUtil.classpath_entries_contents(entries,
+                                                        jar_entry_index=self._jar_entry_index):
         artifacts_by_file_name[f].add(target.address.reference())
 
     binary_target.walk(record_file_ownership)
@@ -120,7 +130,8 @@ class DuplicateDetector(JvmBinaryTask):
     artifacts_by_file_name = defaultdict(set)
     for external_dep, coordinate in self.list_external_jar_dependencies(binary_target):
       self.context.log.debug('  scanning {} from {}'.format(coordinate, external_dep))
-      for qualified_file_name in ClasspathUtil.classpath_entries_contents([external_dep]):
+      for qualified_file_name in ClasspathUtil.classpath_entries_contents(
+          [external_dep], jar_entry_index=self._jar_entry_index):
         artifacts_by_file_name[qualified_file_name].add(coordinate.artifact_filename)
     return artifacts_by_file_name
 
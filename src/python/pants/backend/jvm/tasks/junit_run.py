@@ -12,6 +12,7 @@ import os
 import shutil
 import sys
 from abc import abstractmethod
+from collections import defaultdict
 from contextlib import contextmanager
 
 from six.moves import range
@@ -23,6 +24,7 @@ from pants.backend.jvm.subsystems.jvm_platform import JvmPlatform
 from pants.backend.jvm.targets.junit_tests import JUnitTests
 from pants.backend.jvm.targets.jvm_target import JvmTarget
 from pants.backend.jvm.tasks.classpath_util import ClasspathUtil
+from pants.backend.jvm.tasks.coverage.engine import NoCoverage
 from pants.backend.jvm.tasks.coverage.manager import CodeCoverage
 from pants.backend.jvm.tasks.jvm_task import JvmTask
 from pants.backend.jvm.tasks.jvm_tool_task_mixin import JvmToolTaskMixin
@@ -30,13 +32,16 @@ from pants.backend.jvm.tasks.reports.junit_html_report import JUnitHtmlReport, N
 from pants.base.build_environment import get_buildroot
 from pants.base.deprecated import deprecated_conditional
 from pants.base.exceptions import TargetDefinitionException, TaskError
+from pants.base.hash_utils import hash_file
+from pants.base.worker_pool import Work, WorkerPool
 from pants.base.workunit import WorkUnitLabel
 from pants.build_graph.files import Files
 from pants.build_graph.target import Target
 from pants.build_graph.target_scopes import Scopes
 from pants.java.distribution.distribution import DistributionLocator
 from pants.java.executor import SubprocessExecutor
-from pants.java.junit.junit_xml_parser import RegistryOfTests, Test, parse_failed_targets
+from pants.java.junit.junit_xml_parser import (RegistryOfTests, Test, parse_failed_targets,
+                                               parse_test_durations)
 from pants.process.lock import OwnerPrintingInterProcessFileLock
 from pants.task.testrunner_task_mixin import PartitionedTestRunnerTaskMixin, TestResult
 from pants.util import desktop
@@ -46,6 +51,7 @@ from pants.util.dirutil import safe_delete, safe_mkdir, safe_mkdir_for, safe_rmt
 from pants.util.memo import memoized_method
 from pants.util.meta import AbstractClass
 from pants.util.strutil import pluralize
+from pants.util.xml_parser import XmlParser
 
 
 class _TestSpecification(AbstractClass):
@@ -147,6 +153,10 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
 
     register('--batch-size', advanced=True, type=int, default=cls._BATCH_ALL, fingerprint=True,
              help='Run at most this many tests in a single test process.')
+    register('--parallel-shards', advanced=True, type=int, default=0, fingerprint=True,
+             help='Split the test classes that can share a test process into at most this many '
+                  'shards, balanced by the durations of the classes in previous runs, and run the '
+                  'shards concurrently. 0 or 1 runs tests in a single process (see --batch-size).')
     register('--test', type=list, fingerprint=True,
              help='Force running of just these tests.  Tests can be specified using any of: '
                   '[classname], [classname]#[methodname], [filename] or [filename]#[methodname]')
@@ -215,6 +225,11 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     if cls.request_classes_by_source(options.test or ()):
       round_manager.require_data('classes_by_source')
 
+    # The results of test classes are keyed by the sources that they depend on.
+    if options.result_cache:
+      round_manager.require_data('classes_by_source')
+      round_manager.require_data('product_deps_by_src')
+
   class OptionError(TaskError):
     """Indicates an invalid combination of options for this task."""
 
@@ -224,6 +239,11 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     options = self.get_options()
     self._tests_to_run = options.test
     self._batch_size = options.batch_size
+    self._parallel_shards = options.parallel_shards
+
+    if self._sharded and self._batched:
+      raise self.OptionError('Cannot set both `batch_size` ({}) and `parallel_shards` ({}) at the '
+                             'same time.'.format(self._batch_size, self._parallel_shards))
 
     if options.cwd and self.run_tests_in_chroot:
       raise self.OptionError('Cannot set both `cwd` ({}) and ask for a `chroot` at the same time.'
@@ -391,11 +411,25 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
   def _batched(self):
     return self._batch_size != self._BATCH_ALL
 
+  @property
+  def _sharded(self):
+    return self._parallel_shards > 1
+
   def run_tests(self, fail_fast, test_targets, output_dir, coverage):
     test_registry = self._collect_test_targets(test_targets)
     if test_registry.empty:
       return TestResult.rc(0)
 
+    result_keys = {}
+    # Coverage is only collected for the tests that run, and shards are selected from all of the
+    # tests that run, so recorded results are not used with either.
+    if (self.test_result_cache is not None and isinstance(coverage, NoCoverage) and
+        not self.get_options().test_shard):
+      result_keys = self._test_result_keys(test_registry)
+      test_registry = self._skip_recorded_tests(test_registry, result_keys, output_dir)
+      if test_registry.empty:
+        return TestResult.rc(0)
+
     coverage.instrument(output_dir)
 
     def parse_error_handler(parse_error):
@@ -408,81 +442,26 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     # back to runtime_classpath
     classpath_product = self.context.products.get_data('instrument_classpath')
 
-    result = 0
-    for batch_id, (properties, batch) in enumerate(self._iter_batches(test_registry)):
-      (workdir, platform, target_jvm_options, target_env_vars, concurrency, threads) = properties
-
-      batch_output_dir = output_dir
-      if self._batched:
-        batch_output_dir = os.path.join(batch_output_dir, 'batch-{}'.format(batch_id))
-
-      run_modifications = coverage.run_modifications(batch_output_dir)
-
-      extra_jvm_options = run_modifications.extra_jvm_options
-
-      # Batches of test classes will likely exist within the same targets: dedupe them.
-      relevant_targets = {test_registry.get_owning_target(t) for t in batch}
-
-      complete_classpath = OrderedSet()
-      complete_classpath.update(run_modifications.classpath_prepend)
-      complete_classpath.update(JUnit.global_instance().runner_classpath(self.context))
-      complete_classpath.update(self.classpath(relevant_targets,
-                                               classpath_product=classpath_product))
-
-      distribution = JvmPlatform.preferred_jvm_distribution([platform], self._strict_jvm_version)
-
-      # Override cmdline args with values from junit_test() target that specify concurrency:
-      args = self._args(fail_fast, batch_output_dir) + [u'-xmlreport']
-
-      if concurrency is not None:
-        args = remove_arg(args, '-default-parallel')
-        if concurrency == JUnitTests.CONCURRENCY_SERIAL:
-          args = ensure_arg(args, '-default-concurrency', param='SERIAL')
-        elif concurrency == JUnitTests.CONCURRENCY_PARALLEL_CLASSES:
-          args = ensure_arg(args, '-default-concurrency', param='PARALLEL_CLASSES')
-        elif concurrency == JUnitTests.CONCURRENCY_PARALLEL_METHODS:
-          args = ensure_arg(args, '-default-concurrency', param='PARALLEL_METHODS')
-        elif concurrency == JUnitTests.CONCURRENCY_PARALLEL_CLASSES_AND_METHODS:
-          args = ensure_arg(args, '-default-concurrency', param='PARALLEL_CLASSES_AND_METHODS')
-
-      if threads is not None:
-        args = remove_arg(args, '-parallel-threads', has_param=True)
-        args += ['-parallel-threads', str(threads)]
-
-      batch_test_specs = [test.render_test_spec() for test in batch]
-      with argfile.safe_args(batch_test_specs, self.get_options()) as batch_tests:
-        with self._chroot(relevant_targets, workdir) as chroot:
-          self.context.log.debug('CWD = {}'.format(chroot))
-          self.context.log.debug('platform = {}'.format(platform))
-          with environment_as(**dict(target_env_vars)):
-            subprocess_result = self._spawn_and_wait(
-              executor=SubprocessExecutor(distribution),
-              distribution=distribution,
-              classpath=complete_classpath,
-              main=JUnit.RUNNER_MAIN,
-              jvm_options=self.jvm_options + extra_jvm_options + list(target_jvm_options),
-              args=args + batch_tests,
-              workunit_factory=self.context.new_workunit,
-              workunit_name='run',
-              workunit_labels=[WorkUnitLabel.TEST],
-              cwd=chroot,
-              synthetic_jar_dir=batch_output_dir,
-              create_synthetic_jar=self.synthetic_classpath,
-            )
-            self.context.log.debug('JUnit subprocess exited with result ({})'
-                                   .format(subprocess_result))
-            result += abs(subprocess_result)
-
-        tests_info = self.parse_test_info(batch_output_dir, parse_error_handler, ['classname'])
-        for test_name, test_info in tests_info.items():
-          test_item = Test(test_info['classname'], test_name)
-          test_target = test_registry.get_owning_target(test_item)
-          self.report_all_info_for_single_test(self.options_scope, test_target,
-                                               test_name, test_info)
-
+    run_batch = functools.partial(self._run_batch, fail_fast, test_registry, classpath_product,
+                                  coverage, parse_error_handler)
+    if self._sharded:
+      result = self._run_shards(fail_fast, run_batch, test_registry, output_dir,
+                                parse_error_handler)
+    else:
+      result = 0
+      for batch_id, (properties, batch) in enumerate(self._iter_batches(test_registry)):
+        batch_output_dir = output_dir
+        if self._batched:
+          batch_output_dir = os.path.join(batch_output_dir, 'batch-{}'.format(batch_id))
+        target_env_vars = properties[3]
+        with environment_as(**dict(target_env_vars)):
+          result += run_batch(properties, batch, batch_output_dir)
         if result != 0 and fail_fast:
           break
 
+    if result_keys:
+      self._record_test_results(test_registry, result_keys, output_dir, result == 0)
+
     if result == 0:
       return TestResult.rc(0)
 
@@ -512,8 +491,248 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     )
     return TestResult(msg='\n'.join(error_message_lines), rc=result, failed_targets=failed_targets)
 
-  def _iter_batches(self, test_registry):
-    tests_by_properties = test_registry.index(
+  def _run_batch(self, fail_fast, test_registry, classpath_product, coverage, parse_error_handler,
+                 properties, batch, batch_output_dir):
+    """Runs a batch of tests in a single test process, with the environment of the batch applied.
+
+    :returns: The absolute value of the exit code of the test process.
+    """
+    (workdir, platform, target_jvm_options, _, concurrency, threads) = properties
+
+    run_modifications = coverage.run_modifications(batch_output_dir)
+
+    extra_jvm_options = run_modifications.extra_jvm_options
+
+    # Batches of test classes will likely exist within the same targets: dedupe them.
+    relevant_targets = {test_registry.get_owning_target(t) for t in batch}
+
+    complete_classpath = OrderedSet()
+    complete_classpath.update(run_modifications.classpath_prepend)
+    complete_classpath.update(JUnit.global_instance().runner_classpath(self.context))
+    complete_classpath.update(self.classpath(relevant_targets,
+                                             classpath_product=classpath_product))
+
+    distribution = JvmPlatform.preferred_jvm_distribution([platform], self._strict_jvm_version)
+
+    # Override cmdline args with values from junit_test() target that specify concurrency:
+    args = self._args(fail_fast, batch_output_dir) + [u'-xmlreport']
+
+    if concurrency is not None:
+      args = remove_arg(args, '-default-parallel')
+      if concurrency == JUnitTests.CONCURRENCY_SERIAL:
+        args = ensure_arg(args, '-default-concurrency', param='SERIAL')
+      elif concurrency == JUnitTests.CONCURRENCY_PARALLEL_CLASSES:
+        args = ensure_arg(args, '-default-concurrency', param='PARALLEL_CLASSES')
+      elif concurrency == JUnitTests.CONCURRENCY_PARALLEL_METHODS:
+        args = ensure_arg(args, '-default-concurrency', param='PARALLEL_METHODS')
+      elif concurrency == JUnitTests.CONCURRENCY_PARALLEL_CLASSES_AND_METHODS:
+        args = ensure_arg(args, '-default-concurrency', param='PARALLEL_CLASSES_AND_METHODS')
+
+    if threads is not None:
+      args = remove_arg(args, '-parallel-threads', has_param=True)
+      args += ['-parallel-threads', str(threads)]
+
+    batch_test_specs = [test.render_test_spec() for test in batch]
+    with argfile.safe_args(batch_test_specs, self.get_options()) as batch_tests:
+      with self._chroot(relevant_targets, workdir) as chroot:
+        self.context.log.debug('CWD = {}'.format(chroot))
+        self.context.log.debug('platform = {}'.format(platform))
+        subprocess_result = self._spawn_and_wait(
+          executor=SubprocessExecutor(distribution),
+          distribution=distribution,
+          classpath=complete_classpath,
+          main=JUnit.RUNNER_MAIN,
+          jvm_options=self.jvm_options + extra_jvm_options + list(target_jvm_options),
+          args=args + batch_tests,
+          workunit_factory=self.context.new_workunit,
+          workunit_name='run',
+          workunit_labels=[WorkUnitLabel.TEST],
+          cwd=chroot,
+          synthetic_jar_dir=batch_output_dir,
+          create_synthetic_jar=self.synthetic_classpath,
+        )
+        self.context.log.debug('JUnit subprocess exited with result ({})'
+                               .format(subprocess_result))
+
+      tests_info = self.parse_test_info(batch_output_dir, parse_error_handler, ['classname'])
+      for test_name, test_info in tests_info.items():
+        test_item = Test(test_info['classname'], test_name)
+        test_target = test_registry.get_owning_target(test_item)
+        self.report_all_info_for_single_test(self.options_scope, test_target,
+                                             test_name, test_info)
+
+    return abs(subprocess_result)
+
+  def _run_shards(self, fail_fast, run_batch, test_registry, output_dir, parse_error_handler):
+    """Runs the tests of each set of shared properties as concurrent, balanced shards.
+
+    The shards of each set of properties are balanced using the durations of test classes recorded
+    in the reports of previous runs, both of these targets and of the last run of any targets.
+    Each shard writes its reports to a subdirectory of `output_dir`, where they are found by the
+    report consumers (which walk it), and linked into the stable report locations.
+
+    :returns: The sum of the absolute values of the exit codes of the test processes.
+    """
+    durations = parse_test_durations([output_dir, self._dist_dir], parse_error_handler)
+    # The shards of previous runs may hold different tests: so their reports must not be mistaken
+    # for those of this run.
+    for name in os.listdir(output_dir):
+      if name.startswith('shard-'):
+        safe_rmtree(os.path.join(output_dir, name))
+
+    result = 0
+    shard_id = itertools.count()
+    with self.context.new_workunit('shards') as workunit:
+      worker_pool = WorkerPool(workunit, self.context.run_tracker, self._parallel_shards)
+      try:
+        for properties, shards in self._iter_shards(test_registry, durations):
+          shard_args = [(properties, shard,
+                         os.path.join(output_dir, 'shard-{}'.format(next(shard_id))))
+                        for shard in shards]
+          self.context.log.debug('Running {} in {} shards.'
+                                 .format(pluralize(sum(len(s) for s in shards), 'test'),
+                                         len(shards)))
+          # The shards of a set of properties share their environment, so it is set once for all.
+          target_env_vars = properties[3]
+          with environment_as(**dict(target_env_vars)):
+            results = worker_pool.submit_work_and_wait(Work(run_batch, shard_args, 'shard'),
+                                                       workunit_parent=workunit)
+          result += sum(results)
+          if result != 0 and fail_fast:
+            break
+      finally:
+        worker_pool.shutdown()
+    return result
+
+  _REPORT_PREFIX = 'TEST-'
+  _REPORT_SUFFIX = '.xml'
+
+  @classmethod
+  def _iter_reports(cls, output_dir):
+    """Yields a (classname, path) pair for each report under the given output dir."""
+    for root, _, files in safe_walk(output_dir):
+      for f in files:
+        if f.startswith(cls._REPORT_PREFIX) and f.endswith(cls._REPORT_SUFFIX):
+          yield f[len(cls._REPORT_PREFIX):-len(cls._REPORT_SUFFIX)], os.path.join(root, f)
+
+  def _test_result_keys(self, test_registry):
+    """Returns a map from the classnames of the given tests to the keys of their results.
+
+    The results of a test class are keyed by the sources of its target that the source of the class
+    (transitively) depends on, according to the compile analysis of the target: or by all of the
+    sources of its target, if its dependencies are not known.
+    """
+    buildroot = get_buildroot()
+    classes_by_source = self.context.products.get_data('classes_by_source') or {}
+    product_deps_by_src = self.context.products.get_data('product_deps_by_src') or {}
+
+    digests = {}
+    def digest(source):
+      if source not in digests:
+        digests[source] = '{}:{}'.format(os.path.relpath(source, buildroot), hash_file(source))
+      return digests[source]
+
+    result_keys = {}
+    for (target,), tests in test_registry.index(lambda tgt: tgt).items():
+      sources = {os.path.join(buildroot, source): source
+                 for source in target.sources_relative_to_buildroot()}
+      source_by_classname = {}
+      for source, relsource in sources.items():
+        for _, rel_classfiles in (classes_by_source.get(relsource) or ()).rel_paths():
+          for rel_classfile in rel_classfiles:
+            source_by_classname[ClasspathUtil.classname_for_rel_classfile(rel_classfile)] = source
+      deps_by_source = {os.path.join(buildroot, source): deps
+                        for source, deps in product_deps_by_src.get(target, {}).items()}
+
+      for classname in {test.classname for test in tests}:
+        closure = self._source_closure(source_by_classname.get(classname), deps_by_source,
+                                       sources)
+        result_keys[classname] = self.test_result_cache_key(
+          target, *(digest(source) for source in sorted(closure)))
+    return result_keys
+
+  @staticmethod
+  def _source_closure(source, deps_by_source, sources):
+    """Returns the given source, and those of the given sources that it transitively depends on.
+
+    If the dependencies of any source in the closure are not known, returns all of the sources.
+    """
+    buildroot = get_buildroot()
+    closure = {source}
+    pending = [source]
+    while pending:
+      deps = deps_by_source.get(pending.pop())
+      if deps is None:
+        return set(sources)
+      for dep in deps:
+        dep = os.path.join(buildroot, dep)
+        if dep in sources and dep not in closure:
+          closure.add(dep)
+          pending.append(dep)
+    return closure
+
+  def _skip_recorded_tests(self, test_registry, result_keys, output_dir):
+    """Returns a registry of the given tests, without those of classes with recorded results.
+
+    The reports of previous runs of the given tests are removed from the output dir, so that they
+    are not mistaken for the results of this run, and the recorded reports of the skipped classes
+    are written in their place.
+    """
+    for classname, path in list(self._iter_reports(output_dir)):
+      if classname in result_keys:
+        safe_delete(path)
+
+    recorded = {}
+    for classname, key in result_keys.items():
+      report = self.test_result_cache.get(key)
+      if report is not None:
+        recorded[classname] = report
+    if not recorded:
+      return test_registry
+
+    for classname, report in recorded.items():
+      # Classes without tests produce no report, which is recorded as an empty one.
+      if report:
+        with open(os.path.join(output_dir, self._REPORT_PREFIX + classname + self._REPORT_SUFFIX),
+                  'wb') as fp:
+          fp.write(report)
+
+    self.context.log.info('Skipping {} with recorded results.'
+                          .format(pluralize(len(recorded), 'test class')))
+    return RegistryOfTests({test: target
+                            for (target,), tests in test_registry.index(lambda tgt: tgt).items()
+                            for test in tests
+                            if test.classname not in recorded})
+
+  def _record_test_results(self, test_registry, result_keys, output_dir, succeeded):
+    """Records the reports of the passing test classes of a run in the test result cache.
+
+    :param bool succeeded: True if the run succeeded: the classes that produced no report are then
+                           known to have no tests, rather than to have been cut short.
+    """
+    reports = dict(self._iter_reports(output_dir))
+    for classname in {test.classname for tests in test_registry.index().values() for test in tests}:
+      key = result_keys.get(classname)
+      path = reports.get(classname)
+      if key is None:
+        continue
+      elif path is None:
+        if succeeded:
+          self.test_result_cache.put(key, b'')
+        continue
+
+      try:
+        xml = XmlParser.from_file(path)
+        passed = (int(xml.get_attribute('testsuite', 'failures')) == 0 and
+                  int(xml.get_attribute('testsuite', 'errors')) == 0)
+      except (XmlParser.XmlError, ValueError):
+        passed = False
+      if passed:
+        with open(path, 'rb') as fp:
+          self.test_result_cache.put(key, fp.read())
+
+  def _index_tests_by_properties(self, test_registry):
+    return test_registry.index(
       lambda tgt: tgt.cwd if tgt.cwd is not None else self._working_dir,
       lambda tgt: tgt.test_platform,
       lambda tgt: tgt.payload.extra_jvm_options,
@@ -521,12 +740,28 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
       lambda tgt: tgt.concurrency,
       lambda tgt: tgt.threads)
 
+  def _iter_batches(self, test_registry):
+    tests_by_properties = self._index_tests_by_properties(test_registry)
     for properties, tests in sorted(tests_by_properties.items()):
       sorted_tests = sorted(tests)
       stride = min(self._batch_size, len(sorted_tests))
       for i in range(0, len(sorted_tests), stride):
         yield properties, sorted_tests[i:i + stride]
 
+  def _iter_shards(self, test_registry, durations):
+    """Yields each set of shared properties, with the test classes sharing them split into shards.
+
+    Tests of the same class are always run in the same shard (and so are run as a whole class).
+    """
+    for properties, tests in sorted(self._index_tests_by_properties(test_registry).items()):
+      tests_by_classname = defaultdict(list)
+      for test in tests:
+        tests_by_classname[test.classname].append(test)
+      shards = self.shard_by_duration(sorted(tests_by_classname), self._parallel_shards, durations)
+      yield properties, [sorted(itertools.chain.from_iterable(tests_by_classname[classname]
+                                                              for classname in shard))
+                         for shard in shards]
+
   def _get_possible_tests_to_run(self):
     buildroot = get_buildroot()
     for test_spec in self._tests_to_run:
@@ -606,11 +841,22 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
         except desktop.OpenError as e:
           raise TaskError(e)
 
+  @property
+  def _dist_dir(self):
+    """The directory that the reports of the latest run are linked into."""
+    return os.path.join(self.get_options().pants_distdir,
+                        os.path.relpath(self.workdir, self.get_options().pants_workdir))
+
   @contextmanager
   def _isolation(self, per_target, all_targets):
     run_dir = '_runs'
     mode_dir = 'isolated' if per_target else 'combined'
-    batch_dir = str(self._batch_size) if self._batched else 'all'
+    if self._batched:
+      batch_dir = str(self._batch_size)
+    elif self._sharded:
+      batch_dir = 'shards'
+    else:
+      batch_dir = 'all'
     output_dir = os.path.join(self.workdir,
                               run_dir,
                               Target.identify(all_targets),
@@ -640,8 +886,7 @@ class JUnitRun(PartitionedTestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     finally:
       lock_file = '.file_lock'
       preserve = (run_dir, lock_file)
-      dist_dir = os.path.join(self.get_options().pants_distdir,
-                              os.path.relpath(self.workdir, self.get_options().pants_workdir))
+      dist_dir = self._dist_dir
 
       with OwnerPrintingInterProcessFileLock(os.path.join(dist_dir, lock_file)):
         self._link_current_reports(report_dir=output_dir, link_dir=dist_dir,
@@ -0,0 +1,160 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import mmap
+import os
+import struct
+from collections import defaultdict
+
+from pants.util.dirutil import safe_concurrent_creation
+
+
+class AnalysisIndex(object):
+  """A compact binary index of the products and deps sections of an analysis file.
+
+  Parsing a large text analysis file just to find the classes produced by each source (or the deps
+  of each source) dominates the time of a no-op compile. An index is written alongside an analysis
+  file when the analysis is produced, and records the stat info of the analysis it was built from:
+  if the analysis has since changed, the index is ignored.
+
+  Layout (all integers little-endian):
+
+    header: magic, version, analysis size, mtime (ns) and inode, and the offset of each section.
+    classes_dir: a length-prefixed string.
+    section: a count of entries, followed by a table of (key offset, key length, values offset,
+             value count) per entry. The values of an entry are consecutive length-prefixed strings.
+
+  Sections are read lazily from an mmap of the index, so reading one does not decode the others.
+  """
+
+  MAGIC = b'PANTSAIX'
+  VERSION = 1
+
+  _HEADER = struct.Struct(b'<8sIQqQQQQ')
+  _COUNT = struct.Struct(b'<I')
+  _ENTRY = struct.Struct(b'<QIQI')
+  _LENGTH = struct.Struct(b'<I')
+
+  @staticmethod
+  def path_for(analysis_path):
+    """Return the path of the index for the given analysis file."""
+    return analysis_path + '.index'
+
+  @staticmethod
+  def _stat_key(analysis_path):
+    stat = os.stat(analysis_path)
+    return stat.st_size, int(stat.st_mtime * 1e9), stat.st_ino % (1 << 63)
+
+  @classmethod
+  def write(cls, analysis_path, classes_dir, products, deps):
+    """Write an index for the given analysis file.
+
+    :param str analysis_path: The analysis file that the sections were parsed from.
+    :param str classes_dir: The classes_dir that the products were parsed relative to.
+    :param dict products: A map from source to list of classfiles.
+    :param dict deps: A map from source to list of deps.
+    """
+    stat_key = cls._stat_key(analysis_path)
+    classes_dir = classes_dir.encode('utf-8')
+
+    chunks = []
+    offset = [cls._HEADER.size]
+    def append(chunk):
+      chunks.append(chunk)
+      offset[0] += len(chunk)
+
+    append(cls._LENGTH.pack(len(classes_dir)) + classes_dir)
+    section_offsets = []
+    for section in (products, deps):
+      section_offsets.append(offset[0])
+      items = sorted(section.items())
+      append(cls._COUNT.pack(len(items)))
+      # Lay out the key and values of each entry after the entry table.
+      data_offset = offset[0] + len(items) * cls._ENTRY.size
+      table = []
+      data = []
+      for key, values in items:
+        table.append(cls._ENTRY.pack(data_offset, len(key), data_offset + len(key), len(values)))
+        data.append(key)
+        data_offset += len(key)
+        for value in values:
+          data.append(cls._LENGTH.pack(len(value)))
+          data.append(value)
+          data_offset += cls._LENGTH.size + len(value)
+      append(b''.join(table))
+      append(b''.join(data))
+
+    header = cls._HEADER.pack(cls.MAGIC, cls.VERSION, stat_key[0], stat_key[1], stat_key[2],
+                              section_offsets[0], section_offsets[1], offset[0])
+    index_path = cls.path_for(analysis_path)
+    with safe_concurrent_creation(index_path) as tmp_path:
+      with open(tmp_path, 'wb') as fp:
+        fp.write(header)
+        for chunk in chunks:
+          fp.write(chunk)
+
+  @classmethod
+  def load(cls, analysis_path, classes_dir=None):
+    """Return the index for the given analysis file, or None if it is missing or stale.
+
+    :param str analysis_path: The analysis file to find the index of.
+    :param str classes_dir: If specified, the classes_dir that the index must have been written for.
+    """
+    index_path = cls.path_for(analysis_path)
+    try:
+      with open(index_path, 'rb') as fp:
+        size = os.fstat(fp.fileno()).st_size
+        if size < cls._HEADER.size:
+          return None
+        data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+      stat_key = cls._stat_key(analysis_path)
+    except (IOError, OSError, ValueError):
+      return None
+
+    magic, version, a_size, a_mtime, a_inode, products_offset, deps_offset, end = \
+      cls._HEADER.unpack_from(data, 0)
+    if (magic != cls.MAGIC or version != cls.VERSION or end != size or
+        (a_size, a_mtime, a_inode) != stat_key):
+      data.close()
+      return None
+    index = cls(data, {'products': products_offset, 'deps': deps_offset})
+    if classes_dir is not None and index.classes_dir != classes_dir:
+      index.close()
+      return None
+    return index
+
+  def __init__(self, data, section_offsets):
+    self._data = data
+    self._section_offsets = section_offsets
+
+  @property
+  def classes_dir(self):
+    offset = self._HEADER.size
+    length, = self._LENGTH.unpack_from(self._data, offset)
+    offset += self._LENGTH.size
+    return self._data[offset:offset + length].decode('utf-8')
+
+  def section(self, name):
+    """Return a map from key to list of values for the named section."""
+    data = self._data
+    offset = self._section_offsets[name]
+    count, = self._COUNT.unpack_from(data, offset)
+    offset += self._COUNT.size
+    result = defaultdict(list)
+    for i in range(count):
+      key_offset, key_len, values_offset, num_values = \
+        self._ENTRY.unpack_from(data, offset + i * self._ENTRY.size)
+      values = result[data[key_offset:key_offset + key_len]]
+      for _ in range(num_values):
+        length, = self._LENGTH.unpack_from(data, values_offset)
+        values_offset += self._LENGTH.size
+        values.append(data[values_offset:values_offset + length])
+        values_offset += length
+    return result
+
+  def close(self):
+    self._data.close()
@@ -9,6 +9,7 @@ import os
 import re
 from contextlib import contextmanager
 
+from pants.backend.jvm.tasks.jvm_compile.analysis_index import AnalysisIndex
 from pants.base.exceptions import TaskError
 
 
@@ -73,8 +74,13 @@ class AnalysisParser(object):
   def parse_products_from_path(self, infile_path, classes_dir):
     """An efficient parser of just the src->class mappings.
 
+    Reads from the index of the analysis file if it has an up to date one: see `index_from_path`.
+
     Returns a map of src -> list of classfiles. All paths are absolute.
     """
+    products = self._read_index_section(infile_path, 'products', classes_dir=classes_dir)
+    if products is not None:
+      return products
     with open(infile_path, 'rb') as infile:
       return self.parse_products(infile, classes_dir)
 
@@ -86,10 +92,38 @@ class AnalysisParser(object):
     raise NotImplementedError()
 
   def parse_deps_from_path(self, infile_path):
-    """An efficient parser of just the src->dep mappings."""
+    """An efficient parser of just the src->dep mappings.
+
+    Reads from the index of the analysis file if it has an up to date one: see `index_from_path`.
+    """
+    deps = self._read_index_section(infile_path, 'deps')
+    if deps is not None:
+      return deps
     with open(infile_path, 'rb') as infile:
       return self.parse_deps(infile)
 
+  def index_from_path(self, infile_path, classes_dir):
+    """Write an index of the products and deps of the analysis file at infile_path.
+
+    Subsequent calls to `parse_products_from_path` and `parse_deps_from_path` read from the index,
+    rather than parsing the analysis, until the analysis file is modified.
+    """
+    with open(infile_path, 'rb') as infile:
+      products = self.parse_products(infile, classes_dir)
+    with open(infile_path, 'rb') as infile:
+      deps = self.parse_deps(infile)
+    AnalysisIndex.write(infile_path, classes_dir, products, deps)
+
+  @staticmethod
+  def _read_index_section(infile_path, section, classes_dir=None):
+    index = AnalysisIndex.load(infile_path, classes_dir=classes_dir)
+    if index is None:
+      return None
+    try:
+      return index.section(section)
+    finally:
+      index.close()
+
   def parse_deps(self, infile):
     """An efficient parser of just the binary, source and external deps sections.
 
@@ -100,6 +134,21 @@ class AnalysisParser(object):
     """
     raise NotImplementedError()
 
+  def parse_api_fingerprint_from_path(self, infile_path):
+    """An efficient parser of just the public APIs of the classes in an analysis.
+
+    Returns a fingerprint that changes only when the API of a class in the analysis changes.
+    """
+    with open(infile_path, 'rb') as infile:
+      return self.parse_api_fingerprint(infile)
+
+  def parse_api_fingerprint(self, infile):
+    """An efficient parser of just the public APIs of the classes in an analysis.
+
+    Returns a fingerprint that changes only when the API of a class in the analysis changes.
+    """
+    raise NotImplementedError()
+
   _num_items_re = re.compile(r'(\d+) items\n')
 
   def parse_num_items(self, line):
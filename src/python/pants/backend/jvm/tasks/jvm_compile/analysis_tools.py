@@ -9,6 +9,7 @@ import os
 import shutil
 
 from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_delete
 
 
 class AnalysisTools(object):
@@ -50,3 +51,19 @@ class AnalysisTools(object):
       self.parser.rebase_from_path(src_analysis, tmp_analysis_file, self.localize_mappings)
 
       shutil.move(tmp_analysis_file, localized_analysis)
+
+
+def call_localize(tup):
+  """Importable helper for multi-proc calling of AnalysisTools.localize on an instance.
+
+  The localized analysis is then indexed, so that its products and deps are cheap to read: see
+  AnalysisParser.index_from_path.
+
+  :param tup: A tuple of an AnalysisTools, the portable analysis file to localize, the path to write
+              the localized analysis to, and the classes_dir of the analysis.
+  """
+  analysis_tools, portable_analysis_file, analysis_file, classes_dir = tup
+  safe_delete(analysis_file)
+  analysis_tools.localize(portable_analysis_file, analysis_file)
+  if os.path.exists(analysis_file):
+    analysis_tools.parser.index_from_path(analysis_file, classes_dir)
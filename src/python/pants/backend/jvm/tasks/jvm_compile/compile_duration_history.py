@@ -0,0 +1,102 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import logging
+import threading
+
+from pants.util.dirutil import safe_concurrent_creation
+
+
+logger = logging.getLogger(__name__)
+
+
+class CompileDurationHistory(object):
+  """Records how long previous compiles of targets took, to estimate how long the next will take.
+
+  Estimates are used as the sizes of compile jobs in an ExecutionGraph, so that the graph
+  prioritizes the jobs with the longest expected remaining critical path. Targets that have not
+  been compiled before are estimated from their size (according to a size estimator), scaled by
+  the average compile time per unit of size of the targets that have been.
+  """
+
+  VERSION = 1
+
+  # The weight of the latest duration in a target's estimate, versus that of its previous estimate.
+  LATEST_DURATION_WEIGHT = 0.5
+
+  def __init__(self, path):
+    """
+    :param str path: The path of the history file.
+    """
+    self._path = path
+    # Protects the state below, which may be recorded concurrently.
+    self._lock = threading.Lock()
+    self._durations = self._read()  # A map from key to a list of [seconds, size].
+    # The totals of the durations and sizes of the entries with a positive size.
+    self._total_seconds = 0
+    self._total_size = 0
+    for seconds, size in self._durations.values():
+      self._add_to_totals(seconds, size, 1)
+
+  def estimate(self, key, size):
+    """Return the expected duration of compiling the target with the given key.
+
+    :param str key: A key for the target that is stable across runs.
+    :param size: The estimated size of the target, used if there is no history for it.
+    :returns: An expected duration, in seconds.
+    """
+    entry = self._durations.get(key)
+    if entry is not None:
+      return entry[0]
+    return size * self._seconds_per_size_unit
+
+  def record(self, key, seconds, size):
+    """Record that compiling the target with the given key and estimated size took `seconds`."""
+    with self._lock:
+      entry = self._durations.get(key)
+      if entry is not None:
+        seconds = (self.LATEST_DURATION_WEIGHT * seconds +
+                   (1 - self.LATEST_DURATION_WEIGHT) * entry[0])
+        self._add_to_totals(entry[0], entry[1], -1)
+      self._durations[key] = [seconds, size]
+      self._add_to_totals(seconds, size, 1)
+
+  def save(self):
+    """Write the history back to its file."""
+    with self._lock:
+      content = json.dumps({'version': self.VERSION, 'durations': self._durations})
+    try:
+      with safe_concurrent_creation(self._path) as tmp_path:
+        with open(tmp_path, 'wb') as fp:
+          fp.write(content.encode('utf-8'))
+    except (IOError, OSError) as e:
+      logger.warn('Failed to save compile durations to {}: {}'.format(self._path, e))
+
+  def _add_to_totals(self, seconds, size, sign):
+    if size > 0:
+      self._total_seconds += sign * seconds
+      self._total_size += sign * size
+
+  @property
+  def _seconds_per_size_unit(self):
+    if self._total_size <= 0:
+      # Without any history, estimates are just sizes: all in the same unit, so still comparable.
+      return 1
+    return self._total_seconds / self._total_size
+
+  def _read(self):
+    try:
+      with open(self._path, 'rb') as fp:
+        history = json.loads(fp.read().decode('utf-8'))
+      if history.get('version') == self.VERSION:
+        return history['durations']
+    except IOError:
+      pass  # No history yet.
+    except ValueError as e:
+      logger.warn('Ignoring invalid compile durations in {}: {}'.format(self._path, e))
+    return {}
@@ -0,0 +1,222 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import threading
+
+from pants.backend.jvm.tasks.jvm_compile.compile_context import CompileContext
+from pants.util.dirutil import (link_or_copy, link_tree, mergetree, safe_delete, safe_mkdir,
+                                safe_mkdir_for, safe_rmtree)
+from pants.util.ziputil import fingerprints_path
+
+
+def _rebase_mappings(items):
+  return {old.encode('utf-8'): new.encode('utf-8') for old, new in items}
+
+
+class ClasspathSnapshots(object):
+  """Hard linked copies of the outputs of compiles, which are shared between sandboxes.
+
+  Outputs are only ever published by renaming them into place, so the identity of the file or
+  directory at a path identifies the version of the output there. Each version of an output is
+  linked (and its analysis rebased) once, and then read by the compiles of all of its dependees.
+  """
+
+  class _Snapshot(object):
+    def __init__(self, snapshot_dir):
+      self.dir = snapshot_dir
+      self.lock = threading.Lock()
+      self.created = False
+      self.path = None
+      self.analysis_file = None
+
+  def __init__(self, snapshots_dir, analysis_parser):
+    """
+    :param str snapshots_dir: A directory to create snapshots in, which is cleared. It must be on
+                              the same filesystem as the snapshotted outputs.
+    :param analysis_parser: An AnalysisParser to rebase analysis with.
+    """
+    self._dir = snapshots_dir
+    self._analysis_parser = analysis_parser
+    self._lock = threading.Lock()
+    self._snapshots = {}
+    safe_rmtree(snapshots_dir)
+
+  def snapshot(self, path, analysis_file=None):
+    """Return a snapshot of the current version of the given classpath entry.
+
+    :param str path: A classes dir or jar.
+    :param str analysis_file: The analysis of `path`, if any, which is rebased into the snapshot.
+    :returns: A tuple of the path of the snapshot of `path`, and of its analysis (or None).
+    """
+    if analysis_file and not os.path.exists(analysis_file):
+      analysis_file = None
+    key = (path, self._version(path), analysis_file and self._version(analysis_file))
+    with self._lock:
+      snapshot = self._snapshots.get(key)
+      if snapshot is None:
+        snapshot = self._Snapshot(os.path.join(self._dir, str(len(self._snapshots))))
+        self._snapshots[key] = snapshot
+
+    with snapshot.lock:
+      if not snapshot.created:
+        try:
+          self._create(snapshot, path, analysis_file)
+        except Exception:
+          safe_rmtree(snapshot.dir)
+          raise
+        snapshot.created = True
+    return snapshot.path, snapshot.analysis_file
+
+  def _create(self, snapshot, path, analysis_file):
+    safe_mkdir(snapshot.dir)
+    if os.path.isdir(path):
+      snapshot.path = os.path.join(snapshot.dir, 'classes')
+      link_tree(path, snapshot.path)
+    else:
+      snapshot.path = os.path.join(snapshot.dir, os.path.basename(path))
+      link_or_copy(path, snapshot.path)
+    if analysis_file:
+      # The analysis describes the classes at the location of the snapshot.
+      snapshot.analysis_file = os.path.join(snapshot.dir, 'analysis')
+      self._analysis_parser.rebase_from_path(analysis_file,
+                                             snapshot.analysis_file,
+                                             _rebase_mappings([(path, snapshot.path)]))
+
+  @staticmethod
+  def _version(path):
+    stat = os.stat(path)
+    return stat.st_dev, stat.st_ino, stat.st_ctime
+
+
+class CompileSandbox(object):
+  """A private scratch directory in which to compile a target, before publishing its outputs.
+
+  A compile in a sandbox reads the outputs of other compiles from ClasspathSnapshots of them, and
+  writes its own outputs to the sandbox. Once the compile succeeds, its outputs are renamed into the
+  locations of the CompileContext: so concurrent readers of a classpath entry never observe a
+  partially written one, and a failed compile leaves the previous outputs untouched.
+
+  Since zinc records absolute paths in analysis, the analysis of a target is rebased into the
+  sandbox before compiling, and back out of it when publishing.
+  """
+
+  def __init__(self, sandbox_dir, compile_context, analysis_parser, snapshots):
+    """
+    :param str sandbox_dir: A directory to create the sandbox in. It must be on the same filesystem
+                            as the outputs of the compile_context.
+    :param compile_context: The CompileContext to compile in the sandbox.
+    :param analysis_parser: An AnalysisParser to rebase analysis with.
+    :param ClasspathSnapshots snapshots: The snapshots to read the outputs of other compiles from.
+    """
+    self._dir = sandbox_dir
+    self._compile_context = compile_context
+    self._analysis_parser = analysis_parser
+    self._snapshots = snapshots
+    # Maps paths outside of the sandbox to the paths they are materialized at inside it.
+    self._entries = {}
+    # Maps classes dirs outside of the sandbox to the analysis of their materialized paths.
+    self._analysis_files = {}
+
+    cc = compile_context
+    self.compile_context = CompileContext(cc.target,
+                                          os.path.join(sandbox_dir,
+                                                       os.path.basename(cc.analysis_file)),
+                                          os.path.join(sandbox_dir,
+                                                       os.path.basename(cc.portable_analysis_file)),
+                                          os.path.join(sandbox_dir, 'classes'),
+                                          os.path.join(sandbox_dir, 'z.jar'),
+                                          cc.log_file,
+                                          cc.zinc_args_file,
+                                          cc.sources,
+                                          cc.strict_deps)
+
+  def entry(self, path):
+    """Return the path at which the given classpath entry is materialized in the sandbox."""
+    return self._entries.get(path, path)
+
+  def upstream_analysis(self, upstream_analysis):
+    """Map the classes dirs of the given upstream analysis, and their analysis, into the sandbox.
+
+    :param dict upstream_analysis: A map from classes dirs to their analysis files.
+    """
+    return {self.entry(classes_dir): self._analysis_files.get(classes_dir, analysis_file)
+            for classes_dir, analysis_file in upstream_analysis.items()}
+
+  def prepare(self, classpath, shared_entries, upstream_analysis, incremental):
+    """Create the sandbox, and materialize the inputs of the compile in it.
+
+    :param list classpath: The compile classpath.
+    :param shared_entries: The classpath entries that may be written by other compiles, and which
+                           are therefore read from snapshots.
+    :param dict upstream_analysis: A map from classes dirs on the classpath to their analysis files.
+    :param bool incremental: True to copy the previous outputs of the compile into the sandbox.
+    """
+    safe_rmtree(self._dir)
+    safe_mkdir(self._dir)
+    safe_mkdir(self.compile_context.classes_dir)
+    self._entries[self._compile_context.classes_dir] = self.compile_context.classes_dir
+    self._analysis_files[self._compile_context.classes_dir] = self.compile_context.analysis_file
+
+    for entry in classpath:
+      if entry in self._entries or entry not in shared_entries or not os.path.exists(entry):
+        continue
+      snapshot, snapshot_analysis_file = self._snapshots.snapshot(entry,
+                                                                  upstream_analysis.get(entry))
+      self._entries[entry] = snapshot
+      if snapshot_analysis_file:
+        self._analysis_files[entry] = snapshot_analysis_file
+
+    if incremental and os.path.exists(self._compile_context.analysis_file):
+      # The previous outputs are copied rather than linked: extra resources are rewritten in place,
+      # which would change the published outputs, and the snapshots of them read by other compiles.
+      mergetree(self._compile_context.classes_dir, self.compile_context.classes_dir,
+                symlinks=True)
+      self._analysis_parser.rebase_from_path(self._compile_context.analysis_file,
+                                             self.compile_context.analysis_file,
+                                             _rebase_mappings(self._entries.items()))
+      # The jar is only ever replaced (never rewritten in place), so it may be linked: it allows
+      # unchanged entries of the previous jar to be reused.
+      for path, sandbox_path in self._jar_files():
+        if os.path.exists(path):
+          link_or_copy(path, sandbox_path)
+
+  def publish(self):
+    """Move the outputs of the compile out of the sandbox, and into their final locations."""
+    cc = self._compile_context
+    sandbox_cc = self.compile_context
+    published_analysis = os.path.join(self._dir, 'published.analysis')
+    if os.path.exists(sandbox_cc.analysis_file):
+      self._analysis_parser.rebase_from_path(
+        sandbox_cc.analysis_file,
+        published_analysis,
+        _rebase_mappings((v, k) for k, v in self._entries.items()))
+
+    # Swap the classes dir into place, and then the jar of its contents. The analysis is published
+    # last, since it describes the classes.
+    previous_classes_dir = os.path.join(self._dir, 'previous_classes')
+    if os.path.exists(cc.classes_dir):
+      os.rename(cc.classes_dir, previous_classes_dir)
+    else:
+      safe_mkdir_for(cc.classes_dir)
+    os.rename(sandbox_cc.classes_dir, cc.classes_dir)
+    for path, sandbox_path in self._jar_files():
+      if os.path.exists(sandbox_path):
+        os.rename(sandbox_path, path)
+    if os.path.exists(published_analysis):
+      os.rename(published_analysis, cc.analysis_file)
+    else:
+      safe_delete(cc.analysis_file)
+
+  def _jar_files(self):
+    cc = self._compile_context
+    sandbox_cc = self.compile_context
+    return [(cc.jar_file, sandbox_cc.jar_file),
+            (fingerprints_path(cc.jar_file), fingerprints_path(sandbox_cc.jar_file))]
+
+  def cleanup(self):
+    safe_rmtree(self._dir)
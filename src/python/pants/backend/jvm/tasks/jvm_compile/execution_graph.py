@@ -7,6 +7,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import Queue as queue
 import threading
+import time
 import traceback
 from collections import defaultdict, deque
 from heapq import heappop, heappush
@@ -27,7 +28,8 @@ class Job(object):
     :param key: Key used to reference and look up jobs
     :param fn callable: The work to perform
     :param dependencies: List of keys for dependent jobs
-    :param size: Estimated job size used for prioritization
+    :param size: Estimated job cost used for prioritization, eg. an expected duration. The sizes
+                 of all jobs in a graph should be in the same unit.
     :param on_success: Zero parameter callback to run if job completes successfully. Run on main
                        thread.
     :param on_failure: Zero parameter callback to run if job completes successfully. Run on main
@@ -177,6 +179,18 @@ class ExecutionGraph(object):
 
     self._job_priority = self._compute_job_priorities(job_list)
 
+    # Statistics about the most recent execution.
+    self.busy_secs = 0
+    self.elapsed_secs = 0
+    self.max_jobs_in_flight = 0
+
+  @property
+  def parallelism(self):
+    """The average number of jobs that were running during the most recent execution."""
+    if self.elapsed_secs <= 0:
+      return 0
+    return self.busy_secs / self.elapsed_secs
+
   def format_dependee_graph(self):
     return "\n".join([
       "{} -> {{\n  {}\n}}".format(key, ',\n  '.join(self._dependees[key]))
@@ -253,6 +267,9 @@ class ExecutionGraph(object):
 
     heap = []
     jobs_in_flight = ThreadSafeCounter()
+    self.busy_secs = 0
+    self.max_jobs_in_flight = 0
+    start_time = time.time()
 
     def put_jobs_into_heap(job_keys):
       for job_key in job_keys:
@@ -261,17 +278,19 @@ class ExecutionGraph(object):
 
     def try_to_submit_jobs_from_heap():
       def worker(worker_key, work):
+        work_start_time = time.time()
         try:
           work()
           result = (worker_key, SUCCESSFUL, None)
         except Exception as e:
           result = (worker_key, FAILED, e)
-        finished_queue.put(result)
+        finished_queue.put(result + (time.time() - work_start_time,))
         jobs_in_flight.decrement()
 
       while len(heap) > 0 and jobs_in_flight.get() < pool.num_workers:
         priority, job_key = heappop(heap)
         jobs_in_flight.increment()
+        self.max_jobs_in_flight = max(self.max_jobs_in_flight, jobs_in_flight.get())
         status_table.mark_queued(job_key)
         pool.submit_async_work(Work(worker, [(job_key, (self._jobs[job_key]))]))
 
@@ -284,13 +303,14 @@ class ExecutionGraph(object):
 
       while not status_table.are_all_done():
         try:
-          finished_key, result_status, value = finished_queue.get(timeout=10)
+          finished_key, result_status, value, busy_secs = finished_queue.get(timeout=10)
         except queue.Empty:
           log.debug("Waiting on \n  {}\n".format("\n  ".join(
             "{}: {}".format(key, state) for key, state in status_table.unfinished_items())))
           try_to_submit_jobs_from_heap()
           continue
 
+        self.busy_secs += busy_secs
         finished_job = self._jobs[finished_key]
         direct_dependees = self._dependees[finished_key]
         status_table.mark_as(result_status, finished_key)
@@ -321,7 +341,7 @@ class ExecutionGraph(object):
           for dependee in direct_dependees:
             if status_table.is_unstarted(dependee):
               status_table.mark_queued(dependee)
-              finished_queue.put((dependee, CANCELED, None))
+              finished_queue.put((dependee, CANCELED, None, 0))
 
         # Log success or failure for this job.
         if result_status is FAILED:
@@ -336,6 +356,8 @@ class ExecutionGraph(object):
         self._jobs[key].run_failure_callback()
       log.debug(traceback.format_exc())
       raise ExecutionFailure("Error running job", e)
+    finally:
+      self.elapsed_secs = time.time() - start_time
 
     if status_table.has_failures():
       raise ExecutionFailure("Failed jobs: {}".format(', '.join(status_table.failed_keys())))
@@ -8,11 +8,13 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import functools
 import hashlib
 import os
+import zipfile
 from collections import defaultdict
 from multiprocessing import cpu_count
 
 from twitter.common.collections import OrderedSet
 
+from pants.backend.jvm.subsystems.jar_entry_index import JarEntryIndex
 from pants.backend.jvm.subsystems.java import Java
 from pants.backend.jvm.subsystems.jvm_platform import JvmPlatform
 from pants.backend.jvm.subsystems.scala_platform import ScalaPlatform
@@ -21,9 +23,12 @@ from pants.backend.jvm.targets.javac_plugin import JavacPlugin
 from pants.backend.jvm.targets.jvm_target import JvmTarget
 from pants.backend.jvm.targets.scalac_plugin import ScalacPlugin
 from pants.backend.jvm.tasks.classpath_util import ClasspathUtil
+from pants.backend.jvm.tasks.jvm_compile.analysis_tools import call_localize
 from pants.backend.jvm.tasks.jvm_compile.class_not_found_error_patterns import \
   CLASS_NOT_FOUND_ERROR_PATTERNS
 from pants.backend.jvm.tasks.jvm_compile.compile_context import CompileContext, DependencyContext
+from pants.backend.jvm.tasks.jvm_compile.compile_duration_history import CompileDurationHistory
+from pants.backend.jvm.tasks.jvm_compile.compile_sandbox import ClasspathSnapshots, CompileSandbox
 from pants.backend.jvm.tasks.jvm_compile.execution_graph import (ExecutionFailure, ExecutionGraph,
                                                                  Job)
 from pants.backend.jvm.tasks.jvm_compile.missing_dependency_finder import (CompileErrorExtractor,
@@ -40,10 +45,11 @@ from pants.build_graph.target_scopes import Scopes
 from pants.goal.products import MultipleRootedProducts
 from pants.reporting.reporting_utils import items_to_report_element
 from pants.util.contextutil import Timer
-from pants.util.dirutil import (fast_relpath, read_file, safe_delete, safe_mkdir, safe_rmtree,
-                                safe_walk)
+from pants.util.dirutil import (fast_relpath, read_file, safe_delete, safe_file_dump, safe_mkdir,
+                                safe_rmtree)
 from pants.util.fileutil import create_size_estimators
 from pants.util.memo import memoized_method, memoized_property
+from pants.util.ziputil import update_zip_from_dir
 
 
 class ResolvedJarAwareFingerprintStrategy(FingerprintStrategy):
@@ -90,6 +96,67 @@ class ResolvedJarAwareFingerprintStrategy(FingerprintStrategy):
     return type(self) == type(other)
 
 
+class ApiFingerprintStrategy(ResolvedJarAwareFingerprintStrategy):
+  """Fingerprints a target by its own sources, and the public APIs of its compile dependencies.
+
+  A change to any source in a target invalidates its dependents, even if the change was to the body
+  of a private method. But a target only needs to be recompiled if its own sources changed, or if
+  the API of a class that it compiles against changed: the API of a dependency is taken from the
+  `internal apis` of its analysis, and is otherwise the fingerprint of the dependency itself.
+
+  Since the analysis of a dependency changes when it is compiled, a target should only be
+  fingerprinted after all of its dependencies have been compiled.
+  """
+
+  def __init__(self, classpath_products, dep_context, compile_contexts, analysis_parser):
+    """
+    :param compile_contexts: A map from target to the CompileContext of each target to compile.
+    :param analysis_parser: The AnalysisParser to read the API fingerprint of analysis files with.
+    """
+    super(ApiFingerprintStrategy, self).__init__(classpath_products, dep_context)
+    self._compile_contexts = compile_contexts
+    self._analysis_parser = analysis_parser
+    # Dependencies are fingerprinted once they have been compiled, and are not compiled again.
+    self._api_fingerprints = {}
+
+  def compute_fingerprint(self, target):
+    fingerprint = super(ApiFingerprintStrategy, self).compute_fingerprint(target)
+    compile_context = self._compile_contexts.get(target)
+    if fingerprint is None or compile_context is None:
+      return fingerprint
+
+    hasher = hashlib.sha1()
+    hasher.update(fingerprint)
+    dependencies = compile_context.dependencies(self._dep_context)
+    for dep in sorted(dependencies, key=lambda t: t.address.spec):
+      if dep == target:
+        # The closure of a target includes the target itself.
+        continue
+      api_fingerprint = self._api_fingerprint(dep)
+      if api_fingerprint is not None:
+        hasher.update(dep.address.spec)
+        hasher.update(api_fingerprint)
+    return hasher.hexdigest()
+
+  def _api_fingerprint(self, target):
+    if target not in self._api_fingerprints:
+      compile_context = self._compile_contexts.get(target)
+      if compile_context is not None and os.path.exists(compile_context.analysis_file):
+        api_fingerprint = self._analysis_parser.parse_api_fingerprint_from_path(
+          compile_context.analysis_file)
+      else:
+        api_fingerprint = super(ApiFingerprintStrategy, self).compute_fingerprint(target)
+      self._api_fingerprints[target] = api_fingerprint
+    return self._api_fingerprints[target]
+
+  # Fingerprints depend on the state of this instance, so are only equal for the same instance.
+  def __hash__(self):
+    return id(self)
+
+  def __eq__(self, other):
+    return self is other
+
+
 class JvmCompile(NailgunTaskBase):
   """A common framework for JVM compilation.
 
@@ -99,6 +166,9 @@ class JvmCompile(NailgunTaskBase):
 
   size_estimators = create_size_estimators()
 
+  # The expected cost of outlining a target, relative to fully compiling it.
+  _OUTLINE_COST = 0.1
+
   @classmethod
   def size_estimator_by_name(cls, estimation_strategy_name):
     return cls.size_estimators[estimation_strategy_name]
@@ -111,6 +181,10 @@ class JvmCompile(NailgunTaskBase):
   def _portable_analysis_for_target(analysis_dir, target):
     return JvmCompile._analysis_for_target(analysis_dir, target) + '.portable'
 
+  @staticmethod
+  def _api_fingerprint_file(compile_context):
+    return os.path.join(os.path.dirname(compile_context.classes_dir), 'api_fingerprint')
+
   @classmethod
   def register_options(cls, register):
     super(JvmCompile, cls).register_options(register)
@@ -169,6 +243,39 @@ class JvmCompile(NailgunTaskBase):
                   'constraints). Choose \'random\' to choose random sizes for each target, which '
                   'may be useful for distributed builds.')
 
+    register('--duration-history', advanced=True, type=bool, default=True,
+             help='Record how long each target takes to compile, and prioritize targets by the '
+                  'expected duration of their longest chain of dependees, rather than by size '
+                  'estimates alone. Targets that have not been compiled before are estimated '
+                  'from their size. Ignored when the size estimator is \'random\'.')
+
+    register('--api-invalidation', advanced=True, type=bool, default=False,
+             help='Skip recompiling an invalidated target if its sources are unchanged, and the '
+                  'public APIs of its dependencies (as recorded in their analysis) are unchanged '
+                  'since it was last compiled. NB: a change to the implementation of a Scala '
+                  'macro does not change its API, so this is unsafe for dependees of macros. '
+                  'Ignored when --pipelined.')
+
+    register('--pipelined', advanced=True, type=bool, default=False,
+             help='Compile each target in two phases: first outline the public signatures of its '
+                  'sources with the outliner tool, and then compile it fully. Dependees are '
+                  'compiled against the outlines of their dependencies, so they can start as soon '
+                  'as those outlines are available, rather than waiting for full compiles. '
+                  'Requires --outliner and --outliner-main.')
+    register('--outliner-main', advanced=True, type=str, fingerprint=True,
+             help='The main class of the outliner tool used by --pipelined. It is invoked as '
+                  '`<main> -cp <classpath> -d <outline dir> <source>...`, and should write '
+                  'classfiles containing (at least) the public signatures of the sources to the '
+                  'outline dir, exiting non-zero on failure.')
+    cls.register_jvm_tool(register, 'outliner', classpath=[],
+                          help='The classpath of the outliner tool used by --pipelined.')
+
+    register('--sandboxed', advanced=True, type=bool, default=False,
+             help='Compile each target in a private sandbox containing hard linked copies of the '
+                  'outputs of the other targets on its classpath, and then publish its outputs '
+                  'with renames. Compiles then never observe partially written outputs of '
+                  'concurrent compiles, so a higher --worker-count can be used safely.')
+
     register('--capture-log', advanced=True, type=bool,
              fingerprint=True,
              help='Capture compilation output to per-target logs.')
@@ -227,7 +334,8 @@ class JvmCompile(NailgunTaskBase):
 
   @classmethod
   def subsystem_dependencies(cls):
-    return super(JvmCompile, cls).subsystem_dependencies() + (Java, JvmPlatform, ScalaPlatform)
+    return super(JvmCompile, cls).subsystem_dependencies() + (JarEntryIndex, Java, JvmPlatform,
+                                                              ScalaPlatform)
 
   @classmethod
   def name(cls):
@@ -371,6 +479,20 @@ class JvmCompile(NailgunTaskBase):
     self._worker_count = worker_count
 
     self._size_estimator = self.size_estimator_by_name(self.get_options().size_estimator)
+    self._duration_history = None
+    if self.get_options().duration_history and self.get_options().size_estimator != 'random':
+      self._duration_history = CompileDurationHistory(
+        os.path.join(self.workdir,
+                     'compile_durations.{}.json'.format(self.get_options().size_estimator)))
+
+    self._sandboxed = self.get_options().sandboxed
+    self._pipelined = self.get_options().pipelined
+    if self._pipelined:
+      if not self.get_options().outliner_main:
+        raise TaskError('--pipelined requires an --outliner-main.')
+      if self._unused_deps_check_enabled:
+        # Dependees are compiled against outlines, so their deps could not be attributed to targets.
+        raise TaskError('--pipelined cannot be combined with --unused-deps.')
 
     self._analysis_tools = self.create_analysis_tools()
 
@@ -386,7 +508,8 @@ class JvmCompile(NailgunTaskBase):
   def _dep_analyzer(self):
     return JvmDependencyAnalyzer(get_buildroot(),
                                  self.context.products.get_data('runtime_classpath'),
-                                 self.context.products.get_data('product_deps_by_src'))
+                                 self.context.products.get_data('product_deps_by_src'),
+                                 JarEntryIndex.global_instance())
 
   @memoized_property
   def _missing_deps_finder(self):
@@ -422,6 +545,17 @@ class JvmCompile(NailgunTaskBase):
   def _fingerprint_strategy(self, classpath_products):
     return ResolvedJarAwareFingerprintStrategy(classpath_products, self._dep_context)
 
+  def _api_fingerprint_strategy(self, classpath_products, compile_contexts):
+    return ApiFingerprintStrategy(classpath_products, self._dep_context, compile_contexts,
+                                  self._analysis_parser)
+
+  def _compute_api_fingerprint(self, api_fingerprint_strategy, compile_context):
+    """Fingerprint the inputs of a compile that may change the classes it produces."""
+    hasher = hashlib.sha1()
+    hasher.update(self.fingerprint)
+    hasher.update(api_fingerprint_strategy.fingerprint_target(compile_context.target) or '')
+    return hasher.hexdigest()
+
   @staticmethod
   def strict_deps_enabled(target):
     return JvmCompile._compute_language_property(target, lambda x: x.strict_deps)
@@ -551,6 +685,18 @@ class JvmCompile(NailgunTaskBase):
       exec_graph.execute(worker_pool, self.context.log)
     except ExecutionFailure as e:
       raise TaskError("Compilation failure: {}".format(e))
+    finally:
+      if self._duration_history:
+        self._duration_history.save()
+      self._record_parallelism(exec_graph, len(jobs))
+
+  def _record_parallelism(self, exec_graph, num_jobs):
+    parallelism = '{:.2f}'.format(exec_graph.parallelism)
+    self.context.log.debug('Ran {} jobs with an average parallelism of {} (at most {}).'
+                           .format(num_jobs, parallelism, exec_graph.max_jobs_in_flight))
+    self.context.run_tracker.run_info.add_infos(
+      ('{}_parallelism'.format(self.options_scope), parallelism),
+      ('{}_max_parallelism'.format(self.options_scope), exec_graph.max_jobs_in_flight))
 
   def _record_compile_classpath(self, classpath, targets, outdir):
     relative_classpaths = [fast_relpath(path, self.get_options().pants_workdir) for path in classpath]
@@ -671,12 +817,22 @@ class JvmCompile(NailgunTaskBase):
   def check_artifact_cache(self, vts):
     """Localizes the fetched analysis for targets we found in the cache."""
     def post_process(cached_vts):
+      # Localizing rewrites every path in an analysis, so localize the targets in parallel.
+      items = []
       for vt in cached_vts:
         cc = self._compile_context(vt.target, vt.results_dir)
-        safe_delete(cc.analysis_file)
-        self._analysis_tools.localize(cc.portable_analysis_file, cc.analysis_file)
+        items.append((self._analysis_tools, cc.portable_analysis_file, cc.analysis_file,
+                      cc.classes_dir))
+      if items:
+        self.context.subproc_map(call_localize, items)
     return self.do_check_artifact_cache(vts, post_process_cached_vts=post_process)
 
+  def _index_analysis(self, compile_context):
+    """Index the products and deps of a freshly produced analysis, so they are cheap to read."""
+    if os.path.exists(compile_context.analysis_file):
+      self._analysis_parser.index_from_path(compile_context.analysis_file,
+                                            compile_context.classes_dir)
+
   def _create_empty_products(self):
     if self.context.products.is_required_data('classes_by_source'):
       make_products = lambda: defaultdict(MultipleRootedProducts)
@@ -703,12 +859,12 @@ class JvmCompile(NailgunTaskBase):
     # Build a mapping of srcs to classes for each context.
     classes_by_src_by_context = defaultdict(dict)
     for compile_context in compile_contexts:
-      # Walk the context's jar to build a set of unclaimed classfiles.
+      # Walk the context's jar to build a set of unclaimed classfiles. Context jars are rewritten
+      # by every compile, so their entries are not worth recording by digest.
       unclaimed_classes = set()
-      with compile_context.open_jar(mode='r') as jar:
-        for name in jar.namelist():
-          if not name.endswith('/'):
-            unclaimed_classes.add(os.path.join(compile_context.classes_dir, name))
+      for name in JarEntryIndex.global_instance().entries(compile_context.jar_file, persist=False):
+        if not name.endswith('/'):
+          unclaimed_classes.add(os.path.join(compile_context.classes_dir, name))
 
       # Grab the analysis' view of which classfiles were generated.
       classes_by_src = classes_by_src_by_context[compile_context]
@@ -845,6 +1001,53 @@ class JvmCompile(NailgunTaskBase):
         return len(str(self.size))
     counter = Counter(len(invalid_vts))
 
+    invalid_target_set = set(invalid_targets)
+    invalid_dependencies = {
+      vts.target: self._collect_invalid_compile_dependencies(vts.target, invalid_target_set)
+      for vts in invalid_vts
+    }
+
+    # When pipelined, dependees compile against the outlines of their invalid dependencies, rather
+    # than against their (possibly not yet compiled) classes. So only the targets that are
+    # dependencies of other invalid targets are outlined.
+    outlined_targets = set()
+    outline_dirs = {}
+    if self._pipelined:
+      for dependencies in invalid_dependencies.values():
+        outlined_targets.update(dependencies)
+      for target in outlined_targets:
+        ctx = compile_contexts[target]
+        outline_dirs[ctx.classes_dir] = outline_dirs[ctx.jar_file] = self._outline_dir(target)
+
+    # The outputs of the targets being compiled, which are materialized in sandboxes.
+    shared_cp_entries = set()
+    snapshots = None
+    if self._sandboxed:
+      for ctx in compile_contexts.values():
+        shared_cp_entries.update([ctx.classes_dir, ctx.jar_file])
+      snapshots = ClasspathSnapshots(os.path.join(self.workdir, 'snapshots'),
+                                     self._analysis_parser)
+
+    def compile_classpath(ctx):
+      # TODO: We convert to an iterator here in order to _preserve_ a bug that will be fixed
+      # in https://github.com/pantsbuild/pants/issues/4874: `ClasspathUtil.compute_classpath`
+      # expects to receive a list, but had been receiving an iterator. In the context of an
+      # iterator, `excludes` are not applied
+      # in ClasspathProducts.get_product_target_mappings_for_targets.
+      dependencies_iter = iter(ctx.dependencies(self._dep_context))
+      classpath = ClasspathUtil.compute_classpath(dependencies_iter,
+                                                  classpath_products,
+                                                  extra_compile_time_classpath,
+                                                  self._confs)
+      if not self._pipelined:
+        return classpath
+      return self._substitute_outlines(classpath, ctx, outline_dirs)
+
+    api_fingerprint_strategy = None
+    if self.get_options().api_invalidation and not self._pipelined:
+      api_fingerprint_strategy = self._api_fingerprint_strategy(classpath_products,
+                                                                compile_contexts)
+
     def check_cache(vts):
       """Manually checks the artifact cache (usually immediately before compilation.)
 
@@ -887,55 +1090,89 @@ class JvmCompile(NailgunTaskBase):
       if not hit_cache:
         # Compute the compile classpath for this target.
         cp_entries = [ctx.classes_dir]
-        # TODO: We convert to an iterator here in order to _preserve_ a bug that will be fixed
-        # in https://github.com/pantsbuild/pants/issues/4874: `ClasspathUtil.compute_classpath`
-        # expects to receive a list, but had been receiving an iterator. In the context of an
-        # iterator, `excludes` are not applied
-        # in ClasspathProducts.get_product_target_mappings_for_targets.
-        dependencies_iter = iter(ctx.dependencies(self._dep_context))
-        cp_entries.extend(ClasspathUtil.compute_classpath(dependencies_iter,
-                                                          classpath_products,
-                                                          extra_compile_time_classpath,
-                                                          self._confs))
+        cp_entries.extend(compile_classpath(ctx))
         upstream_analysis = dict(self._upstream_analysis(compile_contexts, cp_entries))
 
         is_incremental = should_compile_incrementally(vts, ctx)
-        if not is_incremental:
-          # Purge existing analysis file in non-incremental mode.
-          safe_delete(ctx.analysis_file)
-          # Work around https://github.com/pantsbuild/pants/issues/3670
-          safe_rmtree(ctx.classes_dir)
-
-        tgt, = vts.targets
-        fatal_warnings = self._compute_language_property(tgt, lambda x: x.fatal_warnings)
-        zinc_file_manager = self._compute_language_property(tgt, lambda x: x.zinc_file_manager)
-        with Timer() as timer:
-          self._compile_vts(vts,
-                            ctx.target,
-                            ctx.sources,
-                            ctx.analysis_file,
-                            upstream_analysis,
-                            cp_entries,
-                            ctx.classes_dir,
-                            log_file,
-                            ctx.zinc_args_file,
-                            progress_message,
-                            tgt.platform,
-                            fatal_warnings,
-                            zinc_file_manager,
-                            counter)
-        self._record_target_stats(tgt,
-                                  len(cp_entries),
-                                  len(ctx.sources),
-                                  timer.elapsed,
-                                  is_incremental)
-        self._analysis_tools.relativize(ctx.analysis_file, ctx.portable_analysis_file)
-
-        # Write any additional resources for this target to the target workdir.
-        self.write_extra_resources(ctx)
-
-        # Jar the compiled output.
-        self._create_context_jar(ctx)
+
+        # The previous classes are still valid if they were compiled from the same sources, against
+        # the same dependency APIs.
+        api_fingerprint = None
+        api_fingerprint_file = self._api_fingerprint_file(ctx)
+        if api_fingerprint_strategy:
+          api_fingerprint = self._compute_api_fingerprint(api_fingerprint_strategy, ctx)
+        if (api_fingerprint is not None and is_incremental and
+            os.path.exists(ctx.analysis_file) and os.path.exists(api_fingerprint_file) and
+            read_file(api_fingerprint_file) == api_fingerprint):
+          self.context.log.info('Skipping compile of {}: the APIs it compiles against are '
+                                'unchanged.'.format(progress_message))
+          counter()
+        else:
+          # Any recorded fingerprint describes the classes that are about to be replaced.
+          safe_delete(api_fingerprint_file)
+
+          sandbox = None
+          compile_ctx = ctx
+          if self._sandboxed:
+            sandbox = CompileSandbox(self._sandbox_dir(ctx.target), ctx, self._analysis_parser,
+                                     snapshots)
+            sandbox.prepare(cp_entries, shared_cp_entries, upstream_analysis, is_incremental)
+            compile_ctx = sandbox.compile_context
+            cp_entries = [sandbox.entry(entry) for entry in cp_entries]
+            upstream_analysis = sandbox.upstream_analysis(upstream_analysis)
+          elif not is_incremental:
+            # Purge existing analysis file in non-incremental mode.
+            safe_delete(ctx.analysis_file)
+            # Work around https://github.com/pantsbuild/pants/issues/3670
+            safe_rmtree(ctx.classes_dir)
+
+          tgt, = vts.targets
+          fatal_warnings = self._compute_language_property(tgt, lambda x: x.fatal_warnings)
+          zinc_file_manager = self._compute_language_property(tgt, lambda x: x.zinc_file_manager)
+          try:
+            with Timer() as timer:
+              self._compile_vts(vts,
+                                ctx.target,
+                                ctx.sources,
+                                compile_ctx.analysis_file,
+                                upstream_analysis,
+                                cp_entries,
+                                compile_ctx.classes_dir,
+                                log_file,
+                                ctx.zinc_args_file,
+                                progress_message,
+                                tgt.platform,
+                                fatal_warnings,
+                                zinc_file_manager,
+                                counter)
+            if sandbox:
+              # Produce the remaining outputs in the sandbox, so that they are published together.
+              self.write_extra_resources(compile_ctx)
+              self._create_context_jar(compile_ctx)
+              sandbox.publish()
+          finally:
+            if sandbox:
+              sandbox.cleanup()
+          self._record_target_stats(tgt,
+                                    len(cp_entries),
+                                    len(ctx.sources),
+                                    timer.elapsed,
+                                    is_incremental)
+          if self._duration_history:
+            self._duration_history.record(ctx.target.address.spec,
+                                          timer.elapsed,
+                                          self._size_estimator(ctx.sources))
+          self._analysis_tools.relativize(ctx.analysis_file, ctx.portable_analysis_file)
+          if api_fingerprint is not None:
+            safe_file_dump(api_fingerprint_file, api_fingerprint)
+        self._index_analysis(ctx)
+
+        if not self._sandboxed:
+          # Write any additional resources for this target to the target workdir.
+          self.write_extra_resources(ctx)
+
+          # Jar the compiled output.
+          self._create_context_jar(ctx)
 
       # Update the products with the latest classes.
       self._register_vts([ctx])
@@ -944,25 +1181,98 @@ class JvmCompile(NailgunTaskBase):
       if not hit_cache and self._unused_deps_check_enabled:
         self._check_unused_deps(ctx)
 
+    def outline_for_vts(ctx):
+      self._outline(ctx, compile_classpath(ctx))
+
     jobs = []
-    invalid_target_set = set(invalid_targets)
     for ivts in invalid_vts:
       # Invalidated targets are a subset of relevant targets: get the context for this one.
       compile_target = ivts.target
       compile_context = compile_contexts[compile_target]
-      invalid_dependencies = self._collect_invalid_compile_dependencies(compile_target,
-                                                                        invalid_target_set)
-
-      jobs.append(Job(self.exec_graph_key_for_target(compile_target),
-                      functools.partial(work_for_vts, ivts, compile_context),
-                      [self.exec_graph_key_for_target(target) for target in invalid_dependencies],
-                      self._size_estimator(compile_context.sources),
-                      # If compilation and analysis work succeeds, validate the vts.
-                      # Otherwise, fail it.
-                      on_success=ivts.update,
-                      on_failure=ivts.force_invalidate))
+      dependencies = invalid_dependencies[compile_target]
+
+      if self._pipelined:
+        # Both the outline and the full compile of a target need only the outlines of its deps.
+        outline_keys = [self._outline_key_for_target(target) for target in dependencies]
+        if compile_target in outlined_targets:
+          jobs.append(Job(self._outline_key_for_target(compile_target),
+                          functools.partial(outline_for_vts, compile_context),
+                          outline_keys,
+                          self._estimate_compile_duration(compile_context) * self._OUTLINE_COST))
+        jobs.append(Job(self.exec_graph_key_for_target(compile_target),
+                        functools.partial(work_for_vts, ivts, compile_context),
+                        outline_keys,
+                        self._estimate_compile_duration(compile_context)))
+        # But the target is only valid once its deps have compiled too: if any of them fail, this
+        # job is canceled, which fails the vts.
+        validate_keys = [self._validate_key_for_target(target) for target in dependencies]
+        jobs.append(Job(self._validate_key_for_target(compile_target),
+                        lambda: None,
+                        [self.exec_graph_key_for_target(compile_target)] + validate_keys,
+                        on_success=ivts.update,
+                        on_failure=ivts.force_invalidate))
+      else:
+        dependency_keys = [self.exec_graph_key_for_target(target) for target in dependencies]
+        jobs.append(Job(self.exec_graph_key_for_target(compile_target),
+                        functools.partial(work_for_vts, ivts, compile_context),
+                        dependency_keys,
+                        self._estimate_compile_duration(compile_context),
+                        # If compilation and analysis work succeeds, validate the vts.
+                        # Otherwise, fail it.
+                        on_success=ivts.update,
+                        on_failure=ivts.force_invalidate))
     return jobs
 
+  @staticmethod
+  def _substitute_outlines(classpath, compile_context, outline_dirs):
+    """Replace the outputs of outlined targets on a compile classpath with their outline dirs.
+
+    :param list classpath: The compile classpath of the target of `compile_context`.
+    :param CompileContext compile_context: The target being compiled.
+    :param dict outline_dirs: A map from the classes dirs and jars of outlined targets to their
+                              outline dirs.
+    """
+    # A target is in its own closure, but should never be compiled against its own outline.
+    return [outline_dirs.get(entry, entry) for entry in classpath
+            if entry not in (compile_context.classes_dir, compile_context.jar_file)]
+
+  def _outline_key_for_target(self, compile_target):
+    return 'outline({})'.format(compile_target.address.spec)
+
+  def _validate_key_for_target(self, compile_target):
+    return 'validate({})'.format(compile_target.address.spec)
+
+  def _sandbox_dir(self, target):
+    return os.path.join(self.workdir, 'sandbox', target.id)
+
+  def _outline_dir(self, target):
+    return os.path.join(self.workdir, 'outline', target.id)
+
+  def _outline(self, compile_context, classpath):
+    """Write classfiles containing the public signatures of a target to its outline dir."""
+    outline_dir = self._outline_dir(compile_context.target)
+    safe_rmtree(outline_dir)
+    safe_mkdir(outline_dir)
+    if not compile_context.sources:
+      return
+
+    args = ['-cp', os.pathsep.join(classpath), '-d', outline_dir]
+    args.extend(os.path.join(get_buildroot(), source) for source in compile_context.sources)
+    if self.runjava(classpath=self.tool_classpath('outliner'),
+                    main=self.get_options().outliner_main,
+                    jvm_options=self._jvm_options,
+                    args=args,
+                    workunit_name='outline',
+                    workunit_labels=[WorkUnitLabel.COMPILER]):
+      raise TaskError('Outlining {} failed.'.format(compile_context.target.address.spec))
+
+  def _estimate_compile_duration(self, compile_context):
+    """Estimate the cost of compiling a target, in a unit that is consistent across targets."""
+    size = self._size_estimator(compile_context.sources)
+    if self._duration_history is None:
+      return size
+    return self._duration_history.estimate(compile_context.target.address.spec, size)
+
   def _record_target_stats(self, target, classpath_len, sources_len, compiletime, is_incremental):
     def record(k, v):
       self.context.run_tracker.report_target_info(self.options_scope, target, ['compile', k], v)
@@ -997,14 +1307,11 @@ class JvmCompile(NailgunTaskBase):
     allow the jars to be used as compile _inputs_ as well. Currently using jar'd compile outputs as
     compile inputs would make the compiler's analysis useless.
       see https://github.com/twitter-forks/sbt/tree/stuhood/output-jars
+
+    Entries for classfiles that are unchanged since the jar was last created are copied from the
+    previous jar as-is.
     """
-    root = compile_context.classes_dir
-    with compile_context.open_jar(mode='w') as jar:
-      for abs_sub_dir, dirnames, filenames in safe_walk(root):
-        for name in dirnames + filenames:
-          abs_filename = os.path.join(abs_sub_dir, name)
-          arcname = fast_relpath(abs_filename, root)
-          jar.write(abs_filename, arcname)
+    update_zip_from_dir(compile_context.jar_file, compile_context.classes_dir, zipfile.ZIP_STORED)
 
   def validate_analysis(self, path):
     """Throws a TaskError for invalid analysis files."""
@@ -48,6 +48,13 @@ class ZincAnalysisParser(AnalysisParser):
       except UnderlyingParser.ParseError as e:
         raise ParseError(e)
 
+  def parse_api_fingerprint(self, infile):
+    with raise_on_eof(infile):
+      try:
+        return self._underlying_parser.parse_api_fingerprint(infile)
+      except UnderlyingParser.ParseError as e:
+        raise ParseError(e)
+
   def rebase(self, infile, outfile, rebase_mappings, java_home=None):
     with raise_on_eof(infile):
       try:
@@ -10,6 +10,7 @@ from collections import defaultdict
 
 from twitter.common.collections import OrderedSet
 
+from pants.backend.jvm.subsystems.jar_entry_index import JarEntryIndex
 from pants.backend.jvm.targets.scala_library import ScalaLibrary
 from pants.backend.jvm.tasks.jvm_dependency_analyzer import JvmDependencyAnalyzer
 from pants.base.build_environment import get_buildroot
@@ -51,6 +52,10 @@ class JvmDependencyCheck(Task):
                   'This is a very strict check. For example, generated code will often '
                   'legitimately have BUILD dependencies that are unused in practice.')
 
+  @classmethod
+  def subsystem_dependencies(cls):
+    return super(JvmDependencyCheck, cls).subsystem_dependencies() + (JarEntryIndex,)
+
   @classmethod
   def _skip(cls, options):
     """Return true if the task should be entirely skipped, and thus have no product requirements."""
@@ -176,7 +181,8 @@ class JvmDependencyCheck(Task):
     """
     analyzer = JvmDependencyAnalyzer(get_buildroot(),
                                      self.context.products.get_data('runtime_classpath'),
-                                     self.context.products.get_data('product_deps_by_src'))
+                                     self.context.products.get_data('product_deps_by_src'),
+                                     JarEntryIndex.global_instance())
     def must_be_explicit_dep(dep):
       # We don't require explicit deps on the java runtime, so we shouldn't consider that
       # a missing dep.
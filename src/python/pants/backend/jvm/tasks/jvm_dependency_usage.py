@@ -10,6 +10,7 @@ import os
 import sys
 from collections import defaultdict, namedtuple
 
+from pants.backend.jvm.subsystems.jar_entry_index import JarEntryIndex
 from pants.backend.jvm.targets.jar_library import JarLibrary
 from pants.backend.jvm.tasks.jvm_dependency_analyzer import JvmDependencyAnalyzer
 from pants.base.build_environment import get_buildroot
@@ -64,6 +65,10 @@ class JvmDependencyUsage(Task):
                   'result can differ from direct execution because cached information '
                   'doesn\'t depend on 3rdparty libraries versions.')
 
+  @classmethod
+  def subsystem_dependencies(cls):
+    return super(JvmDependencyUsage, cls).subsystem_dependencies() + (JarEntryIndex,)
+
   @classmethod
   def prepare(cls, options, round_manager):
     super(JvmDependencyUsage, cls).prepare(options, round_manager)
@@ -157,7 +162,8 @@ class JvmDependencyUsage(Task):
     `classes_by_source`, `runtime_classpath`, `product_deps_by_src` parameters and
     stores the result to the build cache.
     """
-    analyzer = JvmDependencyAnalyzer(get_buildroot(), runtime_classpath, product_deps_by_src)
+    analyzer = JvmDependencyAnalyzer(get_buildroot(), runtime_classpath, product_deps_by_src,
+                                     JarEntryIndex.global_instance())
     targets = self.context.targets()
     targets_by_file = analyzer.targets_by_file(targets)
     transitive_deps_by_target = analyzer.compute_transitive_deps_by_target(targets)
@@ -6,6 +6,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+from contextlib import contextmanager
 
 from pants.backend.jvm.tasks.jvm_tool_task_mixin import JvmToolTaskMixin
 from pants.base.exceptions import TaskError
@@ -13,7 +14,7 @@ from pants.init.subprocess import Subprocess
 from pants.java import util
 from pants.java.executor import SubprocessExecutor
 from pants.java.jar.jar_dependency import JarDependency
-from pants.java.nailgun_executor import NailgunExecutor, NailgunProcessGroup
+from pants.java.nailgun_executor import NailgunExecutor, NailgunExecutorPool, NailgunProcessGroup
 from pants.task.task import Task, TaskBase
 
 
@@ -29,6 +30,14 @@ class NailgunTaskBase(JvmToolTaskMixin, TaskBase):
              help='Timeout (secs) for nailgun startup.')
     register('--nailgun-connect-attempts', advanced=True, default=5, type=int,
              help='Max attempts for nailgun connects.')
+    register('--nailgun-pool-size', advanced=True, default=1, type=int,
+             help='The number of nailgun servers to run for this task. Each concurrent invocation '
+                  'of a tool by the task (eg: each compile under --worker-count) leases a server '
+                  'of its own, rather than sharing the heap of a single server.')
+    register('--nailgun-max-rss-bytes', advanced=True, default=None, type=int,
+             help='If set, a pooled nailgun server whose resident set size exceeds this many bytes '
+                  'after an invocation is restarted before its next one. Only applies if '
+                  '--nailgun-pool-size is greater than 1.')
     cls.register_jvm_tool(register,
                           'nailgun-server',
                           classpath=[
@@ -53,52 +62,84 @@ class NailgunTaskBase(JvmToolTaskMixin, TaskBase):
     self._executor_workdir = os.path.join(self.context.options.for_global_scope().pants_workdir,
                                           *id_tuple)
 
+    options = self.get_options()
+    if options.use_nailgun and options.nailgun_pool_size > 1:
+      self._nailgun_pool = NailgunExecutorPool(options.nailgun_pool_size,
+                                               self._create_pooled_nailgun_executor,
+                                               max_rss_bytes=options.nailgun_max_rss_bytes)
+    else:
+      self._nailgun_pool = None
+
+  def _create_nailgun_executor(self, identity, workdir):
+    classpath = os.pathsep.join(self.tool_classpath('nailgun-server'))
+    return NailgunExecutor(identity,
+                           workdir,
+                           classpath,
+                           self.dist,
+                           connect_timeout=self.get_options().nailgun_timeout_seconds,
+                           connect_attempts=self.get_options().nailgun_connect_attempts)
+
+  def _create_pooled_nailgun_executor(self, index):
+    return self._create_nailgun_executor('{}_{}'.format(self._identity, index),
+                                         os.path.join(self._executor_workdir, str(index)))
+
   def create_java_executor(self):
     """Create java executor that uses this task's ng daemon, if allowed.
 
     Call only in execute() or later. TODO: Enforce this.
     """
     if self.get_options().use_nailgun:
-      classpath = os.pathsep.join(self.tool_classpath('nailgun-server'))
-      return NailgunExecutor(self._identity,
-                             self._executor_workdir,
-                             classpath,
-                             self.dist,
-                             connect_timeout=self.get_options().nailgun_timeout_seconds,
-                             connect_attempts=self.get_options().nailgun_connect_attempts)
+      return self._create_nailgun_executor(self._identity, self._executor_workdir)
     else:
       return SubprocessExecutor(self.dist)
 
+  @contextmanager
+  def _lease_java_executor(self):
+    """A contextmanager that yields a java executor for a single invocation.
+
+    If this task has a pool of nailgun servers, the invocation leases one of its own, and the time
+    spent waiting for one is recorded in a `nailgun-lease` workunit.
+    """
+    if self._nailgun_pool is None:
+      yield self.create_java_executor()
+      return
+    with self.context.new_workunit(name='nailgun-lease'):
+      executor = self._nailgun_pool.acquire()
+    try:
+      yield executor
+    finally:
+      self._nailgun_pool.release(executor)
+
   def runjava(self, classpath, main, jvm_options=None, args=None, workunit_name=None,
               workunit_labels=None, workunit_log_config=None):
     """Runs the java main using the given classpath and args.
 
     If --no-use-nailgun is specified then the java main is run in a freshly spawned subprocess,
     otherwise a persistent nailgun server dedicated to this Task subclass is used to speed up
-    amortized run times.
+    amortized run times. With a --nailgun-pool-size greater than 1, concurrent calls each lease a
+    server of their own from the pool.
 
     :API: public
     """
-    executor = self.create_java_executor()
-
     # Creating synthetic jar to work around system arg length limit is not necessary
     # when `NailgunExecutor` is used because args are passed through socket, therefore turning off
     # creating synthetic jar if nailgun is used.
     create_synthetic_jar = not self.get_options().use_nailgun
-    try:
-      return util.execute_java(classpath=classpath,
-                               main=main,
-                               jvm_options=jvm_options,
-                               args=args,
-                               executor=executor,
-                               workunit_factory=self.context.new_workunit,
-                               workunit_name=workunit_name,
-                               workunit_labels=workunit_labels,
-                               workunit_log_config=workunit_log_config,
-                               create_synthetic_jar=create_synthetic_jar,
-                               synthetic_jar_dir=self._executor_workdir)
-    except executor.Error as e:
-      raise TaskError(e)
+    with self._lease_java_executor() as executor:
+      try:
+        return util.execute_java(classpath=classpath,
+                                 main=main,
+                                 jvm_options=jvm_options,
+                                 args=args,
+                                 executor=executor,
+                                 workunit_factory=self.context.new_workunit,
+                                 workunit_name=workunit_name,
+                                 workunit_labels=workunit_labels,
+                                 workunit_log_config=workunit_log_config,
+                                 create_synthetic_jar=create_synthetic_jar,
+                                 synthetic_jar_dir=self._executor_workdir)
+      except executor.Error as e:
+        raise TaskError(e)
 
 
 # TODO(John Sirois): This just prevents ripple - maybe inline
@@ -5,9 +5,12 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import base64
+import hashlib
 import os
 import re
 from collections import defaultdict
+from itertools import islice
 
 import six
 from six.moves import range
@@ -87,6 +90,39 @@ class ZincAnalysisParser(object):
         ret[src].extend(deps)
     return ret
 
+  def parse_api_fingerprint(self, infile):
+    """An efficient parser of just the internal apis section, returning a fingerprint of it.
+
+    The fingerprint changes only when the API of a class in the analysis (as seen by zinc's name
+    hashing) changes, and not when, eg, only the body of a method changes.
+    """
+    self._verify_version(infile)
+    apis = self._find_repeated_at_header(infile, b'internal apis')
+    hasher = hashlib.sha1()
+    for classname, serialized_apis in sorted(apis.items()):
+      hasher.update(classname)
+      hasher.update(b'\n')
+      for serialized_api in serialized_apis:
+        hasher.update(self._without_compilation_time(base64.b64decode(serialized_api)))
+    return hasher.hexdigest()
+
+  # Each serialized API begins with the `xsbti.api.Compilation` that produced it. Its class
+  # descriptor is terminated by TC_ENDBLOCKDATA and a null superclass descriptor (`xp`), and is
+  # followed by the value of its first field: the 8 byte `startTime` of the compilation.
+  _COMPILATION_CLASS = b'xsbti.api.Compilation'
+  _END_OF_CLASS_DESC = b'xp'
+  _START_TIME_LEN = 8
+
+  def _without_compilation_time(self, serialized_api):
+    start = serialized_api.find(self._COMPILATION_CLASS)
+    if start == -1:
+      return serialized_api
+    end = serialized_api.find(self._END_OF_CLASS_DESC, start)
+    if end == -1:
+      return serialized_api
+    end += len(self._END_OF_CLASS_DESC)
+    return serialized_api[:end] + serialized_api[end + self._START_TIME_LEN:]
+
   def rebase_from_path(self, infile_path, outfile_path, rebase_mappings, java_home=None):
     with open(infile_path, 'rb') as infile:
       with open(outfile_path, 'wb') as outfile:
@@ -96,12 +132,10 @@ class ZincAnalysisParser(object):
     self._verify_version(infile)
     outfile.write(ZincAnalysis.FORMAT_VERSION_LINE)
 
-    # Ensure we replace the longest match first, since the shorter one might be prefix of the longer.
-    rebase_mappings_sorted = [(old_base, rebase_mappings[old_base])
-                              for old_base in sorted(rebase_mappings, key=len, reverse=True)]
+    rebaser = _Rebaser(rebase_mappings)
     def rebase_element(cls):
       for header in cls.headers:
-        self._rebase_section(cls, header, infile, outfile, rebase_mappings_sorted, java_home)
+        self._rebase_section(cls, header, infile, outfile, rebaser, java_home)
 
     rebase_element(CompileSetup)
     rebase_element(Relations)
@@ -110,12 +144,21 @@ class ZincAnalysisParser(object):
     rebase_element(SourceInfos)
     rebase_element(Compilations)
 
-  def _rebase_section(self, cls, header, lines_iter, outfile, rebase_mappings, java_home=None):
-    # Booleans describing the rebasing logic to apply, if any.
-    rebase_pants_home_anywhere = header in cls.pants_home_anywhere
-    rebase_pants_home_prefix = header in cls.pants_home_prefix_only
+  # The number of items rebased and written at a time.
+  REBASE_CHUNK_ITEMS = 10000
+
+  def _rebase_section(self, cls, header, lines_iter, outfile, rebaser, java_home=None):
+    # The rebasing logic to apply, if any.
+    if header in cls.pants_home_anywhere:
+      rebase = rebaser.rebase_anywhere
+    elif header in cls.pants_home_prefix_only:
+      rebase = rebaser.rebase_prefixes
+    else:
+      rebase = None
     filter_java_home_anywhere = java_home and header in cls.java_home_anywhere
     filter_java_home_prefix = java_home and header in cls.java_home_prefix_only
+    lines_per_item = 1 if cls.inline_vals else 2
+    chunk_lines = self.REBASE_CHUNK_ITEMS * lines_per_item
 
     # Check the header and get the number of items.
     line = next(lines_iter)
@@ -123,36 +166,48 @@ class ZincAnalysisParser(object):
       raise self.ParseError('Expected: "{}:". Found: "{}"'.format(header, line))
     n = self._parse_num_items(next(lines_iter))
 
-    # Iterate over the lines, applying rebasing/dropping logic as required.
-    rebased_lines = []
-    num_rebased_items = 0
-    for _ in range(n):
-      line = next(lines_iter)
-      drop_line = ((filter_java_home_anywhere and java_home in line) or
-                   (filter_java_home_prefix and line.startswith(java_home)))
-      if not drop_line:
-        rebased_line = line
-        if rebase_pants_home_anywhere:
-          for rebased_from, rebased_to in rebase_mappings:
-            rebased_line = rebased_line.replace(rebased_from, rebased_to)
-        elif rebase_pants_home_prefix:
-          for rebased_from, rebased_to in rebase_mappings:
-            if line.startswith(rebased_from):
-              rebased_line = rebased_to + line[len(rebased_from):]
-              break
-        rebased_lines.append(rebased_line)
-        num_rebased_items += 1
-        if not cls.inline_vals:  # These values are blobs and never need to be rebased.
-          rebased_lines.append(next(lines_iter))
-      elif not cls.inline_vals:
-        next(lines_iter)  # Also drop the non-inline value.
-
-    # Write the rebased lines back out.
+    if filter_java_home_anywhere or filter_java_home_prefix:
+      # The number of items written depends on how many are dropped, so read the whole section.
+      def drop_line(line):
+        return ((filter_java_home_anywhere and java_home in line) or
+                (filter_java_home_prefix and line.startswith(java_home)))
+      lines = self._read_lines(lines_iter, n * lines_per_item)
+      if cls.inline_vals:
+        kept_lines = [line for line in lines if not drop_line(line)]
+      else:
+        # Also drop the non-inline value of each dropped key.
+        kept_lines = []
+        for i in range(0, len(lines), 2):
+          if not drop_line(lines[i]):
+            kept_lines.extend(lines[i:i + 2])
+      num_items = len(kept_lines) // lines_per_item
+      chunks = (kept_lines[i:i + chunk_lines] for i in range(0, len(kept_lines), chunk_lines))
+    else:
+      # Otherwise, stream the section through in chunks.
+      num_items = n
+      chunks = (self._read_lines(lines_iter, min(chunk_lines, n * lines_per_item - i))
+                for i in range(0, n * lines_per_item, chunk_lines))
+
     outfile.write(header + b':\n')
-    outfile.write(b'{} items\n'.format(num_rebased_items))
-    chunk_size = 10000
-    for i in range(0, len(rebased_lines), chunk_size):
-      outfile.write(b''.join(rebased_lines[i:i+chunk_size]))
+    outfile.write(b'{} items\n'.format(num_items))
+    for lines in chunks:
+      if rebase is None:
+        outfile.write(b''.join(lines))
+      elif cls.inline_vals:
+        outfile.write(rebase(b''.join(lines)))
+      else:
+        # These values are blobs and never need to be rebased: rebase the keys together.
+        rebased_keys = rebase(b''.join(lines[0::2])).split(b'\n')
+        for i in range(1, len(lines), 2):
+          outfile.write(rebased_keys[i // 2])
+          outfile.write(b'\n')
+          outfile.write(lines[i])
+
+  def _read_lines(self, lines_iter, n):
+    lines = list(islice(lines_iter, n))
+    if len(lines) != n:
+      raise self.ParseError('Expected {} more lines. Found {}.'.format(n, len(lines)))
+    return lines
 
   def _find_repeated_at_header(self, lines_iter, header):
     header_line = header + b':\n'
@@ -188,3 +243,62 @@ class ZincAnalysisParser(object):
     if not matchobj:
       raise self.ParseError('Expected: "<num> items". Found: "{0}"'.format(line))
     return int(matchobj.group(1))
+
+
+class _Rebaser(object):
+  """Replaces paths under any of a set of bases in a single pass over a buffer of lines.
+
+  The old bases are compiled into a single regex in the form of a prefix trie, so that a common
+  prefix of the bases (eg: the buildroot, which usually contains the workdir) is searched for as a
+  literal, and the longest matching base is always the one replaced.
+  """
+
+  def __init__(self, rebase_mappings):
+    """
+    :param dict rebase_mappings: A map from old base to new base.
+    """
+    self._rebase_mappings = rebase_mappings
+    if rebase_mappings:
+      pattern = self._trie_pattern(self._trie(rebase_mappings))
+      self._anywhere_re = re.compile(pattern)
+      self._prefix_re = re.compile(b'^' + pattern, re.MULTILINE)
+    else:
+      self._anywhere_re = self._prefix_re = None
+
+  @staticmethod
+  def _trie(strings):
+    trie = {}
+    for string in strings:
+      node = trie
+      for i in range(len(string)):
+        node = node.setdefault(string[i:i + 1], {})
+      node[b''] = None  # Marks the end of a string.
+    return trie
+
+  @classmethod
+  def _trie_pattern(cls, node):
+    alternatives = [re.escape(char) + cls._trie_pattern(child)
+                    for char, child in sorted(node.items()) if char]
+    if not alternatives:
+      return b''
+    pattern = (alternatives[0] if len(alternatives) == 1
+               else b'(?:{})'.format(b'|'.join(alternatives)))
+    if b'' in node:
+      # A string ends here, but prefer the longer strings that continue from it: `?` is greedy.
+      pattern = b'(?:{})?'.format(pattern)
+    return pattern
+
+  def _replacement(self, match):
+    return self._rebase_mappings[match.group(0)]
+
+  def rebase_anywhere(self, lines):
+    """Rebase all occurrences of the old bases in the given lines."""
+    if self._anywhere_re is None:
+      return lines
+    return self._anywhere_re.sub(self._replacement, lines)
+
+  def rebase_prefixes(self, lines):
+    """Rebase each of the given lines that starts with an old base."""
+    if self._prefix_re is None:
+      return lines
+    return self._prefix_re.sub(self._replacement, lines)
@@ -333,10 +333,14 @@ class ExportTask(ResolveRequirementsTaskBase, IvyTaskMixin, CoursierMixin):
       # lowest version.
       default_interpreter = min(python_interpreter_targets_mapping.keys())
 
+      # The requirements of each interpreter are resolved concurrently.
+      resolves = [(interpreter,
+                   filter(has_python_requirements, Target.closure_for_targets(targets)))
+                  for interpreter, targets in six.iteritems(python_interpreter_targets_mapping)]
+      chroots = self._build_requirements_pexes([self._requirements_pex_args(interpreter, req_libs)
+                                                for interpreter, req_libs in resolves])
       interpreters_info = {}
-      for interpreter, targets in six.iteritems(python_interpreter_targets_mapping):
-        req_libs = filter(has_python_requirements, Target.closure_for_targets(targets))
-        chroot = self.resolve_requirements(interpreter, req_libs)
+      for (interpreter, _), chroot in zip(resolves, chroots):
         interpreters_info[str(interpreter.identity)] = {
           'binary': interpreter.binary,
           'chroot': chroot.path()
@@ -0,0 +1,81 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import errno
+import os
+
+from wheel.install import WheelFile
+
+from pants.base.hash_utils import hash_file
+from pants.util.contextutil import open_zip, temporary_dir
+from pants.util.dirutil import safe_mkdir
+
+
+class DistributionStore(object):
+  """A content-addressed store of distributions, installed in the layout PEXes hold them in.
+
+  PEXBuilder installs each packed distribution (a wheel or a zipped egg) that is added to a PEX
+  afresh, and copies the result into the PEX. Adding the installed copy of a distribution from the
+  store instead installs each distinct distribution once, and allows a PEXBuilder that does not
+  copy to hard link the files of the distribution into the PEX: so PEXes of many sets of
+  requirements share the files of their common distributions.
+
+  A distribution is stored under its filename and the digest of its content. The filename of a
+  distribution names its project and version, and the interpreters and platforms it supports, so
+  a distribution is shared by all of the interpreters and platforms it was resolved for.
+  """
+
+  VERSION = 1
+
+  def __init__(self, root_dir):
+    """
+    :param str root_dir: The directory to store installed distributions under.
+    """
+    self._dir = os.path.join(root_dir, 'v{}'.format(self.VERSION))
+
+  def installed(self, dist):
+    """Return the installed copy of the given distribution, and the name to add it to a PEX with.
+
+    :param dist: A resolved :class:`pkg_resources.Distribution`.
+    :returns: A tuple of (distribution, dist_name) to pass to `PEXBuilder.add_distribution`.
+    """
+    dist_name = os.path.basename(dist.location)
+    if os.path.isdir(dist.location):
+      # Already installed.
+      return dist, dist_name
+
+    path = os.path.join(self._dir, dist_name, hash_file(dist.location))
+    if not os.path.isdir(path):
+      parent_dir = os.path.dirname(path)
+      safe_mkdir(parent_dir)
+      with temporary_dir(root_dir=parent_dir) as tmp_path:
+        self._install(dist.location, dist_name, tmp_path)
+        try:
+          os.rename(tmp_path, path)
+        except OSError as e:
+          # An existing entry is never replaced, since it may be being linked into a PEX: a
+          # concurrent install of the same distribution installed identical content.
+          if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+            raise
+    return dist.clone(location=path), dist_name
+
+  @staticmethod
+  def _install(location, dist_name, path):
+    """Install the packed distribution at location to path, as `PEXBuilder` would."""
+    if dist_name.endswith('.whl'):
+      # Wheels are not necessarily importable as-is, so they are installed into their own base.
+      WheelFile(location).install(overrides={'purelib': path,
+                                             'headers': os.path.join(path, 'headers'),
+                                             'scripts': os.path.join(path, 'bin'),
+                                             'platlib': path,
+                                             'data': path},
+                                  force=True)
+    else:
+      with open_zip(location) as zf:
+        for name in zf.namelist():
+          if not name.endswith('/'):
+            zf.extract(name, path)
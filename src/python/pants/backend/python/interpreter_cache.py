@@ -5,8 +5,11 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import json
 import os
 import shutil
+import time
+from collections import OrderedDict
 
 from pex.interpreter import PythonIdentity, PythonInterpreter
 from pex.package import EggPackage, Package, SourcePackage
@@ -15,6 +18,7 @@ from pex.variables import Variables
 
 from pants.backend.python.targets.python_target import PythonTarget
 from pants.base.exceptions import TaskError
+from pants.base.worker_pool import Work
 from pants.process.lock import OwnerPrintingInterProcessFileLock
 from pants.util.dirutil import safe_concurrent_creation, safe_mkdir
 from pants.util.memo import memoized_property
@@ -34,6 +38,9 @@ class PythonInterpreterCache(object):
   class UnsatisfiableInterpreterConstraintsError(TaskError):
     """Indicates a python interpreter matching given constraints could not be located."""
 
+  # The version of the format of the record of interpreter identities.
+  IDENTITIES_VERSION = 1
+
   @staticmethod
   def _matches(interpreter, filters):
     return any(interpreter.identity.matches(filt) for filt in filters)
@@ -60,10 +67,18 @@ class PythonInterpreterCache(object):
     else:
       return []
 
-  def __init__(self, python_setup, python_repos, logger=None):
+  def __init__(self, python_setup, python_repos, logger=None, worker_pool=None):
+    """
+    :param python_setup: The :class:`PythonSetup` to configure the cache with.
+    :param python_repos: The :class:`PythonRepos` to resolve interpreter extras from.
+    :param logger: An optional callable to log messages with.
+    :param worker_pool: An optional :class:`pants.base.worker_pool.WorkerPool` to set up distinct
+                        interpreters concurrently on; they are set up one at a time without one.
+    """
     self._python_setup = python_setup
     self._python_repos = python_repos
     self._logger = logger or (lambda msg: True)
+    self._worker_pool = worker_pool
 
   @memoized_property
   def _cache_dir(self):
@@ -127,17 +142,134 @@ class PythonInterpreterCache(object):
           self._logger('Detected interpreter {}: {}'.format(pi.binary, str(pi.identity)))
           yield pi
 
-  def _setup_paths(self, paths, filters):
-    """Find interpreters under paths, and cache them."""
-    for interpreter in self._matching(PythonInterpreter.all(paths), filters):
-      identity_str = str(interpreter.identity)
-      cache_path = os.path.join(self._cache_dir, identity_str)
+  def _setup_path(self, interpreter, cache_path, filters):
+    start = time.time()
+    pi = self._interpreter_from_path(cache_path, filters)
+    if pi is None:
+      self._setup_interpreter(interpreter, cache_path)
       pi = self._interpreter_from_path(cache_path, filters)
-      if pi is None:
-        self._setup_interpreter(interpreter, cache_path)
-        pi = self._interpreter_from_path(cache_path, filters)
-      if pi:
-        yield pi
+    self._logger('Set up interpreter {} in {:.3f}s'.format(interpreter.binary, time.time() - start))
+    return pi
+
+  def _setup_paths(self, paths, filters):
+    """Find interpreters under paths, and cache them.
+
+    Setting up an interpreter may involve resolving setuptools and wheel for it, so distinct
+    interpreters are set up concurrently, on the worker pool if one was given.
+    """
+    # Interpreters with the same identity share a cache path, and so are only set up once.
+    interpreters_by_cache_path = OrderedDict()
+    for interpreter in self._matching(self._find_interpreters(paths), filters):
+      cache_path = os.path.join(self._cache_dir, str(interpreter.identity))
+      interpreters_by_cache_path.setdefault(cache_path, interpreter)
+
+    args_tuples = [(interpreter, path, filters)
+                   for path, interpreter in interpreters_by_cache_path.items()]
+    if self._worker_pool and len(args_tuples) > 1:
+      pis = self._worker_pool.submit_work_and_wait(Work(self._setup_path, args_tuples))
+    else:
+      pis = [self._setup_path(*args) for args in args_tuples]
+    return [pi for pi in pis if pi]
+
+  def _find_interpreters(self, paths):
+    """Find the interpreters under paths, as `PythonInterpreter.all` does.
+
+    Identifying an interpreter means running it, so the identity and extras of each binary are
+    recorded in the cache, along with the size and modification time of the binary and of the
+    directories its extras were found in. A binary is only run again if any of those change.
+
+    Scripts, e.g. pyenv shims, may run a different interpreter depending on the environment and
+    working directory they are run in, and so are never recorded, but are run every time.
+    """
+    identities = self._read_identities()
+    updated = False
+    interpreters = []
+    for path in paths:
+      for binary in PythonInterpreter.expand_path(path):
+        basename = os.path.basename(binary)
+        if not any(matcher.match(basename) is not None for matcher in PythonInterpreter.REGEXEN):
+          continue
+        try:
+          binary_key = self._stat_key(binary)
+        except OSError:
+          continue
+
+        if self._is_script(binary):
+          record = self._identify(binary, binary_key)
+        else:
+          record = identities.get(binary)
+          if not self._is_current(record, binary_key):
+            record = self._identify(binary, binary_key)
+            identities[binary] = record
+            updated = True
+        if record['identity'] is not None:
+          extras = {(key, version): location for key, version, location in record['extras']}
+          interpreters.append(PythonInterpreter(binary,
+                                                PythonIdentity.from_path(record['identity']),
+                                                extras=extras))
+
+    if updated:
+      self._write_identities(identities)
+    return PythonInterpreter.filter(interpreters)
+
+  @staticmethod
+  def _is_script(path):
+    # A binary that cannot be read is treated as a script, so that its identity is not recorded.
+    try:
+      with open(path, 'rb') as fp:
+        return fp.read(2) == b'#!'
+    except (IOError, OSError):
+      return True
+
+  @staticmethod
+  def _stat_key(path):
+    stat = os.stat(path)
+    return [os.path.realpath(path), stat.st_size, int(stat.st_mtime * 1e9)]
+
+  def _is_current(self, record, binary_key):
+    if not record or record['binary'] != binary_key:
+      return False
+    try:
+      return all(self._stat_key(location) == key for location, key in record['locations'])
+    except OSError:
+      return False
+
+  def _identify(self, binary, binary_key):
+    # A binary that cannot be identified is recorded too, so that it is not run again until it
+    # changes.
+    record = {'binary': binary_key, 'identity': None, 'extras': [], 'locations': []}
+    try:
+      interpreter = PythonInterpreter.from_binary(binary)
+    except Exception as e:
+      self._logger('Could not identify {}: {}'.format(binary, e))
+      return record
+    locations = sorted(set(interpreter.extras.values()))
+    record['identity'] = str(interpreter.identity)
+    record['extras'] = sorted([key, version, location]
+                              for (key, version), location in interpreter.extras.items())
+    record['locations'] = [[location, self._stat_key(location)]
+                           for location in locations if os.path.exists(location)]
+    return record
+
+  @memoized_property
+  def _identities_path(self):
+    return os.path.join(self._cache_dir, 'identities.json')
+
+  def _read_identities(self):
+    try:
+      with open(self._identities_path, 'rb') as fp:
+        recorded = json.loads(fp.read().decode('utf-8'))
+      if recorded.get('version') == self.IDENTITIES_VERSION:
+        return recorded['interpreters']
+    except (IOError, OSError, ValueError, KeyError):
+      pass
+    return {}
+
+  def _write_identities(self, identities):
+    content = json.dumps({'version': self.IDENTITIES_VERSION, 'interpreters': identities})
+    with safe_concurrent_creation(self._identities_path) as tmp_path:
+      with open(tmp_path, 'wb') as fp:
+        fp.write(content.encode('utf-8'))
 
   def setup(self, paths=(), filters=(b'',)):
     """Sets up a cache of python interpreters.
@@ -6,6 +6,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+from multiprocessing import cpu_count
 
 from pkg_resources import Requirement
 
@@ -50,12 +51,21 @@ class PythonSetup(Subsystem):
     register('--resolver-cache-dir', advanced=True, default=None, metavar='<dir>',
              help='The parent directory for the requirement resolver cache. '
                   'If unspecified, a standard path under the workdir is used.')
+    register('--distribution-store-dir', advanced=True, default=None, metavar='<dir>',
+             help='The parent directory for the store of installed distributions, that resolved '
+                  'distributions are linked into PEXes from. '
+                  'If unspecified, a standard path under the workdir is used.')
     register('--resolver-cache-ttl', advanced=True, type=int, metavar='<seconds>',
              default=10 * 365 * 86400,  # 10 years.
              help='The time in seconds before we consider re-resolving an open-ended requirement, '
                   'e.g. "flask>=0.2" if a matching distribution is available on disk.')
     register('--resolver-allow-prereleases', advanced=True, type=bool, default=UnsetBool,
              fingerprint=True, help='Whether to include pre-releases when resolving requirements.')
+    register('--resolver-jobs', advanced=True, type=int, default=cpu_count(),
+             help='The maximum number of distinct sets of requirements, or of interpreters, to '
+                  'resolve concurrently. Resolves that share a resolver cache directory, i.e. '
+                  'that are for the same interpreter, are never run concurrently, downloads '
+                  'included.')
     register('--artifact-cache-dir', advanced=True, default=None, metavar='<dir>',
              help='The parent directory for the python artifact cache. '
                   'If unspecified, a standard path under the workdir is used.')
@@ -101,6 +111,11 @@ class PythonSetup(Subsystem):
     return (self.get_options().resolver_cache_dir or
             os.path.join(self.scratch_dir, 'resolved_requirements'))
 
+  @property
+  def distribution_store_dir(self):
+    return (self.get_options().distribution_store_dir or
+            os.path.join(self.scratch_dir, 'distributions'))
+
   @property
   def resolver_cache_ttl(self):
     return self.get_options().resolver_cache_ttl
@@ -109,6 +124,10 @@ class PythonSetup(Subsystem):
   def resolver_allow_prereleases(self):
     return self.get_options().resolver_allow_prereleases
 
+  @property
+  def resolver_jobs(self):
+    return self.get_options().resolver_jobs
+
   @property
   def artifact_cache_dir(self):
     """Note that this is unrelated to the general pants artifact cache."""
@@ -14,9 +14,12 @@ from twitter.common.collections import OrderedSet
 
 from pants.backend.python.tasks.pex_build_util import (dump_sources, has_python_sources,
                                                        has_resources, is_python_target)
+from pants.base.hash_utils import hash_all
+from pants.build_graph.files import Files
 from pants.invalidation.cache_manager import VersionedTargetSet
 from pants.task.task import Task
-from pants.util.dirutil import safe_concurrent_creation
+from pants.util.dirutil import (fast_relpath, safe_concurrent_creation,
+                                safe_rm_oldest_items_in_dir, safe_walk)
 
 
 class GatherSources(Task):
@@ -33,6 +36,15 @@ class GatherSources(Task):
   def implementation_version(cls):
     return super(GatherSources, cls).implementation_version() + [('GatherSources', 5)]
 
+  @classmethod
+  def register_options(cls, register):
+    super(GatherSources, cls).register_options(register)
+    register('--incremental', advanced=True, type=bool, default=False,
+             help='Gather the sources of each target into a chroot of its own, which is only '
+                  'recreated when that target changes, and hard link the source PEX together from '
+                  'those chroots. Otherwise every source is copied into a new source PEX whenever '
+                  'any target changes.')
+
   @classmethod
   def product_types(cls):
     return [cls.PYTHON_SOURCES]
@@ -79,7 +91,10 @@ class GatherSources(Task):
       # Note that we use the same interpreter for all targets: We know the interpreter
       # is compatible (since it's compatible with all targets in play).
       with safe_concurrent_creation(source_pex_path) as safe_path:
-        self._build_pex(interpreter, safe_path, [vt.target for vt in versioned_targets])
+        if self.get_options().incremental:
+          self._link_pex(interpreter, safe_path, [vt.target for vt in versioned_targets])
+        else:
+          self._build_pex(interpreter, safe_path, [vt.target for vt in versioned_targets])
     return PEX(source_pex_path, interpreter=interpreter)
 
   def _build_pex(self, interpreter, path, targets):
@@ -87,3 +102,43 @@ class GatherSources(Task):
     for target in targets:
       dump_sources(builder, target, self.context.log)
     builder.freeze()
+
+  def _link_pex(self, interpreter, path, targets):
+    """Build the source PEX at path by hard linking in the chroots of each of the targets.
+
+    The chroots are not merged via `PEX_PATH` instead, because a package whose modules are spread
+    across several targets must be importable from a single sys.path entry.
+    """
+    builder = PEXBuilder(path=path, interpreter=interpreter, copy=False)
+    for target in targets:
+      if type(target) == Files:
+        # See `pex_build_util._create_source_dumper`.
+        builder.info.zip_safe = False
+      add = builder.add_resource if has_resources(target) else builder.add_source
+      chroot = self._target_chroot(interpreter, target)
+      for root, _, files in safe_walk(chroot):
+        for f in files:
+          abs_path = os.path.join(root, f)
+          add(abs_path, fast_relpath(abs_path, chroot))
+    builder.freeze()
+
+  def _target_chroot(self, interpreter, target):
+    """Return a chroot of the sources of the given target alone, creating it if needed.
+
+    The chroot is keyed by everything that determines its layout and content, so it is shared by
+    all source PEXes that include the same version of the target. The chroots of older versions of
+    the target are removed when it is created: source PEXes hard link their sources, so they are
+    unaffected.
+    """
+    chroot_id = hash_all([type(target).__name__,
+                          target.target_base,
+                          target.invalidation_hash() or 'no_fingerprint'])
+    chroot = os.path.realpath(os.path.join(self.workdir, 'targets', target.id, chroot_id))
+    if not os.path.isdir(chroot):
+      with safe_concurrent_creation(chroot) as safe_path:
+        # The sources are copied, so that the chroot is unaffected by edits made in place to them:
+        # and the builder is not frozen, so that the chroot holds nothing but the sources.
+        builder = PEXBuilder(path=safe_path, interpreter=interpreter, copy=True)
+        dump_sources(builder, target, self.context.log)
+      safe_rm_oldest_items_in_dir(os.path.dirname(chroot), 0, excludes={chroot})
+    return chroot
@@ -6,11 +6,15 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
 
 from pex.fetcher import Fetcher
 from pex.resolver import resolve
 from twitter.common.collections import OrderedSet
 
+from pants.backend.python.distribution_store import DistributionStore
 from pants.backend.python.subsystems.python_setup import PythonSetup
 from pants.backend.python.targets.python_binary import PythonBinary
 from pants.backend.python.targets.python_distribution import PythonDistribution
@@ -20,9 +24,15 @@ from pants.backend.python.targets.python_tests import PythonTests
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
 from pants.build_graph.files import Files
+from pants.process.lock import OwnerPrintingInterProcessFileLock
 from pants.python.python_repos import PythonRepos
 
 
+# Guards the creation of the per-directory locks below.
+_resolver_cache_locks_lock = threading.Lock()
+_resolver_cache_locks = defaultdict(threading.Lock)
+
+
 def is_python_target(tgt):
   # We'd like to take all PythonTarget subclasses, but currently PythonThriftLibrary and
   # PythonAntlrLibrary extend PythonTarget, and until we fix that (which we can't do until
@@ -115,15 +125,42 @@ def dump_requirements(builder, interpreter, reqs, log, platforms=None):
 
   # Resolve the requirements into distributions.
   distributions = _resolve_multi(interpreter, deduped_reqs, platforms, find_links)
+  # Distributions are added from their installed copies in the store, so that each is only
+  # installed once, and so that builders which link rather than copy share its files. This is done
+  # outside of the resolver cache lock: builds for other interpreters may concurrently install the
+  # same (e.g. universal) distribution, which the store allows.
+  store = DistributionStore(PythonSetup.global_instance().distribution_store_dir)
   locations = set()
   for platform, dists in distributions.items():
     for dist in dists:
       if dist.location not in locations:
         log.debug('  Dumping distribution: .../{}'.format(os.path.basename(dist.location)))
-        builder.add_distribution(dist)
+        installed_dist, dist_name = store.installed(dist)
+        builder.add_distribution(installed_dist, dist_name=dist_name)
       locations.add(dist.location)
 
 
+@contextmanager
+def resolver_cache_lock(cache_dir):
+  """Hold exclusive use of a resolver cache directory, across both threads and processes.
+
+  The resolver writes the distributions it fetches and builds into its cache via fixed temporary
+  paths, so concurrent resolves that share a cache may corrupt it. A file lock only excludes other
+  processes, and so the threads of this process are first excluded by a lock of their own.
+
+  The resolver fetches, builds and caches each distribution in turn, so the lock must be held for
+  the whole resolve: resolves that share a cache are serialized, downloads included, and only
+  resolves against distinct caches (i.e. for distinct interpreters) run concurrently.
+
+  :param str cache_dir: The resolver cache directory to lock.
+  """
+  with _resolver_cache_locks_lock:
+    thread_lock = _resolver_cache_locks[cache_dir]
+  with thread_lock:
+    with OwnerPrintingInterProcessFileLock(path='{}.lock'.format(cache_dir)):
+      yield
+
+
 def _resolve_multi(interpreter, requirements, platforms, find_links):
   """Multi-platform dependency resolution for PEX files.
 
@@ -145,17 +182,17 @@ def _resolve_multi(interpreter, requirements, platforms, find_links):
   fetchers = python_repos.get_fetchers()
   fetchers.extend(Fetcher([path]) for path in find_links)
 
-  for platform in platforms:
-    requirements_cache_dir = os.path.join(python_setup.resolver_cache_dir,
-                                          str(interpreter.identity))
-    distributions[platform] = resolve(
-      requirements=[req.requirement for req in requirements],
-      interpreter=interpreter,
-      fetchers=fetchers,
-      platform=None if platform == 'current' else platform,
-      context=python_repos.get_network_context(),
-      cache=requirements_cache_dir,
-      cache_ttl=python_setup.resolver_cache_ttl,
-      allow_prereleases=python_setup.resolver_allow_prereleases)
+  requirements_cache_dir = os.path.join(python_setup.resolver_cache_dir, str(interpreter.identity))
+  with resolver_cache_lock(requirements_cache_dir):
+    for platform in platforms:
+      distributions[platform] = resolve(
+        requirements=[req.requirement for req in requirements],
+        interpreter=interpreter,
+        fetchers=fetchers,
+        platform=None if platform == 'current' else platform,
+        context=python_repos.get_network_context(),
+        cache=requirements_cache_dir,
+        cache_ttl=python_setup.resolver_cache_ttl,
+        allow_prereleases=python_setup.resolver_allow_prereleases)
 
   return distributions
@@ -5,6 +5,8 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import ast
+import fnmatch
 import itertools
 import json
 import os
@@ -12,30 +14,36 @@ import shutil
 import time
 import traceback
 import uuid
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from contextlib import contextmanager
 from textwrap import dedent
+from xml.dom import minidom
+from xml.parsers.expat import ExpatError
 
+from pex.interpreter import PythonInterpreter
 from six import StringIO
 from six.moves import configparser
 
+from pants.backend.python.subsystems.pytest import PyTest
 from pants.backend.python.targets.python_tests import PythonTests
 from pants.backend.python.tasks.gather_sources import GatherSources
 from pants.backend.python.tasks.pytest_prep import PytestPrep
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import ErrorWhileTesting, TaskError
 from pants.base.fingerprint_strategy import DefaultFingerprintStrategy
-from pants.base.hash_utils import Sharder
+from pants.base.hash_utils import Sharder, hash_file
+from pants.base.worker_pool import Work, WorkerPool
 from pants.base.workunit import WorkUnitLabel
 from pants.build_graph.target import Target
+from pants.java.junit.junit_xml_parser import parse_test_durations
 from pants.task.task import Task
 from pants.task.testrunner_task_mixin import PartitionedTestRunnerTaskMixin, TestResult
 from pants.util.contextutil import environment_as, pushd, temporary_dir, temporary_file
-from pants.util.dirutil import mergetree, safe_mkdir, safe_mkdir_for
+from pants.util.dirutil import mergetree, safe_delete, safe_mkdir, safe_mkdir_for
 from pants.util.memo import memoized_method, memoized_property
 from pants.util.objects import datatype
 from pants.util.process_handler import SubprocessProcessHandler
-from pants.util.strutil import safe_shlex_split
+from pants.util.strutil import pluralize, safe_shlex_split
 from pants.util.xml_parser import XmlParser
 
 
@@ -128,15 +136,38 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
              help='Subset of tests to run, in the form M/N, 0 <= M < N. For example, 1/3 means '
                   'run tests number 2, 5, 8, 11, ...')
 
+    register('--parallel-shards', advanced=True, type=int, default=0, fingerprint=True,
+             help='Split the test files of each partition into at most this many shards, balanced '
+                  'by the durations of their tests in previous runs, and run the shards '
+                  'concurrently, each in a pytest process of its own. 0 or 1 runs the tests of a '
+                  'partition in a single pytest process.')
+
   @classmethod
   def supports_passthru_args(cls):
     return True
 
+  @classmethod
+  def subsystem_dependencies(cls):
+    # NB: The requirements of pytest are part of the key of the recorded results of test modules.
+    return super(PytestRun, cls).subsystem_dependencies() + (PyTest,)
+
   @classmethod
   def prepare(cls, options, round_manager):
     super(PytestRun, cls).prepare(options, round_manager)
     round_manager.require_data(PytestPrep.PytestBinary)
 
+  class OptionError(TaskError):
+    """Indicates an invalid combination of options for this task."""
+
+  def __init__(self, *args, **kwargs):
+    super(PytestRun, self).__init__(*args, **kwargs)
+
+    options = self.get_options()
+    self._parallel_shards = options.parallel_shards
+    if self._parallel_shards > 1 and options.test_shard is not None:
+      raise self.OptionError('Cannot set both `test_shard` ({}) and `parallel_shards` ({}) at the '
+                             'same time.'.format(options.test_shard, self._parallel_shards))
+
   def _test_target_filter(self):
     def target_filter(target):
       return isinstance(target, PythonTests)
@@ -252,7 +283,13 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
         yield args, coverage_rc
 
   @contextmanager
-  def _maybe_emit_coverage_data(self, workdirs, test_targets, pex):
+  def _maybe_emit_coverage_data(self, workdirs, test_targets, pex, combine=False):
+    """Yields the pytest args to collect coverage with, if requested, and reports coverage after.
+
+    :param bool combine: True if the tests are run in shards, each of which records its coverage
+                         data in a `.coverage.shard-*` file of its own: the data is then combined
+                         before it is reported.
+    """
     coverage = self.get_options().coverage
     if coverage is None:
       yield []
@@ -340,6 +377,9 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
         # The '.coverage' data file is output in the CWD of the test run above; so we make sure to
         # look for it there.
         with self._maybe_run_in_chroot():
+          if combine and fnmatch.filter(os.listdir('.'), '.coverage.shard-*'):
+            coverage_run('combine', ['--rcfile', coverage_rc])
+
           # On failures or timeouts, the .coverage file won't be written.
           if not os.path.exists('.coverage'):
             self.context.log.warn('No .coverage file was found! Skipping coverage reporting.')
@@ -472,17 +512,19 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
       yield conftest, get_pytest_rootdir
 
   @contextmanager
-  def _test_runner(self, workdirs, test_targets, sources_map):
+  def _test_runner(self, workdirs, test_targets, sources_map, sharded=False):
     pytest_binary = self.context.products.get_data(PytestPrep.PytestBinary)
     with self._conftest(sources_map) as (conftest, get_pytest_rootdir):
       with self._maybe_emit_coverage_data(workdirs,
                                           test_targets,
-                                          pytest_binary.pex) as coverage_args:
+                                          pytest_binary.pex,
+                                          combine=sharded) as coverage_args:
         yield pytest_binary, [conftest] + coverage_args, get_pytest_rootdir
 
-  def _do_run_tests_with_args(self, pex, args):
+  def _do_run_tests_with_args(self, pex, args, extra_env=None):
     try:
       env = dict(os.environ)
+      env.update(extra_env or {})
 
       # Ensure we don't leak source files or undeclared 3rdparty requirements into the py.test PEX
       # environment.
@@ -562,6 +604,211 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
 
     return failed_targets
 
+  # The default `python_files` patterns of pytest: other sources are treated as support files, which
+  # all of the test modules of their target depend on.
+  _TEST_MODULE_PATTERNS = ('test_*.py', '*_test.py')
+
+  @property
+  def _result_cache_enabled(self):
+    options = self.get_options()
+    # Coverage is only collected for the tests that run, and shards are selected from all of the
+    # tests that run, so recorded results are not used with either. Profiled runs are never cached.
+    return (self.test_result_cache is not None and
+            options.coverage is None and
+            options.test_shard is None and
+            not options.profile)
+
+  @classmethod
+  def _is_test_module(cls, source):
+    name = os.path.basename(source)
+    return any(fnmatch.fnmatch(name, pattern) for pattern in cls._TEST_MODULE_PATTERNS)
+
+  def _test_result_keys(self, targets):
+    """Returns a map from the test modules of the given targets to the keys of their results.
+
+    The results of a test module are keyed by its source, by all of the sources of its target that
+    are not test modules (such as conftest.py files and test helpers), and by the sources of its
+    target that any of those import, transitively.
+    """
+    buildroot = get_buildroot()
+    interpreter = self.context.products.get_data(PythonInterpreter)
+    pytest_requirements = ','.join(PyTest.global_instance().get_requirement_strings())
+
+    def digest(source):
+      return '{}:{}'.format(source, hash_file(os.path.join(buildroot, source)))
+
+    result_keys = {}
+    for target in targets:
+      sources = sorted(target.sources_relative_to_buildroot())
+      local_imports = self._local_imports(target.target_base, sources)
+      support = [source for source in sources if not self._is_test_module(source)]
+      for module in sources:
+        if self._is_test_module(module):
+          inputs = set()
+          pending = [module] + support
+          while pending:
+            pending_source = pending.pop()
+            if pending_source not in inputs:
+              inputs.add(pending_source)
+              pending.extend(local_imports[pending_source])
+          result_keys[module] = self.test_result_cache_key(target,
+                                                           str(interpreter.identity),
+                                                           pytest_requirements,
+                                                           *[digest(source)
+                                                             for source in sorted(inputs)])
+    return result_keys
+
+  @classmethod
+  def _local_imports(cls, source_root, sources):
+    """Returns a map from each of the given sources to the ones among them that it may import.
+
+    Imports are over-approximated: a source that cannot be parsed may import any of the sources.
+
+    :param str source_root: The source root of the sources, relative to the buildroot.
+    :param list sources: Python sources, relative to the buildroot.
+    """
+    buildroot = get_buildroot()
+    source_by_module = {}
+    package_by_source = {}
+    for source in sources:
+      parts = os.path.splitext(os.path.relpath(source, source_root))[0].split(os.sep)
+      if parts[-1] == '__init__':
+        parts.pop()
+        package_by_source[source] = parts
+      else:
+        package_by_source[source] = parts[:-1]
+      source_by_module['.'.join(parts)] = source
+
+    local_imports = {}
+    for source in sources:
+      try:
+        with open(os.path.join(buildroot, source), 'rb') as fp:
+          tree = ast.parse(fp.read(), source)
+      except (IOError, SyntaxError, TypeError, ValueError):
+        local_imports[source] = sources
+        continue
+      names = cls._imported_names(tree, package_by_source[source])
+      local_imports[source] = [source_by_module[name] for name in names
+                               if name in source_by_module]
+    return local_imports
+
+  @staticmethod
+  def _imported_names(tree, package):
+    """Returns the names of the modules that the given module may import, including packages.
+
+    :param tree: The parsed module.
+    :param list package: The components of the name of the package that contains the module.
+    """
+    names = set()
+
+    def add(name):
+      parts = name.split('.')
+      names.update('.'.join(parts[:i + 1]) for i in range(len(parts)))
+      # Python 2 resolves absolute imports relative to the package of the module first.
+      if package:
+        names.add('.'.join(package + parts))
+
+    for node in ast.walk(tree):
+      if isinstance(node, ast.Import):
+        for alias in node.names:
+          add(alias.name)
+      elif isinstance(node, ast.ImportFrom):
+        if node.level:
+          base = package[:max(len(package) - (node.level - 1), 0)]
+          module = '.'.join(base + ([node.module] if node.module else []))
+        else:
+          module = node.module
+        for alias in node.names:
+          add('{}.{}'.format(module, alias.name) if module else alias.name)
+    return names
+
+  def _record_test_results(self, junitxml_path, targets, pytest_rootdir, result_keys, succeeded):
+    """Records the testcases of the passing test modules of a run in the test result cache.
+
+    :param bool succeeded: True if the run succeeded: the modules that produced no testcases are
+                           then known to have no tests, rather than to have been cut short.
+    """
+    relsrc_to_source = {relsrc: os.path.join(target.target_base, src)
+                        for target in targets
+                        for relsrc, src in self._map_relsrc_to_sources(target)}
+    buildroot_relpath = os.path.relpath(pytest_rootdir, get_buildroot())
+
+    try:
+      testcases = minidom.parse(junitxml_path).getElementsByTagName('testcase')
+    except (IOError, ExpatError) as e:
+      raise TaskError('Error parsing xml file at {}: {}'.format(junitxml_path, e))
+    testcases_by_module = defaultdict(list)
+    for testcase in testcases:
+      relsrc = os.path.join(buildroot_relpath, testcase.getAttribute('file'))
+      testcases_by_module[relsrc_to_source.get(relsrc)].append(testcase)
+
+    for module, key in result_keys.items():
+      module_testcases = testcases_by_module.get(module)
+      if not module_testcases and not succeeded:
+        continue
+      if any(testcase.getElementsByTagName('failure') or testcase.getElementsByTagName('error')
+             for testcase in module_testcases or ()):
+        continue
+      self.test_result_cache.put(key, b''.join(testcase.toxml(encoding='utf-8')
+                                               for testcase in module_testcases or ()))
+
+  @classmethod
+  def _merge_recorded_results(cls, junitxml_path, reports):
+    """Adds the recorded testcases of skipped test modules to the junit xml report of a run.
+
+    If the run has no report, one is created holding just the recorded testcases.
+    """
+    reports = [report for report in reports if report]
+    if os.path.exists(junitxml_path):
+      if not reports:
+        return
+      document = minidom.parse(junitxml_path)
+    else:
+      document = minidom.parseString(b'<testsuite errors="0" failures="0" name="pytest" skips="0" '
+                                     b'tests="0" time="0"/>')
+    testsuite = document.getElementsByTagName('testsuite')[0]
+
+    testcases = []
+    for report in reports:
+      recorded = minidom.parseString(b'<testcases>' + report + b'</testcases>')
+      testcases.extend(recorded.getElementsByTagName('testcase'))
+    cls._add_testcases(document, testsuite, testcases)
+    duration = float(testsuite.getAttribute('time') or 0)
+    duration += sum(float(testcase.getAttribute('time') or 0) for testcase in testcases)
+    testsuite.setAttribute('time', '{:.3f}'.format(duration))
+
+    with open(junitxml_path, 'wb') as fp:
+      fp.write(document.toxml(encoding='utf-8'))
+
+  # The junit xml testsuite attributes counting the testcases that hold each element. The count of
+  # skipped testcases is named `skips` by older versions of pytest.
+  _TESTSUITE_COUNTS = (('errors', 'error'), ('failures', 'failure'), ('skips', 'skipped'),
+                       ('skipped', 'skipped'))
+
+  @classmethod
+  def _add_testcases(cls, document, testsuite, testcases):
+    """Adds the testcases to the testsuite of a junit xml document, and updates its counts.
+
+    The time of the testsuite is left to the caller, as it depends on how the testcases were run.
+    """
+    counts = defaultdict(int)
+    for testcase in testcases:
+      testsuite.appendChild(document.importNode(testcase, True))
+      counts['tests'] += 1
+      for name, element in cls._TESTSUITE_COUNTS:
+        if testcase.getElementsByTagName(element):
+          counts[name] += 1
+    for name, count in counts.items():
+      if testsuite.hasAttribute(name):
+        testsuite.setAttribute(name, str(int(testsuite.getAttribute(name) or 0) + count))
+
+  def _map_relsrc_to_sources(self, target):
+    """Yields the paths that pytest may report each source of the target at, with the source."""
+    pex_src_root = os.path.relpath(self._source_chroot_path, get_buildroot())
+    for src in target.sources_relative_to_source_root():
+      yield os.path.join(pex_src_root, src), src
+      yield os.path.join(target.target_base, src), src
+
   def _get_target_from_test(self, test_info, targets, pytest_rootdir):
     relsrc_to_target = self._map_relsrc_to_targets(targets)
     buildroot_relpath = os.path.relpath(pytest_rootdir, get_buildroot())
@@ -569,6 +816,102 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
     relsrc = os.path.join(buildroot_relpath, pytest_relpath)
     return relsrc_to_target.get(relsrc)
 
+  def _shard_test_files(self, workdirs, sources_map):
+    """Splits the chrooted test files of a run into shards balanced by their previous durations.
+
+    The durations are read from the junit xml reports of previous runs of the partition, where
+    pytest records files by their paths under the source chroot that the run used: those paths
+    are matched to the test files of this run by their paths relative to that chroot.
+
+    :returns: A list of at least one shard, each a list of chrooted test files.
+    """
+    def parse_error_handler(parse_error):
+      self.context.log.warn('Failed to read test durations from {}: {}'
+                            .format(parse_error.xml_path, parse_error.cause))
+
+    chroot_relpaths = {os.path.relpath(path, self._source_chroot_path): path
+                       for path in sources_map}
+    durations = {}
+    junitxml_dir = os.path.dirname(workdirs.junitxml_path())
+    for reported_path, duration in parse_test_durations([junitxml_dir], parse_error_handler,
+                                                        attribute='file').items():
+      components = reported_path.split(os.sep)
+      for i in range(len(components)):
+        path = chroot_relpaths.get(os.path.join(*components[i:]))
+        if path:
+          durations[path] = duration
+          break
+    return self.shard_by_duration(list(sources_map), self._parallel_shards, durations)
+
+  def _run_shards(self, pex, args, shards, junitxml_path):
+    """Runs each shard of test files in a pytest process of its own, concurrently.
+
+    The junit xml reports of the shards are merged into a single report at `junitxml_path`.
+
+    :returns: The first failed result among the shards, or a successful result.
+    """
+    coverage = self.get_options().coverage is not None
+    if coverage:
+      # The data of each shard is recorded separately, and combined when coverage is reported: so
+      # the data of previous runs must not be mistaken for that of this run.
+      for name in ['.coverage'] + fnmatch.filter(os.listdir('.'), '.coverage.shard-*'):
+        safe_delete(name)
+
+    with temporary_dir(root_dir=os.path.dirname(junitxml_path)) as shards_dir:
+      shard_junitxml_paths = []
+      shard_args = []
+      for index, shard in enumerate(shards):
+        shard_junitxml_path = os.path.join(shards_dir, 'shard-{}.xml'.format(index))
+        shard_junitxml_paths.append(shard_junitxml_path)
+        extra_env = {'COVERAGE_FILE': '.coverage.shard-{}'.format(index)} if coverage else None
+        shard_args.append((pex, args + ['--junitxml', shard_junitxml_path] + shard, extra_env))
+
+      self.context.log.debug('Running {} in {} shards.'
+                             .format(pluralize(sum(len(shard) for shard in shards), 'test file'),
+                                     len(shards)))
+      with self.context.new_workunit('shards') as workunit:
+        worker_pool = WorkerPool(workunit, self.context.run_tracker, len(shards))
+        try:
+          results = worker_pool.submit_work_and_wait(Work(self._do_run_tests_with_args,
+                                                          shard_args,
+                                                          'shard'),
+                                                     workunit_parent=workunit)
+        finally:
+          worker_pool.shutdown()
+
+      self._merge_junitxml(junitxml_path,
+                           [path for path in shard_junitxml_paths if os.path.exists(path)])
+
+    return next((result for result in results if not result.success), PytestResult.rc(0))
+
+  @classmethod
+  def _merge_junitxml(cls, junitxml_path, shard_junitxml_paths):
+    """Merges the junit xml reports of the shards of a run into a single report.
+
+    If no shard has a report, no report is written.
+    """
+    document = None
+    for path in shard_junitxml_paths:
+      try:
+        shard_document = minidom.parse(path)
+      except (IOError, ExpatError) as e:
+        raise TaskError('Error parsing xml file at {}: {}'.format(path, e))
+      shard_testsuite = shard_document.getElementsByTagName('testsuite')[0]
+      if document is None:
+        document = shard_document
+        testsuite = shard_testsuite
+        continue
+
+      cls._add_testcases(document, testsuite, shard_testsuite.getElementsByTagName('testcase'))
+      # The shards ran concurrently, so the run took as long as its longest shard.
+      duration = max(float(testsuite.getAttribute('time') or 0),
+                     float(shard_testsuite.getAttribute('time') or 0))
+      testsuite.setAttribute('time', '{:.3f}'.format(duration))
+
+    if document is not None:
+      with open(junitxml_path, 'wb') as fp:
+        fp.write(document.toxml(encoding='utf-8'))
+
   @contextmanager
   def partitions(self, per_target, all_targets, test_targets):
     if per_target:
@@ -652,9 +995,32 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
     if not sources_map:
       return PytestResult.rc(0)
 
-    with self._test_runner(workdirs, test_targets, sources_map) as (pytest_binary,
-                                                                    test_args,
-                                                                    get_pytest_rootdir):
+    result_keys = {}
+    recorded = {}
+    if self._result_cache_enabled:
+      result_keys = self._test_result_keys(test_targets)
+      for module, key in result_keys.items():
+        report = self.test_result_cache.get(key)
+        if report is not None:
+          recorded[module] = report
+      if recorded:
+        self.context.log.info('Skipping {} with recorded results.'
+                              .format(pluralize(len(recorded), 'test module')))
+        sources_map = OrderedDict((path, source) for path, source in sources_map.items()
+                                  if source not in recorded)
+        if not any(source in result_keys for source in sources_map.values()):
+          # Every test module has a recorded result, so there is nothing to run.
+          junitxml_path = workdirs.junitxml_path(*test_targets)
+          safe_delete(junitxml_path)
+          self._merge_recorded_results(junitxml_path, recorded.values())
+          return PytestResult.rc(0)
+
+    shards = None
+    if self._parallel_shards > 1 and len(sources_map) > 1:
+      shards = self._shard_test_files(workdirs, sources_map)
+
+    with self._test_runner(workdirs, test_targets, sources_map,
+                           sharded=bool(shards)) as (pytest_binary, test_args, get_pytest_rootdir):
       # Validate that the user didn't provide any passthru args that conflict
       # with those we must set ourselves.
       for arg in self.get_passthru_args():
@@ -667,7 +1033,6 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
       # top of the buildroot. This prevents conftest.py files from outside (e.g. in users home dirs)
       # from leaking into pants test runs. See: https://github.com/pantsbuild/pants/issues/2726
       args = ['-c', pytest_binary.config_path,
-              '--junitxml', junitxml_path,
               '--confcutdir', get_buildroot(),
               '--continue-on-collection-errors']
       if fail_fast:
@@ -679,7 +1044,6 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
       for options in self.get_options().options + self.get_passthru_args():
         args.extend(safe_shlex_split(options))
       args.extend(test_args)
-      args.extend(sources_map.keys())
 
       # We want to ensure our reporting based off junit xml is from this run so kill results from
       # prior runs.
@@ -687,7 +1051,12 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
         os.unlink(junitxml_path)
 
       with self._maybe_run_in_chroot():
-        result = self._do_run_tests_with_args(pytest_binary.pex, args)
+        if shards:
+          result = self._run_shards(pytest_binary.pex, args, shards, junitxml_path)
+        else:
+          args.extend(['--junitxml', junitxml_path])
+          args.extend(sources_map.keys())
+          result = self._do_run_tests_with_args(pytest_binary.pex, args)
 
       # There was a problem prior to test execution preventing junit xml file creation so just let
       # the failure result bubble.
@@ -695,6 +1064,13 @@ class PytestRun(PartitionedTestRunnerTaskMixin, Task):
         return result
 
       pytest_rootdir = get_pytest_rootdir()
+      if result_keys:
+        self._record_test_results(junitxml_path, test_targets, pytest_rootdir,
+                                  {module: key for module, key in result_keys.items()
+                                   if module not in recorded},
+                                  result.success)
+        self._merge_recorded_results(junitxml_path, recorded.values())
+
       failed_targets = self._get_failed_targets_from_junitxml(junitxml_path,
                                                               test_targets,
                                                               pytest_rootdir)
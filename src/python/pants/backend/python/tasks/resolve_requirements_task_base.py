@@ -6,6 +6,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+from collections import OrderedDict
 from contextlib import contextmanager
 
 from pex.interpreter import PythonInterpreter
@@ -13,10 +14,14 @@ from pex.pex import PEX
 from pex.pex_builder import PEXBuilder
 
 from pants.backend.python.python_requirement import PythonRequirement
+from pants.backend.python.subsystems.python_setup import PythonSetup
 from pants.backend.python.targets.python_requirement_library import PythonRequirementLibrary
-from pants.backend.python.tasks.pex_build_util import dump_requirement_libs, dump_requirements
+from pants.backend.python.tasks.pex_build_util import dump_requirements
 from pants.base.hash_utils import hash_all
+from pants.base.worker_pool import Work, WorkerPool
+from pants.base.workunit import WorkUnitLabel
 from pants.invalidation.cache_manager import VersionedTargetSet
+from pants.python.python_repos import PythonRepos
 from pants.task.task import Task
 from pants.util.dirutil import safe_concurrent_creation
 
@@ -29,6 +34,12 @@ class ResolveRequirementsTaskBase(Task):
   for running the relevant python code.
   """
 
+  @classmethod
+  def subsystem_dependencies(cls):
+    return super(ResolveRequirementsTaskBase, cls).subsystem_dependencies() + (
+      PythonRepos, PythonSetup,
+    )
+
   @classmethod
   def prepare(cls, options, round_manager):
     round_manager.require_data(PythonInterpreter)
@@ -41,6 +52,14 @@ class ResolveRequirementsTaskBase(Task):
     :param req_libs: A list of :class:`PythonRequirementLibrary` targets to resolve.
     :returns: a PEX containing target requirements and any specified python dist targets.
     """
+    return self._build_requirements_pexes([self._requirements_pex_args(interpreter, req_libs)])[0]
+
+  def _requirements_pex_args(self, interpreter, req_libs):
+    """Return the (path, interpreter, reqs) tuple to build the requirements PEX of req_libs with.
+
+    :param interpreter: Resolve against this :class:`PythonInterpreter`.
+    :param req_libs: A list of :class:`PythonRequirementLibrary` targets to resolve.
+    """
     with self.invalidated(req_libs) as invalidation_check:
       # If there are no relevant targets, we still go through the motions of resolving
       # an empty set of requirements, to prevent downstream tasks from having to check
@@ -50,16 +69,9 @@ class ResolveRequirementsTaskBase(Task):
             invalidation_check.all_vts).cache_key.hash
       else:
         target_set_id = 'no_targets'
-
-      path = os.path.realpath(os.path.join(self.workdir, str(interpreter.identity), target_set_id))
-      # Note that we check for the existence of the directory, instead of for invalid_vts,
-      # to cover the empty case.
-      if not os.path.isdir(path):
-        with safe_concurrent_creation(path) as safe_path:
-          builder = PEXBuilder(path=safe_path, interpreter=interpreter, copy=True)
-          dump_requirement_libs(builder, interpreter, req_libs, self.context.log)
-          builder.freeze()
-    return PEX(path, interpreter=interpreter)
+    path = os.path.realpath(os.path.join(self.workdir, str(interpreter.identity), target_set_id))
+    reqs = [req for req_lib in req_libs for req in req_lib.requirements]
+    return path, interpreter, reqs
 
   def resolve_requirement_strings(self, interpreter, requirement_strings):
     """Resolve a list of pip-style requirement strings."""
@@ -72,13 +84,53 @@ class ResolveRequirementsTaskBase(Task):
       req_strings_id = hash_all(requirement_strings)
 
     path = os.path.realpath(os.path.join(self.workdir, str(interpreter.identity), req_strings_id))
-    if not os.path.isdir(path):
-      reqs = [PythonRequirement(req_str) for req_str in requirement_strings]
-      with safe_concurrent_creation(path) as safe_path:
-        builder = PEXBuilder(path=safe_path, interpreter=interpreter, copy=True)
-        dump_requirements(builder, interpreter, reqs, self.context.log)
-        builder.freeze()
-    return PEX(path, interpreter=interpreter)
+    reqs = [PythonRequirement(req_str) for req_str in requirement_strings]
+    return self._build_requirements_pexes([(path, interpreter, reqs)])[0]
+
+  def _build_requirements_pexes(self, paths):
+    """Build the requirements PEXes that are not already on disk, and return all of them.
+
+    The distinct PEXes that are missing are built concurrently, by up to
+    `--python-setup-resolver-jobs` workers.
+
+    :param paths: A list of (path, interpreter, reqs) tuples, for the PEXes to return.
+    """
+    # Note that we check for the existence of the directory, instead of for invalid_vts,
+    # to cover the empty case. The same PEX may be requested more than once, but is built once.
+    missing = OrderedDict((path, (path, interpreter, reqs))
+                          for path, interpreter, reqs in paths if not os.path.isdir(path))
+
+    def build(path, interpreter, reqs):
+      with self.context.new_workunit(name='resolve-{}'.format(interpreter.identity),
+                                     labels=[WorkUnitLabel.BOOTSTRAP]):
+        with safe_concurrent_creation(path) as safe_path:
+          builder = self._requirements_pex_builder(safe_path, interpreter)
+          dump_requirements(builder, interpreter, reqs, self.context.log)
+          builder.freeze()
+
+    num_workers = min(len(missing), PythonSetup.global_instance().resolver_jobs)
+    if num_workers > 1:
+      # Each resolve runs in its own workunit under this one, so their timings are reported
+      # separately. Resolves for the same interpreter share a resolver cache, and so are run
+      # one at a time regardless.
+      with self.context.new_workunit(name='resolve', labels=[WorkUnitLabel.MULTITOOL]) as workunit:
+        worker_pool = WorkerPool(workunit, self.context.run_tracker, num_workers)
+        try:
+          worker_pool.submit_work_and_wait(Work(build, list(missing.values())),
+                                           workunit_parent=workunit)
+        finally:
+          worker_pool.shutdown()
+    else:
+      for args in missing.values():
+        build(*args)
+
+    return [PEX(path, interpreter=interpreter) for path, interpreter, _ in paths]
+
+  @staticmethod
+  def _requirements_pex_builder(path, interpreter):
+    # The distributions of requirements are added from the store of installed distributions, and
+    # are never modified: so they are hard linked into the PEX, rather than copied.
+    return PEXBuilder(path=path, interpreter=interpreter, copy=False)
 
   @classmethod
   @contextmanager
@@ -14,6 +14,8 @@ from pants.backend.python.interpreter_cache import PythonInterpreterCache
 from pants.backend.python.subsystems.python_setup import PythonSetup
 from pants.backend.python.targets.python_target import PythonTarget
 from pants.base.fingerprint_strategy import DefaultFingerprintHashingMixin, FingerprintStrategy
+from pants.base.worker_pool import WorkerPool
+from pants.base.workunit import WorkUnitLabel
 from pants.invalidation.cache_manager import VersionedTargetSet
 from pants.python.python_repos import PythonRepos
 from pants.task.task import Task
@@ -69,10 +71,19 @@ class SelectInterpreter(Task):
     self.context.products.register_data(PythonInterpreter, interpreter)
 
   def _create_interpreter_path_file(self, interpreter_path_file, targets):
-    interpreter_cache = PythonInterpreterCache(PythonSetup.global_instance(),
-                                               PythonRepos.global_instance(),
-                                               logger=self.context.log.debug)
-    interpreter = interpreter_cache.select_interpreter_for_targets(targets)
+    python_setup = PythonSetup.global_instance()
+    # Distinct interpreters are set up concurrently, each in its own thread under this workunit.
+    with self.context.new_workunit(name='setup-interpreters',
+                                   labels=[WorkUnitLabel.MULTITOOL]) as workunit:
+      worker_pool = WorkerPool(workunit, self.context.run_tracker, python_setup.resolver_jobs)
+      try:
+        interpreter_cache = PythonInterpreterCache(python_setup,
+                                                   PythonRepos.global_instance(),
+                                                   logger=self.context.log.debug,
+                                                   worker_pool=worker_pool)
+        interpreter = interpreter_cache.select_interpreter_for_targets(targets)
+      finally:
+        worker_pool.shutdown()
     safe_mkdir_for(interpreter_path_file)
     with open(interpreter_path_file, 'w') as outfile:
       outfile.write(b'{}\t{}\n'.format(interpreter.binary, str(interpreter.identity)))
@@ -0,0 +1,143 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+logger = logging.getLogger(__name__)
+
+
+class FileDigestCache(object):
+  """A persistent cache of the sha1 digests of file contents, keyed by file stat info.
+
+  A cached digest is used only if the path, mtime, ctime, size and inode of the file are unchanged
+  since the digest was computed. The digests of recently modified files are not cached at all,
+  because a file could be modified again within the granularity of its filesystem's timestamps
+  without any change to its stat info: such files are always fully hashed.
+
+  The cache is read into memory on first use, and new digests are written back in batches: see
+  `flush`. It is safe to use from multiple threads, and from concurrent processes.
+  """
+
+  # Files modified less than this many seconds ago are always fully hashed.
+  RECENTLY_MODIFIED_SECS = 2.0
+
+  # New digests are written back once this many are pending, even without an explicit flush.
+  MAX_PENDING_DIGESTS = 1000
+
+  READ_SIZE_BYTES = 64 * 1024
+
+  def __init__(self, path):
+    """
+    :param str path: The path of the cache database.
+    """
+    self._path = path
+    self._lock = threading.Lock()  # Protects the state below.
+    self._entries = None  # A map from path to a tuple of (stat key, digest), read lazily.
+    self._pending = []
+
+  @property
+  def path(self):
+    return self._path
+
+  def digest(self, path):
+    """Return the hex sha1 digest of the contents of the file at the given path."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    # Inode numbers may not fit in a signed 64 bit sqlite integer.
+    stat_key = (stat.st_mtime, stat.st_ctime, stat.st_size, stat.st_ino % (1 << 63))
+    with self._lock:
+      entry = self._load().get(path)
+    if entry and entry[0] == stat_key:
+      return entry[1]
+
+    digest = self._hash(path)
+    if time.time() - max(stat.st_mtime, stat.st_ctime) >= self.RECENTLY_MODIFIED_SECS:
+      with self._lock:
+        self._entries[path] = (stat_key, digest)
+        self._pending.append((path,) + stat_key + (digest,))
+        should_flush = len(self._pending) >= self.MAX_PENDING_DIGESTS
+      if should_flush:
+        self.flush()
+    return digest
+
+  def flush(self):
+    """Write any new digests back to the cache database."""
+    with self._lock:
+      pending, self._pending = self._pending, []
+    if not pending:
+      return
+    try:
+      with self._cursor() as c:
+        c.executemany('INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)', pending)
+    except sqlite3.Error as e:
+      # The cache is an optimization: failing to update it just means rehashing next time.
+      logger.warn('Failed to update file digest cache {}: {}'.format(self._path, e))
+
+  def _load(self):
+    if self._entries is None:
+      entries = {}
+      try:
+        with self._cursor() as c:
+          for path, mtime, ctime, size, inode, digest in c.execute('SELECT * FROM digests'):
+            entries[path] = ((mtime, ctime, size, inode), digest)
+      except sqlite3.Error as e:
+        logger.warn('Failed to read file digest cache {}: {}'.format(self._path, e))
+      self._entries = entries
+    return self._entries
+
+  def _hash(self, path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as fd:
+      for chunk in iter(lambda: fd.read(self.READ_SIZE_BYTES), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+  @contextmanager
+  def _cursor(self):
+    parent = os.path.dirname(self._path)
+    if not os.path.isdir(parent):
+      os.makedirs(parent)
+    conn = sqlite3.connect(self._path, timeout=60)
+    try:
+      conn.execute('PRAGMA synchronous=OFF')
+      conn.execute('CREATE TABLE IF NOT EXISTS digests ('
+                   'path TEXT PRIMARY KEY, '
+                   'mtime REAL NOT NULL, '
+                   'ctime REAL NOT NULL, '
+                   'size INTEGER NOT NULL, '
+                   'inode INTEGER NOT NULL, '
+                   'digest TEXT NOT NULL)')
+      yield conn.cursor()
+      conn.commit()
+    finally:
+      conn.close()
+
+
+_file_digest_cache = None
+
+
+def get_file_digest_cache():
+  """Return the FileDigestCache for this run, or None if digests should not be cached."""
+  return _file_digest_cache
+
+
+def set_file_digest_cache(cache):
+  """Set the FileDigestCache for this run, or None to disable caching of digests.
+
+  Any digests pending in a previous cache are flushed.
+  """
+  global _file_digest_cache
+  if _file_digest_cache is not None:
+    _file_digest_cache.flush()
+  _file_digest_cache = cache
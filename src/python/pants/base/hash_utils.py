@@ -8,6 +8,8 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import hashlib
 import json
 
+from pants.base.file_digest_cache import get_file_digest_cache
+
 
 def hash_all(strs, digest=None):
   """Returns a hash of the concatenation of all the strings in strs.
@@ -23,8 +25,13 @@ def hash_all(strs, digest=None):
 def hash_file(path, digest=None):
   """Hashes the contents of the file at the given path and returns the hash digest in hex form.
 
-  If a hashlib message digest is not supplied a new sha1 message digest is used.
+  If a hashlib message digest is not supplied a new sha1 message digest is used, and the hash may be
+  served by the file digest cache for this run, if there is one.
   """
+  if digest is None:
+    file_digest_cache = get_file_digest_cache()
+    if file_digest_cache:
+      return file_digest_cache.digest(path)
   digest = digest or hashlib.sha1()
   with open(path, 'rb') as fd:
     s = fd.read(8192)
@@ -26,6 +26,7 @@ from pants.java.nailgun_executor import NailgunProcessGroup
 from pants.option.ranked_value import RankedValue
 from pants.reporting.reporting import Reporting
 from pants.scm.subsystems.changed import Changed
+from pants.source.file_digest_cache_setup import FileDigestCacheSetup
 from pants.source.source_root import SourceRootConfig
 from pants.task.task import QuietTaskMixin
 from pants.util.filtering import create_filters, wrap_filters
@@ -222,7 +223,8 @@ class GoalRunner(object):
       RunTracker,
       Changed,
       BinaryUtil.Factory,
-      Subprocess.Factory
+      Subprocess.Factory,
+      FileDigestCacheSetup,
     }
 
   def _execute_engine(self):
@@ -248,6 +250,8 @@ class GoalRunner(object):
   def run(self):
     should_kill_nailguns = self._kill_nailguns
 
+    # Targets are fingerprinted by the tasks of the goals, so digests are cached while they execute.
+    FileDigestCacheSetup.global_instance().setup()
     try:
       result = self._execute_engine()
       self._context.set_resulting_graph_size_in_runtracker()
@@ -263,6 +267,8 @@ class GoalRunner(object):
       self._run_tracker.set_root_outcome(WorkUnit.FAILURE)
       raise
     finally:
+      FileDigestCacheSetup.global_instance().teardown()
+
       # Must kill nailguns only after run_tracker.end() is called, otherwise there may still
       # be pending background work that needs a nailgun.
       if should_kill_nailguns:
@@ -5,11 +5,12 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
-import errno
 import os
 import shutil
 import tarfile
+from contextlib import closing
 
+from pants.cache.artifact_codec import codec_for_name
 from pants.util.contextutil import open_tar
 from pants.util.dirutil import safe_mkdir, safe_mkdir_for, safe_walk
 
@@ -85,54 +86,78 @@ class TarballArtifact(Artifact):
 
   # TODO: Expose `dereference` for tasks.
   # https://github.com/pantsbuild/pants/issues/3961
-  def __init__(self, artifact_root, tarfile_, compression=9, dereference=True):
+  def __init__(self, artifact_root, tarfile_, compression=9, dereference=True, codec=None):
+    """
+    :param str artifact_root: The path under which the files of the artifact are read/written.
+    :param str tarfile_: The path of the tarball.
+    :param int compression: The compression level to use when collecting, which is codec-specific.
+    :param bool dereference: Dereference symlinks when collecting.
+    :param ArtifactCodec codec: The compression format of the tarball: defaults to gzip.
+    """
     super(TarballArtifact, self).__init__(artifact_root)
     self._tarfile = tarfile_
     self._compression = compression
     self._dereference = dereference
+    self._codec = codec or codec_for_name('gzip')
+
+  @property
+  def tarfile(self):
+    return self._tarfile
 
   def exists(self):
     return os.path.isfile(self._tarfile)
 
   def collect(self, paths):
-    # In our tests, gzip is slightly less compressive than bzip2 on .class files,
-    # but decompression times are much faster.
-    mode = 'w:gz'
+    with open(self._tarfile, 'wb') as outfile:
+      self.collect_into(outfile, paths)
+
+  def collect_into(self, fileobj, paths):
+    """Write a tarball of the paths (which must be under artifact root) to the given file object.
+
+    The tarball is written in a single sequential pass, so `fileobj` need not support seeking.
+    """
+    # NB: We compress outside of tarfile, which only supports some codecs, and whose streaming mode
+    # ignores the compression level.
+    with closing(self._codec.compressing_writer(fileobj, self._compression)) as compressed:
+      with open_tar(compressed, 'w|', dereference=self._dereference, errorlevel=2) as tarout:
+        for path in paths or ():
+          # Adds dirs recursively.
+          relpath = os.path.relpath(path, self._artifact_root)
+          tarout.add(path, relpath)
+          self._relpaths.add(relpath)
 
-    tar_kwargs = {'dereference': self._dereference, 'errorlevel': 2, 'compresslevel': self._compression}
+  def extract(self):
+    with open(self._tarfile, 'rb') as infile:
+      self.extract_from(infile)
 
-    with open_tar(self._tarfile, mode, **tar_kwargs) as tarout:
-      for path in paths or ():
-        # Adds dirs recursively.
-        relpath = os.path.relpath(path, self._artifact_root)
-        tarout.add(path, relpath)
-        self._relpaths.add(relpath)
+  def extract_from(self, fileobj):
+    """Extract the tarball read from the given file object to locations under artifact root.
 
-  def extract(self):
+    Members are extracted in a single sequential pass, so `fileobj` need only support `read`.
+    """
     try:
-      with open_tar(self._tarfile, 'r', errorlevel=2) as tarin:
-        # Note: We create all needed paths proactively, even though extractall() can do this for us.
-        # This is because we may be called concurrently on multiple artifacts that share directories,
-        # and there will be a race condition inside extractall(): task T1 A) sees that a directory
-        # doesn't exist and B) tries to create it. But in the gap between A) and B) task T2 creates
-        # the same directory, so T1 throws "File exists" in B).
-        # This actually happened, and was very hard to debug.
-        # Creating the paths here up front allows us to squelch that "File exists" error.
-        paths = []
-        dirs = set()
-        for tarinfo in tarin.getmembers():
-          paths.append(tarinfo.name)
+      with open_tar(self._codec.decompressing_reader(fileobj), 'r|', errorlevel=2) as tarin:
+        directories = []
+        for tarinfo in tarin:
+          # Note: We create all needed paths ourselves, even though tarfile can do this for us.
+          # This is because we may be called concurrently on multiple artifacts that share
+          # directories, and there is a race condition inside tarfile: task T1 A) sees that a
+          # directory doesn't exist and B) tries to create it. But in the gap between A) and B)
+          # task T2 creates the same directory, so T1 throws "File exists" in B).
+          # This actually happened, and was very hard to debug.
+          # Creating the paths here allows us to squelch that "File exists" error.
           if tarinfo.isdir():
-            dirs.add(tarinfo.name)
+            safe_mkdir(os.path.join(self._artifact_root, tarinfo.name))
+            # As in `TarFile.extractall`, directory attributes are set once their contents exist.
+            directories.append(tarinfo)
           else:
-            dirs.add(os.path.dirname(tarinfo.name))
-        for d in dirs:
-          try:
-            os.makedirs(os.path.join(self._artifact_root, d))
-          except OSError as e:
-            if e.errno != errno.EEXIST:
-              raise
-        tarin.extractall(self._artifact_root)
-        self._relpaths.update(paths)
-    except tarfile.ReadError as e:
+            safe_mkdir(os.path.join(self._artifact_root, os.path.dirname(tarinfo.name)))
+            tarin.extract(tarinfo, self._artifact_root)
+          self._relpaths.add(tarinfo.name)
+
+        for tarinfo in reversed(directories):
+          dirpath = os.path.join(self._artifact_root, tarinfo.name)
+          tarin.utime(tarinfo, dirpath)
+          tarin.chmod(tarinfo, dirpath)
+    except (tarfile.ReadError, tarfile.StreamError) as e:
       raise ArtifactError(str(e))
@@ -114,6 +114,31 @@ class ArtifactCache(object):
   def has(self, cache_key):
     pass
 
+  def has_many(self, cache_keys):
+    """Check for the presence of artifacts for many keys at once.
+
+    Implementations backed by a remote service should override this to issue their lookups
+    concurrently rather than one round trip at a time.
+
+    Callers that go on to read the artifacts that are present should use `use_cached_files_many`
+    instead, which misses for absent keys without a separate probe.
+
+    A key whose presence could not be determined (due to a `NonfatalArtifactCacheError`) is
+    reported as present, so that callers go on to `use_cached_files` and observe the failure there.
+
+    :param list cache_keys: A list of CacheKey objects.
+    :returns: A list of booleans, parallel to `cache_keys`.
+    :rtype: list of bool
+    """
+    return [self._has_or_unknown(cache_key) for cache_key in cache_keys]
+
+  def _has_or_unknown(self, cache_key):
+    try:
+      return bool(self.has(cache_key))
+    except NonfatalArtifactCacheError as e:
+      logger.debug('Error while checking artifact cache for {0}: {1}'.format(cache_key, e))
+      return True
+
   def use_cached_files(self, cache_key, results_dir=None):
     """Use the files cached for the given key.
 
@@ -135,6 +160,24 @@ class ArtifactCache(object):
     """
     pass
 
+  def use_cached_files_many(self, keys_and_results_dirs, map_func=map):
+    """Use the files cached for many keys at once.
+
+    By default each key is read via `call_use_cached_files`, mapped over the keys with `map_func`.
+    Implementations backed by a remote service should override this to issue their reads
+    concurrently over a shared connection pool.
+
+    :param list keys_and_results_dirs: A list of (CacheKey, results_dir) tuples, where results_dir
+      is as for `use_cached_files`.
+    :param map_func: A function with the signature of `map`, used to map the importable
+      `call_use_cached_files` over tuples of this cache and each key and results_dir.
+    :returns: A list of results as returned by `use_cached_files`, parallel to the keys.
+    :rtype: list
+    """
+    return map_func(call_use_cached_files,
+                    [(self, cache_key, results_dir)
+                     for cache_key, results_dir in keys_and_results_dirs])
+
   def delete(self, cache_key):
     """Delete the artifacts for the specified key.
 
@@ -0,0 +1,165 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from pants.util.dirutil import safe_delete, safe_mkdir_for, safe_walk
+
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactCacheIndex(object):
+  """Tracks the size and last access time of the artifacts under a local cache root.
+
+  The index allows the least recently used artifacts to be evicted in order to keep a cache root
+  under a byte budget, without walking the whole tree under the root. It is shared by the caches of
+  all tasks under the root, and may be used concurrently by multiple processes.
+
+  The index is advisory: an artifact that is missing from the index is never evicted, and an
+  index entry for an artifact that no longer exists is harmless. `rebuild` recreates the index
+  from the artifacts actually present, and marks it complete.
+  """
+
+  def __init__(self, root, index_path):
+    """
+    :param str root: The cache root that indexed artifact paths are under.
+    :param str index_path: The path of the index database.
+    """
+    self._root = os.path.realpath(root)
+    self._index_path = index_path
+    self._initialized = False
+
+  @property
+  def root(self):
+    return self._root
+
+  def is_complete(self):
+    """Return True if the index has been rebuilt from all of the artifacts under its root.
+
+    An index that was created by recording newly written artifacts lacks any that were already
+    present, and so is incomplete until it is rebuilt.
+    """
+    if not os.path.isfile(self._index_path):
+      return False
+    with self._cursor() as c:
+      return c.execute("SELECT 1 FROM metadata WHERE key='complete'").fetchone() is not None
+
+  def record(self, path, size=None):
+    """Record that an artifact at the given absolute path was just written."""
+    size = os.path.getsize(path) if size is None else size
+    with self._advisory_cursor() as c:
+      c.execute('INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?)',
+                [self._relpath(path), size, time.time()])
+
+  def touch(self, path):
+    """Record that the artifact at the given absolute path was just used."""
+    with self._advisory_cursor() as c:
+      c.execute('UPDATE artifacts SET atime=? WHERE path=?', [time.time(), self._relpath(path)])
+
+  def remove(self, paths):
+    """Remove the artifacts at the given absolute paths from the index."""
+    with self._advisory_cursor() as c:
+      c.executemany('DELETE FROM artifacts WHERE path=?', [[self._relpath(p)] for p in paths])
+
+  def total_size(self):
+    with self._cursor() as c:
+      return c.execute('SELECT COALESCE(SUM(size), 0) FROM artifacts').fetchone()[0]
+
+  def rebuild(self, excludes=()):
+    """Recreate the index from the artifacts present under the root.
+
+    The last access time of artifacts not already in the index is taken from their mtime.
+
+    :param excludes: Names of top-level entries under the root to skip.
+    """
+    with self._cursor() as c:
+      atimes = dict(c.execute('SELECT path, atime FROM artifacts'))
+      c.execute('DELETE FROM artifacts')
+      for name in os.listdir(self._root):
+        path = os.path.join(self._root, name)
+        if name in excludes or path == self._index_path or not os.path.isdir(path):
+          continue
+        for dirpath, _, filenames in safe_walk(path):
+          for filename in filenames:
+            filepath = os.path.join(dirpath, filename)
+            relpath = self._relpath(filepath)
+            stat = os.lstat(filepath)
+            c.execute('INSERT INTO artifacts VALUES (?, ?, ?)',
+                      [relpath, stat.st_size, atimes.get(relpath, stat.st_mtime)])
+      c.execute("INSERT OR REPLACE INTO metadata VALUES ('complete', '1')")
+
+  def evict(self, max_bytes):
+    """Delete least recently used artifacts until the indexed total is at most `max_bytes`.
+
+    :returns: A tuple of the number of artifacts evicted, and the number of bytes they occupied.
+    """
+    evicted_count = 0
+    evicted_bytes = 0
+    with self._cursor() as c:
+      total = c.execute('SELECT COALESCE(SUM(size), 0) FROM artifacts').fetchone()[0]
+      if total <= max_bytes:
+        return 0, 0
+      evicted = []
+      for relpath, size in c.execute('SELECT path, size FROM artifacts ORDER BY atime').fetchall():
+        if total <= max_bytes:
+          break
+        safe_delete(os.path.join(self._root, relpath))
+        evicted.append([relpath])
+        total -= size
+        evicted_count += 1
+        evicted_bytes += size
+      c.executemany('DELETE FROM artifacts WHERE path=?', evicted)
+    logger.debug('Evicted {} artifacts ({} bytes) from {}'.format(evicted_count, evicted_bytes,
+                                                                   self._root))
+    return evicted_count, evicted_bytes
+
+  def _relpath(self, path):
+    return os.path.relpath(os.path.realpath(path), self._root)
+
+  @contextmanager
+  def _connection(self):
+    if not self._initialized:
+      safe_mkdir_for(self._index_path)
+    # The index is advisory, and can be rebuilt: trade durability for cheap updates on cache hits.
+    conn = sqlite3.connect(self._index_path, timeout=60)
+    try:
+      conn.execute('PRAGMA synchronous=OFF')
+      if not self._initialized:
+        self._create_schema(conn)
+        self._initialized = True
+      yield conn
+      conn.commit()
+    finally:
+      conn.close()
+
+  @staticmethod
+  def _create_schema(conn):
+    conn.execute('CREATE TABLE IF NOT EXISTS artifacts ('
+                 'path TEXT PRIMARY KEY, '
+                 'size INTEGER NOT NULL, '
+                 'atime REAL NOT NULL)')  # Seconds since the epoch.
+    conn.execute('CREATE INDEX IF NOT EXISTS artifacts_atime_idx ON artifacts(atime)')
+    conn.execute('CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT)')
+
+  @contextmanager
+  def _cursor(self):
+    with self._connection() as conn:
+      yield conn.cursor()
+
+  @contextmanager
+  def _advisory_cursor(self):
+    """A cursor for updates which should not fail the caller if the index is unavailable."""
+    try:
+      with self._cursor() as c:
+        yield c
+    except sqlite3.Error as e:
+      logger.warn('Failed to update artifact cache index {}: {}'.format(self._index_path, e))
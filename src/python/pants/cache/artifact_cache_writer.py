@@ -0,0 +1,275 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import heapq
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import namedtuple
+
+from pants.cache.artifact_cache import ArtifactCacheError, NonfatalArtifactCacheError
+from pants.subsystem.subsystem import Subsystem
+from pants.util.dirutil import safe_walk
+
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactCacheWriterFactory(Subsystem):
+  options_scope = 'cache-writer'
+
+  @classmethod
+  def register_options(cls, register):
+    super(ArtifactCacheWriterFactory, cls).register_options(register)
+    register('--num-workers', advanced=True, type=int, default=multiprocessing.cpu_count(),
+             help='Number of threads that write artifacts to artifact caches. The threads share '
+                  'the interpreter lock, so only their I/O, and the compression performed by '
+                  'codec libraries that release the lock (such as zlib), run in parallel: the '
+                  'rest of the work of creating tarballs is serialized.')
+    register('--max-pending-bytes', advanced=True, type=int, default=512 * 1024 * 1024,
+             help='The maximum total size of the results of pending artifact cache writes. '
+                  'Submitting a write that would exceed this waits for pending writes to '
+                  'complete. A single write larger than this is accepted once no others are '
+                  'pending.')
+    register('--max-wait', advanced=True, type=float, default=30.0,
+             help='Wait at most this many seconds for pending artifact cache writes to make room '
+                  'for a new write, after which the new write is dropped.')
+    register('--max-retries', advanced=True, type=int, default=2,
+             help='Retry artifact cache writes that fail with a non-fatal error (e.g., a failed '
+                  'upload) at most this many times.')
+    register('--retry-backoff', advanced=True, type=float, default=1.0,
+             help='Wait this many seconds before the first retry of a failed artifact cache '
+                  'write, doubling the wait for each subsequent retry.')
+    register('--flush-timeout', advanced=True, type=float, default=None,
+             help='At the end of a run, wait at most this many seconds for pending artifact '
+                  'cache writes before dropping them. Waits for all writes by default.')
+
+  def create_writer(self, thread_initializer=None):
+    """Returns an ArtifactCacheWriter configured by this factory.
+
+    :param thread_initializer: If specified, a callable invoked with no arguments by each writer
+                               thread before it performs any writes.
+    :rtype: :class:`ArtifactCacheWriter`
+    """
+    options = self.get_options()
+    return ArtifactCacheWriter(num_workers=options.num_workers,
+                               max_pending_bytes=options.max_pending_bytes,
+                               max_wait_secs=options.max_wait,
+                               max_retries=options.max_retries,
+                               retry_backoff_secs=options.retry_backoff,
+                               flush_timeout_secs=options.flush_timeout,
+                               thread_initializer=thread_initializer)
+
+
+class ArtifactCacheWriter(object):
+  """Writes artifacts to artifact caches on a dedicated pool of background threads.
+
+  Writes are performed smallest first, so that many small artifacts are not stuck behind a few
+  large ones. The total size of the results of pending writes is bounded: submitting a write that
+  would exceed the bound blocks the submitter until earlier writes complete, and drops the write if
+  they do not complete in time.
+
+  Writes that fail with a `NonfatalArtifactCacheError` are retried with exponential backoff.
+
+  Since the writers are threads, concurrent writes overlap their I/O and any compression that
+  releases the interpreter lock, but not the python-level work of creating tarballs. Caches are
+  written to from several threads at once, and so must be thread-safe: a RESTful cache shares its
+  requests session and its thread-safe url selector between them.
+  """
+
+  class Stats(namedtuple('Stats', ['written', 'skipped', 'failed', 'dropped', 'pending'])):
+    """Counts of artifact cache writes by outcome.
+
+    Writes are skipped when the artifact is already present in the cache, and are pending when
+    they are queued or in progress.
+    """
+
+  _WRITTEN = 'written'
+  _SKIPPED = 'skipped'
+  _FAILED = 'failed'
+  _DROPPED = 'dropped'
+
+  # Wake up periodically while waiting, because python 2 ignores SIGINT in untimed waits.
+  _POLL_INTERVAL_SECS = 1.0
+
+  def __init__(self, num_workers, max_pending_bytes, max_wait_secs=0, max_retries=0,
+               retry_backoff_secs=0, flush_timeout_secs=None, thread_initializer=None):
+    """
+    :param int num_workers: The number of writer threads.
+    :param int max_pending_bytes: The maximum total size of the results of pending writes.
+    :param float max_wait_secs: How long `submit` waits for room for a write before dropping it.
+    :param int max_retries: How many times a write failing with a non-fatal error is retried.
+    :param float retry_backoff_secs: The wait before the first retry of a write.
+    :param float flush_timeout_secs: The default timeout of `flush`, or None to wait for all writes.
+    :param thread_initializer: If specified, a callable invoked with no arguments by each writer
+                               thread before it performs any writes.
+    """
+    self._num_workers = max(1, num_workers)
+    self._max_pending_bytes = max_pending_bytes
+    self._max_wait_secs = max_wait_secs
+    self._max_retries = max_retries
+    self._retry_backoff_secs = retry_backoff_secs
+    self._flush_timeout_secs = flush_timeout_secs
+    self._thread_initializer = thread_initializer
+
+    self._cond = threading.Condition()  # Protects all of the state below.
+    self._queue = []  # A heap of (size, sequence number, write args) tuples.
+    self._sequence = itertools.count()
+    self._pending = 0  # The number of queued and in-progress writes.
+    self._pending_bytes = 0
+    self._counts = {self._WRITTEN: 0, self._SKIPPED: 0, self._FAILED: 0, self._DROPPED: 0}
+    self._workers = []
+    self._closed = False
+
+  def submit(self, cache, cache_key, paths, overwrite=False):
+    """Submit a write of the given artifact files to a cache.
+
+    The arguments are as for `ArtifactCache.insert`.
+
+    :returns: True if the write was queued, or False if it was dropped.
+    """
+    size = self._size_of(paths)
+    deadline = time.time() + self._max_wait_secs
+    with self._cond:
+      while not self._closed and self._pending_bytes and (
+          self._pending_bytes + size > self._max_pending_bytes):
+        remaining = deadline - time.time()
+        if remaining <= 0:
+          break
+        self._cond.wait(min(remaining, self._POLL_INTERVAL_SECS))
+      else:
+        if not self._closed:
+          heapq.heappush(self._queue, (size, next(self._sequence), (cache, cache_key, paths,
+                                                                     overwrite)))
+          self._pending += 1
+          self._pending_bytes += size
+          self._ensure_workers()
+          self._cond.notify_all()
+          return True
+      self._counts[self._DROPPED] += 1
+    logger.warn('Dropped write of {} to the artifact cache: too many writes are pending.'
+                .format(cache_key))
+    return False
+
+  def stats(self):
+    """:rtype: :class:`ArtifactCacheWriter.Stats`"""
+    with self._cond:
+      return self._stats()
+
+  def flush(self, timeout=None):
+    """Wait for pending writes to complete, then stop accepting writes.
+
+    Writes that have not started by the timeout are dropped. Writes that are in progress at the
+    timeout are left to complete in the background, and are reported as pending.
+
+    :param float timeout: The number of seconds to wait, defaulting to the `flush_timeout_secs`
+                          this writer was created with. None waits for all writes.
+    :rtype: :class:`ArtifactCacheWriter.Stats`
+    """
+    timeout = self._flush_timeout_secs if timeout is None else timeout
+    deadline = None if timeout is None else time.time() + timeout
+    with self._cond:
+      while self._pending:
+        remaining = self._POLL_INTERVAL_SECS if deadline is None else deadline - time.time()
+        if remaining <= 0:
+          break
+        self._cond.wait(min(remaining, self._POLL_INTERVAL_SECS))
+      return self._close()
+
+  def abort(self):
+    """Drop all writes that have not started, and stop accepting writes.
+
+    :rtype: :class:`ArtifactCacheWriter.Stats`
+    """
+    with self._cond:
+      return self._close()
+
+  def _close(self):
+    for size, _, _ in self._queue:
+      self._pending -= 1
+      self._pending_bytes -= size
+    self._counts[self._DROPPED] += len(self._queue)
+    self._queue = []
+    self._closed = True
+    self._cond.notify_all()
+    return self._stats()
+
+  def _stats(self):
+    return self.Stats(written=self._counts[self._WRITTEN],
+                      skipped=self._counts[self._SKIPPED],
+                      failed=self._counts[self._FAILED],
+                      dropped=self._counts[self._DROPPED],
+                      pending=self._pending)
+
+  def _ensure_workers(self):
+    while len(self._workers) < min(self._num_workers, self._pending):
+      worker = threading.Thread(target=self._work,
+                                name='artifact-cache-writer-{}'.format(len(self._workers)))
+      # In-progress writes that outlive a flush timeout must not prevent pants from exiting.
+      worker.daemon = True
+      worker.start()
+      self._workers.append(worker)
+
+  def _work(self):
+    if self._thread_initializer:
+      self._thread_initializer()
+    while True:
+      with self._cond:
+        while not self._queue and not self._closed:
+          self._cond.wait(self._POLL_INTERVAL_SECS)
+        if not self._queue:
+          return
+        size, _, args = heapq.heappop(self._queue)
+      try:
+        outcome = self._write(*args)
+      except Exception as e:
+        logger.error('Error while writing {} to the artifact cache: {}'.format(args[1], e))
+        outcome = self._FAILED
+      with self._cond:
+        self._counts[outcome] += 1
+        self._pending -= 1
+        self._pending_bytes -= size
+        self._cond.notify_all()
+
+  def _write(self, cache, cache_key, paths, overwrite):
+    missing_files = [path for path in paths if not os.path.exists(path)]
+    if missing_files:
+      raise ArtifactCacheError('Tried to cache nonexistent files {0}'.format(missing_files))
+
+    if not overwrite and cache.has(cache_key):
+      logger.debug('Skipping insert of existing artifact: {0}'.format(cache_key))
+      return self._SKIPPED
+
+    for attempt in itertools.count():
+      try:
+        cache.try_insert(cache_key, paths)
+        return self._WRITTEN
+      except NonfatalArtifactCacheError as e:
+        if attempt >= self._max_retries:
+          logger.error('Error while writing to artifact cache: {0}'.format(e))
+          return self._FAILED
+        backoff = self._retry_backoff_secs * (2 ** attempt)
+        logger.debug('Error while writing to artifact cache, retrying in {0}s: {1}'
+                     .format(backoff, e))
+        time.sleep(backoff)
+
+  @staticmethod
+  def _size_of(paths):
+    size = 0
+    for path in paths:
+      if os.path.isdir(path):
+        for dirpath, _, filenames in safe_walk(path):
+          for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            if os.path.isfile(file_path):
+              size += os.path.getsize(file_path)
+      elif os.path.isfile(path):
+        size += os.path.getsize(path)
+    return size
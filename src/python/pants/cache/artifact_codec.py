@@ -0,0 +1,191 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import zlib
+from collections import OrderedDict
+
+from six.moves import range
+
+
+class UnknownCodecError(ValueError):
+  pass
+
+
+class ArtifactCodec(object):
+  """A compression format for artifact tarballs.
+
+  A codec is identified by the file extension of the artifacts it creates, so that readers can
+  tell which codec to use for an artifact from its name alone.
+  """
+
+  def __init__(self, name, extension, levels, compressor_factory, decompressor_factory):
+    """
+    :param str name: The name used to select this codec in options.
+    :param str extension: The extension (including the leading dot) of artifacts in this format.
+    :param levels: The range of supported compression levels: a compression level option is
+      validated against it.
+    :param compressor_factory: A function from a compression level to an object with
+      `compress(data)` and `flush()` methods.
+    :param decompressor_factory: A function returning an object with a `decompress(data)` method.
+    """
+    self.name = name
+    self.extension = extension
+    self.levels = levels
+    self._compressor_factory = compressor_factory
+    self._decompressor_factory = decompressor_factory
+
+  def compressing_writer(self, fileobj, level):
+    """Return a write-only file object that writes compressed data to `fileobj` when closed."""
+    return _CompressingWriter(fileobj, self._compressor_factory(level))
+
+  def decompressing_reader(self, fileobj):
+    """Return a read-only file object that decompresses data read from `fileobj`."""
+    return _DecompressingReader(fileobj, self._decompressor_factory())
+
+  def __reduce__(self):
+    # Codecs are passed to subprocesses along with caches, so they are pickled by name.
+    return codec_for_name, (self.name,)
+
+  def __repr__(self):
+    return 'ArtifactCodec({})'.format(self.name)
+
+
+class _Identity(object):
+  """Passes data through unchanged, for uncompressed tarballs."""
+
+  def compress(self, data):
+    return data
+
+  def decompress(self, data):
+    return data
+
+  def flush(self):
+    return b''
+
+
+class _CompressingWriter(object):
+
+  def __init__(self, fileobj, compressor):
+    self._fileobj = fileobj
+    self._compressor = compressor
+
+  def write(self, data):
+    self._fileobj.write(self._compressor.compress(data))
+
+  def close(self):
+    self._fileobj.write(self._compressor.flush())
+
+
+class _DecompressingReader(object):
+
+  READ_SIZE_BYTES = 64 * 1024
+
+  def __init__(self, fileobj, decompressor):
+    self._fileobj = fileobj
+    self._decompressor = decompressor
+    self._buffer = b''
+    self._offset = 0
+    self._eof = False
+
+  def read(self, size=-1):
+    pieces = []
+    remaining = size
+    while size < 0 or remaining > 0:
+      if self._offset >= len(self._buffer):
+        if self._eof:
+          break
+        self._buffer, self._offset = self._fill(), 0
+        continue
+      end = len(self._buffer) if size < 0 else min(len(self._buffer), self._offset + remaining)
+      pieces.append(self._buffer[self._offset:end])
+      remaining -= end - self._offset
+      self._offset = end
+    return b''.join(pieces)
+
+  def _fill(self):
+    """Return the next decompressed chunk, which may be empty."""
+    data = self._fileobj.read(self.READ_SIZE_BYTES)
+    if not data:
+      self._eof = True
+      return b''
+    return self._decompressor.decompress(data)
+
+
+def _gzip_codec():
+  # A wbits value of 16 + MAX_WBITS selects the gzip container format.
+  return ArtifactCodec('gzip', '.tgz', range(1, 10),
+                       lambda level: zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS),
+                       lambda: zlib.decompressobj(16 + zlib.MAX_WBITS))
+
+
+def _uncompressed_codec():
+  return ArtifactCodec('none', '.tar', range(0, 10), lambda level: _Identity(), _Identity)
+
+
+def _zstd_codec():
+  try:
+    import zstandard
+  except ImportError:
+    return None
+  return ArtifactCodec('zstd', '.tar.zst', range(1, 23),
+                       lambda level: zstandard.ZstdCompressor(level=level).compressobj(),
+                       lambda: zstandard.ZstdDecompressor().decompressobj())
+
+
+def _lz4_codec():
+  try:
+    import lz4.frame
+  except ImportError:
+    return None
+
+  class Lz4Compressor(object):
+    def __init__(self, level):
+      self._compressor = lz4.frame.LZ4FrameCompressor(compression_level=level)
+      self._header = self._compressor.begin()
+
+    def compress(self, data):
+      header, self._header = self._header, b''
+      return header + self._compressor.compress(data)
+
+    def flush(self):
+      header, self._header = self._header, b''
+      return header + self._compressor.flush()
+
+  return ArtifactCodec('lz4', '.tar.lz4', range(0, 17),
+                       Lz4Compressor,
+                       lz4.frame.LZ4FrameDecompressor)
+
+
+# All codecs that may be selected, whether or not their implementation is installed.
+ALL_CODEC_NAMES = ('gzip', 'zstd', 'lz4', 'none')
+
+
+def _available_codecs():
+  codecs = OrderedDict()
+  for factory in (_gzip_codec, _zstd_codec, _lz4_codec, _uncompressed_codec):
+    codec = factory()
+    if codec is not None:
+      codecs[codec.name] = codec
+  return codecs
+
+
+AVAILABLE_CODECS = _available_codecs()
+
+
+def codec_for_name(name):
+  """Return the codec with the given name.
+
+  :raises: `UnknownCodecError` if the codec is unknown, or if its implementation is not installed.
+  """
+  try:
+    return AVAILABLE_CODECS[name]
+  except KeyError:
+    if name in ALL_CODEC_NAMES:
+      raise UnknownCodecError('The {} artifact codec requires a python module that is not '
+                              'installed.'.format(name))
+    raise UnknownCodecError('Unknown artifact codec: {}'.format(name))
+
@@ -10,10 +10,11 @@ import threading
 import urlparse
 from collections import namedtuple
 
-from six.moves import range
-
 from pants.base.build_environment import get_buildroot
 from pants.cache.artifact_cache import ArtifactCacheError
+from pants.cache.artifact_cache_index import ArtifactCacheIndex
+from pants.cache.artifact_codec import ALL_CODEC_NAMES, codec_for_name
+from pants.cache.content_addressed_local_artifact_cache import ContentAddressedLocalArtifactCache
 from pants.cache.local_artifact_cache import LocalArtifactCache, TempLocalArtifactCache
 from pants.cache.pinger import BestUrlSelector, Pinger
 from pants.cache.resolver import NoopResolver, Resolver, RESTfulResolver
@@ -74,12 +75,32 @@ class CacheSetup(Subsystem):
                   'a RESTful cache, a path of a filesystem cache, or a pipe-separated list of '
                   'alternate caches to choose from. This list is also used as input to '
                   'the resolver. When resolver is \'none\' list is used as is.')
+    register('--compression-codec', advanced=True, choices=list(ALL_CODEC_NAMES), default='gzip',
+             help='The compression format for created artifacts. zstd requires the zstandard '
+                  'module, and lz4 the lz4 module. The format is encoded in the artifact name, '
+                  'so that a cache may contain artifacts in multiple formats.')
     register('--compression-level', advanced=True, type=int, default=5,
-             help='The gzip compression level (0-9) for created artifacts.')
+             help='The compression level for created artifacts: 1-9 for gzip, 1-22 for zstd, '
+                  '0-16 for lz4 and 0-9 (ignored) for none.')
+    register('--read-codecs', advanced=True, type=list, default=[],
+             help='Compression formats to also look for when reading artifacts from remote '
+                  'caches, after --compression-codec. Useful while migrating a remote cache '
+                  'between formats. Local caches always look for all available formats.')
     register('--dereference-symlinks', type=bool, default=True, fingerprint=True,
              help='Dereference symlinks when creating cache tarball.')
+    register('--local-format', advanced=True, choices=['tarball', 'content-addressed'],
+             default='tarball',
+             help='How to store artifacts in local caches. tarball: store each artifact as a '
+                  'compressed tarball. content-addressed: store each file of an artifact once '
+                  'per distinct content, and clone or copy files into results dirs on cache hits. '
+                  'The clean-cache goal removes content that is no longer used by any artifact.')
     register('--max-entries-per-target', advanced=True, type=int, default=8,
              help='Maximum number of old cache files to keep per task target pair')
+    register('--local-max-bytes', advanced=True, type=int, default=None,
+             help='If set, the size and last use of artifacts in local caches is tracked in an '
+                  'index, and the clean-cache goal evicts the least recently used artifacts '
+                  'from each local cache until it occupies at most this many bytes. Only '
+                  'supported for the tarball --local-format.')
     register('--pinger-timeout', advanced=True, type=float, default=0.5,
              help='number of seconds before pinger times out')
     register('--pinger-tries', advanced=True, type=int, default=2,
@@ -95,6 +116,22 @@ class CacheSetup(Subsystem):
 
 class CacheFactory(object):
 
+  # The name of the directory under a local cache root that holds the content of files stored by
+  # content-addressed local caches. Task cache dirnames are fingerprints, so this cannot collide.
+  CONTENT_DIRNAME = 'content'
+
+  # The name of the file under a local cache root that indexes artifacts for LRU eviction.
+  INDEX_FILENAME = 'index.sqlite'
+
+  @classmethod
+  def create_local_index(cls, parent_path):
+    """Returns the index of the artifacts of all tasks under the given local cache root.
+
+    :rtype: :class:`pants.cache.artifact_cache_index.ArtifactCacheIndex`
+    """
+    parent_path = os.path.realpath(os.path.expanduser(parent_path))
+    return ArtifactCacheIndex(parent_path, os.path.join(parent_path, cls.INDEX_FILENAME))
+
   def __init__(self, options, log, task, pinger=None, resolver=None):
     """Create a cache factory from settings.
 
@@ -260,14 +297,17 @@ class CacheFactory(object):
     """Returns an artifact cache for the specified spec.
 
     spec can be:
-      - a path to a file-based cache root.
+      - a path to a file-based cache root, whose format is selected by --local-format.
       - a URL of a RESTful cache root.
       - a bar-separated list of URLs, where we'll pick the one with the best ping times.
       - A list or tuple of two specs, local, then remote, each as described above
     """
+    codec = codec_for_name(self._options.compression_codec)
+    read_codecs = [codec_for_name(name) for name in self._options.read_codecs]
     compression = self._options.compression_level
-    if compression not in range(1, 10):
-      raise ValueError('compression_level must be an integer 1-9: {}'.format(compression))
+    if compression not in codec.levels:
+      raise ValueError('compression_level must be an integer {}-{} for the {} codec: {}'
+                       .format(codec.levels[0], codec.levels[-1], codec.name, compression))
 
     artifact_root = self._options.pants_workdir
 
@@ -275,10 +315,23 @@ class CacheFactory(object):
       path = os.path.join(parent_path, self._cache_dirname)
       self._log.debug('{0} {1} local artifact cache at {2}'
                       .format(self._task.stable_name(), action, path))
+      if self._options.local_format == 'content-addressed':
+        # Content is shared between all tasks that use the same local cache root.
+        content_path = os.path.join(parent_path, self.CONTENT_DIRNAME)
+        return ContentAddressedLocalArtifactCache(artifact_root, path, content_path, compression,
+                                                  self._options.max_entries_per_target,
+                                                  permissions=self._options.write_permissions,
+                                                  dereference=self._options.dereference_symlinks,
+                                                  codec=codec)
+      index = None
+      if self._options.local_max_bytes is not None:
+        index = self.create_local_index(parent_path)
       return LocalArtifactCache(artifact_root, path, compression,
                                 self._options.max_entries_per_target,
                                 permissions=self._options.write_permissions,
-                                dereference=self._options.dereference_symlinks)
+                                dereference=self._options.dereference_symlinks,
+                                codec=codec,
+                                index=index)
 
     def create_remote_cache(remote_spec, local_cache):
       urls = self.get_available_urls(remote_spec.split('|'))
@@ -287,8 +340,9 @@ class CacheFactory(object):
         best_url_selector = BestUrlSelector(
           ['{}/{}'.format(url.rstrip('/'), self._cache_dirname) for url in urls]
         )
-        local_cache = local_cache or TempLocalArtifactCache(artifact_root, compression)
-        return RESTfulArtifactCache(artifact_root, best_url_selector, local_cache)
+        local_cache = local_cache or TempLocalArtifactCache(artifact_root, compression, codec=codec)
+        return RESTfulArtifactCache(artifact_root, best_url_selector, local_cache,
+                                    read_codecs=read_codecs)
 
     local_cache = create_local_cache(spec.local) if spec.local else None
     remote_cache = create_remote_cache(spec.remote, local_cache) if spec.remote else None
@@ -0,0 +1,328 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import errno
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import sys
+import tarfile
+import time
+
+from pants.cache.artifact_cache import UnreadableArtifact
+from pants.cache.local_artifact_cache import BaseLocalArtifactCache
+from pants.util.contextutil import open_tar, temporary_file
+from pants.util.dirutil import (safe_concurrent_creation, safe_concurrent_rename, safe_delete,
+                                safe_mkdir, safe_mkdir_for, safe_rm_oldest_items_in_dir,
+                                safe_rmtree, safe_walk)
+
+
+logger = logging.getLogger(__name__)
+
+# The Linux ioctl that clones the extents of one file into another, copy-on-write.
+_FICLONE = 0x40049409
+
+
+class ContentAddressedLocalArtifactCache(BaseLocalArtifactCache):
+  """An artifact cache that stores the individual files of artifacts by content digest.
+
+  Each cache key maps to a small json manifest under `<cache_root>/<id>/<hash>.manifest` that
+  lists the directories, files and symlinks of the artifact. File contents are stored once under
+  `<content_root>/<xx>/<digest>`, regardless of how many artifacts (or tasks, if they share a
+  content_root) contain them.
+
+  On a hit, files are restored by cloning their content where the filesystem supports it, and
+  otherwise by copying it. Files are never hard-linked from the content store: tools such as
+  compilers may rewrite a restored file in place, which would corrupt the content of every
+  artifact that shares it.
+
+  Content that is no longer listed by any manifest is only removed by `collect_garbage`.
+  """
+
+  MANIFEST_VERSION = 1
+
+  READ_SIZE_BYTES = 1024 * 1024
+
+  def __init__(self, artifact_root, cache_root, content_root, compression,
+               max_entries_per_target=None, permissions=None, dereference=True, codec=None):
+    """
+    :param str artifact_root: The path under which cacheable products will be read/written.
+    :param str cache_root: The artifact manifests are stored under this directory.
+    :param str content_root: The content of artifact files is stored under this directory. It
+                             may be shared between caches in order to deduplicate across tasks.
+    :param int compression: The compression level for artifact tarballs created for upload to a
+                            remote cache, which is codec-specific: for gzip, valid values are 1-9.
+    :param int max_entries_per_target: The maximum number of old manifests to leave behind on a
+                                       cache miss.
+    :param str permissions: File permissions to use when creating manifest and content files.
+    :param bool dereference: Dereference symlinks when collecting artifacts.
+    :param ArtifactCodec codec: The codec for artifact tarballs created for upload to a remote
+                                cache: defaults to gzip.
+    """
+    super(ContentAddressedLocalArtifactCache, self).__init__(
+      artifact_root,
+      compression,
+      permissions=int(permissions.strip(), base=8) if permissions else None,
+      dereference=dereference,
+      codec=codec
+    )
+    self._cache_root = os.path.realpath(os.path.expanduser(cache_root))
+    self._content_root = os.path.realpath(os.path.expanduser(content_root))
+    self._max_entries_per_target = max_entries_per_target
+    safe_mkdir(self._cache_root)
+    safe_mkdir(self._content_root)
+
+  def prune(self, root):
+    """Prune stale manifests.
+
+    If the option --cache-target-max-entry is greater than zero, then prune will remove all but n
+    old manifests for each target/task. Content files are not removed: see `collect_garbage`.
+
+    :param str root: The path under which cached manifests will be cleaned
+    """
+    max_entries_per_target = self._max_entries_per_target
+    if os.path.isdir(root) and max_entries_per_target:
+      safe_rm_oldest_items_in_dir(root, max_entries_per_target)
+
+  def has(self, cache_key):
+    return os.path.isfile(self._manifest_for_key(cache_key))
+
+  def use_cached_files(self, cache_key, results_dir=None):
+    manifest_path = self._manifest_for_key(cache_key)
+    try:
+      entries = self._read_manifest(manifest_path)
+      if entries is None:
+        return False
+      if results_dir is not None:
+        safe_rmtree(results_dir)
+      self._materialize(entries, results_dir)
+      return True
+    except Exception as e:
+      logger.warn('Error while reading {0} from local artifact cache: {1}'.format(manifest_path, e))
+      if results_dir is not None:
+        safe_mkdir(results_dir, clean=True)
+      safe_delete(manifest_path)
+      return UnreadableArtifact(cache_key, e)
+
+  def try_insert(self, cache_key, paths):
+    entries = []
+    for path in paths:
+      self._collect_path(path, entries)
+    self._write_manifest(cache_key, entries)
+
+  def delete(self, cache_key):
+    safe_delete(self._manifest_for_key(cache_key))
+
+  def _store_tarball(self, cache_key, src, codec=None):
+    """Store the content of the tarball at `src`, and return `src` for use by the caller.
+
+    This is used both when creating an artifact to upload to a remote cache, and when storing an
+    artifact that was downloaded from a remote cache.
+    """
+    entries = []
+    file_entries = {}
+    with open(src, 'rb') as infile:
+      tar_stream = (codec or self._codec).decompressing_reader(infile)
+      with open_tar(tar_stream, 'r|', errorlevel=2) as tarin:
+        for tarinfo in tarin:
+          if tarinfo.isdir():
+            entries.append({'type': 'dir', 'path': tarinfo.name})
+          elif tarinfo.issym():
+            entries.append({'type': 'link', 'path': tarinfo.name, 'target': tarinfo.linkname})
+          elif tarinfo.islnk():
+            entries.append(dict(file_entries[tarinfo.linkname], path=tarinfo.name))
+          elif tarinfo.isfile():
+            fileobj = tarin.extractfile(tarinfo)
+            entry = self._file_entry(tarinfo.name, fileobj, tarinfo.mode)
+            file_entries[tarinfo.name] = entry
+            entries.append(entry)
+          else:
+            raise tarfile.TarError('Unsupported tar entry type for {}'.format(tarinfo.name))
+    self._write_manifest(cache_key, entries)
+    return src
+
+  def _collect_path(self, path, entries):
+    relpath = os.path.relpath(path, self.artifact_root)
+    if not self._dereference and os.path.islink(path):
+      entries.append({'type': 'link', 'path': relpath, 'target': os.readlink(path)})
+    elif os.path.isdir(path):
+      entries.append({'type': 'dir', 'path': relpath})
+      for name in sorted(os.listdir(path)):
+        self._collect_path(os.path.join(path, name), entries)
+    else:
+      with open(path, 'rb') as fileobj:
+        entries.append(self._file_entry(relpath, fileobj, os.stat(path).st_mode))
+
+  def _file_entry(self, relpath, fileobj, mode):
+    executable = bool(mode & stat.S_IXUSR)
+    digest = self._store_content(fileobj, executable)
+    return {'type': 'file', 'path': relpath, 'digest': digest, 'executable': executable}
+
+  def _store_content(self, fileobj, executable):
+    """Copy the given file object into the content store, and return its content key."""
+    hasher = hashlib.sha1()
+    # The content key is only known once the content has been read, so it is first written to a
+    # temporary file in the store.
+    with temporary_file(root_dir=self._content_root,
+                        permissions=self._content_mode(executable)) as tmp:
+      for chunk in iter(lambda: fileobj.read(self.READ_SIZE_BYTES), b''):
+        hasher.update(chunk)
+        tmp.write(chunk)
+      tmp.flush()
+      # Executable and non-executable copies of identical content are stored separately, so that
+      # the mode of a restored file is that of its content.
+      content_key = hasher.hexdigest() + ('.x' if executable else '')
+      content_path = self._content_path(content_key)
+      if os.path.exists(content_path):
+        # Mark the content as recently stored, so that `collect_garbage` leaves it in place until
+        # the manifest that will reference it has been written.
+        os.utime(content_path, None)
+      else:
+        safe_mkdir_for(content_path)
+        # A concurrent writer of the same content_key wrote identical bytes.
+        safe_concurrent_rename(tmp.name, content_path)
+    return content_key
+
+  def _content_mode(self, executable):
+    # Stored content is never modified, so it is read-only.
+    return self._file_mode(executable) & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+
+  def _file_mode(self, executable):
+    mode = self._permissions or 0o644
+    if executable:
+      mode |= stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+    return mode
+
+  def _content_path(self, content_key):
+    return os.path.join(self._content_root, content_key[:2], content_key)
+
+  def _manifest_for_key(self, cache_key):
+    # Note: it's important to use the id as well as the hash, because two different targets
+    # may have the same hash if both have no sources, but we may still want to differentiate them.
+    return os.path.join(self._cache_root, cache_key.id, cache_key.hash) + '.manifest'
+
+  def _write_manifest(self, cache_key, entries):
+    dest = self._manifest_for_key(cache_key)
+    with safe_concurrent_creation(dest) as tmp_path:
+      with open(tmp_path, 'wb') as fp:
+        json.dump({'version': self.MANIFEST_VERSION, 'entries': entries}, fp)
+      if self._permissions:
+        os.chmod(tmp_path, self._permissions)
+    self.prune(os.path.dirname(dest))  # Remove old manifests.
+
+  def _read_manifest(self, manifest_path):
+    """Return the entries of the given manifest, or None if it does not exist."""
+    try:
+      with open(manifest_path, 'rb') as fp:
+        manifest = json.load(fp)
+    except IOError as e:
+      if e.errno == errno.ENOENT:
+        return None
+      raise
+    if manifest.get('version') != self.MANIFEST_VERSION:
+      raise ValueError('Unsupported manifest version in {}: {}'
+                       .format(manifest_path, manifest.get('version')))
+    return manifest['entries']
+
+  def _materialize(self, entries, results_dir):
+    for entry in entries:
+      dest = os.path.join(self.artifact_root, entry['path'])
+      entry_type = entry['type']
+      if entry_type == 'dir':
+        safe_mkdir(dest)
+      elif entry_type == 'link':
+        safe_mkdir_for(dest)
+        safe_delete(dest)
+        os.symlink(entry['target'], dest)
+      elif entry_type == 'file':
+        content_path = self._content_path(entry['digest'])
+        if not os.path.isfile(content_path):
+          raise IOError(errno.ENOENT, 'Missing cached content', content_path)
+        safe_mkdir_for(dest)
+        safe_delete(dest)
+        if not _clone_file(content_path, dest):
+          shutil.copyfile(content_path, dest)
+        os.chmod(dest, self._file_mode(entry['executable']))
+      else:
+        raise ValueError('Unknown manifest entry type: {}'.format(entry_type))
+
+  @classmethod
+  def collect_garbage(cls, manifests_root, content_root, min_age_secs=3600):
+    """Delete the content that is not listed by any manifest under `manifests_root`.
+
+    Content (and any temporary file left behind by an interrupted write) that was stored less
+    than `min_age_secs` ago is kept, since the manifest of a concurrent insert that references it
+    may not have been written yet.
+
+    :param str manifests_root: The directory under which the cache roots of all caches that share
+                               the content root are located.
+    :param str content_root: The content root to collect garbage in.
+    :param int min_age_secs: The minimum age of content to delete.
+    :returns: A tuple of the number of files deleted, and the number of bytes they occupied.
+    """
+    content_root = os.path.realpath(content_root)
+    live = set()
+    for dirpath, dirnames, filenames in safe_walk(os.path.realpath(manifests_root)):
+      dirnames[:] = [d for d in dirnames if os.path.join(dirpath, d) != content_root]
+      for filename in filenames:
+        if filename.endswith('.manifest'):
+          entries = cls._read_manifest_for_gc(os.path.join(dirpath, filename))
+          live.update(entry['digest'] for entry in entries if entry['type'] == 'file')
+
+    deleted_count = 0
+    deleted_bytes = 0
+    cutoff = time.time() - min_age_secs
+    for dirpath, _, filenames in safe_walk(content_root):
+      for filename in filenames:
+        if filename in live:
+          continue
+        path = os.path.join(dirpath, filename)
+        try:
+          stat_result = os.stat(path)
+        except OSError:
+          continue
+        if stat_result.st_mtime < cutoff:
+          safe_delete(path)
+          deleted_count += 1
+          deleted_bytes += stat_result.st_size
+    logger.debug('Deleted {} unreferenced content files ({} bytes) from {}'
+                 .format(deleted_count, deleted_bytes, content_root))
+    return deleted_count, deleted_bytes
+
+  @classmethod
+  def _read_manifest_for_gc(cls, manifest_path):
+    try:
+      with open(manifest_path, 'rb') as fp:
+        manifest = json.load(fp)
+    except IOError as e:
+      if e.errno == errno.ENOENT:
+        # Removed concurrently, so it need not be kept alive.
+        return []
+      raise
+    if manifest.get('version') != cls.MANIFEST_VERSION:
+      # Manifests of other versions are never read, so their content need not be kept alive.
+      return []
+    return manifest['entries']
+
+
+def _clone_file(src, dest):
+  """Clone the content of `src` into a new file at `dest` copy-on-write, if supported.
+
+  :returns: True if the file was cloned.
+  """
+  if not sys.platform.startswith('linux'):
+    return False
+  try:
+    with open(src, 'rb') as src_fp, open(dest, 'wb') as dest_fp:
+      fcntl.ioctl(dest_fp.fileno(), _FICLONE, src_fp.fileno())
+    return True
+  except (IOError, OSError):
+    return False
@@ -11,6 +11,7 @@ from contextlib import contextmanager
 
 from pants.cache.artifact import TarballArtifact
 from pants.cache.artifact_cache import ArtifactCache, UnreadableArtifact
+from pants.cache.artifact_codec import AVAILABLE_CODECS, codec_for_name
 from pants.util.contextutil import temporary_file
 from pants.util.dirutil import (safe_delete, safe_mkdir, safe_mkdir_for,
                                 safe_rm_oldest_items_in_dir, safe_rmtree)
@@ -21,22 +22,33 @@ logger = logging.getLogger(__name__)
 
 class BaseLocalArtifactCache(ArtifactCache):
 
-  def __init__(self, artifact_root, compression, permissions=None, dereference=True):
+  def __init__(self, artifact_root, compression, permissions=None, dereference=True, codec=None):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
-    :param int compression: The gzip compression level for created artifacts.
-                            Valid values are 0-9.
+    :param int compression: The compression level for created artifacts, which is codec-specific:
+                            for gzip, valid values are 1-9.
     :param str permissions: File permissions to use when creating artifact files.
     :param bool dereference: Dereference symlinks when creating the cache tarball.
+    :param ArtifactCodec codec: The codec for created artifacts: defaults to gzip.
     """
     super(BaseLocalArtifactCache, self).__init__(artifact_root)
     self._compression = compression
     self._cache_root = None
     self._permissions = permissions
     self._dereference = dereference
+    self._codec = codec or codec_for_name('gzip')
 
-  def _artifact(self, path):
-    return TarballArtifact(self.artifact_root, path, self._compression, dereference=self._dereference)
+  @property
+  def codec(self):
+    """The codec of the artifacts created by this cache.
+
+    :rtype: :class:`pants.cache.artifact_codec.ArtifactCodec`
+    """
+    return self._codec
+
+  def _artifact(self, path, codec=None):
+    return TarballArtifact(self.artifact_root, path, self._compression,
+                           dereference=self._dereference, codec=codec or self._codec)
 
   @contextmanager
   def _tmpfile(self, cache_key, use):
@@ -52,43 +64,52 @@ class BaseLocalArtifactCache(ArtifactCache):
       self._artifact(tmp.name).collect(paths)
       yield self._store_tarball(cache_key, tmp.name)
 
-  def store_and_use_artifact(self, cache_key, src, results_dir=None):
+  def store_and_use_artifact(self, cache_key, src, results_dir=None, codec=None):
     """Store and then extract the artifact from the given `src` iterator for the given cache_key.
 
+    The artifact is extracted as it is read from `src`, and is only stored if extraction succeeds.
+
     :param cache_key: Cache key for the artifact.
     :param src: Iterator over binary data to store for the artifact.
     :param str results_dir: The path to the expected destination of the artifact extraction: will
       be cleared both before extraction, and after a failure to extract.
+    :param ArtifactCodec codec: The codec of the artifact, if other than this cache's codec.
     """
+    codec = codec or self._codec
     with self._tmpfile(cache_key, 'read') as tmp:
-      for chunk in src:
-        tmp.write(chunk)
+      self._extract_stream(src, results_dir, spool=tmp, codec=codec)
       tmp.close()
-      tarball = self._store_tarball(cache_key, tmp.name)
-      artifact = self._artifact(tarball)
+      self._store_tarball(cache_key, tmp.name, codec=codec)
+      return True
+
+  def _extract_stream(self, src, results_dir=None, spool=None, codec=None):
+    """Extract the artifact read from the given `src` iterator, optionally copying it to `spool`."""
+    # NOTE(mateo): The two clean=True args passed in this method are likely safe, since the cache will by
+    # definition be dealing with unique results_dir, as opposed to the stable vt.results_dir (aka 'current').
+    # But if by chance it's passed the stable results_dir, safe_makedir(clean=True) will silently convert it
+    # from a symlink to a real dir and cause mysterious 'Operation not permitted' errors until the workdir is cleaned.
+    if results_dir is not None:
+      safe_mkdir(results_dir, clean=True)
 
-      # NOTE(mateo): The two clean=True args passed in this method are likely safe, since the cache will by
-      # definition be dealing with unique results_dir, as opposed to the stable vt.results_dir (aka 'current').
-      # But if by chance it's passed the stable results_dir, safe_makedir(clean=True) will silently convert it
-      # from a symlink to a real dir and cause mysterious 'Operation not permitted' errors until the workdir is cleaned.
+    try:
+      reader = _ByteIteratorReader(src, spool=spool)
+      self._artifact(None, codec=codec).extract_from(reader)
+      # The tar reader stops at the end-of-archive marker: consume any trailing padding, so that the
+      # spooled copy is complete.
+      reader.drain()
+    except Exception:
+      # Do our best to clean up after a failed artifact extraction. If a results_dir has been
+      # specified, it is "expected" to represent the output destination of the extracted
+      # artifact, and so removing it should clear any partially extracted state.
       if results_dir is not None:
         safe_mkdir(results_dir, clean=True)
+      raise
 
-      try:
-        artifact.extract()
-      except Exception:
-        # Do our best to clean up after a failed artifact extraction. If a results_dir has been
-        # specified, it is "expected" to represent the output destination of the extracted
-        # artifact, and so removing it should clear any partially extracted state.
-        if results_dir is not None:
-          safe_mkdir(results_dir, clean=True)
-        safe_delete(tarball)
-        raise
-
-      return True
+  def _store_tarball(self, cache_key, src, codec=None):
+    """Given a src path to an artifact tarball, store it and return stored artifact's path.
 
-  def _store_tarball(self, cache_key, src):
-    """Given a src path to an artifact tarball, store it and return stored artifact's path."""
+    :param ArtifactCodec codec: The codec of the artifact, if other than this cache's codec.
+    """
     pass
 
 
@@ -96,23 +117,29 @@ class LocalArtifactCache(BaseLocalArtifactCache):
   """An artifact cache that stores the artifacts in local files."""
 
   def __init__(self, artifact_root, cache_root, compression, max_entries_per_target=None,
-               permissions=None, dereference=True):
+               permissions=None, dereference=True, codec=None, index=None):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param str cache_root: The locally cached files are stored under this directory.
-    :param int compression: The gzip compression level for created artifacts (1-9 or false-y).
+    :param int compression: The compression level for created artifacts (codec-specific or false-y).
     :param int max_entries_per_target: The maximum number of old cache files to leave behind on a cache miss.
     :param str permissions: File permissions to use when creating artifact files.
     :param bool dereference: Dereference symlinks when creating the cache tarball.
+    :param ArtifactCodec codec: The codec for created artifacts: defaults to gzip. Artifacts
+                                created with any other available codec can still be read.
+    :param ArtifactCacheIndex index: An optional index to record the size and use of artifacts in,
+                                     so that they can be evicted by a global LRU policy.
     """
     super(LocalArtifactCache, self).__init__(
       artifact_root,
       compression,
       permissions=int(permissions.strip(), base=8) if permissions else None,
-      dereference=dereference
+      dereference=dereference,
+      codec=codec
     )
     self._cache_root = os.path.realpath(os.path.expanduser(cache_root))
     self._max_entries_per_target = max_entries_per_target
+    self._index = index
     safe_mkdir(self._cache_root)
 
   def prune(self, root):
@@ -126,22 +153,42 @@ class LocalArtifactCache(BaseLocalArtifactCache):
 
     max_entries_per_target = self._max_entries_per_target
     if os.path.isdir(root) and max_entries_per_target:
+      before = os.listdir(root)
       safe_rm_oldest_items_in_dir(root, max_entries_per_target)
+      if self._index:
+        after = set(os.listdir(root))
+        self._index.remove([os.path.join(root, name) for name in before if name not in after])
 
   def has(self, cache_key):
     return self._artifact_for(cache_key).exists()
 
   def _artifact_for(self, cache_key):
+    """Return the artifact for the given key, in the first codec for which one exists.
+
+    If no artifact exists, returns a (non-existent) artifact in this cache's codec.
+    """
+    for codec in self._read_codecs():
+      artifact = self._artifact(self._cache_file_for_key(cache_key, codec), codec=codec)
+      if artifact.exists():
+        return artifact
     return self._artifact(self._cache_file_for_key(cache_key))
 
+  def _read_codecs(self):
+    yield self._codec
+    for codec in AVAILABLE_CODECS.values():
+      if codec is not self._codec:
+        yield codec
+
   def use_cached_files(self, cache_key, results_dir=None):
-    tarfile = self._cache_file_for_key(cache_key)
+    artifact = self._artifact_for(cache_key)
+    tarfile = artifact.tarfile
     try:
-      artifact = self._artifact_for(cache_key)
       if artifact.exists():
         if results_dir is not None:
           safe_rmtree(results_dir)
         artifact.extract()
+        if self._index:
+          self._index.touch(tarfile)
         return True
     except Exception as e:
       # TODO(davidt): Consider being more granular in what is caught.
@@ -156,21 +203,29 @@ class LocalArtifactCache(BaseLocalArtifactCache):
       pass
 
   def delete(self, cache_key):
-    safe_delete(self._cache_file_for_key(cache_key))
-
-  def _store_tarball(self, cache_key, src):
-    dest = self._cache_file_for_key(cache_key)
+    paths = [self._cache_file_for_key(cache_key, codec) for codec in self._read_codecs()]
+    for path in paths:
+      safe_delete(path)
+    if self._index:
+      self._index.remove(paths)
+
+  def _store_tarball(self, cache_key, src, codec=None):
+    dest = self._cache_file_for_key(cache_key, codec)
     safe_mkdir_for(dest)
     os.rename(src, dest)
     if self._permissions:
       os.chmod(dest, self._permissions)
+    if self._index:
+      self._index.record(dest)
     self.prune(os.path.dirname(dest))  # Remove old cache files.
     return dest
 
-  def _cache_file_for_key(self, cache_key):
+  def _cache_file_for_key(self, cache_key, codec=None):
     # Note: it's important to use the id as well as the hash, because two different targets
     # may have the same hash if both have no sources, but we may still want to differentiate them.
-    return os.path.join(self._cache_root, cache_key.id, cache_key.hash) + '.tgz'
+    # The codec is encoded in the extension, so that caches written with mixed codecs are readable.
+    codec = codec or self._codec
+    return os.path.join(self._cache_root, cache_key.id, cache_key.hash) + codec.extension
 
 
 class TempLocalArtifactCache(BaseLocalArtifactCache):
@@ -180,14 +235,19 @@ class TempLocalArtifactCache(BaseLocalArtifactCache):
   actually stores files between calls, but is useful for handling file IO for a remote cache.
   """
 
-  def __init__(self, artifact_root, compression, permissions=None):
+  def __init__(self, artifact_root, compression, permissions=None, codec=None):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     """
     super(TempLocalArtifactCache, self).__init__(artifact_root, compression=compression,
-                                                 permissions=permissions)
+                                                 permissions=permissions, codec=codec)
+
+  def store_and_use_artifact(self, cache_key, src, results_dir=None, codec=None):
+    # Nothing is stored, so extract directly from `src` rather than spooling it to a file first.
+    self._extract_stream(src, results_dir, codec=codec or self._codec)
+    return True
 
-  def _store_tarball(self, cache_key, src):
+  def _store_tarball(self, cache_key, src, codec=None):
     return src
 
   def has(self, cache_key):
@@ -198,3 +258,42 @@ class TempLocalArtifactCache(BaseLocalArtifactCache):
 
   def delete(self, cache_key):
     pass
+
+
+class _ByteIteratorReader(object):
+  """Adapts an iterator over chunks of bytes to the `read` method of a file object."""
+
+  def __init__(self, chunks, spool=None):
+    """
+    :param chunks: An iterator over chunks of bytes.
+    :param spool: An optional file object that all chunks read from `chunks` are written to.
+    """
+    self._chunks = iter(chunks)
+    self._spool = spool
+    self._chunk = b''
+    self._offset = 0
+
+  def _next_chunk(self):
+    chunk = next(self._chunks, b'')
+    if chunk and self._spool:
+      self._spool.write(chunk)
+    return chunk
+
+  def read(self, size=-1):
+    pieces = []
+    remaining = size
+    while size < 0 or remaining > 0:
+      if self._offset >= len(self._chunk):
+        self._chunk, self._offset = self._next_chunk(), 0
+        if not self._chunk:
+          break
+      end = len(self._chunk) if size < 0 else min(len(self._chunk), self._offset + remaining)
+      pieces.append(self._chunk[self._offset:end])
+      remaining -= end - self._offset
+      self._offset = end
+    return b''.join(pieces)
+
+  def drain(self):
+    """Consume the remainder of the underlying iterator."""
+    while self._next_chunk():
+      pass
@@ -5,6 +5,7 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import threading
 import urlparse
 from collections import Counter, deque
 from contextlib import contextmanager
@@ -88,6 +89,8 @@ class BestUrlSelector(object):
     self.parsed_urls = deque(self._parse_urls(available_urls))
     self.unsuccessful_calls = Counter()
     self.max_failures = max_failures
+    # Urls are selected by the threads of the RESTful cache, so the bookkeeping is guarded.
+    self._lock = threading.Lock()
 
   def _parse_urls(self, urls):
     parsed_urls = [urlparse.urlparse(url) for url in urls]
@@ -108,16 +111,20 @@ class BestUrlSelector(object):
     by one element).
     """
 
-    best_url = self.parsed_urls[0]
+    with self._lock:
+      best_url = self.parsed_urls[0]
     try:
       yield best_url
     except Exception:
-      self.unsuccessful_calls[best_url] += 1
-
-      # Not thread-safe but pool used by cache is based on subprocesses, therefore no race.
-      if self.unsuccessful_calls[best_url] > self.max_failures:
-        self.parsed_urls.rotate(-1)
-        self.unsuccessful_calls[best_url] = 0
+      with self._lock:
+        # A url is only rotated away from once, however many calls to it were in flight when it
+        # started failing.
+        if self.parsed_urls[0] == best_url:
+          self.unsuccessful_calls[best_url] += 1
+          if self.unsuccessful_calls[best_url] > self.max_failures:
+            self.parsed_urls.rotate(-1)
+            self.unsuccessful_calls[best_url] = 0
       raise
     else:
-      self.unsuccessful_calls[best_url] = 0
+      with self._lock:
+        self.unsuccessful_calls[best_url] = 0
@@ -6,14 +6,16 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import logging
-import multiprocessing
 import Queue
 import threading
+from multiprocessing.pool import ThreadPool
 
 import requests
 from requests import RequestException
+from requests.adapters import HTTPAdapter
 
-from pants.cache.artifact_cache import ArtifactCache, NonfatalArtifactCacheError, UnreadableArtifact
+from pants.cache.artifact_cache import (ArtifactCache, NonfatalArtifactCacheError, UnreadableArtifact,
+                                        call_use_cached_files)
 
 
 logger = logging.getLogger(__name__)
@@ -26,10 +28,18 @@ logging.getLogger('requests').setLevel(logging.WARNING)
 class RequestsSession(object):
   _session = None
 
+  # The number of connections kept alive per host. This should be at least as large as the number
+  # of requests that are issued concurrently, or connections will be discarded after use.
+  MAX_POOL_SIZE = 16
+
   @classmethod
   def instance(cls):
     if cls._session is None:
-      cls._session = requests.Session()
+      session = requests.Session()
+      adapter = HTTPAdapter(pool_connections=cls.MAX_POOL_SIZE, pool_maxsize=cls.MAX_POOL_SIZE)
+      session.mount('http://', adapter)
+      session.mount('https://', adapter)
+      cls._session = session
     return cls._session
 
 
@@ -38,54 +48,92 @@ class RESTfulArtifactCache(ArtifactCache):
 
   READ_SIZE_BYTES = 4 * 1024 * 1024
 
-  def __init__(self, artifact_root, best_url_selector, local):
+  def __init__(self, artifact_root, best_url_selector, local,
+               max_parallel_requests=RequestsSession.MAX_POOL_SIZE, read_codecs=()):
     """
     :param string artifact_root: The path under which cacheable products will be read/written.
     :param BestUrlSelector best_url_selector: Url selector that supports fail-over. Each returned
       url represents prefix for some RESTful service. We must be able to PUT and GET to any path
       under this base.
     :param BaseLocalArtifactCache local: local cache instance for storing and creating artifacts
+    :param int max_parallel_requests: The maximum number of requests to have in flight at once
+      when probing or reading many keys via `has_many` or `use_cached_files_many`.
+    :param list read_codecs: Codecs of artifacts to look for when reading, in addition to (and
+      after) the codec of the local cache, which is always used for writing.
     """
     super(RESTfulArtifactCache, self).__init__(artifact_root)
 
     self.best_url_selector = best_url_selector
     self._timeout_secs = 4.0
     self._localcache = local
+    self._max_parallel_requests = max_parallel_requests
+    self._read_codecs = [local.codec] + [codec for codec in read_codecs if codec is not local.codec]
 
   def try_insert(self, cache_key, paths):
     # Delegate creation of artifact to local cache.
     with self._localcache.insert_paths(cache_key, paths) as tarfile:
       # Upload local artifact to remote cache.
       with open(tarfile, 'rb') as infile:
-        if not self._request('PUT', cache_key, body=infile):
+        if not self._request('PUT', cache_key, body=infile, codec=self._localcache.codec):
           raise NonfatalArtifactCacheError('Failed to PUT {0}.'.format(cache_key))
 
   def has(self, cache_key):
     if self._localcache.has(cache_key):
       return True
-    return self._request('HEAD', cache_key) is not None
+    return any(self._request('HEAD', cache_key, codec=codec) is not None
+               for codec in self._read_codecs)
+
+  def has_many(self, cache_keys):
+    cache_keys = list(cache_keys)
+    present = self._localcache.has_many(cache_keys)
+    remote_indexes = [i for i, hit in enumerate(present) if not hit]
+    if remote_indexes:
+      remote_keys = [cache_keys[i] for i in remote_indexes]
+      for i, hit in zip(remote_indexes, self._map_requests(self._has_or_unknown, remote_keys)):
+        present[i] = hit
+    return present
+
+  def use_cached_files_many(self, keys_and_results_dirs, map_func=map):
+    # Each key is fetched with a single GET, on which a 404 is a miss: so a hit costs one round trip.
+    return self._map_requests(call_use_cached_files,
+                              [(self, cache_key, results_dir)
+                               for cache_key, results_dir in keys_and_results_dirs])
+
+  def _map_requests(self, func, items):
+    """Map `func` over `items` using a pool of threads.
+
+    The threads share the pooled requests session, and the url selector, which is thread-safe.
+    """
+    pool = ThreadPool(processes=max(1, min(self._max_parallel_requests, len(items))))
+    try:
+      return pool.map(func, items, chunksize=1)
+    finally:
+      pool.close()
+      pool.join()
 
   def use_cached_files(self, cache_key, results_dir=None):
     if self._localcache.has(cache_key):
       return self._localcache.use_cached_files(cache_key, results_dir)
 
-    queue = multiprocessing.Queue()
+    queue = Queue.Queue()
     try:
-      response = self._request('GET', cache_key)
-      if response is not None:
-        threading.Thread(
-          target=_log_if_no_response,
-          args=(
-            60,
-            "Still downloading artifacts (either they're very large or the connection to the cache is slow)",
-            queue.get,
-          )
-        ).start()
-        # Delegate storage and extraction to local cache
-        byte_iter = response.iter_content(self.READ_SIZE_BYTES)
-        res = self._localcache.store_and_use_artifact(cache_key, byte_iter, results_dir)
-        queue.put(None)
-        return res
+      for codec in self._read_codecs:
+        response = self._request('GET', cache_key, codec=codec)
+        if response is not None:
+          threading.Thread(
+            target=_log_if_no_response,
+            args=(
+              60,
+              "Still downloading artifacts (either they're very large or the connection to the cache is slow)",
+              queue.get,
+            )
+          ).start()
+          # Delegate storage and extraction to local cache
+          byte_iter = response.iter_content(self.READ_SIZE_BYTES)
+          res = self._localcache.store_and_use_artifact(cache_key, byte_iter, results_dir,
+                                                        codec=codec)
+          queue.put(None)
+          return res
     except Exception as e:
       logger.warn('\nError while reading from remote artifact cache: {0}\n'.format(e))
       queue.put(None)
@@ -96,14 +144,15 @@ class RESTfulArtifactCache(ArtifactCache):
 
   def delete(self, cache_key):
     self._localcache.delete(cache_key)
-    self._request('DELETE', cache_key)
+    for codec in self._read_codecs:
+      self._request('DELETE', cache_key, codec=codec)
 
   # Returns a response if we get a 200, None if we get a 404 and raises an exception otherwise.
-  def _request(self, method, cache_key, body=None):
+  def _request(self, method, cache_key, body=None, codec=None):
 
     session = RequestsSession.instance()
     with self.best_url_selector.select_best_url() as best_url:
-      url = self._url_for_key(best_url, cache_key)
+      url = self._url_for_key(best_url, cache_key, codec or self._localcache.codec)
       logger.debug('Sending {0} request to {1}'.format(method, url))
       try:
         if 'PUT' == method:
@@ -130,12 +179,13 @@ class RESTfulArtifactCache(ArtifactCache):
                                          .format(method, url,
                                                  response.status_code, response.reason))
 
-  def _url_suffix_for_key(self, cache_key):
-    return '{0}/{1}.tgz'.format(cache_key.id, cache_key.hash)
+  def _url_suffix_for_key(self, cache_key, codec):
+    # The codec is encoded in the extension, so that caches written with mixed codecs are readable.
+    return '{0}/{1}{2}'.format(cache_key.id, cache_key.hash, codec.extension)
 
-  def _url_for_key(self, url, cache_key):
+  def _url_for_key(self, url, cache_key, codec):
     path_prefix = url.path.rstrip(b'/')
-    path = '{0}/{1}'.format(path_prefix, self._url_suffix_for_key(cache_key))
+    path = '{0}/{1}'.format(path_prefix, self._url_suffix_for_key(cache_key, codec))
     return '{0}://{1}{2}'.format(url.scheme, url.netloc, path)
 
 
@@ -0,0 +1,67 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+
+from twitter.common.collections import OrderedSet
+
+from pants.base.exceptions import TaskError
+from pants.cache.cache_setup import CacheFactory, CacheSetup
+from pants.cache.content_addressed_local_artifact_cache import ContentAddressedLocalArtifactCache
+from pants.task.task import Task
+
+
+class CleanCache(Task):
+  """Evict the least recently used artifacts from local artifact caches.
+
+  Each local cache is reduced to at most --cache-local-max-bytes, using the index that is
+  maintained while that option is set. If a cache has no complete index yet, one is built from the
+  artifacts present.
+
+  The content stored by content-addressed local caches that is no longer used by any of their
+  artifacts is deleted instead: they do not support a byte budget.
+  """
+
+  @classmethod
+  def register_options(cls, register):
+    super(CleanCache, cls).register_options(register)
+    register('--rebuild-index', type=bool,
+             help='Rebuild the index of each local cache from the artifacts present before '
+                  'evicting, rather than only when no complete index exists.')
+
+  def execute(self):
+    cache_options = CacheSetup.scoped_instance(self).get_options()
+    max_bytes = cache_options.local_max_bytes
+    content_addressed = cache_options.local_format == 'content-addressed'
+    if max_bytes is None and not content_addressed:
+      raise TaskError('The --cache-local-max-bytes option must be set to clean local caches.')
+    if max_bytes is not None and content_addressed:
+      # The artifacts of content-addressed caches are manifests, whose sizes do not account for
+      # the content they share: so a budget could not be enforced.
+      raise TaskError('The --cache-local-max-bytes option is not supported by the '
+                      'content-addressed --cache-local-format.')
+
+    local_roots = OrderedSet(os.path.realpath(os.path.expanduser(spec))
+                             for spec in cache_options.read_from + cache_options.write_to
+                             if CacheFactory.is_local(spec))
+    for root in local_roots:
+      if not os.path.isdir(root):
+        continue
+      if max_bytes is not None:
+        index = CacheFactory.create_local_index(root)
+        if self.get_options().rebuild_index or not index.is_complete():
+          self.context.log.info('Indexing local artifact cache at {}'.format(root))
+          index.rebuild(excludes=(CacheFactory.CONTENT_DIRNAME,))
+        count, size = index.evict(max_bytes)
+        self.context.log.info('Evicted {} artifacts ({} bytes) from local artifact cache at {}'
+                              .format(count, size, root))
+
+      content_root = os.path.join(root, CacheFactory.CONTENT_DIRNAME)
+      if os.path.isdir(content_root):
+        count, size = ContentAddressedLocalArtifactCache.collect_garbage(root, content_root)
+        self.context.log.info('Deleted {} unused content files ({} bytes) from local artifact '
+                              'cache at {}'.format(count, size, root))
@@ -7,6 +7,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 from pants.core_tasks.bash_completion import BashCompletion
 from pants.core_tasks.clean import Clean
+from pants.core_tasks.clean_cache import CleanCache
 from pants.core_tasks.deferred_sources_mapper import DeferredSourcesMapper
 from pants.core_tasks.explain_options_task import ExplainOptionsTask
 from pants.core_tasks.invalidate import Invalidate
@@ -57,6 +58,7 @@ def register_goals():
   # Cleaning.
   task(name='invalidate', action=Invalidate).install()
   task(name='clean-all', action=Clean).install('clean-all')
+  task(name='clean-cache', action=CleanCache).install()
 
   # Pantsd.
   kill_pantsd = task(name='kill-pantsd', action=PantsDaemonKill)
@@ -181,6 +181,18 @@ class Context(object):
     self.run_tracker.background_worker_pool().submit_async_work_chain(
       work_chain, workunit_parent=workunit_parent, done_hook=done_hook)
 
+  def submit_artifact_cache_writes(self, writes):
+    """Submit writes to artifact caches to be performed in the background.
+
+    :API: public
+
+    :param writes: An iterable of (cache, cache_key, paths, overwrite) tuples, with the arguments
+                   of `ArtifactCache.insert` for each write.
+    """
+    writer = self.run_tracker.artifact_cache_writer()
+    for cache, cache_key, paths, overwrite in writes:
+      writer.submit(cache, cache_key, paths, overwrite)
+
   def background_worker_pool(self):
     """Returns the pool to which tasks can submit background work.
 
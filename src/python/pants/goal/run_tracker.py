@@ -23,6 +23,7 @@ from pants.base.run_info import RunInfo
 from pants.base.worker_pool import SubprocPool, WorkerPool
 from pants.base.workunit import WorkUnit
 from pants.build_graph.target import Target
+from pants.cache.artifact_cache_writer import ArtifactCacheWriterFactory
 from pants.goal.aggregated_timings import AggregatedTimings
 from pants.goal.artifact_cache_stats import ArtifactCacheStats
 from pants.goal.pantsd_stats import PantsDaemonStats
@@ -62,7 +63,7 @@ class RunTracker(Subsystem):
 
   @classmethod
   def subsystem_dependencies(cls):
-    return (StatsDBFactory,)
+    return (StatsDBFactory, ArtifactCacheWriterFactory)
 
   @classmethod
   def register_options(cls, register):
@@ -120,6 +121,9 @@ class RunTracker(Subsystem):
     self._background_worker_pool = None
     self._background_root_workunit = None
 
+    # For artifact cache writes.  Created lazily if needed.
+    self._artifact_cache_writer = None
+
     # Trigger subproc pool init while our memory image is still clean (see SubprocPool docstring).
     SubprocPool.set_num_processes(self._num_foreground_workers)
     SubprocPool.foreground()
@@ -381,6 +385,9 @@ class RunTracker(Subsystem):
 
     :return: 0 for success, 1 for failure.
     """
+    if self._artifact_cache_writer:
+      self._flush_artifact_cache_writes()
+
     if self._background_worker_pool:
       if self._aborted:
         self.log(Report.INFO, "Aborting background workers.")
@@ -417,6 +424,20 @@ class RunTracker(Subsystem):
 
     return 1 if outcome in [WorkUnit.FAILURE, WorkUnit.ABORTED] else 0
 
+  def _flush_artifact_cache_writes(self):
+    if self._aborted:
+      self.log(Report.INFO, "Aborting artifact cache writes.")
+      stats = self._artifact_cache_writer.abort()
+    else:
+      pending = self._artifact_cache_writer.stats().pending
+      if pending:
+        self.log(Report.INFO, "Waiting for {} artifact cache writes to finish.".format(pending))
+      stats = self._artifact_cache_writer.flush()
+    log_level = Report.WARN if stats.failed or stats.dropped or stats.pending else Report.INFO
+    self.log(log_level, "Artifact cache writes: {} written, {} skipped, {} failed, {} dropped, "
+                        "{} still pending.".format(stats.written, stats.skipped, stats.failed,
+                                                   stats.dropped, stats.pending))
+
   def end_workunit(self, workunit):
     self.report.end_workunit(workunit)
     path, duration, self_time, is_tool = workunit.end()
@@ -443,6 +464,17 @@ class RunTracker(Subsystem):
                                                 num_workers=self._num_background_workers)
     return self._background_worker_pool
 
+  def artifact_cache_writer(self):
+    """Returns the writer that performs artifact cache writes in the background.
+
+    :rtype: :class:`pants.cache.artifact_cache_writer.ArtifactCacheWriter`
+    """
+    if self._artifact_cache_writer is None:  # Initialize lazily.
+      parent_workunit = self.get_background_root_workunit()
+      self._artifact_cache_writer = ArtifactCacheWriterFactory.global_instance().create_writer(
+        thread_initializer=lambda: self.register_thread(parent_workunit))
+    return self._artifact_cache_writer
+
   def shutdown_worker_pool(self):
     """Shuts down the SubprocPool.
 
@@ -7,18 +7,26 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import errno
 import hashlib
+import logging
 import os
+import threading
 from abc import abstractmethod
 from collections import namedtuple
+from multiprocessing.pool import ThreadPool
 
+from pants.base.fingerprint_strategy import DefaultFingerprintStrategy
 from pants.base.hash_utils import hash_all
+from pants.build_graph.build_graph import sort_targets
 from pants.build_graph.target import Target
 from pants.fs.fs import safe_filename
 from pants.subsystem.subsystem import Subsystem
-from pants.util.dirutil import safe_mkdir
+from pants.util.dirutil import safe_concurrent_creation, safe_mkdir
 from pants.util.meta import AbstractClass
 
 
+logger = logging.getLogger(__name__)
+
+
 # Bump this to invalidate all existing keys in artifact caches across all pants deployments in the
 # world. Do this if you've made a change that invalidates existing artifacts, e.g.,  fixed a bug
 # that caused bad artifacts to be cached.
@@ -84,6 +92,19 @@ class CacheKeyGeneratorInterface(AbstractClass):
       fingerprinting of a given Target.
     """
 
+  def precompute_fingerprints(self, targets, transitive=False, fingerprint_strategy=None,
+                              num_workers=1):
+    """Compute and memoize the fingerprints that `key_for_target` will need for the given targets.
+
+    This is an optimization that allows fingerprints to be computed in bulk: it is a no-op by
+    default, and callers must not depend on it for correctness.
+
+    :param targets: The targets that keys will be requested for.
+    :param transitive: Whether keys will include a fingerprint of all of the targets' dependencies.
+    :param fingerprint_strategy: The FingerprintStrategy that keys will be requested with.
+    :param int num_workers: The number of threads to compute fingerprints with.
+    """
+
 
 class CacheKeyGenerator(CacheKeyGeneratorInterface):
   def __init__(self, *base_fingerprint_inputs):
@@ -110,6 +131,53 @@ class CacheKeyGenerator(CacheKeyGeneratorInterface):
     else:
       return None
 
+  def precompute_fingerprints(self, targets, transitive=False, fingerprint_strategy=None,
+                              num_workers=1):
+    """Compute the direct fingerprints of targets in parallel, then fold transitive fingerprints.
+
+    Direct fingerprints are dominated by hashing sources, which is mostly I/O and hashlib (which
+    releases the GIL), so they may be computed in a pool of `num_workers` threads: this requires
+    the fingerprint strategy to be thread-safe. Transitive fingerprints are then folded serially
+    in dependency order, so that each one only combines memoized fingerprints.
+
+    Fingerprints are memoized on targets by fingerprint strategy, so they are shared with any other
+    task that uses an equal strategy in the same run.
+    """
+    fingerprint_strategy = fingerprint_strategy or DefaultFingerprintStrategy()
+    targets = Target.closure_for_targets(targets) if transitive else list(targets)
+    if transitive:
+      # Direct strategies may fingerprint dependencies other than the targets' own dependencies.
+      for target in list(targets):
+        if fingerprint_strategy.direct(target):
+          targets.update(fingerprint_strategy.dependencies(target))
+
+    def invalidation_hash(target):
+      try:
+        target.invalidation_hash(fingerprint_strategy)
+      except Exception as e:
+        # Errors are reported with better context by `key_for_target`.
+        logger.debug('Failed to precompute the fingerprint of {}: {}'.format(target.address, e))
+
+    if num_workers > 1 and len(targets) > 1:
+      pool = ThreadPool(processes=min(num_workers, len(targets)))
+      try:
+        pool.map(invalidation_hash, targets, chunksize=1)
+      finally:
+        pool.close()
+        pool.join()
+    else:
+      for target in targets:
+        invalidation_hash(target)
+
+    if transitive:
+      # Fold dependencies before their dependees: `sort_targets` orders dependees first.
+      for target in reversed(sort_targets(targets)):
+        try:
+          target.transitive_invalidation_hash(fingerprint_strategy)
+        except Exception as e:
+          logger.debug('Failed to precompute the transitive fingerprint of {}: {}'
+                       .format(target.address, e))
+
 
 class UncacheableCacheKeyGenerator(CacheKeyGeneratorInterface):
   """A cache key generator that always returns uncacheable cache keys."""
@@ -127,6 +195,18 @@ class BuildInvalidator(object):
   class Factory(Subsystem):
     options_scope = 'build-invalidator'
 
+    @classmethod
+    def register_options(cls, register):
+      super(BuildInvalidator.Factory, cls).register_options(register)
+      register('--fingerprint-workers', advanced=True, type=int, default=1,
+               help='Number of threads used to compute the fingerprints of targets before '
+                    'checking them for invalidation. Values greater than 1 require the '
+                    'fingerprint strategies of all tasks to be thread-safe.')
+      register('--store', advanced=True, choices=['files', 'log'], default='files',
+               help='How to store fingerprints. files: one file per target set, read and written '
+                    'individually. log: a single append-only file per task, read once and '
+                    'written in batches, which is much cheaper on network filesystems.')
+
     @classmethod
     def create(cls, build_task=None):
       """Creates a build invalidator optionally scoped to a task.
@@ -135,7 +215,10 @@ class BuildInvalidator(object):
                              supplied the build invalidator will act globally across all build
                              tasks.
       """
-      root = os.path.join(cls.global_instance().get_options().pants_workdir, 'build_invalidator')
+      options = cls.global_instance().get_options()
+      root = os.path.join(options.pants_workdir, 'build_invalidator')
+      if options.store == 'log':
+        return LogBuildInvalidator(root, scope=build_task)
       return BuildInvalidator(root, scope=build_task)
 
   @staticmethod
@@ -194,6 +277,12 @@ class BuildInvalidator(object):
     if self.cacheable(cache_key):
       self._write_sha(cache_key)
 
+  def flush(self):
+    """Persist any updates that have not yet been persisted.
+
+    This implementation persists each update immediately, so this is a no-op.
+    """
+
   def force_invalidate_all(self):
     """Force-invalidates all cached items."""
     safe_mkdir(self._root, clean=True)
@@ -228,3 +317,113 @@ class BuildInvalidator(object):
       if e.errno != errno.ENOENT:
         raise
       return None  # File doesn't exist.
+
+
+class LogBuildInvalidator(BuildInvalidator):
+  """A BuildInvalidator that stores all of its fingerprints in a single append-only log file.
+
+  The log is read into memory once, on first use, and updates and invalidations are appended to it
+  in batches: see `flush`. Each line of the log records the current hash of a target set id, with
+  an empty hash recording an invalidation, and later lines take precedence over earlier ones.
+
+  A crash may leave a torn final line, or lose unflushed updates. Neither can cause a target set to
+  be considered valid when it is not: a torn hash never matches a real key, and a lost update just
+  causes the target set to be rebuilt. Invalidations are appended immediately, since losing one
+  could.
+
+  Changes made to the log by other invalidators or processes after it has been read are not
+  observed.
+
+  An invalidator may be used concurrently by multiple threads.
+  """
+
+  LOG_FILENAME = 'fingerprints.log'
+
+  # Updates are appended once this many are pending, even without an explicit flush.
+  MAX_PENDING_UPDATES = 1000
+
+  # The log is compacted when it is read if at least this many of its lines are obsolete.
+  MIN_OBSOLETE_LINES_TO_COMPACT = 1000
+
+  def __init__(self, root, scope=None):
+    super(LogBuildInvalidator, self).__init__(root, scope=scope)
+    self._log_path = os.path.join(self._root, self.LOG_FILENAME)
+    self._hashes = None  # Lazily read from the log.
+    self._pending = []  # (id, hash) pairs not yet appended to the log.
+    self._torn = False  # Whether the log ends with a partial line.
+    # Protects all of the state above, and appends to the log. Re-entrant, since recording an
+    # update may flush.
+    self._lock = threading.RLock()
+
+  def force_invalidate_all(self):
+    with self._lock:
+      super(LogBuildInvalidator, self).force_invalidate_all()
+      self._hashes = {}
+      self._pending = []
+      self._torn = False
+
+  def force_invalidate(self, cache_key):
+    if self.cacheable(cache_key) and self._read_sha(cache_key) is not None:
+      self._record(cache_key.id, '')
+      self.flush()
+
+  def flush(self):
+    with self._lock:
+      if not self._pending:
+        return
+      lines = ['{}\t{}\n'.format(hash, id) for id, hash in self._pending]
+      if self._torn:
+        lines.insert(0, '\n')
+      with open(self._log_path, 'ab') as fd:
+        # A single write, so that concurrent appenders are unlikely to interleave partial lines.
+        fd.write(''.join(lines).encode('utf-8'))
+      self._pending = []
+      self._torn = False
+
+  def _write_sha(self, cache_key):
+    self._record(cache_key.id, cache_key.hash)
+
+  def _record(self, id, hash):
+    with self._lock:
+      self._load()[id] = hash or None
+      self._pending.append((id, hash))
+      if len(self._pending) >= self.MAX_PENDING_UPDATES:
+        self.flush()
+
+  def _read_sha_by_id(self, id):
+    with self._lock:
+      return self._load().get(id)
+
+  def _load(self):
+    with self._lock:
+      if self._hashes is None:
+        hashes = {}
+        line_count = 0
+        try:
+          with open(self._log_path, 'rb') as fd:
+            content = fd.read().decode('utf-8')
+        except IOError as e:
+          if e.errno != errno.ENOENT:
+            raise
+          content = ''
+        lines = content.split('\n')
+        # The last element is empty if the log ends with a complete line, and partial otherwise.
+        self._torn = bool(lines[-1])
+        for line in lines[:-1]:
+          hash, sep, id = line.partition('\t')
+          if sep:
+            hashes[id] = hash or None
+            line_count += 1
+        self._hashes = hashes
+        live_count = sum(1 for hash in hashes.values() if hash)
+        if line_count - live_count >= self.MIN_OBSOLETE_LINES_TO_COMPACT:
+          self._compact()
+      return self._hashes
+
+  def _compact(self):
+    """Rewrite the log to contain only the current hash of each target set id."""
+    with safe_concurrent_creation(self._log_path) as tmp_path:
+      with open(tmp_path, 'wb') as fd:
+        fd.write(''.join('{}\t{}\n'.format(hash, id)
+                         for id, hash in self._hashes.items() if hash).encode('utf-8'))
+    self._torn = False
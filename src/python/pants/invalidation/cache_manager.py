@@ -272,7 +272,8 @@ class InvalidationCacheManager(object):
                invalidation_report=None,
                task_name=None,
                task_version=None,
-               artifact_write_callback=lambda _: None):
+               artifact_write_callback=lambda _: None,
+               fingerprint_workers=1):
     """
     :API: public
     """
@@ -283,6 +284,7 @@ class InvalidationCacheManager(object):
     self._invalidator = build_invalidator
     self._fingerprint_strategy = fingerprint_strategy
     self._artifact_write_callback = artifact_write_callback
+    self._fingerprint_workers = fingerprint_workers
     self.invalidation_report = invalidation_report
 
     # Create the task-versioned prefix of the results dir, and a stable symlink to it
@@ -358,6 +360,12 @@ class InvalidationCacheManager(object):
 
     Returns a list of VersionedTargets, each representing one input target.
     """
+    self._cache_key_generator.precompute_fingerprints(
+      targets,
+      transitive=self._invalidate_dependents,
+      fingerprint_strategy=self._fingerprint_strategy,
+      num_workers=self._fingerprint_workers)
+
     def vt_iter():
       if topological_order:
         target_set = set(targets)
@@ -168,3 +168,50 @@ def parse_failed_targets(test_registry, junit_xml_path, error_handler):
     parse_junit_xml_file(junit_xml_path)
 
   return dict(failed_targets)
+
+
+def parse_test_durations(junit_xml_paths, error_handler, attribute='classname'):
+  """Parses junit xml reports for the total duration of the tests of each test class.
+
+  Where several reports include tests of the same class (as when reports of previous runs are
+  included), the duration recorded in the most recently modified report is used.
+
+  Tests may instead be grouped by another attribute of their testcases, such as the `file` that
+  pytest records.
+
+  :param junit_xml_paths: Paths of files or directories containing test junit xml reports to
+                          analyze. Symlinks to the same report are only analyzed once.
+  :type junit_xml_paths: list of string
+  :param error_handler: An error handler that will be called with any junit xml parsing errors.
+  :type error_handler: callable that accepts a single :class:`ParseError` argument.
+  :param string attribute: The testcase attribute to group tests by.
+  :returns: A mapping from test classname (or other attribute) to the total duration of its tests,
+            in seconds.
+  :rtype: dict from string to float
+  """
+  reports = {}
+  for junit_xml_path in junit_xml_paths:
+    if os.path.isdir(junit_xml_path):
+      for root, _, files in safe_walk(junit_xml_path):
+        for junit_xml_file in fnmatch.filter(files, 'TEST-*.xml'):
+          path = os.path.realpath(os.path.join(root, junit_xml_file))
+          if os.path.isfile(path):
+            reports[path] = os.path.getmtime(path)
+    elif os.path.isfile(junit_xml_path):
+      path = os.path.realpath(junit_xml_path)
+      reports[path] = os.path.getmtime(path)
+
+  durations = {}
+  for path in sorted(reports, key=lambda p: (reports[p], p)):
+    report_durations = defaultdict(float)
+    try:
+      xml = XmlParser.from_file(path)
+      for testcase in xml.parsed.getElementsByTagName('testcase'):
+        time = testcase.getAttribute('time')
+        if time:
+          report_durations[testcase.getAttribute(attribute)] += float(time)
+    except (XmlParser.XmlError, ValueError) as e:
+      error_handler(ParseError(path, e))
+      continue
+    durations.update(report_durations)
+  return durations
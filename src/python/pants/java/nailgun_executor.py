@@ -12,15 +12,17 @@ import re
 import select
 import threading
 import time
-from contextlib import closing
+from contextlib import closing, contextmanager
 
 from six import string_types
+from six.moves import queue
 from twitter.common.collections import maybe_list
 
 from pants.base.build_environment import get_buildroot
 from pants.java.executor import Executor, SubprocessExecutor
 from pants.java.nailgun_client import NailgunClient
-from pants.pantsd.process_manager import FingerprintedProcessManager, ProcessGroup
+from pants.pantsd.process_manager import (FingerprintedProcessManager, ProcessGroup,
+                                          swallow_psutil_exceptions)
 from pants.util.dirutil import safe_file_dump, safe_open
 
 
@@ -248,6 +250,14 @@ class NailgunExecutor(Executor, FingerprintedProcessManager):
 
     return client
 
+  def rss_bytes(self):
+    """Return the resident set size of the running nailgun server, or None if it is not running."""
+    if not self.is_alive():
+      return None
+    with swallow_psutil_exceptions():
+      return self._as_process().memory_info().rss
+    return None
+
   def _check_process_buildroot(self, process):
     """Matches only processes started from the current buildroot."""
     return self._PANTS_NG_BUILDROOT_ARG in process.cmdline()
@@ -271,3 +281,79 @@ class NailgunExecutor(Executor, FingerprintedProcessManager):
                          close_fds=True)
 
     self.write_pid(subproc.pid)
+
+
+class NailgunExecutorPool(object):
+  """A pool of nailgun servers for a single identity, each leased to one invocation at a time.
+
+  Concurrent invocations via a single NailgunExecutor all run in the same JVM, and so share its
+  heap and its GC pauses. The servers of a pool are ordinary NailgunExecutors, each with its own
+  identity and workdir, and each spawned (or respawned, when its fingerprint changes) on demand.
+  """
+
+  # How long to block at a time while waiting for a free server, so that waits are interruptible.
+  _LEASE_POLL_SECS = 1
+
+  def __init__(self, size, executor_factory, max_rss_bytes=None):
+    """
+    :param int size: The number of servers in the pool.
+    :param executor_factory: A function from the index of a server in the pool to a NailgunExecutor
+                             for it. Called the first time each server is leased.
+    :param int max_rss_bytes: If set, a server whose resident set size exceeds this many bytes when
+                              it is released is terminated, to be respawned on its next lease.
+    """
+    if size < 1:
+      raise ValueError('A nailgun pool must have at least one server, given: {}'.format(size))
+    self._executor_factory = executor_factory
+    self._max_rss_bytes = max_rss_bytes
+    self._executors = [None] * size
+    # The most recently released servers are leased first, so that servers beyond the concurrency
+    # actually needed are never spawned.
+    self._free = queue.LifoQueue()
+    for index in reversed(range(size)):
+      self._free.put(index)
+
+  def acquire(self):
+    """Block until a server is free, and return its NailgunExecutor.
+
+    The executor must be returned to the pool via `release`.
+    """
+    while True:
+      try:
+        index = self._free.get(timeout=self._LEASE_POLL_SECS)
+        break
+      except queue.Empty:
+        pass
+    if self._executors[index] is None:
+      try:
+        self._executors[index] = self._executor_factory(index)
+      except Exception:
+        self._free.put(index)
+        raise
+    return self._executors[index]
+
+  def release(self, executor):
+    """Return an executor acquired via `acquire` to the pool."""
+    index = self._executors.index(executor)
+    try:
+      self._maybe_retire(executor)
+    finally:
+      self._free.put(index)
+
+  @contextmanager
+  def lease(self):
+    """A contextmanager that yields a NailgunExecutor that is not in use by any other lease."""
+    executor = self.acquire()
+    try:
+      yield executor
+    finally:
+      self.release(executor)
+
+  def _maybe_retire(self, executor):
+    if self._max_rss_bytes is None:
+      return
+    rss_bytes = executor.rss_bytes()
+    if rss_bytes is not None and rss_bytes > self._max_rss_bytes:
+      logger.debug('Retiring {} with rss={} bytes, above the maximum of {} bytes.'
+                   .format(executor, rss_bytes, self._max_rss_bytes))
+      executor.terminate()
@@ -0,0 +1,36 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+
+from pants.base.file_digest_cache import FileDigestCache, set_file_digest_cache
+from pants.subsystem.subsystem import Subsystem
+
+
+class FileDigestCacheSetup(Subsystem):
+  """Configures the persistent cache of source file digests used when fingerprinting targets."""
+
+  options_scope = 'file-digest-cache'
+
+  @classmethod
+  def register_options(cls, register):
+    super(FileDigestCacheSetup, cls).register_options(register)
+    register('--enabled', advanced=True, type=bool, default=True,
+             help='Cache the digests of files by their stat info, so that unchanged sources are '
+                  'not reread to fingerprint targets.')
+    register('--path', advanced=True,
+             default=os.path.join(register.bootstrap.pants_workdir, 'file_digests.sqlite'),
+             help='Location of the file digest cache.')
+
+  def setup(self):
+    """Set the file digest cache for this run, according to this subsystem's options."""
+    options = self.get_options()
+    set_file_digest_cache(FileDigestCache(options.path) if options.enabled else None)
+
+  def teardown(self):
+    """Write back any new digests, and disable the file digest cache."""
+    set_file_digest_cache(None)
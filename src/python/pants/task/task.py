@@ -13,7 +13,7 @@ from itertools import repeat
 
 from pants.base.exceptions import TaskError
 from pants.base.worker_pool import Work
-from pants.cache.artifact_cache import UnreadableArtifact, call_insert, call_use_cached_files
+from pants.cache.artifact_cache import UnreadableArtifact
 from pants.cache.cache_setup import CacheSetup
 from pants.invalidation.build_invalidator import (BuildInvalidator, CacheKeyGenerator,
                                                   UncacheableCacheKeyGenerator)
@@ -185,6 +185,9 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
     build_task = None if root else self.fingerprint
     return BuildInvalidator.Factory.create(build_task=build_task)
 
+  def _fingerprint_workers(self):
+    return BuildInvalidator.Factory.global_instance().get_options().fingerprint_workers
+
   def get_options(self):
     """Returns the option values for this task's scope.
 
@@ -437,12 +440,17 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
       vts.force_invalidate()
 
     # Yield the result, and then mark the targets as up to date.
-    yield invalidation_check
+    try:
+      yield invalidation_check
 
-    self._update_invalidation_report(invalidation_check, 'post-check')
+      self._update_invalidation_report(invalidation_check, 'post-check')
 
-    for vt in invalidation_check.invalid_vts:
-      vt.update()
+      for vt in invalidation_check.invalid_vts:
+        vt.update()
+    finally:
+      # Persist the updates of targets marked valid, including any marked valid by the caller
+      # before a failure.
+      self._build_invalidator().flush()
 
     # Background work to clean up previous builds.
     if self.context.options.for_global_scope().workdir_max_build_entries is not None:
@@ -476,7 +484,8 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
                                              invalidation_report=self.context.invalidation_report,
                                              task_name=self._task_name,
                                              task_version=self.implementation_version_str(),
-                                             artifact_write_callback=self.maybe_write_artifact)
+                                             artifact_write_callback=self.maybe_write_artifact,
+                                             fingerprint_workers=self._fingerprint_workers())
 
     # If this Task's execution has been forced, invalidate all our target fingerprints.
     if self._cache_factory.ignore and not self._force_invalidated:
@@ -549,9 +558,11 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
       return [], [], []
 
     read_cache = self._cache_factory.get_read_cache()
-    items = [(read_cache, vt.cache_key, vt.current_results_dir if self.cache_target_dirs else None)
+
+    # Read all keys at once, so that a remote cache can issue its reads concurrently.
+    items = [(vt.cache_key, vt.current_results_dir if self.cache_target_dirs else None)
              for vt in vts]
-    res = self.context.subproc_map(call_use_cached_files, items)
+    res = read_cache.use_cached_files_many(items, map_func=self.context.subproc_map)
 
     cached_vts = []
     uncached_vts = []
@@ -579,49 +590,36 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
   def update_artifact_cache(self, vts_artifactfiles_pairs):
     """Write to the artifact cache, if we're configured to.
 
+    The writes are performed in the background by the run tracker's artifact cache writer.
+
     vts_artifactfiles_pairs - a list of pairs (vts, artifactfiles) where
       - vts is single VersionedTargetSet.
       - artifactfiles is a list of absolute paths to artifacts for the VersionedTargetSet.
     """
-    update_artifact_cache_work = self._get_update_artifact_cache_work(vts_artifactfiles_pairs)
-    if update_artifact_cache_work:
-      self.context.submit_background_work_chain([update_artifact_cache_work],
-                                                parent_workunit_name='cache')
+    cache = self._cache_factory.get_write_cache()
+    if not cache or len(vts_artifactfiles_pairs) == 0:
+      return
+
+    # Do some reporting.
+    targets = set()
+    for vts, _ in vts_artifactfiles_pairs:
+      targets.update(vts.targets)
+
+    self._report_targets(
+      'Caching artifacts for ',
+      list(targets),
+      '.',
+      logger=self.context.log.debug,
+    )
 
-  def _get_update_artifact_cache_work(self, vts_artifactfiles_pairs):
-    """Create a Work instance to update an artifact cache, if we're configured to.
+    always_overwrite = self._cache_factory.overwrite()
 
-    vts_artifactfiles_pairs - a list of pairs (vts, artifactfiles) where
-      - vts is single VersionedTargetSet.
-      - artifactfiles is a list of paths to artifacts for the VersionedTargetSet.
-    """
-    cache = self._cache_factory.get_write_cache()
-    if cache:
-      if len(vts_artifactfiles_pairs) == 0:
-        return None
-        # Do some reporting.
-      targets = set()
-      for vts, _ in vts_artifactfiles_pairs:
-        targets.update(vts.targets)
-
-      self._report_targets(
-        'Caching artifacts for ',
-        list(targets),
-        '.',
-        logger=self.context.log.debug,
-      )
-
-      always_overwrite = self._cache_factory.overwrite()
-
-      # Cache the artifacts.
-      args_tuples = []
-      for vts, artifactfiles in vts_artifactfiles_pairs:
-        overwrite = always_overwrite or vts.cache_key in self._cache_key_errors
-        args_tuples.append((cache, vts.cache_key, artifactfiles, overwrite))
-
-      return Work(lambda x: self.context.subproc_map(call_insert, x), [(args_tuples,)], 'insert')
-    else:
-      return None
+    # Cache the artifacts.
+    writes = []
+    for vts, artifactfiles in vts_artifactfiles_pairs:
+      overwrite = always_overwrite or vts.cache_key in self._cache_key_errors
+      writes.append((cache, vts.cache_key, artifactfiles, overwrite))
+    self.context.submit_artifact_cache_writes(writes)
 
   def _report_targets(self, prefix, targets, suffix, logger=None):
     target_address_references = [t.address.reference() for t in targets]
@@ -5,6 +5,7 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import heapq
 import os
 import re
 import xml.etree.ElementTree as ET
@@ -15,6 +16,7 @@ from pants.base.exceptions import ErrorWhileTesting, TaskError
 from pants.build_graph.files import Files
 from pants.invalidation.cache_manager import VersionedTargetSet
 from pants.task.task import Task
+from pants.task.unit_result_cache import UnitResultCache
 from pants.util.memo import memoized_method, memoized_property
 from pants.util.process_handler import subprocess
 
@@ -168,6 +170,32 @@ class TestRunnerTaskMixin(object):
       self.context.run_tracker.report_target_info('GLOBAL', target, ['target_type'], target_type)
       self.context.run_tracker.report_target_info(scope, target, keys, test_info)
 
+  @staticmethod
+  def shard_by_duration(items, num_shards, durations):
+    """Splits items into shards with total expected durations that are as equal as practical.
+
+    Items are assigned longest first, each to the shard with the least total duration so far. Items
+    without a known duration are expected to take the mean of the known durations.
+
+    :param items: The items to shard.
+    :param int num_shards: The maximum number of shards to produce.
+    :param dict durations: A mapping from item to its expected duration, for some of the items.
+    :returns: A list of at most `num_shards` non-empty shards, each a sorted list of items.
+    :rtype: list of list
+    """
+    known = [durations[item] for item in items if item in durations]
+    default_duration = sum(known) / len(known) if known else 1.0
+
+    def duration(item):
+      return durations.get(item, default_duration)
+
+    shards = [(0.0, index, []) for index in range(min(num_shards, len(items)))]
+    for item in sorted(items, key=lambda item: (-duration(item), item)):
+      total, index, shard = heapq.heappop(shards)
+      shard.append(item)
+      heapq.heappush(shards, (total + duration(item), index, shard))
+    return [sorted(shard) for _, _, shard in sorted(shards, key=lambda s: s[1])]
+
   @staticmethod
   def parse_test_info(xml_path, error_handler, additional_testcase_attributes=None):
     """Parses the junit file for information needed about each test.
@@ -414,6 +442,14 @@ class PartitionedTestRunnerTaskMixin(TestRunnerTaskMixin, Task):
              help='Run tests in a chroot. Any loose files tests depend on via `{}` dependencies '
                   'will be copied to the chroot.'
              .format(Files.alias()))
+    register('--result-cache', advanced=True, type=bool, default=False,
+             help='Record the results of passing units of tests (such as test classes or modules) '
+                  'by a fingerprint of their inputs, and skip re-running units whose inputs are '
+                  'unchanged, even when other tests in their targets have changed. The recorded '
+                  'reports of skipped units are still emitted.')
+    register('--result-cache-max-entries', advanced=True, type=int, default=10000,
+             help='The number of recorded results of units of tests to keep for --result-cache. '
+                  'The least recently used results are removed first.')
 
   @staticmethod
   def _vts_for_partition(invalidation_check):
@@ -556,6 +592,43 @@ class PartitionedTestRunnerTaskMixin(TestRunnerTaskMixin, Task):
 
       return result
 
+  @memoized_property
+  def test_result_cache(self):
+    """Return the cache of the results of units of tests, or None if it is disabled.
+
+    :rtype: :class:`pants.task.unit_result_cache.UnitResultCache`
+    """
+    options = self.get_options()
+    if not options.result_cache:
+      return None
+    cache = UnitResultCache(os.path.join(self.workdir, 'results'))
+    cache.prune(options.result_cache_max_entries)
+    return cache
+
+  def test_result_cache_key(self, target, *source_digests):
+    """Return the key of a unit of tests in the given target, for the `test_result_cache`.
+
+    The key covers the options of the task, the non-source fields of the target, the transitive
+    fingerprints of the dependencies of the target, and the given digests of the sources of the
+    target that the unit depends on.
+
+    :param target: The target that owns the unit of tests.
+    :param source_digests: The digests of the sources the unit depends on, in a stable order.
+    :rtype: string
+    """
+    # The sources of the target are covered by the given digests instead.
+    field_keys = [key for key, _ in target.payload.fields if key != 'sources']
+    payload_fingerprint = target.payload.fingerprint(field_keys=field_keys) if field_keys else None
+
+    fingerprint_strategy = self.fingerprint_strategy()
+    dependency_fingerprints = sorted(dep.transitive_invalidation_hash(fingerprint_strategy) or ''
+                                     for dep in target.dependencies)
+
+    components = [self.fingerprint, target.address.spec, payload_fingerprint]
+    components.append(','.join(dependency_fingerprints))
+    components.extend(source_digests)
+    return UnitResultCache.key(*components)
+
   @memoized_property
   def result_class(self):
     """Return the test result type returned by `run_tests`.
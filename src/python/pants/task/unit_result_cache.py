@@ -0,0 +1,111 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import logging
+import os
+from hashlib import sha1
+
+from pants.util.dirutil import rm_rf, safe_concurrent_creation, safe_delete, safe_walk
+
+
+logger = logging.getLogger(__name__)
+
+
+class UnitResultCache(object):
+  """A persistent record of the reports of passing units of tests, keyed by their inputs.
+
+  A unit is the granularity at which a test runner can select tests to run, such as a test class or
+  a test module: finer than the targets that test results are otherwise cached for. The key of a
+  unit is a fingerprint of everything its result depends on, and is computed by the test runner: a
+  unit whose key has a recorded report passed when last run against the same inputs, and so need
+  not be run again.
+
+  Only the reports of passing units should be recorded, since failing units should always be run.
+  Since the keys of a unit change whenever its inputs do, the cache should be periodically pruned.
+  """
+
+  VERSION = 1
+
+  @staticmethod
+  def key(*components):
+    """Return a key for a unit of tests, from the fingerprints of its inputs.
+
+    :param components: Strings that together identify the inputs of the unit. A component may be
+                       None, in which case it is skipped.
+    :rtype: string
+    """
+    hasher = sha1()
+    for component in components:
+      if component is not None:
+        hasher.update(component.encode('utf-8'))
+      # Delimit the components, so that they cannot be confused by shifting characters between them.
+      hasher.update(b'\0')
+    return hasher.hexdigest()
+
+  def __init__(self, root_dir):
+    """
+    :param str root_dir: The directory to record reports in.
+    """
+    self._dir = os.path.join(root_dir, 'v{}'.format(self.VERSION))
+
+  def _path(self, key):
+    return os.path.join(self._dir, key[:2], key[2:])
+
+  def get(self, key):
+    """Return the report recorded for the given key, or None if there is none.
+
+    :rtype: bytes
+    """
+    path = self._path(key)
+    try:
+      with open(path, 'rb') as fp:
+        report = fp.read()
+      # Mark the report as recently used, so that it is kept by `prune`.
+      os.utime(path, None)
+      return report
+    except (IOError, OSError):
+      return None
+
+  def put(self, key, report):
+    """Record the report of a passing unit of tests under the given key.
+
+    :param str key: The key of the unit, as returned by `key`.
+    :param bytes report: The report of the unit: may be empty, for a unit that produced no report.
+    """
+    path = self._path(key)
+    try:
+      with safe_concurrent_creation(path) as tmp_path:
+        with open(tmp_path, 'wb') as fp:
+          fp.write(report)
+    except (IOError, OSError) as e:
+      logger.warn('Failed to record a test result in {}: {}'.format(path, e))
+
+  def prune(self, max_entries):
+    """Remove all but the `max_entries` most recently used reports, and any of other versions.
+
+    :param int max_entries: The number of reports to keep.
+    """
+    root_dir = os.path.dirname(self._dir)
+    if not os.path.isdir(root_dir):
+      return
+    for name in os.listdir(root_dir):
+      path = os.path.join(root_dir, name)
+      if path != self._dir:
+        rm_rf(path)
+
+    entries = []
+    for dirpath, _, filenames in safe_walk(self._dir):
+      for filename in filenames:
+        path = os.path.join(dirpath, filename)
+        try:
+          entries.append((os.path.getmtime(path), path))
+        except OSError:
+          # Concurrently removed.
+          pass
+    entries.sort(reverse=True)
+    for _, path in entries[max_entries:]:
+      safe_delete(path)
@@ -193,6 +193,34 @@ def mergetree(src, dst, symlinks=False, ignore=None):
         shutil.copy2(src_filename, dst_filename)
 
 
+def link_or_copy(src, dst):
+  """Hard link the file at `src` to `dst`, or copy it if it cannot be linked.
+
+  Files cannot be linked across devices, or on filesystems that do not support hard links.
+  """
+  try:
+    os.link(src, dst)
+  except OSError as e:
+    if e.errno not in (errno.EXDEV, errno.EMLINK, errno.EPERM, errno.ENOTSUP):
+      raise
+    shutil.copy2(src, dst)
+
+
+def link_tree(src, dst):
+  """Recreate the directory tree at `src` at `dst`, hard linking (or copying) each of its files.
+
+  Since the files are shared, files in neither tree should be rewritten in place: files should only
+  be replaced (ie, deleted and recreated) in one tree without affecting the other.
+  """
+  safe_mkdir(dst)
+  for src_path, dirnames, filenames in safe_walk(src):
+    dst_path = os.path.join(dst, os.path.relpath(src_path, src))
+    for dirname in dirnames:
+      safe_mkdir(os.path.join(dst_path, dirname))
+    for filename in filenames:
+      link_or_copy(os.path.join(src_path, filename), os.path.join(dst_path, filename))
+
+
 _MKDTEMP_CLEANER = None
 _MKDTEMP_DIRS = defaultdict(set)
 _MKDTEMP_LOCK = threading.RLock()
@@ -275,12 +303,11 @@ def safe_concurrent_rename(src, dst):
 
   Useful when concurrent processes may attempt to create dst, and it doesn't matter who wins.
   """
-  # Delete dst, in case it existed (with old content) even before any concurrent processes
-  # attempted this write. This ensures that at least one process writes the new content.
+  # Delete a dst dir, in case it existed (with old content) even before any concurrent processes
+  # attempted this write. This ensures that at least one process writes the new content. A dst file
+  # is instead replaced atomically by the move, so that it is never observed to be missing.
   if os.path.isdir(src):  # Note that dst may not exist, so we test for the type of src.
     safe_rmtree(dst)
-  else:
-    safe_delete(dst)
   try:
     shutil.move(src, dst)
   except IOError as e:
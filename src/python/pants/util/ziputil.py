@@ -0,0 +1,219 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import os
+import struct
+import time
+import zipfile
+
+from pants.util.contextutil import open_zip
+from pants.util.dirutil import fast_relpath, safe_concurrent_creation, safe_walk
+
+
+FINGERPRINTS_VERSION = 2
+
+# Files modified less than this many seconds before a zip is written are not fingerprinted, since
+# they could be modified again within the granularity of their timestamps without any change to
+# their stat info.
+_RECENTLY_MODIFIED_SECS = 2.0
+
+# Set in the flags of an entry whose sizes follow its data, rather than being in its local header.
+_DATA_DESCRIPTOR_FLAG = 0x08
+
+# Set in the flags of an entry whose name is encoded as utf-8.
+_UTF8_FLAG = 0x800
+
+_END_OF_CENTRAL_DIR = struct.Struct(zipfile.structEndArchive)
+_CENTRAL_DIR_HEADER = struct.Struct(zipfile.structCentralDir)
+_LOCAL_FILE_HEADER = struct.Struct(zipfile.structFileHeader)
+
+# The indexes of the name and extra field lengths in a local file header, as laid out by the spec.
+_LOCAL_FILE_HEADER_NAME_LENGTH = 10
+_LOCAL_FILE_HEADER_EXTRA_LENGTH = 11
+
+
+def fingerprints_path(zip_path):
+  """Return the path of the file that records the fingerprints of the entries of a zip."""
+  return zip_path + '.fingerprints'
+
+
+def read_zip_names(zip_path):
+  """Return a list of the names of the entries of a zip, in the order of its central directory.
+
+  Equivalent to `ZipFile.namelist`, but only the central directory of the zip is read, and only the
+  names of its entries are decoded.
+
+  :param str zip_path: The zip to read the entry names of.
+  :raises: :class:`zipfile.BadZipfile` if the file is not a zip.
+  """
+  with open(zip_path, 'rb') as fp:
+    fp.seek(0, os.SEEK_END)
+    size = fp.tell()
+    # The end of central directory record is followed by a comment of at most 64KB.
+    tail_size = min(size, _END_OF_CENTRAL_DIR.size + (1 << 16))
+    fp.seek(size - tail_size)
+    tail = fp.read(tail_size)
+    end_offset = tail.rfind(zipfile.stringEndArchive)
+    if end_offset < 0 or end_offset + _END_OF_CENTRAL_DIR.size > len(tail):
+      raise zipfile.BadZipfile('File is not a zip file: {}'.format(zip_path))
+    end = _END_OF_CENTRAL_DIR.unpack_from(tail, end_offset)
+    central_dir_size = end[zipfile._ECD_SIZE]
+    if end[zipfile._ECD_ENTRIES_TOTAL] == 0xFFFF or end[zipfile._ECD_OFFSET] == 0xFFFFFFFF:
+      # A zip64 archive: rare enough that it is not worth parsing by hand.
+      with open_zip(zip_path, 'r') as zf:
+        return zf.namelist()
+    # Measure back from the end record rather than trusting the recorded offset, which does not
+    # account for any data prepended to the zip (as in a self-executing jar).
+    fp.seek(size - tail_size + end_offset - central_dir_size)
+    central_dir = fp.read(central_dir_size)
+
+  names = []
+  offset = 0
+  while offset + _CENTRAL_DIR_HEADER.size <= len(central_dir):
+    header = _CENTRAL_DIR_HEADER.unpack_from(central_dir, offset)
+    if header[0] != zipfile.stringCentralDir:
+      raise zipfile.BadZipfile('Bad magic number for central directory: {}'.format(zip_path))
+    offset += _CENTRAL_DIR_HEADER.size
+    name = central_dir[offset:offset + header[zipfile._CD_FILENAME_LENGTH]]
+    names.append(_decode_name(name, header[zipfile._CD_FLAG_BITS]))
+    offset += (header[zipfile._CD_FILENAME_LENGTH] + header[zipfile._CD_EXTRA_FIELD_LENGTH] +
+               header[zipfile._CD_COMMENT_LENGTH])
+  return names
+
+
+def _decode_name(name, flag_bits):
+  if flag_bits & _UTF8_FLAG:
+    return name.decode('utf-8')
+  try:
+    # Jar tools write utf-8 names without necessarily setting the flag.
+    return name.decode('utf-8')
+  except UnicodeDecodeError:
+    return name.decode('cp437')
+
+
+def update_zip_from_dir(zip_path, root, compression=zipfile.ZIP_STORED):
+  """Write a zip of the contents of the directory `root` to `zip_path`.
+
+  Equivalent to writing each directory and file under `root` to a new zip, except that entries for
+  files which are unchanged since the zip was last written by this function are copied from the
+  previous zip as-is, without being recompressed. A file is unchanged if its size, modification
+  and change times, and inode match those recorded for it in the fingerprints of the zip: so files
+  are only read to be written anew.
+
+  :param str zip_path: The zip to write. If it exists, its entries may be reused.
+  :param str root: The directory to zip the contents of.
+  :param int compression: The compression of the zip: its entries are only reused if they have the
+                          same compression.
+  """
+  previous_fingerprints = _read_fingerprints(zip_path, compression)
+  previous_zip = zipfile.ZipFile(zip_path, 'r') if previous_fingerprints else None
+  fingerprints = {}
+  now = time.time()
+
+  try:
+    with safe_concurrent_creation(zip_path) as tmp_path:
+      with open_zip(tmp_path, 'w', compression=compression) as zf:
+        for abs_sub_dir, dirnames, filenames in safe_walk(root):
+          for dirname in dirnames:
+            abs_dirname = os.path.join(abs_sub_dir, dirname)
+            zf.write(abs_dirname, fast_relpath(abs_dirname, root))
+          for filename in filenames:
+            abs_filename = os.path.join(abs_sub_dir, filename)
+            arcname = fast_relpath(abs_filename, root)
+            fingerprint = _fingerprint(abs_filename, now)
+            if fingerprint is not None:
+              fingerprints[arcname] = fingerprint
+              if (previous_zip is not None and previous_fingerprints.get(arcname) == fingerprint and
+                  _copy_entry(previous_zip, arcname, zf)):
+                continue
+            zf.write(abs_filename, arcname)
+  finally:
+    if previous_zip is not None:
+      previous_zip.close()
+
+  _write_fingerprints(zip_path, compression, fingerprints)
+
+
+def _fingerprint(path, now):
+  """Return the stat key of the file at path, or None if it was modified too recently."""
+  stat = os.stat(path)
+  if now - max(stat.st_mtime, stat.st_ctime) < _RECENTLY_MODIFIED_SECS:
+    return None
+  return [stat.st_size, int(stat.st_mtime * 1e9), int(stat.st_ctime * 1e9), stat.st_ino]
+
+
+def _zip_stat_key(zip_path):
+  # The fingerprints are only valid for the zip they were written along with.
+  stat = os.stat(zip_path)
+  return [stat.st_size, int(stat.st_mtime * 1e9)]
+
+
+def _read_fingerprints(zip_path, compression):
+  try:
+    with open(fingerprints_path(zip_path), 'rb') as fp:
+      recorded = json.loads(fp.read().decode('utf-8'))
+    if (recorded.get('version') == FINGERPRINTS_VERSION and
+        recorded.get('compression') == compression and
+        recorded.get('zip') == _zip_stat_key(zip_path)):
+      return recorded['entries']
+  except (IOError, OSError, ValueError, KeyError):
+    pass
+  return {}
+
+
+def _write_fingerprints(zip_path, compression, fingerprints):
+  content = json.dumps({'version': FINGERPRINTS_VERSION,
+                        'compression': compression,
+                        'zip': _zip_stat_key(zip_path),
+                        'entries': fingerprints})
+  with safe_concurrent_creation(fingerprints_path(zip_path)) as tmp_path:
+    with open(tmp_path, 'wb') as fp:
+      fp.write(content.encode('utf-8'))
+
+
+def _copy_entry(src_zip, name, dst_zip):
+  """Move the still-compressed data of an entry from one open zip to another.
+
+  Returns False if the entry cannot be moved.
+  """
+  try:
+    info = src_zip.getinfo(name)
+  except KeyError:
+    return False
+  if info.flag_bits & _DATA_DESCRIPTOR_FLAG or not _supports_raw_entries(dst_zip):
+    return False
+
+  src_zip.fp.seek(info.header_offset)
+  header = _LOCAL_FILE_HEADER.unpack(src_zip.fp.read(_LOCAL_FILE_HEADER.size))
+  src_zip.fp.seek(header[_LOCAL_FILE_HEADER_NAME_LENGTH] + header[_LOCAL_FILE_HEADER_EXTRA_LENGTH],
+                  os.SEEK_CUR)
+  data = src_zip.fp.read(info.compress_size)
+
+  # The info is moved rather than copied, so the source zip should not be used for this entry again.
+  _append_raw_entry(dst_zip, info, data)
+  return True
+
+
+# The ZipFile attributes used to append an entry without recompressing it: zipfile has no public API
+# to do so, so these are checked for before they are used.
+_RAW_ENTRY_ATTRIBUTES = ('fp', 'filelist', 'NameToInfo', '_didModify')
+
+
+def _supports_raw_entries(zf):
+  return all(hasattr(zf, attribute) for attribute in _RAW_ENTRY_ATTRIBUTES)
+
+
+def _append_raw_entry(zf, info, data):
+  """Append an entry whose data is already compressed (as described by `info`) to an open zip."""
+  info.header_offset = zf.fp.tell()
+  zf.fp.write(info.FileHeader())
+  zf.fp.write(data)
+  zf.filelist.append(info)
+  zf.NameToInfo[info.filename] = info
+  # Ensures that the central directory is written when the zip is closed.
+  zf._didModify = True
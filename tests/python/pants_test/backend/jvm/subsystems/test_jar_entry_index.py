@@ -0,0 +1,84 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import shutil
+import unittest
+
+from pants.backend.jvm.subsystems.jar_entry_index import JarEntryIndex
+from pants.subsystem.subsystem import Subsystem
+from pants.util.contextutil import open_zip, temporary_dir
+from pants.util.dirutil import safe_file_dump
+from pants_test.subsystem.subsystem_util import global_subsystem_instance
+
+
+class JarEntryIndexTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tmpdir = self.enter(temporary_dir())
+    self.index_dir = os.path.join(self.tmpdir, 'index')
+    self.jar = os.path.join(self.tmpdir, 'a.jar')
+    with open_zip(self.jar, 'w') as zf:
+      zf.writestr('org/', b'')
+      zf.writestr('org/A.class', b'a')
+      zf.writestr('META-INF/MANIFEST.MF', b'Manifest-Version: 1.0\n')
+    self.addCleanup(Subsystem.reset)
+
+  def enter(self, context_manager):
+    value = context_manager.__enter__()
+    self.addCleanup(context_manager.__exit__, None, None, None)
+    return value
+
+  def index(self, **options):
+    # A new instance, as in a new run.
+    Subsystem.reset()
+    options.setdefault('dir', self.index_dir)
+    return global_subsystem_instance(JarEntryIndex,
+                                     options={JarEntryIndex.options_scope: options})
+
+  def recorded(self):
+    versioned_dir = os.path.join(self.index_dir, 'v{}'.format(JarEntryIndex.VERSION))
+    return os.listdir(versioned_dir) if os.path.isdir(versioned_dir) else []
+
+  def test_entries(self):
+    self.assertEqual(('org/', 'org/A.class', 'META-INF/MANIFEST.MF'),
+                     self.index().entries(self.jar))
+    self.assertEqual(1, len(self.recorded()))
+
+  def test_recorded_entries_are_shared_by_identical_jars(self):
+    copy = os.path.join(self.tmpdir, 'copy.jar')
+    shutil.copy(self.jar, copy)
+    self.index().entries(self.jar)
+
+    self.assertEqual(('org/', 'org/A.class', 'META-INF/MANIFEST.MF'), self.index().entries(copy))
+    self.assertEqual(1, len(self.recorded()))
+
+  def test_recorded_entries_are_read(self):
+    index = self.index()
+    index.entries(self.jar)
+    recorded_path = os.path.join(self.index_dir, 'v{}'.format(JarEntryIndex.VERSION),
+                                 self.recorded()[0])
+    safe_file_dump(recorded_path, b'recorded\0entries')
+
+    self.assertEqual(('recorded', 'entries'), self.index().entries(self.jar))
+
+  def test_not_persisted(self):
+    self.assertEqual(('org/', 'org/A.class', 'META-INF/MANIFEST.MF'),
+                     self.index().entries(self.jar, persist=False))
+    self.assertEqual([], self.recorded())
+
+  def test_disabled(self):
+    self.index(enabled=False).entries(self.jar)
+    self.assertEqual([], self.recorded())
+
+  def test_modified_jar(self):
+    index = self.index()
+    index.entries(self.jar)
+    with open_zip(self.jar, 'w') as zf:
+      zf.writestr('org/B.class', b'bb')
+
+    self.assertEqual(('org/B.class',), index.entries(self.jar))
@@ -0,0 +1,64 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.backend.jvm.tasks.jvm_compile.compile_duration_history import CompileDurationHistory
+from pants.util.contextutil import temporary_dir
+
+
+class CompileDurationHistoryTest(unittest.TestCase):
+
+  def test_estimate_without_history_is_size(self):
+    with temporary_dir() as tmpdir:
+      history = CompileDurationHistory(os.path.join(tmpdir, 'durations.json'))
+      self.assertEqual(10, history.estimate('a', 10))
+
+  def test_estimate_from_history(self):
+    with temporary_dir() as tmpdir:
+      history = CompileDurationHistory(os.path.join(tmpdir, 'durations.json'))
+      history.record('a', 4.0, 10)
+      history.record('b', 2.0, 30)
+      self.assertEqual(4.0, history.estimate('a', 100))
+      # Unknown targets are scaled by the average duration per unit of size: 6s / 40.
+      self.assertEqual(1.5, history.estimate('c', 10))
+
+  def test_record_smooths_durations(self):
+    with temporary_dir() as tmpdir:
+      history = CompileDurationHistory(os.path.join(tmpdir, 'durations.json'))
+      history.record('a', 4.0, 10)
+      history.record('a', 2.0, 10)
+      self.assertEqual(3.0, history.estimate('a', 10))
+
+  def test_estimate_scale_follows_rerecorded_durations(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'durations.json')
+      history = CompileDurationHistory(path)
+      history.record('a', 4.0, 10)
+      history.record('a', 2.0, 10)
+      history.record('b', 1.0, 10)
+      # Only the latest estimate of each target counts: (3s + 1s) / 20.
+      self.assertEqual(2.0, history.estimate('c', 10))
+      history.save()
+      self.assertEqual(2.0, CompileDurationHistory(path).estimate('c', 10))
+
+  def test_save(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'history', 'durations.json')
+      history = CompileDurationHistory(path)
+      history.record('a', 4.0, 10)
+      history.save()
+      self.assertEqual(['durations.json'], os.listdir(os.path.dirname(path)))
+      self.assertEqual(4.0, CompileDurationHistory(path).estimate('a', 100))
+
+  def test_invalid_history_is_ignored(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'durations.json')
+      with open(path, 'w') as fp:
+        fp.write('{')
+      self.assertEqual(10, CompileDurationHistory(path).estimate('a', 10))
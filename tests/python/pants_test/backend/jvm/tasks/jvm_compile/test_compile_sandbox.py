@@ -0,0 +1,187 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.backend.jvm.tasks.jvm_compile.compile_context import CompileContext
+from pants.backend.jvm.tasks.jvm_compile.compile_sandbox import ClasspathSnapshots, CompileSandbox
+from pants.util.contextutil import open_zip, temporary_dir
+from pants.util.dirutil import read_file, safe_file_dump, safe_open
+from pants.util.ziputil import fingerprints_path, update_zip_from_dir
+
+
+class ReplacingAnalysisParser(object):
+  """Rebases "analysis" files by replacing each occurrence of an old base."""
+
+  def rebase_from_path(self, infile_path, outfile_path, rebase_mappings):
+    content = read_file(infile_path)
+    for old_base, new_base in rebase_mappings.items():
+      content = content.replace(old_base, new_base)
+    safe_file_dump(outfile_path, content)
+
+
+class CompileSandboxTest(unittest.TestCase):
+
+  def setUp(self):
+    self.workdir = self.enter(temporary_dir())
+    self.ctx = self.compile_context('app')
+    self.dep_ctx = self.compile_context('dep')
+    safe_file_dump(os.path.join(self.dep_ctx.classes_dir, 'Dep.class'), 'dep')
+    safe_file_dump(self.dep_ctx.analysis_file, self.dep_ctx.classes_dir)
+    self.snapshots = ClasspathSnapshots(os.path.join(self.workdir, 'snapshots'),
+                                        ReplacingAnalysisParser())
+    self.sandbox = self.create_sandbox(self.ctx)
+
+  def create_sandbox(self, ctx):
+    name = os.path.basename(os.path.dirname(ctx.classes_dir))
+    sandbox = CompileSandbox(os.path.join(self.workdir, 'sandbox', name), ctx,
+                             ReplacingAnalysisParser(), self.snapshots)
+    self.addCleanup(sandbox.cleanup)
+    return sandbox
+
+  def enter(self, context_manager):
+    value = context_manager.__enter__()
+    self.addCleanup(context_manager.__exit__, None, None, None)
+    return value
+
+  def compile_context(self, name):
+    target_workdir = os.path.join(self.workdir, name)
+    return CompileContext(None,
+                          os.path.join(target_workdir, 'z.analysis'),
+                          os.path.join(target_workdir, 'z.analysis.portable'),
+                          os.path.join(target_workdir, 'classes'),
+                          os.path.join(target_workdir, 'z.jar'),
+                          None, None, [], False)
+
+  def prepare(self, incremental, sandbox=None):
+    sandbox = sandbox or self.sandbox
+    classpath = [self.ctx.classes_dir, self.dep_ctx.classes_dir, '/some/external.jar']
+    upstream_analysis = {self.ctx.classes_dir: self.ctx.analysis_file,
+                         self.dep_ctx.classes_dir: self.dep_ctx.analysis_file}
+    sandbox.prepare(classpath, {self.ctx.classes_dir, self.dep_ctx.classes_dir}, upstream_analysis,
+                    incremental)
+
+  def compile(self):
+    sandbox_ctx = self.sandbox.compile_context
+    safe_file_dump(os.path.join(sandbox_ctx.classes_dir, 'App.class'), 'app')
+    safe_file_dump(sandbox_ctx.analysis_file,
+                   '{} -> {}'.format(sandbox_ctx.classes_dir,
+                                     self.sandbox.entry(self.dep_ctx.classes_dir)))
+
+  def test_classpath_is_materialized(self):
+    self.prepare(incremental=False)
+
+    materialized = self.sandbox.entry(self.dep_ctx.classes_dir)
+    self.assertTrue(materialized.startswith(os.path.join(self.workdir, 'snapshots')))
+    self.assertTrue(os.path.samefile(os.path.join(self.dep_ctx.classes_dir, 'Dep.class'),
+                                     os.path.join(materialized, 'Dep.class')))
+    self.assertEqual('/some/external.jar', self.sandbox.entry('/some/external.jar'))
+
+  def test_upstream_analysis_is_rebased(self):
+    self.prepare(incremental=False)
+
+    upstream_analysis = self.sandbox.upstream_analysis({
+      self.ctx.classes_dir: self.ctx.analysis_file,
+      self.dep_ctx.classes_dir: self.dep_ctx.analysis_file,
+      '/some/other/classes': '/some/other/analysis',
+    })
+    materialized = self.sandbox.entry(self.dep_ctx.classes_dir)
+    sandbox_ctx = self.sandbox.compile_context
+    self.assertEqual({sandbox_ctx.classes_dir, materialized, '/some/other/classes'},
+                     set(upstream_analysis))
+    self.assertEqual(sandbox_ctx.analysis_file, upstream_analysis[sandbox_ctx.classes_dir])
+    self.assertEqual('/some/other/analysis', upstream_analysis['/some/other/classes'])
+    # The analysis of a snapshot describes the snapshot.
+    self.assertEqual(materialized, read_file(upstream_analysis[materialized]))
+
+  def test_snapshots_are_shared(self):
+    self.prepare(incremental=False)
+    other_sandbox = self.create_sandbox(self.compile_context('other'))
+    self.prepare(incremental=False, sandbox=other_sandbox)
+
+    self.assertEqual(self.sandbox.entry(self.dep_ctx.classes_dir),
+                     other_sandbox.entry(self.dep_ctx.classes_dir))
+
+  def test_published_outputs_are_snapshotted_again(self):
+    self.prepare(incremental=False)
+    snapshot = self.sandbox.entry(self.dep_ctx.classes_dir)
+
+    # Publish a new version of the dependency.
+    dep_sandbox = self.create_sandbox(self.dep_ctx)
+    dep_sandbox.prepare([self.dep_ctx.classes_dir], {self.dep_ctx.classes_dir}, {}, False)
+    safe_file_dump(os.path.join(dep_sandbox.compile_context.classes_dir, 'Dep.class'), 'new dep')
+    dep_sandbox.publish()
+
+    other_sandbox = self.create_sandbox(self.compile_context('other'))
+    self.prepare(incremental=False, sandbox=other_sandbox)
+    new_snapshot = other_sandbox.entry(self.dep_ctx.classes_dir)
+    self.assertNotEqual(snapshot, new_snapshot)
+    self.assertEqual('dep', read_file(os.path.join(snapshot, 'Dep.class')))
+    self.assertEqual('new dep', read_file(os.path.join(new_snapshot, 'Dep.class')))
+
+  def test_publish(self):
+    self.prepare(incremental=False)
+    self.compile()
+
+    # Nothing is visible outside of the sandbox until it is published.
+    self.assertFalse(os.path.exists(self.ctx.analysis_file))
+    self.sandbox.publish()
+
+    self.assertEqual('app', read_file(os.path.join(self.ctx.classes_dir, 'App.class')))
+    self.assertEqual('{} -> {}'.format(self.ctx.classes_dir, self.dep_ctx.classes_dir),
+                     read_file(self.ctx.analysis_file))
+
+  def test_incremental(self):
+    safe_file_dump(os.path.join(self.ctx.classes_dir, 'Old.class'), 'old')
+    safe_file_dump(self.ctx.analysis_file, self.ctx.classes_dir)
+    self.prepare(incremental=True)
+
+    sandbox_ctx = self.sandbox.compile_context
+    self.assertEqual(sandbox_ctx.classes_dir, read_file(sandbox_ctx.analysis_file))
+    sandboxed_class = os.path.join(sandbox_ctx.classes_dir, 'Old.class')
+    self.assertEqual('old', read_file(sandboxed_class))
+    # The previous outputs are copied rather than linked, so that they are never changed in place.
+    self.assertFalse(os.path.samefile(os.path.join(self.ctx.classes_dir, 'Old.class'),
+                                      sandboxed_class))
+
+  def test_incremental_resources_are_rewritten_in_the_sandbox_only(self):
+    resource = os.path.join(self.ctx.classes_dir, 'META-INF', 'plugin.xml')
+    safe_file_dump(resource, 'old')
+    safe_file_dump(self.ctx.analysis_file, self.ctx.classes_dir)
+    # Another compile reads a snapshot of the published outputs.
+    other_sandbox = self.create_sandbox(self.compile_context('other'))
+    self.prepare(incremental=False, sandbox=other_sandbox)
+    snapshot = other_sandbox.entry(self.ctx.classes_dir)
+    self.prepare(incremental=True)
+
+    # Extra resources are rewritten in place, as by `write_extra_resources`.
+    with safe_open(os.path.join(self.sandbox.compile_context.classes_dir, 'META-INF',
+                                'plugin.xml'), 'w') as fp:
+      fp.write('new')
+
+    self.assertEqual('old', read_file(resource))
+    self.assertEqual('old', read_file(os.path.join(snapshot, 'META-INF', 'plugin.xml')))
+    self.sandbox.publish()
+    self.assertEqual('new', read_file(resource))
+    self.assertEqual('old', read_file(os.path.join(snapshot, 'META-INF', 'plugin.xml')))
+
+  def test_incremental_jar_is_published_with_its_fingerprints(self):
+    safe_file_dump(os.path.join(self.ctx.classes_dir, 'Old.class'), 'old')
+    safe_file_dump(self.ctx.analysis_file, self.ctx.classes_dir)
+    update_zip_from_dir(self.ctx.jar_file, self.ctx.classes_dir)
+    self.prepare(incremental=True)
+
+    sandbox_ctx = self.sandbox.compile_context
+    self.assertTrue(os.path.exists(fingerprints_path(sandbox_ctx.jar_file)))
+    self.compile()
+    update_zip_from_dir(sandbox_ctx.jar_file, sandbox_ctx.classes_dir)
+    self.sandbox.publish()
+
+    with open_zip(self.ctx.jar_file) as jar:
+      self.assertEqual({'App.class', 'Old.class'}, set(jar.namelist()))
+    self.assertTrue(os.path.exists(fingerprints_path(self.ctx.jar_file)))
@@ -9,7 +9,11 @@ import os
 
 from pants.backend.jvm.targets.java_library import JavaLibrary
 from pants.backend.jvm.tasks.classpath_products import ClasspathProducts
-from pants.backend.jvm.tasks.jvm_compile.jvm_compile import JvmCompile
+from pants.backend.jvm.tasks.jvm_compile.compile_context import CompileContext, DependencyContext
+from pants.backend.jvm.tasks.jvm_compile.jvm_compile import ApiFingerprintStrategy, JvmCompile
+from pants.build_graph.target_scopes import Scopes
+from pants.util.dirutil import read_file, safe_file_dump
+from pants_test.base_test import BaseTest
 from pants_test.tasks.task_test_base import TaskTestBase
 
 
@@ -47,3 +51,109 @@ class JvmCompileTest(TaskTestBase):
     resulting_classpath = task.create_runtime_classpath()
     self.assertEqual([('default', pre_init_runtime_entry), ('default', compile_entry)],
       resulting_classpath.get_for_target(target))
+
+  class FakeVts(object):
+    def __init__(self, target):
+      self.target = target
+
+    def update(self):
+      pass
+
+    def force_invalidate(self):
+      pass
+
+  def test_pipelined_jobs(self):
+    lib = self.make_target('java/lib', target_type=JavaLibrary, sources=[])
+    app = self.make_target('java/app', target_type=JavaLibrary, sources=[], dependencies=[lib])
+    self.set_options(pipelined=True, outliner_main='org.example.Outliner')
+    context = self.context(target_roots=[app])
+    task = self.create_task(context)
+
+    compile_contexts = {t: CompileContext(t, None, None,
+                                          os.path.join(self.pants_workdir, t.id, 'classes'),
+                                          None, None, None, [], False)
+                        for t in (lib, app)}
+    jobs = task._create_compile_jobs(ClasspathProducts.init_func(self.pants_workdir)(),
+                                     compile_contexts, [], [lib, app],
+                                     [self.FakeVts(lib), self.FakeVts(app)])
+    jobs_by_key = {job.key: job for job in jobs}
+
+    # Nothing depends on `app`, so it is not outlined.
+    self.assertEqual({'outline(java/lib:lib)', 'compile(java/lib:lib)', 'validate(java/lib:lib)',
+                      'compile(java/app:app)', 'validate(java/app:app)'},
+                     set(jobs_by_key))
+    # The compile of `app` needs only the outline of `lib`...
+    self.assertEqual([], jobs_by_key['outline(java/lib:lib)'].dependencies)
+    self.assertEqual(['outline(java/lib:lib)'], jobs_by_key['compile(java/app:app)'].dependencies)
+    # ...but `app` is only validated once `lib` has compiled too.
+    self.assertEqual(['compile(java/lib:lib)'], jobs_by_key['validate(java/lib:lib)'].dependencies)
+    self.assertEqual(['compile(java/app:app)', 'validate(java/lib:lib)'],
+                     jobs_by_key['validate(java/app:app)'].dependencies)
+    for key, job in jobs_by_key.items():
+      self.assertEqual(key.startswith('validate'), job.on_success is not None)
+
+
+class SubstituteOutlinesTest(BaseTest):
+
+  def test_substitute_outlines(self):
+    ctx = CompileContext(None, None, None, '/app/classes', '/app/z.jar', None, None, [], False)
+    outline_dirs = {'/app/classes': '/app/outline',
+                    '/app/z.jar': '/app/outline',
+                    '/lib/classes': '/lib/outline'}
+    classpath = ['/app/classes', '/lib/classes', '/app/z.jar', '/jdk/tools.jar']
+    self.assertEqual(['/lib/outline', '/jdk/tools.jar'],
+                     JvmCompile._substitute_outlines(classpath, ctx, outline_dirs))
+
+
+class ApiFingerprintStrategyTest(BaseTest):
+
+  class FakeAnalysisParser(object):
+    # The "API" of a fake analysis file is its content.
+    def parse_api_fingerprint_from_path(self, path):
+      return read_file(path)
+
+  def setUp(self):
+    super(ApiFingerprintStrategyTest, self).setUp()
+    self.create_file('java/lib/Lib.java', 'class Lib {}')
+    self.create_file('java/app/App.java', 'class App {}')
+    self.lib = self.make_target('java/lib', target_type=JavaLibrary, sources=['Lib.java'])
+    self.app = self.make_target('java/app', target_type=JavaLibrary, sources=['App.java'],
+                                dependencies=[self.lib])
+    self.compile_contexts = {t: self.compile_context(t) for t in (self.lib, self.app)}
+
+  def compile_context(self, target):
+    target_workdir = os.path.join(self.pants_workdir, target.id)
+    return CompileContext(target, os.path.join(target_workdir, 'z.analysis'), None,
+                          os.path.join(target_workdir, 'classes'), None, None, None, [], False)
+
+  def fingerprint(self, target):
+    dep_context = DependencyContext([], dict(include_scopes=Scopes.JVM_COMPILE_SCOPES,
+                                             respect_intransitive=True))
+    strategy = ApiFingerprintStrategy(ClasspathProducts.init_func(self.pants_workdir)(),
+                                      dep_context,
+                                      self.compile_contexts,
+                                      self.FakeAnalysisParser())
+    return strategy.compute_fingerprint(target)
+
+  def write_api(self, target, api):
+    safe_file_dump(self.compile_contexts[target].analysis_file, api)
+
+  def test_uncompiled_dependencies_are_fingerprinted_by_source(self):
+    self.assertIsNotNone(self.fingerprint(self.app))
+    self.assertEqual(self.fingerprint(self.app), self.fingerprint(self.app))
+
+  def test_compiled_dependencies_are_fingerprinted_by_api(self):
+    self.write_api(self.lib, 'void lib()')
+    fingerprint = self.fingerprint(self.app)
+
+    # Recompiling the dependency to produce the same API does not change the fingerprint.
+    self.write_api(self.lib, 'void lib()')
+    self.assertEqual(fingerprint, self.fingerprint(self.app))
+
+    self.write_api(self.lib, 'int lib()')
+    self.assertNotEqual(fingerprint, self.fingerprint(self.app))
+
+  def test_own_api_is_ignored(self):
+    fingerprint = self.fingerprint(self.app)
+    self.write_api(self.app, 'void app()')
+    self.assertEqual(fingerprint, self.fingerprint(self.app))
@@ -26,6 +26,8 @@ from pants.ivy.bootstrapper import Bootstrapper
 from pants.ivy.ivy_subsystem import IvySubsystem
 from pants.java.distribution.distribution import DistributionLocator
 from pants.java.executor import SubprocessExecutor
+from pants.java.junit.junit_xml_parser import Test as JUnitTest
+from pants.java.junit.junit_xml_parser import RegistryOfTests
 from pants.util.contextutil import environment_as, temporary_dir
 from pants.util.dirutil import safe_file_dump, touch
 from pants.util.process_handler import subprocess
@@ -384,6 +386,122 @@ class JUnitRunnerTest(JvmToolTaskTestBase):
     self._execute_junit_runner(list_of_filename_content_tuples,
                                target_name='tests/java/org/pantsbuild/foo:foo_test')
 
+  @ensure_cached(JUnitRun, expected_num_artifacts=1)
+  def test_junit_run_parallel_shards(self):
+    num_of_classes = 5
+
+    list_of_filename_content_tuples = []
+    for n in range(num_of_classes):
+      filename = 'FooTest{}.java'.format(n)
+
+      content = dedent("""
+          package org.pantsbuild.foo;
+          import org.junit.Test;
+          import static org.junit.Assert.assertTrue;
+          public class FooTest{}{{
+          @Test
+            public void testFoo() {{
+              assertTrue(5 > 3);
+            }}
+          }}""".format(n))
+      list_of_filename_content_tuples.append((filename, content))
+
+    self.make_target(
+      spec='tests/java/org/pantsbuild/foo:foo_test',
+      target_type=JUnitTests,
+      sources=[name for name, _ in list_of_filename_content_tuples],
+    )
+    self.set_options(parallel_shards=2)
+
+    self._execute_junit_runner(list_of_filename_content_tuples,
+                               target_name='tests/java/org/pantsbuild/foo:foo_test')
+
+  @ensure_cached(JUnitRun, expected_num_artifacts=1)
+  def test_junit_run_result_cache(self):
+    list_of_filename_content_tuples = []
+    for n in range(2):
+      content = dedent("""
+          package org.pantsbuild.foo;
+          import org.junit.Test;
+          import static org.junit.Assert.assertTrue;
+          public class FooTest{}{{
+          @Test
+            public void testFoo() {{
+              assertTrue(5 > 3);
+            }}
+          }}""".format(n))
+      list_of_filename_content_tuples.append(('FooTest{}.java'.format(n), content))
+
+    self.make_target(
+      spec='tests/java/org/pantsbuild/foo:foo_test',
+      target_type=JUnitTests,
+      sources=[name for name, _ in list_of_filename_content_tuples],
+    )
+    self.set_options(result_cache=True)
+
+    self._execute_junit_runner(list_of_filename_content_tuples,
+                               target_name='tests/java/org/pantsbuild/foo:foo_test')
+
+    # The report of each passing class is recorded.
+    results_dir = os.path.join(self.test_workdir, 'results')
+    reports = [os.path.join(root, f) for root, _, files in os.walk(results_dir) for f in files]
+    self.assertEqual(2, len(reports))
+    for report in reports:
+      with open(report, 'rb') as fp:
+        self.assertIn(b'testFoo', fp.read())
+
+  def test_junit_run_result_cache_skips_recorded_classes(self):
+    target = self.make_target(spec='tests/java/org/pantsbuild/foo:foo_test', target_type=JUnitTests,
+                              sources=[])
+    self.set_options(result_cache=True)
+    task = self.prepare_execute(self.context(target_roots=[target]))
+
+    recorded, unrecorded, empty = (JUnitTest('org.pantsbuild.foo.{}'.format(name))
+                                   for name in ('RecordedTest', 'UnrecordedTest', 'EmptyTest'))
+    result_keys = {test.classname: task.test_result_cache_key(target, test.classname)
+                   for test in (recorded, unrecorded, empty)}
+    task.test_result_cache.put(result_keys[recorded.classname], b'<testsuite name="recorded"/>')
+    task.test_result_cache.put(result_keys[empty.classname], b'')
+
+    with temporary_dir() as output_dir:
+      # A stale report of a class that is about to run.
+      stale_report = os.path.join(output_dir, 'TEST-{}.xml'.format(unrecorded.classname))
+      safe_file_dump(stale_report, 'stale')
+
+      registry = RegistryOfTests({test: target for test in (recorded, unrecorded, empty)})
+      registry = task._skip_recorded_tests(registry, result_keys, output_dir)
+
+      self.assertEqual({(target,): (unrecorded,)}, registry.index(lambda tgt: tgt))
+      # The recorded report is emitted in place of the skipped class's, and the stale one is gone.
+      self.assertEqual(['TEST-{}.xml'.format(recorded.classname)], os.listdir(output_dir))
+      with open(os.path.join(output_dir, 'TEST-{}.xml'.format(recorded.classname))) as fp:
+        self.assertEqual('<testsuite name="recorded"/>', fp.read())
+
+  def test_source_closure(self):
+    sources = {'/src/A.java', '/src/B.java', '/src/C.java', '/src/D.java'}
+    deps_by_source = {'/src/A.java': ['/src/B.java', '/jars/dep.jar'],
+                      '/src/B.java': ['/src/C.java'],
+                      '/src/C.java': [],
+                      '/src/D.java': ['/src/A.java']}
+    self.assertEqual({'/src/A.java', '/src/B.java', '/src/C.java'},
+                     JUnitRun._source_closure('/src/A.java', deps_by_source, sources))
+    self.assertEqual({'/src/C.java'},
+                     JUnitRun._source_closure('/src/C.java', deps_by_source, sources))
+
+  def test_source_closure_unknown_deps(self):
+    sources = {'/src/A.java', '/src/B.java', '/src/C.java'}
+    # Without the deps of every source in the closure, it is all of the sources.
+    self.assertEqual(sources,
+                     JUnitRun._source_closure('/src/A.java', {'/src/A.java': ['/src/B.java']},
+                                              sources))
+    self.assertEqual(sources, JUnitRun._source_closure(None, {}, sources))
+
+  @ensure_cached(JUnitRun, expected_num_artifacts=0)
+  def test_junit_run_batch_size_parallel_shards_mutex(self):
+    self.set_options(batch_size=2, parallel_shards=2)
+    with self.assertRaises(JUnitRun.OptionError):
+      self.execute(self.context())
+
   @ensure_cached(JUnitRun, expected_num_artifacts=1)
   def test_junit_run_chroot(self):
     self.create_files('config/org/pantsbuild/foo', ['sentinel', 'another'])
@@ -0,0 +1,115 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import argparse
+import glob
+import itertools
+import multiprocessing
+import os
+import shutil
+import time
+
+from pants.backend.jvm.tasks.jvm_compile.analysis_tools import AnalysisTools
+from pants.backend.jvm.tasks.jvm_compile.zinc.zinc_analysis import ZincAnalysis
+from pants.backend.jvm.tasks.jvm_compile.zinc.zinc_analysis_parser import ZincAnalysisParser
+from pants.util.contextutil import temporary_dir
+
+
+# Measures the throughput of relativizing and localizing zinc analysis files, as is done when
+# writing to and reading from the artifact cache, serially and across a pool of processes.
+#
+# Pass the buildroot and workdir that the analysis files were produced in, and globs of real
+# analysis files (eg: `.pants.d/compile/zinc/*/*/current/*.analysis`) for representative results:
+# otherwise copies of a small test analysis are used.
+#
+#   ./pants run tests/python/pants_test/backend/jvm/zinc:analysis_rebase_benchmark -- \
+#     --buildroot=$PWD --workdir=$PWD/.pants.d '.pants.d/compile/zinc/*/*/current/*.analysis'
+
+
+_SIMPLE_ANALYSIS = os.path.join(os.path.dirname(__file__), 'testdata', 'simple', 'simple.analysis')
+
+
+def _relativize(args):
+  analysis_tools, analysis_file, portable_analysis_file = args
+  analysis_tools.relativize(analysis_file, portable_analysis_file)
+
+
+def _localize(args):
+  analysis_tools, portable_analysis_file, analysis_file = args
+  analysis_tools.localize(portable_analysis_file, analysis_file)
+
+
+def _time(func, repeat):
+  best = None
+  for _ in range(repeat):
+    start = time.time()
+    func()
+    elapsed = time.time() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+
+def benchmark(analysis_files, buildroot, workdir, java_home, repeat, processes):
+  analysis_tools = AnalysisTools(java_home, ZincAnalysisParser(), ZincAnalysis, buildroot, workdir)
+  size_mb = sum(os.path.getsize(f) for f in analysis_files) / (1024 * 1024)
+  print('Input: {} analysis files ({:.1f} MB)'.format(len(analysis_files), size_mb))
+  print('{:<12} {:>10} {:>12}'.format('operation', 'processes', 'MB/s'))
+
+  pool = multiprocessing.Pool(processes)
+  try:
+    with temporary_dir() as tmpdir:
+      portable_files = [os.path.join(tmpdir, '{}.portable'.format(i))
+                        for i in range(len(analysis_files))]
+      localized_files = [os.path.join(tmpdir, '{}.localized'.format(i))
+                         for i in range(len(analysis_files))]
+      relativize_items = [(analysis_tools, f, p) for f, p in zip(analysis_files, portable_files)]
+      localize_items = [(analysis_tools, p, l) for p, l in zip(portable_files, localized_files)]
+      for name, func, items in (('relativize', _relativize, relativize_items),
+                                ('localize', _localize, localize_items)):
+        serial_secs = _time(lambda: [func(item) for item in items], repeat)
+        parallel_secs = _time(lambda: pool.map(func, items), repeat)
+        print('{:<12} {:>10} {:>12.1f}'.format(name, 1, size_mb / serial_secs))
+        print('{:<12} {:>10} {:>12.1f}'.format(name, processes, size_mb / parallel_secs))
+  finally:
+    pool.terminate()
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark rebasing of zinc analysis files.')
+  parser.add_argument('analysis_globs', nargs='*',
+                      help='Globs of analysis files to benchmark with.')
+  parser.add_argument('--buildroot', default='/src/pants',
+                      help='The buildroot that the analysis files were produced in.')
+  parser.add_argument('--workdir', default='/src/pants/.pants.d',
+                      help='The workdir that the analysis files were produced in.')
+  parser.add_argument('--java-home', default=None,
+                      help='A java home whose paths are filtered out when relativizing.')
+  parser.add_argument('--copies', type=int, default=200,
+                      help='The number of copies of a test analysis to use if no globs are given.')
+  parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(),
+                      help='The number of processes to rebase across in parallel.')
+  parser.add_argument('--repeat', type=int, default=3,
+                      help='Report the best of this many runs.')
+  args = parser.parse_args()
+
+  if args.analysis_globs:
+    analysis_files = list(itertools.chain.from_iterable(glob.glob(g) for g in args.analysis_globs))
+    benchmark(analysis_files, args.buildroot, args.workdir, args.java_home, args.repeat,
+              args.processes)
+  else:
+    with temporary_dir() as tmpdir:
+      analysis_files = []
+      for i in range(args.copies):
+        analysis_file = os.path.join(tmpdir, '{}.analysis'.format(i))
+        shutil.copy(_SIMPLE_ANALYSIS, analysis_file)
+        analysis_files.append(analysis_file)
+      benchmark(analysis_files, args.buildroot, args.workdir, args.java_home, args.repeat,
+                args.processes)
+
+
+if __name__ == '__main__':
+  main()
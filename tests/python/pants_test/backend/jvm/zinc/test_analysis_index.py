@@ -0,0 +1,100 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import shutil
+import unittest
+
+from pants.backend.jvm.tasks.jvm_compile.analysis_index import AnalysisIndex
+from pants.backend.jvm.tasks.jvm_compile.zinc.zinc_analysis_parser import ZincAnalysisParser
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import touch
+
+
+class CountingZincAnalysisParser(ZincAnalysisParser):
+  """Counts the sections parsed from the text of an analysis."""
+
+  def __init__(self):
+    super(CountingZincAnalysisParser, self).__init__()
+    self.parsed = 0
+
+  def parse_products(self, infile, classes_dir):
+    self.parsed += 1
+    return super(CountingZincAnalysisParser, self).parse_products(infile, classes_dir)
+
+  def parse_deps(self, infile):
+    self.parsed += 1
+    return super(CountingZincAnalysisParser, self).parse_deps(infile)
+
+
+class AnalysisIndexTest(unittest.TestCase):
+
+  EXE_SOURCE = b'/src/pants/examples/src/scala/org/pantsbuild/example/hello/exe/Exe.scala'
+
+  def setUp(self):
+    self.parser = CountingZincAnalysisParser()
+
+  def copy_analysis(self, tmpdir):
+    analysis_path = os.path.join(tmpdir, 'simple.analysis')
+    shutil.copy(os.path.join(os.path.dirname(__file__), 'testdata', 'simple', 'simple.analysis'),
+                analysis_path)
+    return analysis_path
+
+  def parse_text(self, analysis_path, classes_dir):
+    with open(analysis_path, 'rb') as infile:
+      products = ZincAnalysisParser().parse_products(infile, classes_dir)
+    with open(analysis_path, 'rb') as infile:
+      deps = ZincAnalysisParser().parse_deps(infile)
+    return products, deps
+
+  def test_index_matches_text(self):
+    with temporary_dir() as tmpdir:
+      analysis_path = self.copy_analysis(tmpdir)
+      self.parser.index_from_path(analysis_path, tmpdir)
+      self.assertEqual(2, self.parser.parsed)
+
+      products, deps = self.parse_text(analysis_path, tmpdir)
+      self.assertEqual(products, self.parser.parse_products_from_path(analysis_path, tmpdir))
+      self.assertEqual(deps, self.parser.parse_deps_from_path(analysis_path))
+      self.assertIn(self.EXE_SOURCE, deps)
+      self.assertEqual(2, self.parser.parsed)
+
+  def test_without_index(self):
+    with temporary_dir() as tmpdir:
+      analysis_path = self.copy_analysis(tmpdir)
+      products, deps = self.parse_text(analysis_path, tmpdir)
+      self.assertEqual(products, self.parser.parse_products_from_path(analysis_path, tmpdir))
+      self.assertEqual(deps, self.parser.parse_deps_from_path(analysis_path))
+      self.assertEqual(2, self.parser.parsed)
+
+  def test_stale_index_is_ignored(self):
+    with temporary_dir() as tmpdir:
+      analysis_path = self.copy_analysis(tmpdir)
+      self.parser.index_from_path(analysis_path, tmpdir)
+      with open(analysis_path, 'ab') as fp:
+        fp.write(b'\n')
+      self.assertIsNone(AnalysisIndex.load(analysis_path))
+      self.parser.parse_deps_from_path(analysis_path)
+      self.assertEqual(3, self.parser.parsed)
+
+  def test_index_for_other_classes_dir_is_ignored(self):
+    with temporary_dir() as tmpdir:
+      analysis_path = self.copy_analysis(tmpdir)
+      self.parser.index_from_path(analysis_path, tmpdir)
+      self.assertIsNone(AnalysisIndex.load(analysis_path, classes_dir='/other'))
+      index = AnalysisIndex.load(analysis_path, classes_dir=tmpdir)
+      self.assertEqual(tmpdir, index.classes_dir)
+      index.close()
+
+  def test_corrupt_index_is_ignored(self):
+    with temporary_dir() as tmpdir:
+      analysis_path = self.copy_analysis(tmpdir)
+      touch(AnalysisIndex.path_for(analysis_path))
+      self.assertIsNone(AnalysisIndex.load(analysis_path))
+      with open(AnalysisIndex.path_for(analysis_path), 'wb') as fp:
+        fp.write(b'x' * 1024)
+      self.assertIsNone(AnalysisIndex.load(analysis_path))
@@ -5,8 +5,10 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import base64
 import os
 import StringIO
+import struct
 import unittest
 
 from pants.backend.jvm.tasks.jvm_compile.analysis_tools import AnalysisTools
@@ -80,3 +82,84 @@ class ZincAnalysisTestSorting(unittest.TestCase):
     with environment_as(ZINCUTILS_SORTED_ANALYSIS='1'):
       unsorted_elem = self.FakeElement([unsorted_arg])
       do_test(unsorted_elem)
+
+
+class ZincAnalysisTestRebase(unittest.TestCase):
+  class ChunkedZincAnalysisParser(ZincAnalysisParser):
+    # Rebase an item at a time, to exercise chunk boundaries.
+    REBASE_CHUNK_ITEMS = 1
+
+  REBASE_MAPPINGS = {b'/src/pants': AnalysisTools._PANTS_BUILDROOT_PLACEHOLDER,
+                     b'/src/pants/.pants.d': AnalysisTools._PANTS_WORKDIR_PLACEHOLDER}
+
+  def get_analysis_text(self, name):
+    with open(os.path.join(os.path.dirname(__file__), 'testdata', 'simple', name), 'r') as fp:
+      return fp.read()
+
+  def rebase(self, parser, text, rebase_mappings, java_home=None):
+    buf = StringIO.StringIO()
+    parser.rebase(iter(text.splitlines(True)), buf, rebase_mappings, java_home)
+    return buf.getvalue()
+
+  def test_chunked(self):
+    orig = self.get_analysis_text('simple.analysis')
+    parser = self.ChunkedZincAnalysisParser()
+    self.assertMultiLineEqual(self.get_analysis_text('simple.rebased.analysis'),
+                              self.rebase(parser, orig, self.REBASE_MAPPINGS))
+    self.assertMultiLineEqual(self.get_analysis_text('simple.rebased.filtered.analysis'),
+                              self.rebase(parser, orig, self.REBASE_MAPPINGS,
+                                          b'/Library/Java/JavaVirtualMachines/jdk1.8.0_40.jdk'))
+
+  def test_round_trip(self):
+    orig = self.get_analysis_text('simple.analysis')
+    parser = ZincAnalysisParser()
+    rebased = self.rebase(parser, orig, self.REBASE_MAPPINGS)
+    localize_mappings = {v: k for k, v in self.REBASE_MAPPINGS.items()}
+    self.assertMultiLineEqual(orig, self.rebase(parser, rebased, localize_mappings))
+
+  def test_no_mappings(self):
+    orig = self.get_analysis_text('simple.analysis')
+    self.assertMultiLineEqual(orig, self.rebase(ZincAnalysisParser(), orig, {}))
+
+  def test_truncated(self):
+    lines = self.get_analysis_text('simple.analysis').splitlines(True)
+    truncated = ''.join(lines[:len(lines) // 2])
+    with self.assertRaises(ZincAnalysisParser.ParseError):
+      self.rebase(ZincAnalysisParser(), truncated, self.REBASE_MAPPINGS)
+
+
+class ZincAnalysisTestApiFingerprint(unittest.TestCase):
+
+  def get_analysis_lines(self):
+    path = os.path.join(os.path.dirname(__file__), 'testdata', 'simple', 'simple.analysis')
+    with open(path, 'rb') as fp:
+      return fp.read().splitlines(True)
+
+  def fingerprint(self, lines):
+    return ZincAnalysisParser().parse_api_fingerprint(iter(lines))
+
+  def replace_api(self, lines, replace):
+    # The serialized API of the single class in the `internal apis` section is on its own line.
+    index = lines.index(b'internal apis:\n') + 3
+    api = base64.b64decode(lines[index])
+    lines[index] = base64.b64encode(replace(api)) + b'\n'
+    return lines
+
+  def test_ignores_compilation_time(self):
+    def replace_start_time(api):
+      start = api.index(b'xp', api.index(b'xsbti.api.Compilation')) + 2
+      return api[:start] + struct.pack(b'>q', 42) + api[start + 8:]
+    lines = self.get_analysis_lines()
+    self.assertEqual(self.fingerprint(lines),
+                     self.fingerprint(self.replace_api(list(lines), replace_start_time)))
+
+  def test_ignores_other_sections(self):
+    lines = self.get_analysis_lines()
+    changed = [line.replace(b'Exe.class', b'Other.class') for line in lines]
+    self.assertNotEqual(lines, changed)
+    self.assertEqual(self.fingerprint(lines), self.fingerprint(changed))
+
+  def test_changes_with_api(self):
+    lines = self.get_analysis_lines()
+    changed = self.replace_api(list(lines), lambda api: api.replace(b'getWorld', b'getWorle'))
+    self.assertNotEqual(self.fingerprint(lines), self.fingerprint(changed))
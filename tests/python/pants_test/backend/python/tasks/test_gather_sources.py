@@ -8,6 +8,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import os
 
 from pex.interpreter import PythonInterpreter
+from pex.pex_info import PexInfo
 
 from pants.backend.python.interpreter_cache import PythonInterpreterCache
 from pants.backend.python.subsystems.python_setup import PythonSetup
@@ -105,6 +106,53 @@ class GatherSourcesTest(TaskTestBase):
     self._assert_content_not_in_pex(pex, self.sources1)
     self._assert_content_not_in_pex(pex, self.resources)
 
+  def test_gather_sources_incrementally(self):
+    self.set_options(incremental=True)
+    pex = self._gather_sources([self.sources1, self.sources3])
+    self._assert_content_in_pex(pex, self.sources1)
+    self._assert_content_in_pex(pex, self.sources3)
+    self._assert_content_in_pex(pex, self.files)
+    self._assert_content_in_pex(pex, self.resources)
+    self._assert_content_not_in_pex(pex, self.sources2)
+    # Loose files are gathered, so the PEX is not zip safe.
+    self.assertFalse(PexInfo.from_pex(pex.path()).zip_safe)
+
+  def test_gather_sources_incrementally_links_unchanged_targets(self):
+    self.set_options(incremental=True)
+    pex = self._gather_sources([self.sources1])
+    foo_stat = os.stat(os.path.join(pex.path(), 'one', 'foo.py'))
+
+    self.filemap['src/python/one/bar.py'] = 'changed_bar_py_content'
+    self.create_file('src/python/one/bar.py', self.filemap['src/python/one/bar.py'])
+    # Start over with a fresh build graph, so that the target is fingerprinted anew.
+    self.reset_build_graph()
+    resources = self.make_target(spec='resources/qux:resources_tgt',
+                                 target_type=Resources,
+                                 sources=['quux.txt'])
+    sources1 = self.make_target(spec='src/python/one:sources1_tgt',
+                                target_type=PythonLibrary,
+                                sources=['foo.py', 'bar.py'],
+                                dependencies=[resources])
+    changed_pex = self._gather_sources([sources1])
+    self.assertNotEqual(pex.path(), changed_pex.path())
+    self._assert_content_in_pex(changed_pex, sources1)
+    self._assert_content_in_pex(changed_pex, resources)
+
+    # The chroot of the unchanged resources target is shared by both PEXes.
+    quux_stat = os.stat(os.path.join(pex.path(), 'qux', 'quux.txt'))
+    changed_quux_stat = os.stat(os.path.join(changed_pex.path(), 'qux', 'quux.txt'))
+    self.assertEqual(quux_stat.st_ino, changed_quux_stat.st_ino)
+    # Whereas the sources of the changed target were gathered anew.
+    changed_foo_stat = os.stat(os.path.join(changed_pex.path(), 'one', 'foo.py'))
+    self.assertNotEqual(foo_stat.st_ino, changed_foo_stat.st_ino)
+
+    # Only the chroot of the latest version of the changed target is kept, without affecting the
+    # PEX that was linked from the older one.
+    chroots_dir = os.path.join(self.test_workdir, 'targets', sources1.id)
+    self.assertEqual(1, len(os.listdir(chroots_dir)))
+    with open(os.path.join(pex.path(), 'one', 'bar.py')) as fp:
+      self.assertEqual('bar_py_content', fp.read())
+
   def _gather_sources(self, target_roots):
     context = self.context(target_roots=target_roots, for_subsystems=[PythonSetup, PythonRepos])
 
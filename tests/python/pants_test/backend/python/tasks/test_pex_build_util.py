@@ -0,0 +1,47 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import threading
+import time
+import unittest
+
+from pants.backend.python.tasks.pex_build_util import resolver_cache_lock
+from pants.util.contextutil import temporary_dir
+
+
+class ResolverCacheLockTest(unittest.TestCase):
+
+  def _max_concurrent_holders(self, cache_dirs):
+    lock = threading.Lock()
+    counts = {'holders': 0, 'max_holders': 0}
+
+    def hold(cache_dir):
+      with resolver_cache_lock(cache_dir):
+        with lock:
+          counts['holders'] += 1
+          counts['max_holders'] = max(counts['max_holders'], counts['holders'])
+        time.sleep(0.1)
+        with lock:
+          counts['holders'] -= 1
+
+    threads = [threading.Thread(target=hold, args=(cache_dir,)) for cache_dir in cache_dirs]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    return counts['max_holders']
+
+  def test_same_cache_excludes_threads(self):
+    with temporary_dir() as root:
+      cache_dir = os.path.join(root, 'CPython-2.7.13')
+      self.assertEqual(1, self._max_concurrent_holders([cache_dir] * 3))
+
+  def test_distinct_caches_are_held_concurrently(self):
+    with temporary_dir() as root:
+      cache_dirs = [os.path.join(root, 'CPython-2.7.13'), os.path.join(root, 'CPython-3.6.4')]
+      self.assertEqual(2, self._max_concurrent_holders(cache_dirs))
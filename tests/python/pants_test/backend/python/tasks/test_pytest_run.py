@@ -7,6 +7,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import os
 from textwrap import dedent
+from xml.dom import minidom
 
 import coverage
 from six.moves import configparser
@@ -22,8 +23,9 @@ from pants.base.exceptions import ErrorWhileTesting, TaskError
 from pants.build_graph.target import Target
 from pants.source.source_root import SourceRootConfig
 from pants.util.contextutil import pushd, temporary_dir, temporary_file
-from pants.util.dirutil import safe_mkdtemp, safe_rmtree
+from pants.util.dirutil import safe_mkdtemp, safe_rmtree, touch
 from pants_test.backend.python.tasks.python_task_test_base import PythonTaskTestBase
+from pants_test.base_test import BaseTest
 from pants_test.subsystem.subsystem_util import init_subsystem
 from pants_test.tasks.task_test_base import ensure_cached
 
@@ -433,6 +435,64 @@ class PytestTest(PytestTestBase):
 
       self.assert_test_info(junit_xml_dir, ('test_one', 'success'), ('test_two', 'failure'))
 
+  def test_result_cache_skips_unchanged_modules(self):
+    with temporary_dir() as tmpdir:
+      # A test that only passes until the marker exists: since the marker is not an input of the
+      # test, it is only observed if the test is re-run.
+      marker = os.path.join(tmpdir, 'marker')
+      self.create_file('tests/modules/test_unchanged.py', dedent("""
+        import os
+
+        def test_unchanged():
+          assert not os.path.exists({!r})
+        """.format(marker)))
+      self.create_file('tests/modules/test_changed.py', dedent("""
+        def test_changed():
+          assert False
+        """))
+      self.add_to_build_file('tests/modules', 'python_tests()')
+      modules = self.target('tests/modules')
+
+      self.run_failing_tests(targets=[modules], failed_targets=[modules], result_cache=True)
+
+      touch(marker)
+      self.create_file('tests/modules/test_changed.py', dedent("""
+        def test_changed():
+          assert True
+        """))
+      with temporary_dir() as junit_xml_dir:
+        self.run_tests(targets=[modules], result_cache=True, junit_xml_dir=junit_xml_dir)
+
+        # The recorded result of the unchanged module is reported along with the new one.
+        self.assert_test_info(junit_xml_dir, ('test_unchanged', 'success'),
+                              ('test_changed', 'success'))
+
+  def test_result_cache_reruns_importers_of_changed_modules(self):
+    self.create_file('tests/importers/test_base.py', dedent("""
+      EXPECTED = 1
+
+      def test_base():
+        pass
+      """))
+    self.create_file('tests/importers/test_importer.py', dedent("""
+      from test_base import EXPECTED
+
+      def test_importer():
+        assert EXPECTED == 1
+      """))
+    self.add_to_build_file('tests/importers', 'python_tests()')
+    importers = self.target('tests/importers')
+    self.run_tests(targets=[importers], result_cache=True)
+
+    # The importer is not changed itself, but it is re-run (and fails) because its import changed.
+    self.create_file('tests/importers/test_base.py', dedent("""
+      EXPECTED = 2
+
+      def test_base():
+        pass
+      """))
+    self.run_failing_tests(targets=[importers], failed_targets=[importers], result_cache=True)
+
   def coverage_data_file(self):
     return os.path.join(self.build_root, '.coverage')
 
@@ -700,3 +760,91 @@ class PytestTest(PytestTestBase):
 
     with self.assertRaises(PytestRun.InvalidShardSpecification):
       self.run_tests(targets=[self.green], test_shard='1/a')
+
+  @ensure_cached(PytestRun, expected_num_artifacts=0)
+  def test_parallel_shards(self):
+    with temporary_dir() as junit_xml_dir:
+      self.run_failing_tests(targets=[self.red, self.green],
+                             failed_targets=[self.red],
+                             junit_xml_dir=junit_xml_dir,
+                             parallel_shards=2)
+
+      # The reports of the shards are merged into the report of the run.
+      self.assert_test_info(junit_xml_dir, ('test_one', 'success'), ('test_two', 'failure'))
+
+  @ensure_cached(PytestRun, expected_num_artifacts=0)
+  def test_parallel_shards_with_test_shard(self):
+    with self.assertRaises(PytestRun.OptionError):
+      self.run_tests(targets=[self.green], test_shard='0/2', parallel_shards=2)
+
+  def test_merge_junitxml(self):
+    with temporary_dir() as tmpdir:
+      shard_paths = []
+      for index, (tests, failures, time) in enumerate([(2, 1, '1.5'), (1, 0, '2.25')]):
+        shard_path = os.path.join(tmpdir, 'shard-{}.xml'.format(index))
+        with open(shard_path, 'w') as fp:
+          fp.write(dedent("""
+            <testsuite errors="0" failures="{failures}" name="pytest" skips="0" tests="{tests}"
+                       time="{time}">
+            {testcases}
+            </testsuite>
+            """).strip().format(failures=failures, tests=tests, time=time, testcases=''.join(
+              '<testcase classname="test_{0}" file="test_{0}.py" name="test_{1}" time="0.5"/>'
+              .format(index, i) for i in range(tests))))
+        shard_paths.append(shard_path)
+
+      junitxml_path = os.path.join(tmpdir, 'junitxml', 'TEST-all.xml')
+      os.mkdir(os.path.dirname(junitxml_path))
+      PytestRun._merge_junitxml(junitxml_path, shard_paths)
+
+      with open(junitxml_path) as fp:
+        testsuite = minidom.parse(fp).getElementsByTagName('testsuite')[0]
+      self.assertEqual('3', testsuite.getAttribute('tests'))
+      self.assertEqual('1', testsuite.getAttribute('failures'))
+      self.assertEqual('0', testsuite.getAttribute('errors'))
+      self.assertEqual('0', testsuite.getAttribute('skips'))
+      # The shards ran concurrently, so the run took as long as the longest of them.
+      self.assertEqual('2.250', testsuite.getAttribute('time'))
+      self.assertEqual(['test_0.py', 'test_0.py', 'test_1.py'],
+                       [testcase.getAttribute('file')
+                        for testcase in testsuite.getElementsByTagName('testcase')])
+
+  def test_merge_junitxml_no_reports(self):
+    with temporary_dir() as tmpdir:
+      junitxml_path = os.path.join(tmpdir, 'TEST-all.xml')
+      PytestRun._merge_junitxml(junitxml_path, [])
+      self.assertFalse(os.path.exists(junitxml_path))
+
+
+class PytestLocalImportsTest(BaseTest):
+  def local_imports(self, files):
+    for path, content in files.items():
+      self.create_file(os.path.join('src', path), dedent(content))
+    sources = sorted(os.path.join('src', path) for path in files)
+    return {os.path.relpath(source, 'src'): sorted(os.path.relpath(imported, 'src')
+                                                   for imported in imported_sources)
+            for source, imported_sources in PytestRun._local_imports('src', sources).items()}
+
+  def test_absolute_imports(self):
+    self.assertEqual({'pkg/__init__.py': [],
+                      'pkg/test_a.py': ['pkg/__init__.py', 'pkg/util.py'],
+                      'pkg/test_b.py': ['pkg/__init__.py', 'pkg/test_a.py'],
+                      'pkg/util.py': []},
+                     self.local_imports({'pkg/__init__.py': '',
+                                         'pkg/test_a.py': 'import os\nimport pkg.util',
+                                         'pkg/test_b.py': 'from pkg import test_a',
+                                         'pkg/util.py': ''}))
+
+  def test_relative_imports(self):
+    self.assertEqual({'pkg/__init__.py': [],
+                      'pkg/test_a.py': ['pkg/__init__.py', 'pkg/util.py'],
+                      'pkg/test_b.py': ['pkg/util.py'],
+                      'pkg/util.py': []},
+                     self.local_imports({'pkg/__init__.py': '',
+                                         'pkg/test_a.py': 'from . import util',
+                                         'pkg/test_b.py': 'import util',
+                                         'pkg/util.py': ''}))
+
+  def test_unparseable_source_imports_everything(self):
+    self.assertEqual({'test_a.py': ['test_a.py', 'util.py'], 'util.py': []},
+                     self.local_imports({'test_a.py': 'def (', 'util.py': ''}))
@@ -6,7 +6,9 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import threading
 
+import mock
 from pex.interpreter import PythonInterpreter
 
 from pants.backend.python.interpreter_cache import PythonInterpreterCache
@@ -108,6 +110,36 @@ class ResolveRequirementsTest(TaskTestBase):
     # Check that the path is under the test's build root, so we know the pex was created there.
     self.assertTrue(path.startswith(os.path.realpath(get_buildroot())))
 
+  def test_build_requirements_pexes(self):
+    ansicolors_tgt = self._fake_target('ansicolors', ['ansicolors==1.0.2'])
+    six_tgt = self._fake_target('six', ['six==1.11.0'])
+    context = self.context(target_roots=[ansicolors_tgt, six_tgt],
+                           for_subsystems=[PythonSetup, PythonRepos])
+    task = self.create_task(context)
+    interpreter = PythonInterpreter.get()
+
+    resolved = []
+    lock = threading.Lock()
+
+    def dump_requirements(builder, interpreter, reqs, log):
+      with lock:
+        resolved.append(sorted(str(req.requirement) for req in reqs))
+
+    with mock.patch('pants.backend.python.tasks.resolve_requirements_task_base.dump_requirements',
+                    side_effect=dump_requirements):
+      pexes = task._build_requirements_pexes(
+        [task._requirements_pex_args(interpreter, [ansicolors_tgt]),
+         task._requirements_pex_args(interpreter, [six_tgt]),
+         task._requirements_pex_args(interpreter, [ansicolors_tgt])])
+
+    # Each distinct set of requirements is resolved once, and each resolve returns its own PEX.
+    self.assertEqual([['ansicolors==1.0.2'], ['six==1.11.0']], sorted(resolved))
+    self.assertEqual(3, len(pexes))
+    self.assertEqual(pexes[0].path(), pexes[2].path())
+    self.assertNotEqual(pexes[0].path(), pexes[1].path())
+    for pex in pexes:
+      self.assertTrue(os.path.isdir(pex.path()))
+
   def _fake_target(self, spec, requirement_strs):
     requirements = [PythonRequirement(r) for r in requirement_strs]
     return self.make_target(spec=spec, target_type=PythonRequirementLibrary,
@@ -0,0 +1,152 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import base64
+import hashlib
+import os
+import threading
+import unittest
+
+import mock
+from pex.interpreter import PythonInterpreter
+from pex.pex_builder import PEXBuilder
+from pkg_resources import Distribution
+
+from pants.backend.python.distribution_store import DistributionStore
+from pants.util.contextutil import open_zip, temporary_dir
+
+
+class DistributionStoreTest(unittest.TestCase):
+  _WHEEL_NAME = 'foo-1.0-py2.py3-none-any.whl'
+
+  @staticmethod
+  def _record_hash(content):
+    digest = base64.urlsafe_b64encode(hashlib.sha256(content).digest()).rstrip(b'=')
+    return 'sha256={}'.format(digest.decode('ascii'))
+
+  def _create_wheel(self, dir_path, module_content=b'X = 1\n'):
+    files = {
+      'foo.py': module_content,
+      'foo-1.0.dist-info/METADATA': b'Metadata-Version: 2.0\nName: foo\nVersion: 1.0\n',
+      'foo-1.0.dist-info/WHEEL': (b'Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\n'
+                                  b'Tag: py2-none-any\n'),
+    }
+    record = ''.join('{},{},{}\n'.format(name, self._record_hash(content), len(content))
+                     for name, content in sorted(files.items()))
+    files['foo-1.0.dist-info/RECORD'] = (record + 'foo-1.0.dist-info/RECORD,,\n').encode('utf-8')
+
+    path = os.path.join(dir_path, self._WHEEL_NAME)
+    with open_zip(path, 'w') as zf:
+      for name, content in sorted(files.items()):
+        zf.writestr(name, content)
+    return Distribution(location=path, project_name='foo', version='1.0')
+
+  @staticmethod
+  def _files(root):
+    return {os.path.relpath(os.path.join(dirpath, f), root)
+            for dirpath, _, files in os.walk(root) for f in files}
+
+  def test_installs_wheel(self):
+    with temporary_dir() as tmpdir:
+      dist = self._create_wheel(tmpdir)
+      installed, dist_name = DistributionStore(os.path.join(tmpdir, 'store')).installed(dist)
+
+      self.assertEqual(self._WHEEL_NAME, dist_name)
+      self.assertEqual('foo', installed.project_name)
+      self.assertEqual({'foo.py', 'foo-1.0.dist-info/METADATA', 'foo-1.0.dist-info/WHEEL',
+                        'foo-1.0.dist-info/RECORD'},
+                       self._files(installed.location))
+
+  def test_installs_once_per_content(self):
+    with temporary_dir() as tmpdir:
+      store = DistributionStore(os.path.join(tmpdir, 'store'))
+      installed, _ = store.installed(self._create_wheel(tmpdir))
+      self.assertEqual(installed.location,
+                       store.installed(self._create_wheel(tmpdir))[0].location)
+
+      # A distribution with the same name but different content is stored separately.
+      changed, _ = store.installed(self._create_wheel(tmpdir, module_content=b'X = 2\n'))
+      self.assertNotEqual(installed.location, changed.location)
+      with open(os.path.join(changed.location, 'foo.py'), 'rb') as fp:
+        self.assertEqual(b'X = 2\n', fp.read())
+
+  def test_existing_entry_is_never_replaced(self):
+    with temporary_dir() as tmpdir:
+      store = DistributionStore(os.path.join(tmpdir, 'store'))
+      dist = self._create_wheel(tmpdir)
+      installed, _ = store.installed(dist)
+      module = os.path.join(installed.location, 'foo.py')
+      inode = os.stat(module).st_ino
+
+      # Lose the race with the install above, as if both had found the entry missing.
+      isdir = os.path.isdir
+      with mock.patch.object(os.path, 'isdir',
+                             side_effect=lambda path: path != installed.location and isdir(path)):
+        self.assertEqual(installed.location, store.installed(dist)[0].location)
+
+      self.assertEqual(inode, os.stat(module).st_ino)
+      self.assertEqual({'foo.py', 'foo-1.0.dist-info/METADATA', 'foo-1.0.dist-info/WHEEL',
+                        'foo-1.0.dist-info/RECORD'},
+                       self._files(installed.location))
+      self.assertEqual([os.path.basename(installed.location)],
+                       os.listdir(os.path.dirname(installed.location)))
+
+  def test_concurrent_installs(self):
+    with temporary_dir() as tmpdir:
+      store = DistributionStore(os.path.join(tmpdir, 'store'))
+      dist = self._create_wheel(tmpdir)
+      start = threading.Event()
+      locations = []
+
+      def install():
+        start.wait()
+        locations.append(store.installed(dist)[0].location)
+
+      threads = [threading.Thread(target=install) for _ in range(4)]
+      for thread in threads:
+        thread.start()
+      start.set()
+      for thread in threads:
+        thread.join()
+
+      self.assertEqual(4, len(locations))
+      self.assertEqual(1, len(set(locations)))
+      self.assertEqual({'foo.py', 'foo-1.0.dist-info/METADATA', 'foo-1.0.dist-info/WHEEL',
+                        'foo-1.0.dist-info/RECORD'},
+                       self._files(locations[0]))
+      self.assertEqual([os.path.basename(locations[0])],
+                       os.listdir(os.path.dirname(locations[0])))
+
+  def test_installed_dir_is_unchanged(self):
+    with temporary_dir() as tmpdir:
+      dist = Distribution(location=tmpdir, project_name='foo', version='1.0')
+      installed, dist_name = DistributionStore(os.path.join(tmpdir, 'store')).installed(dist)
+      self.assertIs(dist, installed)
+      self.assertEqual(os.path.basename(tmpdir), dist_name)
+
+  def test_pex_matches_packed_distribution(self):
+    with temporary_dir() as tmpdir:
+      dist = self._create_wheel(tmpdir)
+      interpreter = PythonInterpreter.get()
+
+      packed_pex = os.path.join(tmpdir, 'packed')
+      packed_builder = PEXBuilder(path=packed_pex, interpreter=interpreter, copy=True)
+      packed_builder.add_distribution(dist)
+      packed_builder.freeze()
+
+      linked_pex = os.path.join(tmpdir, 'linked')
+      installed, dist_name = DistributionStore(os.path.join(tmpdir, 'store')).installed(dist)
+      linked_builder = PEXBuilder(path=linked_pex, interpreter=interpreter, copy=False)
+      linked_builder.add_distribution(installed, dist_name=dist_name)
+      linked_builder.freeze()
+
+      self.assertEqual(self._files(packed_pex), self._files(linked_pex))
+      self.assertEqual(packed_builder.info.distributions, linked_builder.info.distributions)
+      # The files of the distribution are shared with the store.
+      module = os.path.join('.deps', dist_name, 'foo.py')
+      self.assertEqual(os.stat(os.path.join(installed.location, 'foo.py')).st_ino,
+                       os.stat(os.path.join(linked_pex, module)).st_ino)
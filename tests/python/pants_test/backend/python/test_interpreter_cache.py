@@ -9,6 +9,7 @@ import os
 from contextlib import contextmanager
 
 import mock
+from pex.interpreter import PythonIdentity
 from pex.package import EggPackage, Package, SourcePackage
 from pex.resolver import Unsatisfiable, resolve
 
@@ -16,6 +17,7 @@ from pants.backend.python.interpreter_cache import PythonInterpreter, PythonInte
 from pants.backend.python.subsystems.python_setup import PythonSetup
 from pants.python.python_repos import PythonRepos
 from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import chmod_plus_x
 from pants_test.base_test import BaseTest
 from pants_test.pants_run_integration_test import PantsRunIntegrationTest
 from pants_test.testutils.pexrc_util import setup_pexrc_with_pex_python_path
@@ -138,6 +140,87 @@ class TestInterpreterCache(BaseTest):
       self.assertFalse('.tmp.' in ' '.join(os.listdir(cache_path)),
                        'interpreter cache path contains tmp dirs!')
 
+  def test_setup_paths_sets_up_each_identity_once(self):
+    py27 = PythonInterpreter('/usr/bin/python2.7', PythonIdentity('CPython', 2, 7, 13))
+    py27_alias = PythonInterpreter('/usr/bin/python2', PythonIdentity('CPython', 2, 7, 13))
+    py36 = PythonInterpreter('/usr/bin/python3.6', PythonIdentity('CPython', 3, 6, 4))
+
+    mock_setup = mock.MagicMock().return_value
+    worker_pool = mock.MagicMock()
+    worker_pool.submit_work_and_wait.side_effect = lambda work: [work.func(*args)
+                                                                 for args in work.args_tuples]
+    with temporary_dir() as path:
+      mock_setup.interpreter_cache_dir = path
+      cache = PythonInterpreterCache(mock_setup, mock.MagicMock(), worker_pool=worker_pool)
+      with mock.patch.object(cache, '_find_interpreters', return_value=[py27, py27_alias, py36]), \
+           mock.patch.object(cache, '_setup_path', side_effect=lambda pi, *args: pi) as setup_path:
+        self.assertEqual([py27, py36], cache._setup_paths(['/usr/bin'], [b'']))
+        self.assertEqual(1, worker_pool.submit_work_and_wait.call_count)
+
+      self.assertEqual(sorted([(py27, os.path.join(path, str(py27.identity)), [b'']),
+                               (py36, os.path.join(path, str(py36.identity)), [b''])]),
+                       sorted(call[0] for call in setup_path.call_args_list))
+
+  def _write_python(self, bin_dir, exit_code=None):
+    python = os.path.join(bin_dir, 'python2.7')
+    with open(python, 'w') as fp:
+      if exit_code is None:
+        fp.write('#!/bin/sh\nexec {} "$@"\n'.format(self._interpreter.binary))
+      else:
+        fp.write('#!/bin/sh\nexit {}\n'.format(exit_code))
+    chmod_plus_x(python)
+    return python
+
+  def _write_native_python(self, bin_dir):
+    # Only the magic number matters, as the binary is never actually run.
+    python = os.path.join(bin_dir, 'python2.7')
+    with open(python, 'wb') as fp:
+      fp.write(b'\x7fELF')
+    chmod_plus_x(python)
+    return python
+
+  def test_find_interpreters_records_identities(self):
+    with self._setup_test() as (cache, _), temporary_dir() as bin_dir:
+      python = self._write_native_python(bin_dir)
+      with mock.patch.object(PythonInterpreter, 'from_binary',
+                             return_value=self._interpreter) as from_binary:
+        interpreters = cache._find_interpreters([bin_dir])
+        self.assertEqual(1, from_binary.call_count)
+      self.assertEqual([self._interpreter.identity], [pi.identity for pi in interpreters])
+
+      # The recorded identity is used while the binary is unchanged.
+      with mock.patch.object(PythonInterpreter, 'from_binary') as from_binary:
+        self.assertEqual(interpreters, cache._find_interpreters([bin_dir]))
+        self.assertEqual(interpreters[0].extras, cache._find_interpreters([bin_dir])[0].extras)
+        self.assertFalse(from_binary.called)
+
+      # But the binary is identified anew once it changes.
+      with open(python, 'ab') as fp:
+        fp.write(b'\0')
+      with mock.patch.object(PythonInterpreter, 'from_binary',
+                             return_value=self._interpreter) as from_binary:
+        self.assertEqual(interpreters, cache._find_interpreters([bin_dir]))
+        self.assertEqual(1, from_binary.call_count)
+
+  def test_find_interpreters_records_unidentifiable_binaries(self):
+    with self._setup_test() as (cache, _), temporary_dir() as bin_dir:
+      self._write_native_python(bin_dir)
+      with mock.patch.object(PythonInterpreter, 'from_binary', side_effect=Exception('nope')):
+        self.assertEqual([], cache._find_interpreters([bin_dir]))
+      with mock.patch.object(PythonInterpreter, 'from_binary') as from_binary:
+        self.assertEqual([], cache._find_interpreters([bin_dir]))
+        self.assertFalse(from_binary.called)
+
+  def test_find_interpreters_identifies_scripts_every_time(self):
+    with self._setup_test() as (cache, _), temporary_dir() as bin_dir:
+      self._write_python(bin_dir)
+      for _ in range(2):
+        with mock.patch.object(PythonInterpreter, 'from_binary',
+                               wraps=PythonInterpreter.from_binary) as from_binary:
+          interpreters = cache._find_interpreters([bin_dir])
+          self.assertEqual(1, from_binary.call_count)
+        self.assertEqual([self._interpreter.identity], [pi.identity for pi in interpreters])
+
   def test_pex_python_paths(self):
     """Test pex python path helper method of PythonInterpreterCache."""
     py27 = '2'
@@ -13,6 +13,7 @@ from twitter.common.collections import maybe_list
 
 from pants.base.workunit import WorkUnit
 from pants.build_graph.target import Target
+from pants.cache.artifact_cache import call_insert
 from pants.goal.context import Context
 
 
@@ -54,8 +55,17 @@ class TestContext(Context):
 
     artifact_cache_stats = DummyArtifactCacheStats()
 
+    class DummyRunInfo(object):
+      def add_info(self, key, val, ignore_errors=False): pass
+
+      def add_infos(self, *keyvals, **kwargs): pass
+
+    run_info = DummyRunInfo()
+
     def report_target_info(self, scope, target, keys, val): pass
 
+    def register_thread(self, parent_workunit): pass
+
 
   class TestLogger(logging.getLoggerClass()):
     """A logger that converts our structured records into flat ones.
@@ -102,6 +112,14 @@ class TestContext(Context):
       for args_tuple in work.args_tuples:
         work.func(*args_tuple)
 
+  def submit_artifact_cache_writes(self, writes):
+    """
+    :API: public
+    """
+    # Just do the writes synchronously, so we don't need a run tracker and a writer.
+    for cache, cache_key, paths, overwrite in writes:
+      call_insert((cache, cache_key, paths, overwrite))
+
   def subproc_map(self, f, items):
     """
     :API: public
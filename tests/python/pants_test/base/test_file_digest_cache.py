@@ -0,0 +1,107 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import os
+import time
+import unittest
+
+from pants.base.file_digest_cache import (FileDigestCache, get_file_digest_cache,
+                                          set_file_digest_cache)
+from pants.base.hash_utils import hash_file
+from pants.util.dirutil import safe_file_dump, safe_mkdtemp, safe_rmtree
+
+
+class CountingFileDigestCache(FileDigestCache):
+  """Counts the files that were actually read.
+
+  The ctime of a file written by a test is always recent, so by default this caches the digests of
+  recently modified files.
+  """
+
+  RECENTLY_MODIFIED_SECS = 0
+
+  def __init__(self, *args, **kwargs):
+    super(CountingFileDigestCache, self).__init__(*args, **kwargs)
+    self.hashed = 0
+
+  def _hash(self, path):
+    self.hashed += 1
+    return super(CountingFileDigestCache, self)._hash(path)
+
+
+class FileDigestCacheTest(unittest.TestCase):
+
+  def setUp(self):
+    self.root = safe_mkdtemp()
+    self.addCleanup(safe_rmtree, self.root)
+    self.cache_path = os.path.join(self.root, 'cache', 'digests.sqlite')
+
+  def write(self, name, content, age_secs=60):
+    path = os.path.join(self.root, name)
+    safe_file_dump(path, content)
+    mtime = time.time() - age_secs
+    os.utime(path, (mtime, mtime))
+    return path
+
+  def cache(self):
+    return CountingFileDigestCache(self.cache_path)
+
+  def test_digest(self):
+    path = self.write('a', 'jake jones')
+    self.assertEqual(hashlib.sha1(b'jake jones').hexdigest(), self.cache().digest(path))
+
+  def test_unchanged_files_are_not_reread(self):
+    cache = self.cache()
+    path = self.write('a', 'jake jones')
+    cache.digest(path)
+    cache.digest(path)
+    self.assertEqual(1, cache.hashed)
+
+  def test_persisted_on_flush(self):
+    path = self.write('a', 'jake jones')
+    cache = self.cache()
+    cache.digest(path)
+    cache.flush()
+
+    reloaded = self.cache()
+    self.assertEqual(hashlib.sha1(b'jake jones').hexdigest(), reloaded.digest(path))
+    self.assertEqual(0, reloaded.hashed)
+
+  def test_changed_files_are_reread(self):
+    cache = self.cache()
+    path = self.write('a', 'jake jones')
+    cache.digest(path)
+    path = self.write('a', 'jane jones', age_secs=30)
+    self.assertEqual(hashlib.sha1(b'jane jones').hexdigest(), cache.digest(path))
+    self.assertEqual(2, cache.hashed)
+
+  def test_recently_modified_files_are_always_reread(self):
+    cache = self.cache()
+    cache.RECENTLY_MODIFIED_SECS = 60
+    path = self.write('a', 'jake jones', age_secs=0)
+    cache.digest(path)
+    cache.digest(path)
+    self.assertEqual(2, cache.hashed)
+    cache.flush()
+
+    reloaded = self.cache()
+    reloaded.digest(path)
+    self.assertEqual(1, reloaded.hashed)
+
+  def test_hash_file(self):
+    path = self.write('a', 'jake jones')
+    cache = self.cache()
+    previous_cache = get_file_digest_cache()
+    set_file_digest_cache(cache)
+    try:
+      self.assertEqual(hashlib.sha1(b'jake jones').hexdigest(), hash_file(path))
+      self.assertEqual(hashlib.md5(b'jake jones').hexdigest(),
+                       hash_file(path, digest=hashlib.md5()))
+    finally:
+      set_file_digest_cache(previous_cache)
+    self.assertEqual(1, cache.hashed)
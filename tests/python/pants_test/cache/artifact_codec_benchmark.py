@@ -0,0 +1,106 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import argparse
+import os
+import random
+import time
+
+from pants.cache.artifact import TarballArtifact
+from pants.cache.artifact_codec import AVAILABLE_CODECS
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump, safe_rmtree
+
+
+# Compares the throughput of artifact codecs when collecting and extracting a tree of files.
+#
+# Pass the path of a real classes directory (eg: one under `.pants.d/compile/zinc`) for
+# representative results: otherwise a synthetic tree of class-file-like content is generated.
+#
+#   ./pants run tests/python/pants_test/cache:artifact_codec_benchmark -- [classes_dir]
+
+
+def _generate_class_files(root, count, seed=0):
+  rng = random.Random(seed)
+  # Class files are dominated by constant pool strings, which repeat heavily across classes.
+  vocabulary = [b'Lorg/pantsbuild/example/{}/Type{};'.format(rng.choice([b'a', b'b', b'c']), i)
+                for i in range(500)]
+  for i in range(count):
+    body = [b'\xca\xfe\xba\xbe\x00\x00\x00\x34']
+    for _ in range(rng.randint(20, 400)):
+      body.append(rng.choice(vocabulary))
+      body.append(bytes(bytearray(rng.randint(0, 255) for _ in range(rng.randint(2, 12)))))
+    safe_file_dump(os.path.join(root, 'pkg{}'.format(i % 50), 'Class{}.class'.format(i)),
+                   b''.join(body))
+
+
+def _tree_size(root):
+  return sum(os.path.getsize(os.path.join(dirpath, f))
+             for dirpath, _, files in os.walk(root) for f in files)
+
+
+def _time(func, repeat):
+  best = None
+  for _ in range(repeat):
+    start = time.time()
+    func()
+    elapsed = time.time() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+
+def benchmark(classes_dir, repeat):
+  artifact_root = os.path.dirname(classes_dir)
+  size_mb = _tree_size(classes_dir) / (1024 * 1024)
+  print('Input: {} ({:.1f} MB)'.format(classes_dir, size_mb))
+  print('{:<6} {:>5} {:>10} {:>12} {:>12}'.format('codec', 'level', 'ratio', 'write MB/s',
+                                                   'read MB/s'))
+  with temporary_dir() as tmpdir:
+    extract_root = os.path.join(tmpdir, 'extracted')
+    for codec in AVAILABLE_CODECS.values():
+      for level in sorted({codec.levels[0], codec.levels[len(codec.levels) // 2],
+                           codec.levels[-1]}):
+        tarball = os.path.join(tmpdir, 'artifact' + codec.extension)
+
+        def collect():
+          TarballArtifact(artifact_root, tarball, level, codec=codec).collect([classes_dir])
+
+        def extract():
+          safe_rmtree(extract_root)
+          TarballArtifact(extract_root, tarball, codec=codec).extract()
+
+        write_secs = _time(collect, repeat)
+        read_secs = _time(extract, repeat)
+        ratio = _tree_size(classes_dir) / os.path.getsize(tarball)
+        print('{:<6} {:>5} {:>10.2f} {:>12.1f} {:>12.1f}'.format(
+          codec.name, level, ratio, size_mb / write_secs, size_mb / read_secs))
+        if codec.name == 'none':
+          # The level is ignored.
+          break
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark artifact cache compression codecs.')
+  parser.add_argument('classes_dir', nargs='?',
+                      help='A directory of class files to benchmark with.')
+  parser.add_argument('--synthetic-files', type=int, default=5000,
+                      help='The number of class files to generate if no classes_dir is given.')
+  parser.add_argument('--repeat', type=int, default=3,
+                      help='Report the best of this many runs.')
+  args = parser.parse_args()
+
+  if args.classes_dir:
+    benchmark(os.path.realpath(args.classes_dir), args.repeat)
+  else:
+    with temporary_dir() as tmpdir:
+      classes_dir = os.path.join(tmpdir, 'classes')
+      _generate_class_files(classes_dir, args.synthetic_files)
+      benchmark(classes_dir, args.repeat)
+
+
+if __name__ == '__main__':
+  main()
@@ -5,12 +5,13 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import io
 import os
 import unittest
 
 from pants.cache.artifact import DirectoryArtifact, TarballArtifact
 from pants.util.contextutil import temporary_dir
-from pants.util.dirutil import safe_mkdir, safe_open
+from pants.util.dirutil import safe_mkdir, safe_open, safe_rmtree
 
 
 class TarballArtifactTest(unittest.TestCase):
@@ -49,6 +50,56 @@ class TarballArtifactTest(unittest.TestCase):
 
       self.assertTrue(artifact.exists())
 
+  def test_round_trip_through_stream(self):
+    with temporary_dir() as tmpdir:
+      artifact_root = os.path.join(tmpdir, 'artifacts')
+      file_path = self.touch_file_in(os.path.join(artifact_root, 'a', 'b'))
+      safe_mkdir(os.path.join(artifact_root, 'a', 'empty'))
+
+      # Neither direction of the stream may seek.
+      class WriteOnly(object):
+        def __init__(self):
+          self.buf = io.BytesIO()
+
+        def write(self, data):
+          self.buf.write(data)
+
+      class ReadOnly(object):
+        def __init__(self, data):
+          self.buf = io.BytesIO(data)
+
+        def read(self, size=-1):
+          return self.buf.read(size)
+
+      out = WriteOnly()
+      TarballArtifact(artifact_root, None, compression=1).collect_into(out, [file_path])
+      TarballArtifact(artifact_root, None, compression=1).collect_into(
+        WriteOnly(), [os.path.join(artifact_root, 'a')])
+
+      os.unlink(file_path)
+      artifact = TarballArtifact(artifact_root, None)
+      artifact.extract_from(ReadOnly(out.buf.getvalue()))
+
+      self.assertTrue(os.path.isfile(file_path))
+      self.assertEquals([file_path], list(artifact.get_paths()))
+
+  def test_extract_restores_directories(self):
+    with temporary_dir() as tmpdir:
+      artifact_root = os.path.join(tmpdir, 'artifacts')
+      tarball = os.path.join(tmpdir, 'some.tar.gz')
+      parent = os.path.join(artifact_root, 'a')
+      file_path = self.touch_file_in(os.path.join(parent, 'b'))
+      safe_mkdir(os.path.join(parent, 'empty'))
+
+      TarballArtifact(artifact_root, tarball).collect([parent])
+      safe_rmtree(parent)
+      # A pre-existing directory, as created by a concurrent extraction, is not an error.
+      safe_mkdir(os.path.join(parent, 'b'))
+      TarballArtifact(artifact_root, tarball).extract()
+
+      self.assertTrue(os.path.isfile(file_path))
+      self.assertTrue(os.path.isdir(os.path.join(parent, 'empty')))
+
   def touch_file_in(self, artifact_root):
     path = os.path.join(artifact_root, 'some.file')
     with safe_open(path, 'w') as f:
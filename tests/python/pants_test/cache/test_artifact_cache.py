@@ -11,6 +11,7 @@ from contextlib import contextmanager
 
 from pants.cache.artifact_cache import (NonfatalArtifactCacheError, call_insert,
                                         call_use_cached_files)
+from pants.cache.artifact_codec import codec_for_name
 from pants.cache.local_artifact_cache import LocalArtifactCache, TempLocalArtifactCache
 from pants.cache.pinger import BestUrlSelector, InvalidRESTfulCacheProtoError
 from pants.cache.restful_artifact_cache import RESTfulArtifactCache
@@ -204,6 +205,105 @@ class TestArtifactCache(unittest.TestCase):
         map(call_insert, [(cache, key, [path], False)])
       self.assertFalse(map(call_use_cached_files, [(cache, key, None)])[0])
 
+  def test_has_many(self):
+    present_key = CacheKey('muppet_key', 'fake_hash')
+    missing_key = CacheKey('kermit_key', 'fake_hash')
+
+    with self.setup_local_cache() as cache:
+      self._do_test_has_many(cache, present_key, missing_key)
+
+    with self.setup_rest_cache() as cache:
+      self._do_test_has_many(cache, present_key, missing_key)
+
+  def _do_test_has_many(self, cache, present_key, missing_key):
+    self.assertEquals(cache.has_many([]), [])
+    self.assertEquals(cache.has_many([present_key, missing_key]), [False, False])
+    with self.setup_test_file(cache.artifact_root) as path:
+      cache.insert(present_key, [path])
+    self.assertEquals(cache.has_many([missing_key, present_key, missing_key]),
+                      [False, True, False])
+
+  def test_use_cached_files_many(self):
+    present_key = CacheKey('muppet_key', 'fake_hash')
+    missing_key = CacheKey('kermit_key', 'fake_hash')
+
+    with self.setup_local_cache() as cache:
+      self._do_test_use_cached_files_many(cache, present_key, missing_key)
+
+    with self.setup_rest_cache() as cache:
+      self._do_test_use_cached_files_many(cache, present_key, missing_key)
+
+  def _do_test_use_cached_files_many(self, cache, present_key, missing_key):
+    self.assertEquals(cache.use_cached_files_many([]), [])
+    with self.setup_test_file(cache.artifact_root) as path:
+      cache.insert(present_key, [path])
+      with open(path, 'w') as outfile:
+        outfile.write(TEST_CONTENT2)
+
+      # Reads are issued directly, rather than after probing for presence.
+      def unexpected_has(cache_key):
+        self.fail('Unexpected probe for {}.'.format(cache_key))
+      cache.has = unexpected_has
+      results = cache.use_cached_files_many([(missing_key, None), (present_key, None)])
+      self.assertEquals([False, True], [bool(result) for result in results])
+      with open(path, 'r') as infile:
+        self.assertEquals(TEST_CONTENT1, infile.read())
+
+  def test_failed_has_many(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+
+    # Keys that could not be probed are reported as present, so that the failure surfaces on read.
+    with self.setup_rest_cache(return_failed=True) as cache:
+      self.assertEquals(cache.has_many([key]), [True])
+      self.assertFalse(map(call_use_cached_files, [(cache, key, None)])[0])
+
+  def test_store_and_use_artifact_from_chunks(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+
+    with self.setup_local_cache() as local:
+      with self.setup_test_file(local.artifact_root) as path:
+        local.insert(key, [path])
+        with open(local._cache_file_for_key(key), 'rb') as fp:
+          data = fp.read()
+        local.delete(key)
+        os.unlink(path)
+
+        # Deliver the artifact in small chunks, as from a streaming download.
+        chunks = (data[i:i + 7] for i in range(0, len(data), 7))
+        tmp = TempLocalArtifactCache(local.artifact_root, 0)
+        self.assertTrue(tmp.store_and_use_artifact(key, chunks))
+        self.assertTrue(os.path.isfile(path))
+        self.assertFalse(local.has(key))
+
+        os.unlink(path)
+        chunks = (data[i:i + 7] for i in range(0, len(data), 7))
+        self.assertTrue(local.store_and_use_artifact(key, chunks))
+        self.assertTrue(os.path.isfile(path))
+        with open(local._cache_file_for_key(key), 'rb') as fp:
+          self.assertEquals(data, fp.read())
+
+  def test_restful_cache_read_codecs(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    with self.setup_server() as server:
+      with temporary_dir() as artifact_root:
+        url_selector = BestUrlSelector([server.url])
+        writer = RESTfulArtifactCache(
+          artifact_root, url_selector,
+          TempLocalArtifactCache(artifact_root, 0, codec=codec_for_name('none')))
+        with self.setup_test_file(artifact_root) as path:
+          writer.insert(key, [path])
+
+        gzip_only = RESTfulArtifactCache(artifact_root, url_selector,
+                                         TempLocalArtifactCache(artifact_root, 1))
+        self.assertFalse(gzip_only.has(key))
+        self.assertFalse(gzip_only.use_cached_files(key))
+
+        mixed = RESTfulArtifactCache(artifact_root, url_selector,
+                                     TempLocalArtifactCache(artifact_root, 1),
+                                     read_codecs=[codec_for_name('none')])
+        self.assertTrue(mixed.has(key))
+        self.assertTrue(mixed.use_cached_files(key))
+
   def test_successful_request_cleans_result_dir(self):
     key = CacheKey('muppet_key', 'fake_hash')
 
@@ -0,0 +1,111 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+import unittest
+from contextlib import contextmanager
+
+from pants.cache.artifact_cache_index import ArtifactCacheIndex
+from pants.cache.local_artifact_cache import LocalArtifactCache
+from pants.invalidation.build_invalidator import CacheKey
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump
+
+
+class ArtifactCacheIndexTest(unittest.TestCase):
+
+  @contextmanager
+  def index(self):
+    with temporary_dir() as root:
+      yield ArtifactCacheIndex(root, os.path.join(root, 'index.sqlite'))
+
+  def artifact(self, index, relpath, size):
+    path = os.path.join(index.root, relpath)
+    safe_file_dump(path, b'x' * size)
+    return path
+
+  def test_record_and_evict_lru(self):
+    with self.index() as index:
+      a = self.artifact(index, 'task/a/1.tgz', 10)
+      b = self.artifact(index, 'task/b/1.tgz', 10)
+      c = self.artifact(index, 'task/c/1.tgz', 10)
+      for path in (a, b, c):
+        index.record(path)
+        time.sleep(0.01)
+      index.touch(a)
+      self.assertEquals(30, index.total_size())
+
+      self.assertEquals((0, 0), index.evict(30))
+      self.assertEquals((1, 10), index.evict(25))
+      self.assertFalse(os.path.exists(b))
+      self.assertTrue(os.path.exists(a))
+      self.assertTrue(os.path.exists(c))
+
+      self.assertEquals((2, 20), index.evict(0))
+      self.assertEquals(0, index.total_size())
+
+  def test_remove(self):
+    with self.index() as index:
+      a = self.artifact(index, 'task/a/1.tgz', 10)
+      index.record(a)
+      index.remove([a])
+      self.assertEquals(0, index.total_size())
+      self.assertEquals((0, 0), index.evict(0))
+      self.assertTrue(os.path.exists(a))
+
+  def test_rebuild(self):
+    with self.index() as index:
+      a = self.artifact(index, 'task/a/1.tgz', 10)
+      self.artifact(index, 'content/ab/abcd', 5)
+      self.assertFalse(index.is_complete())
+      index.rebuild(excludes=('content',))
+      self.assertTrue(index.is_complete())
+      self.assertEquals(10, index.total_size())
+
+      os.unlink(a)
+      self.artifact(index, 'task/b/1.tgz', 7)
+      index.rebuild(excludes=('content',))
+      self.assertEquals(7, index.total_size())
+
+  def test_recorded_index_is_incomplete(self):
+    with self.index() as index:
+      self.artifact(index, 'task/a/1.tgz', 10)
+      index.record(self.artifact(index, 'task/b/1.tgz', 5))
+      self.assertFalse(index.is_complete())
+      index.rebuild()
+      self.assertTrue(index.is_complete())
+      self.assertEquals(15, index.total_size())
+
+  def test_schema_created_once(self):
+    with self.index() as index:
+      index.record(self.artifact(index, 'task/a/1.tgz', 10))
+      create_schema_calls = []
+      index._create_schema = create_schema_calls.append
+      index.record(self.artifact(index, 'task/b/1.tgz', 10))
+      self.assertEquals(20, index.total_size())
+      self.assertEquals([], create_schema_calls)
+
+  def test_local_cache_maintains_index(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    with self.index() as index:
+      with temporary_dir() as artifact_root:
+        path = os.path.join(artifact_root, 'A.class')
+        safe_file_dump(path, b'muppet')
+        cache = LocalArtifactCache(artifact_root, os.path.join(index.root, 'task'), compression=1,
+                                   index=index)
+        cache.insert(key, [path])
+        tarball = cache._cache_file_for_key(key)
+        self.assertEquals(os.path.getsize(tarball), index.total_size())
+
+        self.assertTrue(cache.use_cached_files(key))
+        index.evict(0)
+        self.assertFalse(cache.has(key))
+
+        cache.insert(key, [path])
+        cache.delete(key)
+        self.assertEquals(0, index.total_size())
@@ -0,0 +1,181 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import threading
+import unittest
+
+from pants.cache.artifact_cache import ArtifactCache, NonfatalArtifactCacheError
+from pants.cache.artifact_cache_writer import ArtifactCacheWriter
+from pants.cache.local_artifact_cache import TempLocalArtifactCache
+from pants.cache.pinger import BestUrlSelector
+from pants.cache.restful_artifact_cache import RESTfulArtifactCache
+from pants.invalidation.build_invalidator import CacheKey
+from pants.util.dirutil import safe_file_dump, safe_mkdtemp, safe_rmtree
+from pants_test.cache.cache_server import cache_server
+
+
+class RecordingArtifactCache(ArtifactCache):
+  """Records the keys inserted into it, optionally failing or blocking inserts."""
+
+  def __init__(self, artifact_root, failures=0, present=()):
+    super(RecordingArtifactCache, self).__init__(artifact_root)
+    self.inserted = []
+    self.attempts = 0
+    self.started = threading.Event()
+    self.release = threading.Event()
+    self.release.set()
+    self._failures = failures
+    self._present = set(present)
+
+  def has(self, cache_key):
+    return cache_key in self._present
+
+  def try_insert(self, cache_key, paths):
+    self.started.set()
+    self.release.wait()
+    self.attempts += 1
+    if self.attempts <= self._failures:
+      raise NonfatalArtifactCacheError('Failed to insert {}'.format(cache_key))
+    self.inserted.append(cache_key)
+
+
+class ArtifactCacheWriterTest(unittest.TestCase):
+
+  def setUp(self):
+    self.artifact_root = safe_mkdtemp()
+    self.addCleanup(safe_rmtree, self.artifact_root)
+
+  def artifact(self, name, size):
+    path = os.path.join(self.artifact_root, name)
+    safe_file_dump(path, b'x' * size)
+    return [path]
+
+  def key(self, name):
+    return CacheKey(name, name)
+
+  def writer(self, **kwargs):
+    kwargs.setdefault('num_workers', 1)
+    kwargs.setdefault('max_pending_bytes', 1024)
+    return ArtifactCacheWriter(**kwargs)
+
+  def test_write(self):
+    cache = RecordingArtifactCache(self.artifact_root, present=[self.key('b')])
+    writer = self.writer()
+    self.assertTrue(writer.submit(cache, self.key('a'), self.artifact('a', 10)))
+    self.assertTrue(writer.submit(cache, self.key('b'), self.artifact('b', 10)))
+    self.assertTrue(writer.submit(cache, self.key('b'), self.artifact('b', 10), overwrite=True))
+    self.assertEqual(ArtifactCacheWriter.Stats(written=2, skipped=1, failed=0, dropped=0,
+                                               pending=0),
+                     writer.flush())
+    self.assertEqual([self.key('a'), self.key('b')], cache.inserted)
+
+  def test_missing_files(self):
+    cache = RecordingArtifactCache(self.artifact_root)
+    writer = self.writer()
+    writer.submit(cache, self.key('a'), [os.path.join(self.artifact_root, 'missing')])
+    self.assertEqual(1, writer.flush().failed)
+    self.assertEqual([], cache.inserted)
+
+  def test_smallest_first(self):
+    cache = RecordingArtifactCache(self.artifact_root)
+    cache.release.clear()
+    writer = self.writer()
+    # The single worker blocks on the first write, while the others queue up behind it.
+    writer.submit(cache, self.key('first'), self.artifact('first', 1))
+    cache.started.wait()
+    writer.submit(cache, self.key('large'), self.artifact('large', 100))
+    writer.submit(cache, self.key('medium'), self.artifact('medium', 50))
+    writer.submit(cache, self.key('small'), self.artifact('small', 10))
+    cache.release.set()
+    self.assertEqual(4, writer.flush().written)
+    self.assertEqual([self.key('first'), self.key('small'), self.key('medium'), self.key('large')],
+                     cache.inserted)
+
+  def test_dropped_when_over_budget(self):
+    cache = RecordingArtifactCache(self.artifact_root)
+    cache.release.clear()
+    writer = self.writer(max_pending_bytes=100, max_wait_secs=0)
+    self.assertTrue(writer.submit(cache, self.key('a'), self.artifact('a', 60)))
+    self.assertTrue(writer.submit(cache, self.key('b'), self.artifact('b', 40)))
+    self.assertFalse(writer.submit(cache, self.key('c'), self.artifact('c', 1)))
+    cache.release.set()
+    self.assertEqual(ArtifactCacheWriter.Stats(written=2, skipped=0, failed=0, dropped=1,
+                                               pending=0),
+                     writer.flush())
+
+  def test_oversized_write_accepted_when_idle(self):
+    cache = RecordingArtifactCache(self.artifact_root)
+    writer = self.writer(max_pending_bytes=10, max_wait_secs=0)
+    self.assertTrue(writer.submit(cache, self.key('a'), self.artifact('a', 100)))
+    self.assertEqual(1, writer.flush().written)
+
+  def test_waits_for_room(self):
+    cache = RecordingArtifactCache(self.artifact_root)
+    cache.release.clear()
+    writer = self.writer(max_pending_bytes=100, max_wait_secs=60)
+    writer.submit(cache, self.key('a'), self.artifact('a', 100))
+    threading.Timer(0.1, cache.release.set).start()
+    self.assertTrue(writer.submit(cache, self.key('b'), self.artifact('b', 100)))
+    self.assertEqual(2, writer.flush().written)
+
+  def test_retries(self):
+    cache = RecordingArtifactCache(self.artifact_root, failures=2)
+    writer = self.writer(max_retries=2, retry_backoff_secs=0.01)
+    writer.submit(cache, self.key('a'), self.artifact('a', 10))
+    self.assertEqual(1, writer.flush().written)
+    self.assertEqual(3, cache.attempts)
+
+  def test_retries_exhausted(self):
+    cache = RecordingArtifactCache(self.artifact_root, failures=3)
+    writer = self.writer(max_retries=2, retry_backoff_secs=0.01)
+    writer.submit(cache, self.key('a'), self.artifact('a', 10))
+    self.assertEqual(1, writer.flush().failed)
+    self.assertEqual(3, cache.attempts)
+    self.assertEqual([], cache.inserted)
+
+  def test_flush_timeout(self):
+    cache = RecordingArtifactCache(self.artifact_root)
+    cache.release.clear()
+    writer = self.writer()
+    writer.submit(cache, self.key('a'), self.artifact('a', 10))
+    cache.started.wait()
+    writer.submit(cache, self.key('b'), self.artifact('b', 10))
+    try:
+      stats = writer.flush(timeout=0.1)
+    finally:
+      cache.release.set()
+    # The in-progress write is left to complete, and the queued write is dropped.
+    self.assertEqual(1, stats.pending)
+    self.assertEqual(1, stats.dropped)
+    self.assertFalse(writer.submit(cache, self.key('c'), self.artifact('c', 10)))
+
+  def test_abort(self):
+    cache = RecordingArtifactCache(self.artifact_root)
+    cache.release.clear()
+    writer = self.writer()
+    writer.submit(cache, self.key('a'), self.artifact('a', 10))
+    cache.started.wait()
+    writer.submit(cache, self.key('b'), self.artifact('b', 10))
+    try:
+      stats = writer.abort()
+    finally:
+      cache.release.set()
+    self.assertEqual(1, stats.dropped)
+
+  def test_concurrent_writes_to_restful_cache(self):
+    # The writer threads share the url selector of the cache, which fails over from the bad url.
+    with cache_server() as server:
+      url_selector = BestUrlSelector(['http://badhost:123', server.url], max_failures=0)
+      cache = RESTfulArtifactCache(self.artifact_root, url_selector,
+                                   TempLocalArtifactCache(self.artifact_root, 0))
+      writer = self.writer(num_workers=4, max_retries=2)
+      keys = [self.key('artifact-{}'.format(i)) for i in range(8)]
+      for key in keys:
+        self.assertTrue(writer.submit(cache, key, self.artifact(key.id, 10), overwrite=True))
+      self.assertEqual(8, writer.flush().written)
+      self.assertTrue(all(cache.has(key) for key in keys))
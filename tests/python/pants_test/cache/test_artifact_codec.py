@@ -0,0 +1,81 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import io
+import os
+import pickle
+import unittest
+
+from pants.cache.artifact import TarballArtifact
+from pants.cache.artifact_codec import AVAILABLE_CODECS, UnknownCodecError, codec_for_name
+from pants.cache.local_artifact_cache import LocalArtifactCache
+from pants.invalidation.build_invalidator import CacheKey
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump, safe_rmtree
+
+
+class ArtifactCodecTest(unittest.TestCase):
+
+  def test_gzip_and_uncompressed_always_available(self):
+    self.assertEquals('.tgz', codec_for_name('gzip').extension)
+    self.assertEquals('.tar', codec_for_name('none').extension)
+
+  def test_unknown_codec(self):
+    with self.assertRaises(UnknownCodecError):
+      codec_for_name('bogus')
+
+  def test_pickle_by_name(self):
+    for codec in AVAILABLE_CODECS.values():
+      self.assertIs(codec, pickle.loads(pickle.dumps(codec)))
+
+  def test_round_trip(self):
+    data = b''.join(b'\xca\xfe\xba\xbe' + str(i).encode('ascii') for i in range(100000))
+    for codec in AVAILABLE_CODECS.values():
+      out = io.BytesIO()
+      writer = codec.compressing_writer(out, codec.levels[0])
+      writer.write(data[:1000])
+      writer.write(data[1000:])
+      writer.close()
+
+      reader = codec.decompressing_reader(io.BytesIO(out.getvalue()))
+      self.assertEquals(data[:7], reader.read(7))
+      self.assertEquals(data[7:], reader.read())
+      self.assertEquals(b'', reader.read(1))
+
+  def test_tarball_round_trip(self):
+    for codec in AVAILABLE_CODECS.values():
+      with temporary_dir() as tmpdir:
+        artifact_root = os.path.join(tmpdir, 'artifacts')
+        path = os.path.join(artifact_root, 'a', 'A.class')
+        safe_file_dump(path, b'muppet')
+        tarball = os.path.join(tmpdir, 'some' + codec.extension)
+
+        TarballArtifact(artifact_root, tarball, codec.levels[-1], codec=codec).collect([path])
+        safe_rmtree(artifact_root)
+        TarballArtifact(artifact_root, tarball, codec=codec).extract()
+
+        with open(path, 'rb') as fp:
+          self.assertEquals(b'muppet', fp.read())
+
+  def test_local_cache_reads_mixed_codecs(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        path = os.path.join(artifact_root, 'A.class')
+        safe_file_dump(path, b'muppet')
+        writer = LocalArtifactCache(artifact_root, cache_root, compression=1,
+                                    codec=codec_for_name('none'))
+        writer.insert(key, [path])
+        os.unlink(path)
+
+        reader = LocalArtifactCache(artifact_root, cache_root, compression=1)
+        self.assertTrue(reader.has(key))
+        self.assertTrue(reader.use_cached_files(key))
+        self.assertTrue(os.path.isfile(path))
+
+        reader.delete(key)
+        self.assertFalse(writer.has(key))
@@ -13,6 +13,7 @@ from pants.cache.cache_setup import (CacheFactory, CacheSetup, CacheSpec, CacheS
                                      EmptyCacheSpecError, InvalidCacheSpecError,
                                      LocalCacheSpecRequiredError, RemoteCacheSpecRequiredError,
                                      TooManyCacheSpecsError)
+from pants.cache.content_addressed_local_artifact_cache import ContentAddressedLocalArtifactCache
 from pants.cache.local_artifact_cache import LocalArtifactCache
 from pants.cache.resolver import Resolver
 from pants.cache.restful_artifact_cache import RESTfulArtifactCache
@@ -82,8 +83,11 @@ class TestCacheSetup(BaseTest):
       'read_from': [self.EMPTY_URI],
       'write_to': [self.EMPTY_URI],
       'write': False,
+      'compression_codec': 'gzip',
       'compression_level': 1,
+      'read_codecs': [],
       'max_entries_per_target': 1,
+      'local_max_bytes': None,
       'write_permissions': None,
       'dereference_symlinks': True,
       # Usually read from global scope.
@@ -162,10 +166,10 @@ class TestCacheSetup(BaseTest):
                       cache_factory._resolve(self.CACHE_SPEC_LOCAL_RESOLVE))
 
   def test_cache_spec_parsing(self):
-    def mk_cache(spec, resolver=None):
+    def mk_cache(spec, resolver=None, local_format='tarball'):
       Subsystem.reset()
       self.set_options_for_scope(CacheSetup.subscope(DummyTask.options_scope),
-                                 read_from=spec, compression=1)
+                                 read_from=spec, compression=1, local_format=local_format)
       self.context(for_task_types=[DummyTask])  # Force option initialization.
       cache_factory = CacheSetup.create_cache_factory_for_task(
         self.create_task(),
@@ -173,14 +177,15 @@ class TestCacheSetup(BaseTest):
         resolver=resolver)
       return cache_factory.get_read_cache()
 
-    def check(expected_type, spec, resolver=None):
-      cache = mk_cache(spec, resolver=resolver)
+    def check(expected_type, spec, resolver=None, local_format='tarball'):
+      cache = mk_cache(spec, resolver=resolver, local_format=local_format)
       self.assertIsInstance(cache, expected_type)
       self.assertEquals(cache.artifact_root, self.pants_workdir)
 
     with temporary_dir() as tmpdir:
       cachedir = os.path.join(tmpdir, 'cachedir')  # Must be a real path, so we can safe_mkdir it.
       check(LocalArtifactCache, [cachedir])
+      check(ContentAddressedLocalArtifactCache, [cachedir], local_format='content-addressed')
       check(RESTfulArtifactCache, ['http://localhost/bar'])
       check(RESTfulArtifactCache, ['https://localhost/bar'])
       check(RESTfulArtifactCache, [cachedir, 'http://localhost/bar'])
@@ -201,6 +206,18 @@ class TestCacheSetup(BaseTest):
       with self.assertRaises(TooManyCacheSpecsError):
         mk_cache([tmpdir, self.REMOTE_URI_1, self.REMOTE_URI_2])
 
+  def test_compression_level_validation(self):
+    with temporary_dir() as cachedir:
+      for level in (1, 9):
+        cache_factory = self.cache_factory(read_from=[cachedir], compression_level=level,
+                                           local_format='tarball')
+        self.assertIsInstance(cache_factory.get_read_cache(), LocalArtifactCache)
+      for level in (0, 10):
+        cache_factory = self.cache_factory(read_from=[cachedir], compression_level=level,
+                                           local_format='tarball')
+        with self.assertRaises(ValueError):
+          cache_factory.get_read_cache()
+
   def test_read_cache_available(self):
     self.assertFalse(self.cache_factory(ignore=True, read=True, read_from=[self.EMPTY_URI])
                      .read_cache_available())
@@ -0,0 +1,147 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+from contextlib import contextmanager
+
+from pants.cache.content_addressed_local_artifact_cache import ContentAddressedLocalArtifactCache
+from pants.cache.pinger import BestUrlSelector
+from pants.cache.restful_artifact_cache import RESTfulArtifactCache
+from pants.invalidation.build_invalidator import CacheKey
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump, safe_mkdir, safe_rmtree
+from pants_test.cache.cache_server import cache_server
+
+
+class ContentAddressedLocalArtifactCacheTest(unittest.TestCase):
+
+  @contextmanager
+  def setup_cache(self):
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        yield ContentAddressedLocalArtifactCache(artifact_root,
+                                                 os.path.join(cache_root, 'task'),
+                                                 os.path.join(cache_root, 'content'),
+                                                 compression=1)
+
+  def populate(self, results_dir, files):
+    safe_rmtree(results_dir)
+    safe_mkdir(results_dir)
+    for relpath, content in files.items():
+      safe_file_dump(os.path.join(results_dir, relpath), content)
+
+  def assert_contents(self, results_dir, files):
+    found = {}
+    for root, _, filenames in os.walk(results_dir):
+      for filename in filenames:
+        path = os.path.join(root, filename)
+        with open(path, 'rb') as fp:
+          found[os.path.relpath(path, results_dir)] = fp.read()
+    self.assertEquals(files, found)
+
+  def content_files(self, cache):
+    return [os.path.join(root, f) for root, _, files in os.walk(cache._content_root) for f in files]
+
+  def test_round_trip(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    files = {'a/A.class': b'muppet', 'b/B.class': b'kermit', 'empty': b''}
+    with self.setup_cache() as cache:
+      results_dir = os.path.join(cache.artifact_root, 'results')
+      self.populate(results_dir, files)
+      safe_mkdir(os.path.join(results_dir, 'empty_dir'))
+
+      self.assertFalse(cache.has(key))
+      self.assertFalse(cache.use_cached_files(key, results_dir))
+      cache.insert(key, [results_dir])
+      self.assertTrue(cache.has(key))
+
+      self.populate(results_dir, {'stale': b'stale'})
+      self.assertTrue(cache.use_cached_files(key, results_dir))
+      self.assert_contents(results_dir, files)
+      self.assertTrue(os.path.isdir(os.path.join(results_dir, 'empty_dir')))
+
+      # Rewriting a restored file in place, as a compiler might, does not affect the stored content.
+      with open(os.path.join(results_dir, 'a/A.class'), 'wb') as fp:
+        fp.write(b'rewritten')
+      self.assertTrue(cache.use_cached_files(key, results_dir))
+      self.assert_contents(results_dir, files)
+
+      cache.delete(key)
+      self.assertFalse(cache.has(key))
+
+  def test_deduplicates_content(self):
+    key1 = CacheKey('muppet_key', 'fake_hash')
+    key2 = CacheKey('kermit_key', 'fake_hash')
+    with self.setup_cache() as cache:
+      results_dir = os.path.join(cache.artifact_root, 'results')
+      self.populate(results_dir, {'A.class': b'muppet', 'B.class': b'muppet'})
+      cache.insert(key1, [results_dir])
+      self.populate(results_dir, {'C.class': b'muppet', 'D.class': b'kermit'})
+      cache.insert(key2, [results_dir])
+      self.assertEquals(2, len(self.content_files(cache)))
+
+  def test_collect_garbage(self):
+    live_key = CacheKey('muppet_key', 'fake_hash')
+    dead_key = CacheKey('kermit_key', 'fake_hash')
+    with self.setup_cache() as cache:
+      results_dir = os.path.join(cache.artifact_root, 'results')
+      self.populate(results_dir, {'A.class': b'muppet', 'B.class': b'shared'})
+      cache.insert(live_key, [results_dir])
+      self.populate(results_dir, {'C.class': b'kermit', 'D.class': b'shared'})
+      cache.insert(dead_key, [results_dir])
+      cache.delete(dead_key)
+      self.assertEquals(3, len(self.content_files(cache)))
+      manifests_root = os.path.dirname(cache._cache_root)
+
+      # Recently stored content is kept, since a concurrent insert may be about to reference it.
+      self.assertEquals((0, 0), cache.collect_garbage(manifests_root, cache._content_root))
+      self.assertEquals(3, len(self.content_files(cache)))
+
+      self.assertEquals((1, len(b'kermit')),
+                        cache.collect_garbage(manifests_root, cache._content_root, min_age_secs=-1))
+      self.assertEquals(2, len(self.content_files(cache)))
+      safe_rmtree(results_dir)
+      self.assertTrue(cache.use_cached_files(live_key, results_dir))
+      self.assert_contents(results_dir, {'A.class': b'muppet', 'B.class': b'shared'})
+
+  def test_missing_content_is_unreadable(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    with self.setup_cache() as cache:
+      results_dir = os.path.join(cache.artifact_root, 'results')
+      self.populate(results_dir, {'A.class': b'muppet'})
+      cache.insert(key, [results_dir])
+      for path in self.content_files(cache):
+        os.unlink(path)
+
+      self.assertFalse(cache.use_cached_files(key, results_dir))
+      self.assertFalse(cache.has(key))
+      self.assertEquals([], os.listdir(results_dir))
+
+  def test_backs_remote_cache(self):
+    key = CacheKey('muppet_key', 'fake_hash')
+    files = {'A.class': b'muppet'}
+    with self.setup_cache() as local:
+      with cache_server() as server:
+        with self.setup_cache() as other_local:
+          writer = RESTfulArtifactCache(other_local.artifact_root,
+                                        BestUrlSelector([server.url]),
+                                        other_local)
+          results_dir = os.path.join(other_local.artifact_root, 'results')
+          self.populate(results_dir, files)
+          writer.insert(key, [results_dir])
+          self.assertTrue(other_local.has(key))
+
+        reader = RESTfulArtifactCache(local.artifact_root, BestUrlSelector([server.url]), local)
+        results_dir = os.path.join(local.artifact_root, 'results')
+        self.assertTrue(reader.use_cached_files(key, results_dir))
+        self.assert_contents(results_dir, files)
+
+        # The local cache was backfilled.
+        safe_rmtree(results_dir)
+        self.assertTrue(local.use_cached_files(key, results_dir))
+        self.assert_contents(results_dir, files)
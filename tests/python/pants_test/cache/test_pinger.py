@@ -114,3 +114,15 @@ class TestBestUrlSelector(BaseTest):
     self.call_url(self.url2, with_error=True)
     self.call_url(self.url2, with_error=True)
     self.call_url(self.url1)
+
+  def test_concurrent_failures_rotate_once(self):
+    best_url_selector = BestUrlSelector([self.url1, self.url2, 'http://host3:789'],
+                                        max_failures=0)
+    # Three calls to url1 are in flight when they all fail.
+    with self.assertRaises(RequestException):
+      with best_url_selector.select_best_url():
+        with best_url_selector.select_best_url():
+          with best_url_selector.select_best_url():
+            raise RequestException('error connecting')
+    with best_url_selector.select_best_url() as url:
+      self.assertEquals(urlparse.urlparse(self.url2), url)
@@ -0,0 +1,92 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import os
+
+from pants.base.exceptions import TaskError
+from pants.cache.cache_setup import CacheFactory
+from pants.core_tasks.clean_cache import CleanCache
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump
+from pants_test.tasks.task_test_base import TaskTestBase
+
+
+class CleanCacheTest(TaskTestBase):
+
+  @classmethod
+  def task_type(cls):
+    return CleanCache
+
+  def test_requires_budget(self):
+    with temporary_dir() as cache_root:
+      self.set_options_for_scope('cache', read_from=[cache_root], write_to=[cache_root])
+      task = self.create_task(self.context())
+      with self.assertRaises(TaskError):
+        task.execute()
+
+  def test_rejects_budget_for_content_addressed_caches(self):
+    with temporary_dir() as cache_root:
+      self.set_options_for_scope('cache', read_from=[cache_root], write_to=[cache_root],
+                                 local_format='content-addressed', local_max_bytes=15)
+      task = self.create_task(self.context())
+      with self.assertRaises(TaskError):
+        task.execute()
+
+  def test_evicts_to_budget(self):
+    with temporary_dir() as cache_root:
+      old = os.path.join(cache_root, 'task', 'a', 'old.tgz')
+      new = os.path.join(cache_root, 'task', 'b', 'new.tgz')
+      safe_file_dump(old, b'x' * 10)
+      safe_file_dump(new, b'x' * 10)
+      os.utime(old, (0, 0))
+
+      self.set_options_for_scope('cache', read_from=[cache_root], write_to=[cache_root],
+                                 local_max_bytes=15)
+      self.create_task(self.context()).execute()
+
+      self.assertFalse(os.path.exists(old))
+      self.assertTrue(os.path.exists(new))
+      self.assertEquals(10, CacheFactory.create_local_index(cache_root).total_size())
+
+  def test_indexes_artifacts_present_before_recording(self):
+    with temporary_dir() as cache_root:
+      old = os.path.join(cache_root, 'task', 'a', 'old.tgz')
+      new = os.path.join(cache_root, 'task', 'b', 'new.tgz')
+      safe_file_dump(old, b'x' * 10)
+      safe_file_dump(new, b'x' * 10)
+      os.utime(old, (0, 0))
+      # Only the new artifact was recorded, as when the budget is set on an existing cache.
+      CacheFactory.create_local_index(cache_root).record(new)
+
+      self.set_options_for_scope('cache', read_from=[cache_root], write_to=[cache_root],
+                                 local_max_bytes=15)
+      self.create_task(self.context()).execute()
+
+      self.assertFalse(os.path.exists(old))
+      self.assertTrue(os.path.exists(new))
+
+  def test_collects_unused_content(self):
+    with temporary_dir() as cache_root:
+      manifest = os.path.join(cache_root, 'task', 'a', 'hash.manifest')
+      safe_file_dump(manifest, json.dumps({'version': 1, 'entries': [
+        {'type': 'file', 'path': 'A.class', 'digest': 'used', 'executable': False},
+      ]}))
+      content_root = os.path.join(cache_root, CacheFactory.CONTENT_DIRNAME)
+      used = os.path.join(content_root, 'us', 'used')
+      unused = os.path.join(content_root, 'un', 'unused')
+      safe_file_dump(used, b'x')
+      safe_file_dump(unused, b'x')
+      os.utime(used, (0, 0))
+      os.utime(unused, (0, 0))
+
+      self.set_options_for_scope('cache', read_from=[cache_root], write_to=[cache_root],
+                                 local_format='content-addressed')
+      self.create_task(self.context()).execute()
+
+      self.assertTrue(os.path.exists(used))
+      self.assertFalse(os.path.exists(unused))
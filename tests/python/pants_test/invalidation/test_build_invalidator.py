@@ -6,12 +6,14 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import tempfile
+import threading
 import unittest
 from contextlib import contextmanager
 
-from pants.invalidation.build_invalidator import BuildInvalidator, CacheKey
+from pants.invalidation.build_invalidator import BuildInvalidator, CacheKey, LogBuildInvalidator
+from pants.subsystem.subsystem import Subsystem
 from pants.util.contextutil import temporary_dir
-from pants.util.dirutil import safe_rmtree
+from pants.util.dirutil import read_file, safe_file_dump, safe_rmtree
 from pants_test.subsystem.subsystem_util import init_subsystem
 
 
@@ -136,6 +138,112 @@ class BuildInvalidatorTest(BaseBuildInvalidatorTest):
       self.assertTrue(invalidator.needs_update(key2))
 
 
+class LogBuildInvalidatorTest(BuildInvalidatorTest):
+  @contextmanager
+  def invalidator(self):
+    with temporary_dir() as root:
+      yield LogBuildInvalidator(root)
+
+  @contextmanager
+  def root(self):
+    with temporary_dir() as root:
+      yield root
+
+  def test_persisted_on_flush(self):
+    with self.root() as root:
+      key = self.cache_key()
+      invalidator = LogBuildInvalidator(root)
+      invalidator.update(key)
+      self.assertTrue(LogBuildInvalidator(root).needs_update(key))
+      invalidator.flush()
+      self.assertFalse(LogBuildInvalidator(root).needs_update(key))
+
+  def test_batched_updates(self):
+    with self.root() as root:
+      invalidator = LogBuildInvalidator(root)
+      keys = [self.cache_key(key_id=str(i)) for i in range(LogBuildInvalidator.MAX_PENDING_UPDATES)]
+      for key in keys:
+        invalidator.update(key)
+      reloaded = LogBuildInvalidator(root)
+      self.assertFalse(any(reloaded.needs_update(key) for key in keys))
+
+  def test_force_invalidate_persisted_immediately(self):
+    with self.root() as root:
+      key = self.cache_key()
+      invalidator = LogBuildInvalidator(root)
+      invalidator.update(key)
+      invalidator.flush()
+      invalidator.force_invalidate(key)
+      self.assertTrue(LogBuildInvalidator(root).needs_update(key))
+
+  def test_latest_entry_wins(self):
+    with self.root() as root:
+      key = self.cache_key()
+      invalidator = LogBuildInvalidator(root)
+      invalidator.update(key)
+      invalidator.update(self.update_hash(key, new_hash='43'))
+      invalidator.flush()
+      self.assertEqual(self.update_hash(key, new_hash='43'),
+                       LogBuildInvalidator(root).previous_key(key))
+
+  def test_torn_line(self):
+    with self.root() as root:
+      key1 = self.cache_key(key_id='1', key_hash='1')
+      key2 = self.cache_key(key_id='2', key_hash='2')
+      invalidator = LogBuildInvalidator(root)
+      invalidator.update(key1)
+      invalidator.flush()
+
+      # Simulate a crash in the middle of appending an update.
+      log_path = invalidator._log_path
+      safe_file_dump(log_path, read_file(log_path) + '2')
+
+      invalidator = LogBuildInvalidator(root)
+      self.assertFalse(invalidator.needs_update(key1))
+      self.assertTrue(invalidator.needs_update(key2))
+      invalidator.update(key2)
+      invalidator.flush()
+
+      invalidator = LogBuildInvalidator(root)
+      self.assertFalse(invalidator.needs_update(key1))
+      self.assertFalse(invalidator.needs_update(key2))
+
+  def test_compaction(self):
+    with self.root() as root:
+      key = self.cache_key()
+      invalidator = LogBuildInvalidator(root)
+      for i in range(LogBuildInvalidator.MIN_OBSOLETE_LINES_TO_COMPACT + 1):
+        invalidator.update(self.update_hash(key, new_hash=str(i)))
+      invalidator.flush()
+
+      compacted = LogBuildInvalidator(root)
+      final_hash = str(LogBuildInvalidator.MIN_OBSOLETE_LINES_TO_COMPACT)
+      final_key = self.update_hash(key, new_hash=final_hash)
+      self.assertFalse(compacted.needs_update(final_key))
+      self.assertEqual(1, len(read_file(compacted._log_path).splitlines()))
+
+  def test_concurrent_updates(self):
+    with self.root() as root:
+      invalidator = LogBuildInvalidator(root)
+
+      def update_and_flush(thread_index):
+        for i in range(200):
+          invalidator.update(self.cache_key(key_id='{}-{}'.format(thread_index, i)))
+          if i % 10 == 0:
+            invalidator.flush()
+
+      threads = [threading.Thread(target=update_and_flush, args=(i,)) for i in range(8)]
+      for thread in threads:
+        thread.start()
+      for thread in threads:
+        thread.join()
+      invalidator.flush()
+
+      reloaded = LogBuildInvalidator(root)
+      self.assertFalse(any(reloaded.needs_update(self.cache_key(key_id='{}-{}'.format(t, i)))
+                           for t in range(8) for i in range(200)))
+
+
 class BuildInvalidatorFactoryTest(BaseBuildInvalidatorTest):
   def setUp(self):
     pants_workdir = tempfile.mkdtemp()
@@ -169,3 +277,27 @@ class BuildInvalidatorFactoryTest(BaseBuildInvalidatorTest):
 
     self.assertTrue(self.scoped_invalidator1.needs_update(self.key))
     self.assertFalse(self.scoped_invalidator2.needs_update(self.key))
+
+
+class LogBuildInvalidatorFactoryTest(BaseBuildInvalidatorTest):
+  def setUp(self):
+    self.pants_workdir = tempfile.mkdtemp()
+    self.addCleanup(safe_rmtree, self.pants_workdir)
+
+    Subsystem.reset()
+    self.addCleanup(Subsystem.reset)
+    init_subsystem(BuildInvalidator.Factory, options={'': {'pants_workdir': self.pants_workdir},
+                                                      'build-invalidator': {'store': 'log'}})
+
+  def test_create(self):
+    self.assertIsInstance(BuildInvalidator.Factory.create(build_task='gen'), LogBuildInvalidator)
+
+  def test_root(self):
+    key = self.cache_key()
+    scoped_invalidator = BuildInvalidator.Factory.create(build_task='gen')
+    scoped_invalidator.update(key)
+    scoped_invalidator.flush()
+
+    BuildInvalidator.Factory.create().force_invalidate_all()
+
+    self.assertTrue(BuildInvalidator.Factory.create(build_task='gen').needs_update(key))
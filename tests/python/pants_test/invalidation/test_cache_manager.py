@@ -9,6 +9,7 @@ import os
 import shutil
 import tempfile
 
+from pants.base.fingerprint_strategy import DefaultFingerprintHashingMixin, FingerprintStrategy
 from pants.invalidation.build_invalidator import BuildInvalidator, CacheKeyGenerator
 from pants.invalidation.cache_manager import InvalidationCacheManager, VersionedTargetSet
 from pants.util.dirutil import safe_mkdir, safe_rmtree
@@ -200,3 +201,43 @@ class InvalidationCacheManagerTest(BaseTest):
     vts = VersionedTargetSet.from_versioned_targets([vt])
     with self.assertRaises(VersionedTargetSet.IllegalResultsDir):
       vts.update()
+
+  def test_parallel_fingerprints_match_serial(self):
+    a = self.make_target(':a', dependencies=[])
+    b = self.make_target(':b', dependencies=[a])
+    c = self.make_target(':c', dependencies=[a, b])
+    serial_keys = [vt.cache_key for vt in self.cache_manager.wrap_targets([c, b])]
+
+    for target in (a, b, c):
+      target.mark_invalidation_hash_dirty()
+    parallel_cache_manager = InvalidationCacheManager(
+      results_dir_root=os.path.join(self._dir, 'results'),
+      cache_key_generator=CacheKeyGenerator(),
+      build_invalidator=BuildInvalidator(os.path.join(self._dir, 'build_invalidator')),
+      invalidate_dependents=True,
+      fingerprint_workers=4,
+    )
+    parallel_keys = [vt.cache_key for vt in parallel_cache_manager.wrap_targets([c, b])]
+    self.assertEqual(serial_keys, parallel_keys)
+
+  def test_precompute_fingerprints(self):
+    class CountingFingerprintStrategy(DefaultFingerprintHashingMixin, FingerprintStrategy):
+      fingerprinted = []
+
+      def compute_fingerprint(self, target):
+        self.fingerprinted.append(target)
+        return target.id
+
+    a = self.make_target(':a', dependencies=[])
+    b = self.make_target(':b', dependencies=[a])
+    c = self.make_target(':c', dependencies=[b])
+    key_generator = CacheKeyGenerator()
+    strategy = CountingFingerprintStrategy()
+    key_generator.precompute_fingerprints([c], transitive=True, fingerprint_strategy=strategy,
+                                          num_workers=4)
+    self.assertEqual({a, b, c}, set(strategy.fingerprinted))
+    self.assertEqual(3, len(strategy.fingerprinted))
+
+    # The keys are computed from the memoized fingerprints.
+    key_generator.key_for_target(c, transitive=True, fingerprint_strategy=strategy)
+    self.assertEqual(3, len(strategy.fingerprinted))
@@ -11,7 +11,8 @@ import unittest
 from pants.java.junit.junit_xml_parser import Test as JUnitTest
 # NB: The Test -> JUnitTest import re-name above is needed to work around conflicts with pytest test
 # collection and a conflicting Test type in scope during that process.
-from pants.java.junit.junit_xml_parser import ParseError, RegistryOfTests, parse_failed_targets
+from pants.java.junit.junit_xml_parser import (ParseError, RegistryOfTests, parse_failed_targets,
+                                                parse_test_durations)
 from pants.util.contextutil import temporary_dir
 from pants.util.dirutil import safe_open
 from pants.util.xml_parser import XmlParser
@@ -193,3 +194,69 @@ class TestParseFailedTargets(unittest.TestCase):
       self.assertEqual({bad_file1, bad_file2}, {e.junit_xml_path for e in collect_handler.errors})
 
       self.assertEqual({None: {JUnitTest('org.pantsbuild.Error', 'testError')}}, failed_targets)
+
+
+class TestParseTestDurations(unittest.TestCase):
+  @staticmethod
+  def _raise_handler(e):
+    raise e
+
+  @staticmethod
+  def _write_report(path, mtime, content):
+    with safe_open(path, 'w') as fp:
+      fp.write(content)
+    os.utime(path, (mtime, mtime))
+
+  def test_parse_test_durations_no_files(self):
+    with temporary_dir() as junit_xml_dir:
+      self.assertEqual({}, parse_test_durations([junit_xml_dir], self._raise_handler))
+
+  def test_parse_test_durations_nominal(self):
+    with temporary_dir() as previous_dir, temporary_dir() as latest_dir:
+      self._write_report(os.path.join(previous_dir, 'TEST-a.xml'), 1000, """
+        <testsuite>
+          <testcase classname="org.pantsbuild.A" name="test1" time="1.5"/>
+          <testcase classname="org.pantsbuild.B" name="test1" time="3"/>
+        </testsuite>
+        """)
+      self._write_report(os.path.join(latest_dir, 'subdir', 'TEST-a.xml'), 2000, """
+        <testsuite>
+          <testcase classname="org.pantsbuild.A" name="test1" time="0.25"/>
+          <testcase classname="org.pantsbuild.A" name="test2" time="0.5"/>
+          <testcase classname="org.pantsbuild.C" name="test1"/>
+        </testsuite>
+        """)
+      # A link to a report should not count its tests twice.
+      os.symlink(os.path.join(latest_dir, 'subdir', 'TEST-a.xml'),
+                 os.path.join(latest_dir, 'TEST-a.xml'))
+
+      durations = parse_test_durations([previous_dir, latest_dir], self._raise_handler)
+      self.assertEqual({'org.pantsbuild.A': 0.75, 'org.pantsbuild.B': 3.0}, durations)
+
+  def test_parse_test_durations_error_continue(self):
+    with temporary_dir() as junit_xml_dir:
+      bad_file = os.path.join(junit_xml_dir, 'TEST-bad.xml')
+      self._write_report(bad_file, 1000, '<invalid></xml>')
+      self._write_report(os.path.join(junit_xml_dir, 'TEST-good.xml'), 1000, """
+        <testsuite>
+          <testcase classname="org.pantsbuild.A" name="test1" time="1"/>
+        </testsuite>
+        """)
+
+      errors = []
+      durations = parse_test_durations([junit_xml_dir], errors.append)
+      self.assertEqual([bad_file], [e.junit_xml_path for e in errors])
+      self.assertEqual({'org.pantsbuild.A': 1.0}, durations)
+
+  def test_parse_test_durations_by_attribute(self):
+    with temporary_dir() as junit_xml_dir:
+      self._write_report(os.path.join(junit_xml_dir, 'TEST-pytest.xml'), 1000, """
+        <testsuite>
+          <testcase classname="a.test_a" file="a/test_a.py" name="test1" time="1"/>
+          <testcase classname="a.test_a.TestA" file="a/test_a.py" name="test2" time="2"/>
+          <testcase classname="b.test_b" file="b/test_b.py" name="test1" time="0.5"/>
+        </testsuite>
+        """)
+
+      durations = parse_test_durations([junit_xml_dir], self._raise_handler, attribute='file')
+      self.assertEqual({'a/test_a.py': 3.0, 'b/test_b.py': 0.5}, durations)
@@ -5,10 +5,13 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import threading
+import unittest
+
 import mock
 import psutil
 
-from pants.java.nailgun_executor import NailgunExecutor
+from pants.java.nailgun_executor import NailgunExecutor, NailgunExecutorPool
 from pants_test.base_test import BaseTest
 
 
@@ -51,3 +54,68 @@ class NailgunExecutorTest(BaseTest):
       )
       self.assertFalse(self.executor.is_alive())
       mock_as_process.assert_called_with(self.executor)
+
+  def test_rss_bytes(self):
+    with mock.patch.object(NailgunExecutor, 'is_alive', **PATCH_OPTS) as mock_is_alive:
+      with mock.patch.object(NailgunExecutor, '_as_process', **PATCH_OPTS) as mock_as_process:
+        mock_is_alive.return_value = True
+        mock_as_process.return_value = fake_process(memory_info=mock.Mock(rss=1024))
+        self.assertEqual(1024, self.executor.rss_bytes())
+
+        mock_is_alive.return_value = False
+        self.assertIsNone(self.executor.rss_bytes())
+
+
+class NailgunExecutorPoolTest(unittest.TestCase):
+  def setUp(self):
+    self.created = []
+
+  def executor_factory(self, rss_bytes=None):
+    def create(index):
+      executor = mock.create_autospec(NailgunExecutor, spec_set=True, instance=True)
+      executor.rss_bytes.return_value = rss_bytes
+      self.created.append(index)
+      return executor
+    return create
+
+  def test_invalid_size(self):
+    with self.assertRaises(ValueError):
+      NailgunExecutorPool(0, self.executor_factory())
+
+  def test_servers_are_created_on_demand(self):
+    pool = NailgunExecutorPool(3, self.executor_factory())
+    with pool.lease() as first:
+      pass
+    with pool.lease() as second:
+      pass
+    # The most recently released server is reused.
+    self.assertIs(first, second)
+    self.assertEqual([0], self.created)
+
+  def test_concurrent_leases_are_distinct(self):
+    pool = NailgunExecutorPool(2, self.executor_factory())
+    first = pool.acquire()
+    second = pool.acquire()
+    self.assertIsNot(first, second)
+    self.assertEqual([0, 1], self.created)
+
+    # A third lease waits until a server is released.
+    leased = []
+    thread = threading.Thread(target=lambda: leased.append(pool.acquire()))
+    thread.start()
+    thread.join(0.1)
+    self.assertEqual([], leased)
+    pool.release(second)
+    thread.join()
+    self.assertEqual([second], leased)
+
+  def test_servers_above_max_rss_are_retired(self):
+    pool = NailgunExecutorPool(1, self.executor_factory(rss_bytes=2048), max_rss_bytes=1024)
+    with pool.lease() as executor:
+      pass
+    executor.terminate.assert_called_once_with()
+
+    pool = NailgunExecutorPool(1, self.executor_factory(rss_bytes=512), max_rss_bytes=1024)
+    with pool.lease() as executor:
+      pass
+    self.assertFalse(executor.terminate.called)
@@ -580,3 +580,20 @@ class TestRunnerTaskMixinXmlParsing(TestRunnerTaskMixin, TestCase):
             'time': 0.27
           }
         }, tests_info)
+
+
+class TestRunnerTaskMixinSharding(TestRunnerTaskMixin, TestCase):
+  def test_shard_by_duration(self):
+    durations = {'a': 5.0, 'b': 4.0, 'c': 3.0, 'd': 3.0, 'e': 1.0}
+    self.assertEqual([['a'], ['b', 'e'], ['c', 'd']],
+                     self.shard_by_duration(sorted(durations), 3, durations))
+
+  def test_shard_by_duration_unknown_durations(self):
+    # Unknown durations are estimated as the mean of the known ones.
+    durations = {'a': 4.0, 'b': 2.0}
+    self.assertEqual([['a'], ['b', 'c']], self.shard_by_duration(['a', 'b', 'c'], 2, durations))
+    self.assertEqual([['a', 'c'], ['b']], self.shard_by_duration(['a', 'b', 'c'], 2, {}))
+
+  def test_shard_by_duration_more_shards_than_items(self):
+    self.assertEqual([['a'], ['b']], self.shard_by_duration(['a', 'b'], 4, {}))
+    self.assertEqual([], self.shard_by_duration([], 4, {}))
@@ -0,0 +1,67 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+import unittest
+
+from pants.task.unit_result_cache import UnitResultCache
+from pants.util.contextutil import temporary_dir
+
+
+class UnitResultCacheTest(unittest.TestCase):
+  def test_key_is_stable(self):
+    self.assertEqual(UnitResultCache.key('a', 'b'), UnitResultCache.key('a', 'b'))
+
+  def test_key_delimits_components(self):
+    self.assertNotEqual(UnitResultCache.key('ab', 'c'), UnitResultCache.key('a', 'bc'))
+    self.assertNotEqual(UnitResultCache.key('a', None), UnitResultCache.key('a'))
+
+  def test_get_missing(self):
+    with temporary_dir() as root_dir:
+      self.assertIsNone(UnitResultCache(root_dir).get(UnitResultCache.key('a')))
+
+  def test_put_and_get(self):
+    with temporary_dir() as root_dir:
+      key = UnitResultCache.key('a')
+      UnitResultCache(root_dir).put(key, b'<testsuite/>')
+      # Recorded results outlive the instance that recorded them.
+      self.assertEqual(b'<testsuite/>', UnitResultCache(root_dir).get(key))
+
+  def test_put_empty(self):
+    with temporary_dir() as root_dir:
+      cache = UnitResultCache(root_dir)
+      key = UnitResultCache.key('a')
+      cache.put(key, b'')
+      self.assertEqual(b'', cache.get(key))
+
+  def test_put_replaces(self):
+    with temporary_dir() as root_dir:
+      cache = UnitResultCache(root_dir)
+      key = UnitResultCache.key('a')
+      cache.put(key, b'1')
+      cache.put(key, b'2')
+      self.assertEqual(b'2', cache.get(key))
+      # No temporary files are left behind.
+      files = [f for _, _, fs in os.walk(root_dir) for f in fs]
+      self.assertEqual(1, len(files))
+
+  def test_prune(self):
+    with temporary_dir() as root_dir:
+      cache = UnitResultCache(root_dir)
+      keys = [UnitResultCache.key(str(i)) for i in range(4)]
+      for age, key in zip([40, 30, 20, 10], keys):
+        cache.put(key, b'')
+        mtime = time.time() - age
+        os.utime(cache._path(key), (mtime, mtime))
+      # Reading the oldest report marks it as recently used.
+      cache.get(keys[0])
+      os.mkdir(os.path.join(root_dir, 'v0'))
+
+      cache.prune(2)
+      self.assertEqual([b'', None, None, b''], [cache.get(key) for key in keys])
+      self.assertEqual(['v{}'.format(UnitResultCache.VERSION)], os.listdir(root_dir))
@@ -5,6 +5,8 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import threading
+import time
 import unittest
 
 from pants.backend.jvm.tasks.jvm_compile.execution_graph import (ExecutionFailure, ExecutionGraph,
@@ -19,6 +21,13 @@ class ImmediatelyExecutingPool(object):
     work.func(*work.args_tuples[0])
 
 
+class ThreadPerWorkPool(object):
+  num_workers = 2
+
+  def submit_async_work(self, work):
+    threading.Thread(target=work.func, args=work.args_tuples[0]).start()
+
+
 class PrintLogger(object):
 
   def error(self, msg):
@@ -36,6 +45,10 @@ def raising_fn():
   raise Exception("I'm an error")
 
 
+def sleeping_fn():
+  time.sleep(0.1)
+
+
 class ExecutionGraphTest(unittest.TestCase):
 
   def setUp(self):
@@ -272,3 +285,21 @@ class ExecutionGraphTest(unittest.TestCase):
 
     self.assertEqual(self.jobs_run, ['A'])
     self.assertEqual(failures, ['A', 'B1', 'B2', 'C1', 'C2', 'E'])
+
+  def test_parallelism_of_serial_execution(self):
+    exec_graph = ExecutionGraph([self.job('A', sleeping_fn, ['B']),
+                                 self.job('B', sleeping_fn, [])])
+    self.execute(exec_graph)
+
+    self.assertEqual(1, exec_graph.max_jobs_in_flight)
+    self.assertLessEqual(exec_graph.parallelism, 1)
+    self.assertGreater(exec_graph.parallelism, 0.5)
+
+  def test_parallelism_of_concurrent_execution(self):
+    exec_graph = ExecutionGraph([self.job('A', sleeping_fn, ['B', 'C']),
+                                 self.job('B', sleeping_fn, []),
+                                 self.job('C', sleeping_fn, [])])
+    exec_graph.execute(ThreadPerWorkPool(), PrintLogger())
+
+    self.assertEqual(2, exec_graph.max_jobs_in_flight)
+    self.assertGreater(exec_graph.parallelism, 1)
@@ -17,10 +17,11 @@ import six
 from pants.util import dirutil
 from pants.util.contextutil import pushd, temporary_dir
 from pants.util.dirutil import (ExistingDirError, ExistingFileError, _mkdtemp_unregister_cleaner,
-                                absolute_symlink, fast_relpath, get_basedir, longest_dir_prefix,
-                                mergetree, read_file, relative_symlink, relativize_paths, rm_rf,
-                                safe_concurrent_creation, safe_file_dump, safe_mkdir, safe_mkdtemp,
-                                safe_open, safe_rm_oldest_items_in_dir, safe_rmtree, touch)
+                                absolute_symlink, fast_relpath, get_basedir, link_tree,
+                                longest_dir_prefix, mergetree, read_file, relative_symlink,
+                                relativize_paths, rm_rf, safe_concurrent_creation, safe_file_dump,
+                                safe_mkdir, safe_mkdtemp, safe_open, safe_rm_oldest_items_in_dir,
+                                safe_rmtree, touch)
 from pants.util.objects import datatype
 
 
@@ -233,6 +234,24 @@ class DirutilTest(unittest.TestCase):
                        self.File('b/1', contents=b'1'),
                        self.File.empty('b/2'))
 
+  def test_link_tree(self):
+    with temporary_dir() as src, temporary_dir() as dst_root:
+      safe_file_dump(os.path.join(src, 'a', 'b', '1'), '1')
+      touch(os.path.join(src, 'a', '2'))
+      safe_mkdir(os.path.join(src, 'c'))
+      dst = os.path.join(dst_root, 'dst')
+
+      link_tree(src, dst)
+
+      self.assert_tree(dst,
+                       self.Dir('a'),
+                       self.File.empty('a/2'),
+                       self.Dir('a/b'),
+                       self.File('a/b/1', contents=b'1'),
+                       self.Dir('c'))
+      self.assertTrue(os.path.samefile(os.path.join(src, 'a', 'b', '1'),
+                                       os.path.join(dst, 'a', 'b', '1')))
+
   def test_mergetree_ignore_files(self):
     with self.tree() as (src, dst):
       def ignore(root, names):
@@ -409,6 +428,16 @@ class DirutilTest(unittest.TestCase):
         self.assertFalse(os.path.exists(expected_file))
       self.assertTrue(os.path.exists(expected_file))
 
+  def test_safe_concurrent_creation_replaces_file(self):
+    with temporary_dir() as td:
+      expected_file = os.path.join(td, 'expected_file')
+      safe_file_dump(expected_file, 'old')
+      with safe_concurrent_creation(expected_file) as tmp_expected_file:
+        safe_file_dump(tmp_expected_file, 'new')
+        # The previous file is only replaced once the new one is complete.
+        self.assertEqual('old', read_file(expected_file))
+      self.assertEqual('new', read_file(expected_file))
+
   def test_safe_concurrent_creation_noop(self):
     with temporary_dir() as td:
       expected_file = os.path.join(td, 'parent_dir', 'expected_file')
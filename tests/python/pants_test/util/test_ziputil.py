@@ -0,0 +1,144 @@
+# coding=utf-8
+# Copyright 2018 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+import unittest
+import zipfile
+
+import mock
+
+from pants.util import ziputil
+from pants.util.contextutil import open_zip
+from pants.util.dirutil import safe_delete, safe_file_dump, safe_mkdtemp, safe_rmtree
+from pants.util.ziputil import read_zip_names, update_zip_from_dir
+
+
+class ZiputilTest(unittest.TestCase):
+  def setUp(self):
+    self.basedir = safe_mkdtemp()
+    self.root = os.path.join(self.basedir, 'root')
+    self.zip_path = os.path.join(self.basedir, 'z.jar')
+    self.now = time.time()
+
+  def tearDown(self):
+    safe_rmtree(self.basedir)
+
+  def write(self, relpath, content, age_secs=60):
+    path = os.path.join(self.root, relpath)
+    safe_file_dump(path, content)
+    mtime = self.now - age_secs
+    os.utime(path, (mtime, mtime))
+
+  def update(self, compression=zipfile.ZIP_STORED, secs_later=60):
+    # Files are only fingerprinted once they have not been modified for a while.
+    with mock.patch.object(ziputil.time, 'time', return_value=time.time() + secs_later):
+      update_zip_from_dir(self.zip_path, self.root, compression=compression)
+
+  def zip_contents(self):
+    with open_zip(self.zip_path) as zf:
+      self.assertIsNone(zf.testzip())
+      return {info.filename: zf.read(info) for info in zf.infolist()}
+
+  def test_zip_of_dir(self):
+    self.write('a/b/1.class', '1')
+    self.write('2.class', '2')
+    self.update()
+    self.assertEqual({'a/': '', 'a/b/': '', 'a/b/1.class': '1', '2.class': '2'},
+                     self.zip_contents())
+
+  def test_unchanged_entries_are_reused(self):
+    self.write('a/1.class', '1')
+    self.write('a/2.class', '2')
+    self.write('3.class', '3')
+    self.update()
+
+    # Changes are detected by a change to either the mtime or the size of a file.
+    self.write('a/1.class', 'X', age_secs=30)
+    self.write('a/2.class', 'changed')
+    safe_delete(os.path.join(self.root, '3.class'))
+    self.write('4.class', '4')
+    self.update()
+
+    self.assertEqual({'a/': '', 'a/1.class': 'X', 'a/2.class': 'changed', '4.class': '4'},
+                     self.zip_contents())
+
+  def test_reused_entries_are_copied_as_is(self):
+    self.write('1.class', '1' * 100)
+    self.update(compression=zipfile.ZIP_DEFLATED)
+
+    # The entry is copied from the previous zip, rather than rewritten from the file.
+    with mock.patch.object(zipfile.ZipFile, 'write') as write:
+      self.update(compression=zipfile.ZIP_DEFLATED)
+    self.assertFalse(write.called)
+    self.assertEqual({'1.class': '1' * 100}, self.zip_contents())
+
+  def test_entries_are_rewritten_without_raw_entry_support(self):
+    self.write('1.class', '1' * 100)
+    self.update(compression=zipfile.ZIP_DEFLATED)
+
+    with mock.patch.object(ziputil, '_supports_raw_entries', return_value=False):
+      self.update(compression=zipfile.ZIP_DEFLATED)
+    self.assertEqual({'1.class': '1' * 100}, self.zip_contents())
+
+  def test_recently_modified_entries_are_not_reused(self):
+    self.write('1.class', '1', age_secs=0)
+    self.update(secs_later=0)
+
+    # The file could have been modified again without any change to its stat info.
+    with mock.patch.object(ziputil, '_copy_entry') as copy_entry:
+      self.update()
+
+    self.assertFalse(copy_entry.called)
+    self.assertEqual({'1.class': '1'}, self.zip_contents())
+
+  def test_zipfile_supports_raw_entries(self):
+    # If this fails, zipfile's internals have changed, and entries are always recompressed.
+    with open_zip(self.zip_path, 'w') as zf:
+      self.assertTrue(ziputil._supports_raw_entries(zf))
+
+  def test_entries_are_not_reused_across_compressions(self):
+    self.write('1.class', '1' * 100)
+    self.update()
+    with mock.patch.object(ziputil, '_copy_entry') as copy_entry:
+      self.update(compression=zipfile.ZIP_DEFLATED)
+
+    self.assertFalse(copy_entry.called)
+    self.assertEqual({'1.class': '1' * 100}, self.zip_contents())
+
+  def test_modified_zip_is_not_reused(self):
+    self.write('1.class', '1')
+    self.update()
+    with open_zip(self.zip_path, 'a') as zf:
+      zf.writestr('extra', 'extra')
+    with mock.patch.object(ziputil, '_copy_entry') as copy_entry:
+      self.update()
+
+    self.assertFalse(copy_entry.called)
+    self.assertEqual({'1.class': '1'}, self.zip_contents())
+
+  def test_read_zip_names(self):
+    with open_zip(self.zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+      zf.comment = b'a comment'
+      zf.writestr('a/', b'')
+      zf.writestr(zipfile.ZipInfo('a/1.class'), b'1')
+      zf.writestr('é.txt', b'2')
+    self.assertEqual(['a/', 'a/1.class', 'é.txt'], read_zip_names(self.zip_path))
+
+  def test_read_zip_names_with_prefix(self):
+    with open_zip(self.zip_path, 'w') as zf:
+      zf.writestr('1.class', b'1')
+    with open(self.zip_path, 'rb') as fp:
+      content = fp.read()
+    # As with a self-executing jar.
+    safe_file_dump(self.zip_path, b'#!/bin/sh\nexec java -jar "$0"\n' + content)
+    self.assertEqual(['1.class'], read_zip_names(self.zip_path))
+
+  def test_read_zip_names_of_non_zip(self):
+    safe_file_dump(self.zip_path, b'not a zip')
+    with self.assertRaises(zipfile.BadZipfile):
+      read_zip_names(self.zip_path)